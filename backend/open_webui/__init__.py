@@ -92,5 +92,16 @@ def dev(
     )
 
 
+@app.command()
+def backfill_chat_search(batch_size: int = 500):
+    """
+    Copy the messages of chats created before the chat search index into it.
+    """
+    from open_webui.models.chats import Chats
+
+    count = Chats.backfill_messages(batch_size=batch_size)
+    typer.echo(f"Backfilled the messages of {count} chats")
+
+
 if __name__ == "__main__":
     app()
@@ -1727,6 +1727,35 @@ DOCUMENT_INTELLIGENCE_KEY = PersistentConfig(
     os.getenv("DOCUMENT_INTELLIGENCE_KEY", ""),
 )
 
+# Local extractors (PyPDF, docx2txt, Unstructured, ...) run in a pool of
+# CONTENT_EXTRACTION_WORKERS processes, 0 runs them in the request thread. A
+# file is given CONTENT_EXTRACTION_TIMEOUT seconds, a worker at most
+# CONTENT_EXTRACTION_MAX_MEMORY MB (0 for no limit), and PDFs are loaded
+# PDF_PAGES_PER_TASK pages per task (0 loads the whole file in one task).
+try:
+    CONTENT_EXTRACTION_WORKERS = int(os.environ.get("CONTENT_EXTRACTION_WORKERS", "0"))
+except ValueError:
+    CONTENT_EXTRACTION_WORKERS = 0
+
+try:
+    CONTENT_EXTRACTION_TIMEOUT = int(
+        os.environ.get("CONTENT_EXTRACTION_TIMEOUT", "300")
+    )
+except ValueError:
+    CONTENT_EXTRACTION_TIMEOUT = 300
+
+try:
+    CONTENT_EXTRACTION_MAX_MEMORY = int(
+        os.environ.get("CONTENT_EXTRACTION_MAX_MEMORY", "2048")
+    )
+except ValueError:
+    CONTENT_EXTRACTION_MAX_MEMORY = 2048
+
+try:
+    PDF_PAGES_PER_TASK = int(os.environ.get("PDF_PAGES_PER_TASK", "50"))
+except ValueError:
+    PDF_PAGES_PER_TASK = 50
+
 
 BYPASS_EMBEDDING_AND_RETRIEVAL = PersistentConfig(
     "BYPASS_EMBEDDING_AND_RETRIEVAL",
@@ -1824,6 +1853,43 @@ RAG_EMBEDDING_BATCH_SIZE = PersistentConfig(
     ),
 )
 
+# Batches of OpenAI and Ollama embeddings are sent RAG_EMBEDDING_CONCURRENCY at a
+# time and hold at most RAG_EMBEDDING_BATCH_MAX_TOKENS (estimated) tokens each.
+try:
+    RAG_EMBEDDING_CONCURRENCY = int(os.environ.get("RAG_EMBEDDING_CONCURRENCY", "4"))
+except ValueError:
+    RAG_EMBEDDING_CONCURRENCY = 4
+
+try:
+    RAG_EMBEDDING_BATCH_MAX_TOKENS = int(
+        os.environ.get("RAG_EMBEDDING_BATCH_MAX_TOKENS", "32000")
+    )
+except ValueError:
+    RAG_EMBEDDING_BATCH_MAX_TOKENS = 32000
+
+try:
+    RAG_EMBEDDING_MAX_RETRIES = int(os.environ.get("RAG_EMBEDDING_MAX_RETRIES", "3"))
+except ValueError:
+    RAG_EMBEDDING_MAX_RETRIES = 3
+
+# Embeddings are cached by engine, model, URL, prefix and text: "local" keeps
+# them in a SQLite file under CACHE_DIR, "redis" in REDIS_URL. Disabled ("")
+# by default, as each embedding then costs a cache read (and write on a miss).
+RAG_EMBEDDING_CACHE = os.environ.get("RAG_EMBEDDING_CACHE", "").lower()
+
+try:
+    RAG_EMBEDDING_CACHE_MAX_ENTRIES = int(
+        os.environ.get("RAG_EMBEDDING_CACHE_MAX_ENTRIES", "100000")
+    )
+except ValueError:
+    RAG_EMBEDDING_CACHE_MAX_ENTRIES = 100000
+
+# Seconds a cached embedding is kept in Redis, which bounds it by time not count
+try:
+    RAG_EMBEDDING_CACHE_TTL = int(os.environ.get("RAG_EMBEDDING_CACHE_TTL", "604800"))
+except ValueError:
+    RAG_EMBEDDING_CACHE_TTL = 604800
+
 RAG_EMBEDDING_QUERY_PREFIX = os.environ.get("RAG_EMBEDDING_QUERY_PREFIX", None)
 
 RAG_EMBEDDING_CONTENT_PREFIX = os.environ.get("RAG_EMBEDDING_CONTENT_PREFIX", None)
@@ -1849,6 +1915,12 @@ RAG_RERANKING_MODEL_TRUST_REMOTE_CODE = (
     os.environ.get("RAG_RERANKING_MODEL_TRUST_REMOTE_CODE", "True").lower() == "true"
 )
 
+# Number of (query, document) pairs scored per call of the reranking model
+try:
+    RAG_RERANKING_BATCH_SIZE = int(os.environ.get("RAG_RERANKING_BATCH_SIZE", "32"))
+except ValueError:
+    RAG_RERANKING_BATCH_SIZE = 32
+
 
 RAG_TEXT_SPLITTER = PersistentConfig(
     "RAG_TEXT_SPLITTER",
@@ -310,6 +310,15 @@ else:
     except Exception:
         DATABASE_POOL_RECYCLE = 3600
 
+# Serve hot read paths from an async engine (aiosqlite / asyncpg) instead of
+# the synchronous engine, which otherwise runs in the threadpool
+ENABLE_ASYNC_DATABASE = (
+    os.environ.get("ENABLE_ASYNC_DATABASE", "False").lower() == "true"
+)
+
+# Defaults to DATABASE_URL with its async driver
+DATABASE_ASYNC_URL = os.environ.get("DATABASE_ASYNC_URL", "")
+
 RESET_CONFIG_ON_START = (
     os.environ.get("RESET_CONFIG_ON_START", "False").lower() == "true"
 )
@@ -318,6 +327,52 @@ ENABLE_REALTIME_CHAT_SAVE = (
     os.environ.get("ENABLE_REALTIME_CHAT_SAVE", "False").lower() == "true"
 )
 
+# Streamed content is buffered and written at most every interval (seconds),
+# or earlier once the buffered content grew by more than the given bytes.
+REALTIME_CHAT_SAVE_INTERVAL = os.environ.get("REALTIME_CHAT_SAVE_INTERVAL", "1")
+
+try:
+    REALTIME_CHAT_SAVE_INTERVAL = float(REALTIME_CHAT_SAVE_INTERVAL)
+except Exception:
+    REALTIME_CHAT_SAVE_INTERVAL = 1.0
+
+REALTIME_CHAT_SAVE_MAX_BYTES = os.environ.get("REALTIME_CHAT_SAVE_MAX_BYTES", "4096")
+
+try:
+    REALTIME_CHAT_SAVE_MAX_BYTES = int(REALTIME_CHAT_SAVE_MAX_BYTES)
+except Exception:
+    REALTIME_CHAT_SAVE_MAX_BYTES = 4096
+
+# Seconds an authenticated user is served from memory before it is reloaded,
+# 0 loads the user from the database on every request
+USER_CACHE_TTL = os.environ.get("USER_CACHE_TTL", "5")
+
+try:
+    USER_CACHE_TTL = float(USER_CACHE_TTL)
+except Exception:
+    USER_CACHE_TTL = 5.0
+
+# Seconds a resolved permission tree is served from memory. Invalidations
+# reach other workers through Redis, this bounds how long a worker that missed
+# one (or runs without Redis) keeps serving the old tree
+PERMISSION_CACHE_TTL = os.environ.get("PERMISSION_CACHE_TTL", "5")
+
+try:
+    PERMISSION_CACHE_TTL = float(PERMISSION_CACHE_TTL)
+except Exception:
+    PERMISSION_CACHE_TTL = 5.0
+
+# Last active timestamps are collected and written in one bulk update every
+# interval (seconds), 0 writes them on every request
+USER_LAST_ACTIVE_FLUSH_INTERVAL = os.environ.get(
+    "USER_LAST_ACTIVE_FLUSH_INTERVAL", "10"
+)
+
+try:
+    USER_LAST_ACTIVE_FLUSH_INTERVAL = float(USER_LAST_ACTIVE_FLUSH_INTERVAL)
+except Exception:
+    USER_LAST_ACTIVE_FLUSH_INTERVAL = 10.0
+
 ####################################
 # REDIS
 ####################################
@@ -385,6 +440,61 @@ WEBSOCKET_SENTINEL_HOSTS = os.environ.get("WEBSOCKET_SENTINEL_HOSTS", "")
 
 WEBSOCKET_SENTINEL_PORT = os.environ.get("WEBSOCKET_SENTINEL_PORT", "26379")
 
+# Streamed content of a message is emitted at most every interval (seconds),
+# or earlier once it grew by more than the given bytes. 0 emits every delta.
+WEBSOCKET_EVENT_BATCH_INTERVAL = os.environ.get(
+    "WEBSOCKET_EVENT_BATCH_INTERVAL", "0.04"
+)
+
+try:
+    WEBSOCKET_EVENT_BATCH_INTERVAL = float(WEBSOCKET_EVENT_BATCH_INTERVAL)
+except Exception:
+    WEBSOCKET_EVENT_BATCH_INTERVAL = 0.04
+
+WEBSOCKET_EVENT_BATCH_MAX_BYTES = os.environ.get(
+    "WEBSOCKET_EVENT_BATCH_MAX_BYTES", "4096"
+)
+
+try:
+    WEBSOCKET_EVENT_BATCH_MAX_BYTES = int(WEBSOCKET_EVENT_BATCH_MAX_BYTES)
+except Exception:
+    WEBSOCKET_EVENT_BATCH_MAX_BYTES = 4096
+
+####################################
+# INGESTION
+####################################
+
+# Uploads and knowledge batch adds return right away and are processed by
+# ingestion workers, unless a request asks otherwise with `?background=`
+ENABLE_BACKGROUND_INGESTION = (
+    os.environ.get("ENABLE_BACKGROUND_INGESTION", "False").lower() == "true"
+)
+
+# "redis" shares the queue between nodes through REDIS_URL, so nodes with
+# INGESTION_WORKERS=0 only enqueue jobs
+INGESTION_JOB_QUEUE = os.environ.get("INGESTION_JOB_QUEUE", "")
+
+INGESTION_WORKERS = os.environ.get("INGESTION_WORKERS", "2")
+
+try:
+    INGESTION_WORKERS = int(INGESTION_WORKERS)
+except Exception:
+    INGESTION_WORKERS = 2
+
+INGESTION_JOB_MAX_PER_USER = os.environ.get("INGESTION_JOB_MAX_PER_USER", "2")
+
+try:
+    INGESTION_JOB_MAX_PER_USER = int(INGESTION_JOB_MAX_PER_USER)
+except Exception:
+    INGESTION_JOB_MAX_PER_USER = 2
+
+INGESTION_JOB_MAX_RETRIES = os.environ.get("INGESTION_JOB_MAX_RETRIES", "2")
+
+try:
+    INGESTION_JOB_MAX_RETRIES = int(INGESTION_JOB_MAX_RETRIES)
+except Exception:
+    INGESTION_JOB_MAX_RETRIES = 2
+
 AIOHTTP_CLIENT_TIMEOUT = os.environ.get("AIOHTTP_CLIENT_TIMEOUT", "")
 
 if AIOHTTP_CLIENT_TIMEOUT == "":
@@ -408,6 +518,68 @@ else:
     except Exception:
         AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST = 10
 
+# Seconds the merged model list is served before it is refreshed in the
+# background, 0 rebuilds it on every request
+MODELS_REFRESH_INTERVAL = os.environ.get("MODELS_REFRESH_INTERVAL", "10")
+
+try:
+    MODELS_REFRESH_INTERVAL = float(MODELS_REFRESH_INTERVAL)
+except Exception:
+    MODELS_REFRESH_INTERVAL = 10.0
+
+# Connection pooling for the shared upstream (OpenAI / Ollama) client sessions
+AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST = os.environ.get(
+    "AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST", "0"
+)
+
+try:
+    AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST = int(AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST)
+except Exception:
+    AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST = 0
+
+AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT = os.environ.get(
+    "AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT", "30"
+)
+
+try:
+    AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT = float(AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT)
+except Exception:
+    AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT = 30.0
+
+AIOHTTP_CLIENT_DNS_CACHE_TTL = os.environ.get("AIOHTTP_CLIENT_DNS_CACHE_TTL", "300")
+
+try:
+    AIOHTTP_CLIENT_DNS_CACHE_TTL = int(AIOHTTP_CLIENT_DNS_CACHE_TTL)
+except Exception:
+    AIOHTTP_CLIENT_DNS_CACHE_TTL = 300
+
+####################################
+# OLLAMA LOAD BALANCING
+####################################
+
+# One of: random, least_outstanding, ewma, weighted
+OLLAMA_LOAD_BALANCING_MODE = (
+    os.environ.get("OLLAMA_LOAD_BALANCING_MODE", "random").strip().lower()
+)
+
+OLLAMA_SESSION_AFFINITY = (
+    os.environ.get("OLLAMA_SESSION_AFFINITY", "False").lower() == "true"
+)
+
+OLLAMA_BACKEND_EJECT_FAILURES = os.environ.get("OLLAMA_BACKEND_EJECT_FAILURES", "3")
+
+try:
+    OLLAMA_BACKEND_EJECT_FAILURES = int(OLLAMA_BACKEND_EJECT_FAILURES)
+except Exception:
+    OLLAMA_BACKEND_EJECT_FAILURES = 3
+
+OLLAMA_BACKEND_EJECT_SECONDS = os.environ.get("OLLAMA_BACKEND_EJECT_SECONDS", "30")
+
+try:
+    OLLAMA_BACKEND_EJECT_SECONDS = float(OLLAMA_BACKEND_EJECT_SECONDS)
+except Exception:
+    OLLAMA_BACKEND_EJECT_SECONDS = 30.0
+
 ####################################
 # OFFLINE_MODE
 ####################################
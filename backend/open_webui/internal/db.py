@@ -1,7 +1,8 @@
+import functools
 import json
 import logging
-from contextlib import contextmanager
-from typing import Any, Optional
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Callable, Optional
 
 from open_webui.internal.wrappers import register_connection
 from open_webui.env import (
@@ -13,13 +14,18 @@ from open_webui.env import (
     DATABASE_POOL_RECYCLE,
     DATABASE_POOL_SIZE,
     DATABASE_POOL_TIMEOUT,
+    ENABLE_ASYNC_DATABASE,
+    DATABASE_ASYNC_URL,
 )
 from peewee_migrate import Router
 from sqlalchemy import Dialect, create_engine, MetaData, types
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.pool import QueuePool, NullPool
 from sqlalchemy.sql.type_api import _T
+from starlette.concurrency import run_in_threadpool
 from typing_extensions import Self
 
 log = logging.getLogger(__name__)
@@ -114,3 +120,107 @@ def get_session():
 
 
 get_db = contextmanager(get_session)
+
+
+def insert_or_ignore(db, model, rows: list[dict], batch_size: int = 100) -> int:
+    """
+    Inserts `rows` into the table of `model` as part of `db`'s transaction,
+    skipping the rows whose primary key is already taken (by a concurrent
+    writer, for instance). Returns the number of rows inserted.
+    """
+    if not rows:
+        return 0
+
+    dialect_name = db.bind.dialect.name
+    if dialect_name in ("sqlite", "postgresql"):
+        if dialect_name == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+
+        count = 0
+        for i in range(0, len(rows), batch_size):
+            result = db.execute(
+                insert(model).values(rows[i : i + batch_size]).on_conflict_do_nothing()
+            )
+            count += result.rowcount
+        return count
+
+    # Without ON CONFLICT, each row is inserted in a savepoint of its own
+    count = 0
+    for row in rows:
+        try:
+            with db.begin_nested():
+                db.add(model(**row))
+            count += 1
+        except IntegrityError:
+            pass
+    return count
+
+
+def get_async_database_url(url: str) -> Optional[str]:
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    if url.startswith("postgresql://") or url.startswith("postgresql+psycopg2://"):
+        return "postgresql+asyncpg://" + url.split("://", 1)[1]
+    return None
+
+
+async_engine = None
+AsyncSessionLocal = None
+
+if ENABLE_ASYNC_DATABASE:
+    SQLALCHEMY_ASYNC_DATABASE_URL = DATABASE_ASYNC_URL or get_async_database_url(
+        SQLALCHEMY_DATABASE_URL
+    )
+
+    try:
+        if SQLALCHEMY_ASYNC_DATABASE_URL is None:
+            raise ValueError("no async driver known for DATABASE_URL")
+
+        if "sqlite" in SQLALCHEMY_ASYNC_DATABASE_URL:
+            async_engine = create_async_engine(SQLALCHEMY_ASYNC_DATABASE_URL)
+        elif DATABASE_POOL_SIZE > 0:
+            async_engine = create_async_engine(
+                SQLALCHEMY_ASYNC_DATABASE_URL,
+                pool_size=DATABASE_POOL_SIZE,
+                max_overflow=DATABASE_POOL_MAX_OVERFLOW,
+                pool_timeout=DATABASE_POOL_TIMEOUT,
+                pool_recycle=DATABASE_POOL_RECYCLE,
+                pool_pre_ping=True,
+            )
+        else:
+            async_engine = create_async_engine(
+                SQLALCHEMY_ASYNC_DATABASE_URL, pool_pre_ping=True, poolclass=NullPool
+            )
+
+        AsyncSessionLocal = async_sessionmaker(
+            bind=async_engine, autoflush=False, expire_on_commit=False
+        )
+    except Exception as e:
+        log.error(f"Failed to initialize the async database engine: {e}")
+        async_engine = None
+
+
+@asynccontextmanager
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def sync_fallback(sync_method: Callable):
+    """
+    Decorates an async table method. Without the async engine, `sync_method`
+    runs in the threadpool instead, so callers never block the event loop.
+    """
+
+    def decorator(method):
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            if async_engine is None:
+                return await run_in_threadpool(sync_method, *args, **kwargs)
+            return await method(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -50,6 +50,7 @@ from open_webui.utils.audit import AuditLevel, AuditLoggingMiddleware
 from open_webui.utils.logger import start_logger
 from open_webui.socket.main import (
     app as socket_app,
+    emit_to_user,
     periodic_usage_pool_cleanup,
 )
 from open_webui.routers import (
@@ -351,7 +352,7 @@ from open_webui.utils.chat import (
     chat_action as chat_action_handler,
 )
 from open_webui.utils.middleware import process_chat_payload, process_chat_response
-from open_webui.utils.access_control import has_access
+from open_webui.utils.access_control import get_user_group_ids, has_access
 
 from open_webui.utils.auth import (
     get_license_data,
@@ -361,6 +362,11 @@ from open_webui.utils.auth import (
 )
 from open_webui.utils.oauth import OAuthManager
 from open_webui.utils.security_headers import SecurityHeadersMiddleware
+from open_webui.utils.session_pool import SESSION_POOL
+from open_webui.retrieval.embedding_client import EMBEDDING_CLIENT
+from open_webui.retrieval.loaders.main import LOADER_PROCESS_POOL
+from open_webui.utils.ingestion import INGESTION_WORKER_POOL
+from open_webui.utils.user_cache import LAST_ACTIVE_BUFFER
 
 from open_webui.tasks import stop_task, list_tasks  # Import from tasks.py
 
@@ -418,8 +424,24 @@ async def lifespan(app: FastAPI):
         get_license_data(app, LICENSE_KEY)
 
     asyncio.create_task(periodic_usage_pool_cleanup())
+    last_active_task = asyncio.create_task(LAST_ACTIVE_BUFFER.run())
+    await INGESTION_WORKER_POOL.start(app, emit_to_user)
     yield
 
+    # Write the last active timestamps collected since the last flush
+    last_active_task.cancel()
+    LAST_ACTIVE_BUFFER.flush()
+
+    # Interrupted jobs are queued again once their heartbeat is stale
+    await INGESTION_WORKER_POOL.stop()
+
+    # Close the pooled upstream (OpenAI / Ollama) connections
+    await SESSION_POOL.close()
+    await EMBEDDING_CLIENT.close()
+
+    # Stop the content extraction worker processes
+    LOADER_PROCESS_POOL.shutdown()
+
 
 app = FastAPI(
     docs_url="/docs" if ENV == "dev" else None,
@@ -958,6 +980,15 @@ if audit_level != AuditLevel.NONE:
 @app.get("/api/models")
 async def get_models(request: Request, user=Depends(get_verified_user)):
     def get_filtered_models(models, user):
+        # Load the user's groups and the access control of all models once,
+        # instead of querying both for every model
+        user_group_ids = get_user_group_ids(user.id)
+        accessible_model_ids = Models.get_accessible_model_ids(
+            user.id,
+            [model["id"] for model in models if not model.get("arena")],
+            user_group_ids=user_group_ids,
+        )
+
         filtered_models = []
         for model in models:
             if model.get("arena"):
@@ -967,16 +998,13 @@ async def get_models(request: Request, user=Depends(get_verified_user)):
                     access_control=model.get("info", {})
                     .get("meta", {})
                     .get("access_control", {}),
+                    user_group_ids=user_group_ids,
                 ):
                     filtered_models.append(model)
                 continue
 
-            model_info = Models.get_model_by_id(model["id"])
-            if model_info:
-                if user.id == model_info.user_id or has_access(
-                    user.id, type="read", access_control=model_info.access_control
-                ):
-                    filtered_models.append(model)
+            if model["id"] in accessible_model_ids:
+                filtered_models.append(model)
 
         return filtered_models
 
@@ -0,0 +1,43 @@
+"""Add chat_message table
+
+Revision ID: 9f0c9cd09105
+Revises: 3781e22d8b01
+Create Date: 2025-03-01 00:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "9f0c9cd09105"
+down_revision = "3781e22d8b01"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Messages are backfilled lazily from `chat.chat.history.messages` on the
+    # first per-message access, so no data migration happens here.
+    op.create_table(
+        "chat_message",
+        sa.Column("id", sa.Text(), nullable=False),  # Message ID (unique per chat)
+        sa.Column("chat_id", sa.Text(), nullable=False),  # Owning chat
+        sa.Column("parent_id", sa.Text(), nullable=True),  # Parent message ID
+        sa.Column("role", sa.Text(), nullable=True),
+        sa.Column("content", sa.Text(), nullable=True),
+        sa.Column("meta", sa.JSON(), nullable=True),  # Remaining message fields
+        sa.Column("created_at", sa.BigInteger(), nullable=True),
+        sa.Column("updated_at", sa.BigInteger(), nullable=True),
+        sa.PrimaryKeyConstraint("chat_id", "id", name="pk_chat_id_id"),
+    )
+
+    op.create_index(
+        "chat_message_chat_id_updated_at_idx",
+        "chat_message",
+        ["chat_id", "updated_at"],
+    )
+
+
+def downgrade():
+    op.drop_index("chat_message_chat_id_updated_at_idx", table_name="chat_message")
+    op.drop_table("chat_message")
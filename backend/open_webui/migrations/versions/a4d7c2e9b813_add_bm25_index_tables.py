@@ -0,0 +1,64 @@
+"""Add BM25 index tables
+
+Revision ID: a4d7c2e9b813
+Revises: f1b6d2a94c37
+Create Date: 2025-03-30 00:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "a4d7c2e9b813"
+down_revision = "f1b6d2a94c37"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Collections are indexed on their first hybrid search, nothing to backfill
+    op.create_table(
+        "bm25_collection",
+        sa.Column("name", sa.Text(), primary_key=True),
+        sa.Column("doc_count", sa.BigInteger(), nullable=True),
+        sa.Column("total_length", sa.BigInteger(), nullable=True),
+        sa.Column("created_at", sa.BigInteger(), nullable=True),
+        sa.Column("updated_at", sa.BigInteger(), nullable=True),
+    )
+
+    op.create_table(
+        "bm25_document",
+        sa.Column("collection_name", sa.Text(), nullable=False),
+        sa.Column("id", sa.Text(), nullable=False),
+        sa.Column("file_id", sa.Text(), nullable=True),
+        sa.Column("length", sa.Integer(), nullable=True),
+        sa.Column("text", sa.Text(), nullable=True),
+        sa.Column("meta", sa.JSON(), nullable=True),
+        sa.PrimaryKeyConstraint("collection_name", "id", name="pk_collection_name_id"),
+    )
+    op.create_index(
+        "bm25_document_collection_name_file_id_idx",
+        "bm25_document",
+        ["collection_name", "file_id"],
+    )
+
+    op.create_table(
+        "bm25_posting",
+        sa.Column("collection_name", sa.Text(), nullable=False),
+        sa.Column("term", sa.Text(), nullable=False),
+        sa.Column("document_id", sa.Text(), nullable=False),
+        sa.Column("tf", sa.Integer(), nullable=True),
+        sa.Column("length", sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint(
+            "collection_name", "term", "document_id", name="pk_collection_name_term_id"
+        ),
+    )
+
+
+def downgrade():
+    op.drop_table("bm25_posting")
+    op.drop_index(
+        "bm25_document_collection_name_file_id_idx", table_name="bm25_document"
+    )
+    op.drop_table("bm25_document")
+    op.drop_table("bm25_collection")
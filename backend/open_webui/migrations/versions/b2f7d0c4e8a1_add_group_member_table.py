@@ -0,0 +1,60 @@
+"""Add group_member table
+
+Revision ID: b2f7d0c4e8a1
+Revises: 9f0c9cd09105
+Create Date: 2025-03-02 00:00:00.000000
+
+"""
+
+import json
+import time
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.sql import table, column, select
+
+revision = "b2f7d0c4e8a1"
+down_revision = "9f0c9cd09105"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    group_member_table = op.create_table(
+        "group_member",
+        sa.Column("group_id", sa.Text(), nullable=False),
+        sa.Column("user_id", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.BigInteger(), nullable=True),
+        sa.PrimaryKeyConstraint("group_id", "user_id", name="pk_group_id_user_id"),
+    )
+
+    op.create_index("group_member_user_id_idx", "group_member", ["user_id"])
+
+    # Backfill memberships from the JSON `group.user_ids` column
+    group_table = table(
+        "group",
+        column("id", sa.Text()),
+        column("user_ids", sa.JSON()),
+    )
+
+    now = int(time.time())
+    rows = []
+    for group in op.get_bind().execute(
+        select(group_table.c.id, group_table.c.user_ids)
+    ):
+        user_ids = group.user_ids or []
+        if isinstance(user_ids, str):
+            user_ids = json.loads(user_ids)
+
+        rows.extend(
+            {"group_id": group.id, "user_id": user_id, "created_at": now}
+            for user_id in dict.fromkeys(user_ids)
+        )
+
+    if rows:
+        op.bulk_insert(group_member_table, rows)
+
+
+def downgrade():
+    op.drop_index("group_member_user_id_idx", table_name="group_member")
+    op.drop_table("group_member")
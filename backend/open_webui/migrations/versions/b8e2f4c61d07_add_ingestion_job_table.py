@@ -0,0 +1,50 @@
+"""Add ingestion_job table
+
+Revision ID: b8e2f4c61d07
+Revises: a4d7c2e9b813
+Create Date: 2025-04-02 00:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "b8e2f4c61d07"
+down_revision = "a4d7c2e9b813"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "ingestion_job",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("user_id", sa.String(), nullable=True),
+        sa.Column("type", sa.Text(), nullable=True),
+        sa.Column("status", sa.Text(), nullable=True),
+        sa.Column("stage", sa.Text(), nullable=True),
+        sa.Column("progress", sa.Float(), nullable=True),
+        sa.Column("attempts", sa.Integer(), nullable=True),
+        sa.Column("data", sa.JSON(), nullable=True),
+        sa.Column("state", sa.JSON(), nullable=True),
+        sa.Column("result", sa.JSON(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.BigInteger(), nullable=True),
+        sa.Column("updated_at", sa.BigInteger(), nullable=True),
+    )
+    op.create_index(
+        "ingestion_job_user_id_created_at_idx",
+        "ingestion_job",
+        ["user_id", "created_at"],
+    )
+    op.create_index(
+        "ingestion_job_status_updated_at_idx",
+        "ingestion_job",
+        ["status", "updated_at"],
+    )
+
+
+def downgrade():
+    op.drop_index("ingestion_job_status_updated_at_idx", table_name="ingestion_job")
+    op.drop_index("ingestion_job_user_id_created_at_idx", table_name="ingestion_job")
+    op.drop_table("ingestion_job")
@@ -0,0 +1,25 @@
+"""Add chat.current_message_id column
+
+Revision ID: c5a1e7d39f24
+Revises: b8e2f4c61d07
+Create Date: 2025-04-05 00:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "c5a1e7d39f24"
+down_revision = "b8e2f4c61d07"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Empty for existing chats, which keep the `history.currentId` of their
+    # last full save until a message is written to `chat_message`
+    op.add_column("chat", sa.Column("current_message_id", sa.Text(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("chat", "current_message_id")
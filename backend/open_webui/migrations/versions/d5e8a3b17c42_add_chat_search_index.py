@@ -0,0 +1,141 @@
+"""Add chat search index
+
+Revision ID: d5e8a3b17c42
+Revises: b2f7d0c4e8a1
+Create Date: 2025-03-09 00:00:00.000000
+
+"""
+
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+log = logging.getLogger(__name__)
+
+revision = "d5e8a3b17c42"
+down_revision = "b2f7d0c4e8a1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect_name = op.get_bind().dialect.name
+
+    if dialect_name == "sqlite":
+        # `chat_message` has no INTEGER PRIMARY KEY, so its rowids are not
+        # stable (VACUUM may renumber them). The FTS rows are keyed by a
+        # separate table with stable ids instead.
+        op.execute(
+            """
+            CREATE TABLE chat_message_fts_key (
+                id INTEGER PRIMARY KEY,
+                chat_id TEXT NOT NULL,
+                message_id TEXT NOT NULL,
+                UNIQUE (chat_id, message_id)
+            )
+            """
+        )
+        # The trigram tokenizer matches arbitrary substrings (case-insensitive)
+        op.execute(
+            """
+            CREATE VIRTUAL TABLE chat_message_fts USING fts5(
+                chat_id UNINDEXED, content, tokenize = 'trigram'
+            )
+            """
+        )
+
+        op.execute(
+            """
+            CREATE TRIGGER chat_message_fts_insert AFTER INSERT ON chat_message
+            BEGIN
+                INSERT OR IGNORE INTO chat_message_fts_key (chat_id, message_id)
+                VALUES (new.chat_id, new.id);
+                INSERT INTO chat_message_fts (rowid, chat_id, content)
+                SELECT id, new.chat_id, new.content FROM chat_message_fts_key
+                WHERE chat_id = new.chat_id AND message_id = new.id;
+            END
+            """
+        )
+        op.execute(
+            """
+            CREATE TRIGGER chat_message_fts_update AFTER UPDATE OF content ON chat_message
+            BEGIN
+                DELETE FROM chat_message_fts WHERE rowid = (
+                    SELECT id FROM chat_message_fts_key
+                    WHERE chat_id = old.chat_id AND message_id = old.id
+                );
+                INSERT INTO chat_message_fts (rowid, chat_id, content)
+                SELECT id, new.chat_id, new.content FROM chat_message_fts_key
+                WHERE chat_id = new.chat_id AND message_id = new.id;
+            END
+            """
+        )
+        op.execute(
+            """
+            CREATE TRIGGER chat_message_fts_delete AFTER DELETE ON chat_message
+            BEGIN
+                DELETE FROM chat_message_fts WHERE rowid = (
+                    SELECT id FROM chat_message_fts_key
+                    WHERE chat_id = old.chat_id AND message_id = old.id
+                );
+                DELETE FROM chat_message_fts_key
+                WHERE chat_id = old.chat_id AND message_id = old.id;
+            END
+            """
+        )
+
+        # Index the messages that are already stored
+        op.execute(
+            """
+            INSERT INTO chat_message_fts_key (chat_id, message_id)
+            SELECT chat_id, id FROM chat_message
+            """
+        )
+        op.execute(
+            """
+            INSERT INTO chat_message_fts (rowid, chat_id, content)
+            SELECT chat_message_fts_key.id, chat_message.chat_id, chat_message.content
+            FROM chat_message JOIN chat_message_fts_key
+            ON chat_message_fts_key.chat_id = chat_message.chat_id
+            AND chat_message_fts_key.message_id = chat_message.id
+            """
+        )
+
+    elif dialect_name == "postgresql":
+        op.execute(
+            """
+            CREATE INDEX chat_message_content_tsv_idx ON chat_message
+            USING GIN (to_tsvector('simple', coalesce(content, '')))
+            """
+        )
+
+        # Substring (ILIKE) matches need pg_trgm, which may not be allowed
+        # to be installed; search still works without it, just unindexed.
+        connection = op.get_bind()
+        try:
+            with connection.begin_nested():
+                connection.execute(sa.text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+                connection.execute(
+                    sa.text(
+                        "CREATE INDEX chat_message_content_trgm_idx ON chat_message "
+                        "USING GIN (content gin_trgm_ops)"
+                    )
+                )
+        except Exception as e:
+            log.warning(f"Skipping trigram index on chat_message.content: {e}")
+
+
+def downgrade():
+    dialect_name = op.get_bind().dialect.name
+
+    if dialect_name == "sqlite":
+        op.execute("DROP TRIGGER IF EXISTS chat_message_fts_insert")
+        op.execute("DROP TRIGGER IF EXISTS chat_message_fts_update")
+        op.execute("DROP TRIGGER IF EXISTS chat_message_fts_delete")
+        op.execute("DROP TABLE IF EXISTS chat_message_fts")
+        op.execute("DROP TABLE IF EXISTS chat_message_fts_key")
+
+    elif dialect_name == "postgresql":
+        op.execute("DROP INDEX IF EXISTS chat_message_content_trgm_idx")
+        op.execute("DROP INDEX IF EXISTS chat_message_content_tsv_idx")
@@ -0,0 +1,25 @@
+"""Add ingestion_job.run_after column
+
+Revision ID: d7f3b2a8c915
+Revises: c5a1e7d39f24
+Create Date: 2025-04-06 00:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "d7f3b2a8c915"
+down_revision = "c5a1e7d39f24"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "ingestion_job", sa.Column("run_after", sa.BigInteger(), nullable=True)
+    )
+
+
+def downgrade():
+    op.drop_column("ingestion_job", "run_after")
@@ -0,0 +1,65 @@
+"""Add chat_tag table
+
+Revision ID: e3a9c5f17b20
+Revises: d5e8a3b17c42
+Create Date: 2025-03-16 00:00:00.000000
+
+"""
+
+import json
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.sql import table, column, select
+
+revision = "e3a9c5f17b20"
+down_revision = "d5e8a3b17c42"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    chat_tag_table = op.create_table(
+        "chat_tag",
+        sa.Column("chat_id", sa.String(), nullable=False),
+        sa.Column("user_id", sa.String(), nullable=False),
+        sa.Column("tag_id", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("chat_id", "tag_id", name="pk_chat_id_tag_id"),
+    )
+    op.create_index("chat_tag_user_id_tag_id_idx", "chat_tag", ["user_id", "tag_id"])
+
+    # Backfill from the JSON `chat.meta.tags` column, shared copies of chats
+    # are never looked up by tag
+    chat_table = table(
+        "chat",
+        column("id", sa.String()),
+        column("user_id", sa.String()),
+        column("meta", sa.JSON()),
+    )
+
+    rows = []
+    for chat in op.get_bind().execute(
+        select(chat_table.c.id, chat_table.c.user_id, chat_table.c.meta).where(
+            ~chat_table.c.user_id.startswith("shared-")
+        )
+    ):
+        meta = chat.meta or {}
+        if isinstance(meta, str):
+            meta = json.loads(meta)
+
+        rows.extend(
+            {"chat_id": chat.id, "user_id": chat.user_id, "tag_id": tag_id}
+            for tag_id in dict.fromkeys(meta.get("tags", []))
+        )
+
+        if len(rows) >= 1000:
+            op.bulk_insert(chat_tag_table, rows)
+            rows = []
+
+    if rows:
+        op.bulk_insert(chat_tag_table, rows)
+
+
+def downgrade():
+    op.drop_index("chat_tag_user_id_tag_id_idx", table_name="chat_tag")
+    op.drop_table("chat_tag")
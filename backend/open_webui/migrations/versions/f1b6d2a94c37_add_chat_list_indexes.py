@@ -0,0 +1,34 @@
+"""Add chat list indexes
+
+Revision ID: f1b6d2a94c37
+Revises: e3a9c5f17b20
+Create Date: 2025-03-23 00:00:00.000000
+
+"""
+
+from alembic import op
+
+revision = "f1b6d2a94c37"
+down_revision = "e3a9c5f17b20"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Chat lists filter by user, archived/pinned or folder and are ordered by
+    # most recently updated first
+    op.create_index(
+        "chat_user_id_archived_pinned_updated_at_idx",
+        "chat",
+        ["user_id", "archived", "pinned", "updated_at"],
+    )
+    op.create_index(
+        "chat_user_id_folder_id_updated_at_idx",
+        "chat",
+        ["user_id", "folder_id", "updated_at"],
+    )
+
+
+def downgrade():
+    op.drop_index("chat_user_id_folder_id_updated_at_idx", table_name="chat")
+    op.drop_index("chat_user_id_archived_pinned_updated_at_idx", table_name="chat")
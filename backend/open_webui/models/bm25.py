@@ -0,0 +1,390 @@
+import logging
+import math
+import re
+import time
+from collections import Counter
+from typing import Optional
+
+from open_webui.internal.db import Base, get_db, insert_or_ignore
+from open_webui.env import SRC_LOG_LEVELS
+
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Float,
+    Index,
+    Integer,
+    PrimaryKeyConstraint,
+    Text,
+    JSON,
+    case,
+    func,
+    literal,
+    tuple_,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+# Okapi BM25 parameters, same defaults as rank_bm25
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Rows per bulk insert and ids per `IN (...)`
+BATCH_SIZE = 500
+
+####################
+# BM25 Index DB Schema
+####################
+
+
+class BM25Collection(Base):
+    __tablename__ = "bm25_collection"
+
+    name = Column(Text, primary_key=True)
+    doc_count = Column(BigInteger, default=0)
+    total_length = Column(BigInteger, default=0)
+
+    created_at = Column(BigInteger)
+    updated_at = Column(BigInteger)
+
+
+class BM25Document(Base):
+    __tablename__ = "bm25_document"
+
+    collection_name = Column(Text)
+    id = Column(Text)
+    file_id = Column(Text, nullable=True)
+
+    length = Column(Integer)
+    text = Column(Text)
+    meta = Column(JSON, nullable=True)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("collection_name", "id", name="pk_collection_name_id"),
+        Index(
+            "bm25_document_collection_name_file_id_idx", "collection_name", "file_id"
+        ),
+    )
+
+
+class BM25Posting(Base):
+    __tablename__ = "bm25_posting"
+
+    collection_name = Column(Text)
+    term = Column(Text)
+    document_id = Column(Text)
+    tf = Column(Integer)
+    # Copy of the document length, so scoring reads the postings only
+    length = Column(Integer)
+
+    # Postings are only ever looked up by term (deletes re-tokenize the
+    # document), a second index would steer the query planner away from it
+    __table_args__ = (
+        PrimaryKeyConstraint(
+            "collection_name", "term", "document_id", name="pk_collection_name_term_id"
+        ),
+    )
+
+
+class BM25DocumentModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    text: str
+    meta: Optional[dict] = None
+
+
+class BM25SearchResult(BaseModel):
+    score: float
+    document: BM25DocumentModel
+
+
+####################
+# Tokenization
+####################
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def get_idf(doc_count: int, df: int) -> float:
+    # Lucene's variant of the BM25 idf, it stays positive for terms that
+    # appear in more than half of the documents
+    return math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+
+
+class BM25IndexTable:
+    """
+    Inverted index with BM25 term statistics for each vector DB collection.
+
+    The index is kept up to date incrementally as documents are added to or
+    deleted from a collection, so hybrid search scores a query against the
+    postings of its terms instead of re-indexing the whole collection.
+    """
+
+    def has_index(self, collection_name: str) -> bool:
+        with get_db() as db:
+            return db.get(BM25Collection, collection_name) is not None
+
+    def create_index(
+        self, collection_name: str, items: list[dict], replace: bool = True
+    ) -> bool:
+        """
+        Indexes a collection with the given items, replacing its current index
+        unless `replace` is False, in one transaction so searches never see a
+        partial index. Returns False if the collection was already indexed or
+        another builder indexed it concurrently.
+        """
+        timestamp = int(time.time())
+        with get_db() as db:
+            if replace:
+                self._delete_index(db, collection_name)
+
+            # Of concurrent builders, only the one that inserts the collection
+            # row adds the documents
+            if not insert_or_ignore(
+                db,
+                BM25Collection,
+                [
+                    {
+                        "name": collection_name,
+                        "doc_count": 0,
+                        "total_length": 0,
+                        "created_at": timestamp,
+                        "updated_at": timestamp,
+                    }
+                ],
+            ):
+                db.rollback()
+                return False
+
+            self._add(db, collection_name, items)
+            db.commit()
+            return True
+
+    def add_documents(self, collection_name: str, items: list[dict]) -> bool:
+        """
+        Adds `{"id", "text", "metadata"}` items to the index of a collection.
+        Collections without an index are skipped, they are indexed as a whole
+        on their first search.
+        """
+        with get_db() as db:
+            if db.get(BM25Collection, collection_name) is None:
+                return False
+
+            self._add(db, collection_name, items)
+            db.commit()
+            return True
+
+    def _add(self, db, collection_name: str, items: list[dict]):
+        total_length = 0
+        documents = []
+        postings = []
+        for item in items:
+            tokens = tokenize(item["text"])
+            total_length += len(tokens)
+
+            metadata = item.get("metadata") or {}
+            documents.append(
+                {
+                    "collection_name": collection_name,
+                    "id": item["id"],
+                    "file_id": metadata.get("file_id"),
+                    "length": len(tokens),
+                    "text": item["text"],
+                    "meta": metadata,
+                }
+            )
+            postings.extend(
+                {
+                    "collection_name": collection_name,
+                    "term": term,
+                    "document_id": item["id"],
+                    "tf": tf,
+                    "length": len(tokens),
+                }
+                for term, tf in Counter(tokens).items()
+            )
+
+        for i in range(0, len(documents), BATCH_SIZE):
+            db.bulk_insert_mappings(BM25Document, documents[i : i + BATCH_SIZE])
+        for i in range(0, len(postings), BATCH_SIZE):
+            db.bulk_insert_mappings(BM25Posting, postings[i : i + BATCH_SIZE])
+
+        db.query(BM25Collection).filter_by(name=collection_name).update(
+            {
+                BM25Collection.doc_count: BM25Collection.doc_count + len(documents),
+                BM25Collection.total_length: BM25Collection.total_length + total_length,
+                BM25Collection.updated_at: int(time.time()),
+            },
+            synchronize_session=False,
+        )
+
+    def delete_documents(
+        self,
+        collection_name: str,
+        ids: Optional[list[str]] = None,
+        filter: Optional[dict] = None,
+    ):
+        """Deletes documents by id or by metadata, like `VECTOR_DB_CLIENT.delete`."""
+        with get_db() as db:
+            query = db.query(
+                BM25Document.id,
+                BM25Document.length,
+                BM25Document.text,
+                BM25Document.meta,
+            ).filter(BM25Document.collection_name == collection_name)
+
+            if ids is not None:
+                rows = []
+                for i in range(0, len(ids), BATCH_SIZE):
+                    rows.extend(
+                        query.filter(BM25Document.id.in_(ids[i : i + BATCH_SIZE]))
+                    )
+            elif filter:
+                if "file_id" in filter:
+                    query = query.filter(BM25Document.file_id == filter["file_id"])
+                rows = [
+                    row
+                    for row in query
+                    if all(
+                        (row.meta or {}).get(key) == value
+                        for key, value in filter.items()
+                    )
+                ]
+            else:
+                return
+
+            if not rows:
+                return
+
+            keys = [(term, row.id) for row in rows for term in set(tokenize(row.text))]
+            for i in range(0, len(keys), BATCH_SIZE):
+                db.query(BM25Posting).filter(
+                    BM25Posting.collection_name == collection_name,
+                    tuple_(BM25Posting.term, BM25Posting.document_id).in_(
+                        keys[i : i + BATCH_SIZE]
+                    ),
+                ).delete(synchronize_session=False)
+
+            deleted_ids = [row.id for row in rows]
+            for i in range(0, len(deleted_ids), BATCH_SIZE):
+                batch = deleted_ids[i : i + BATCH_SIZE]
+                db.query(BM25Document).filter(
+                    BM25Document.collection_name == collection_name,
+                    BM25Document.id.in_(batch),
+                ).delete(synchronize_session=False)
+
+            db.query(BM25Collection).filter_by(name=collection_name).update(
+                {
+                    BM25Collection.doc_count: BM25Collection.doc_count - len(rows),
+                    BM25Collection.total_length: BM25Collection.total_length
+                    - sum(row.length for row in rows),
+                    BM25Collection.updated_at: int(time.time()),
+                },
+                synchronize_session=False,
+            )
+            db.commit()
+
+    def delete_index(self, collection_name: str):
+        with get_db() as db:
+            self._delete_index(db, collection_name)
+            db.commit()
+
+    def _delete_index(self, db, collection_name: str):
+        db.query(BM25Posting).filter_by(collection_name=collection_name).delete()
+        db.query(BM25Document).filter_by(collection_name=collection_name).delete()
+        db.query(BM25Collection).filter_by(name=collection_name).delete()
+
+    def delete_all_indexes(self):
+        with get_db() as db:
+            db.query(BM25Posting).delete()
+            db.query(BM25Document).delete()
+            db.query(BM25Collection).delete()
+            db.commit()
+
+    def search(
+        self, collection_name: str, query: str, k: int
+    ) -> list[BM25SearchResult]:
+        query_terms = Counter(tokenize(query))
+        if not query_terms or k <= 0:
+            return []
+
+        with get_db() as db:
+            collection = db.get(BM25Collection, collection_name)
+            if collection is None or not collection.doc_count:
+                return []
+
+            doc_count = collection.doc_count
+            avgdl = max(collection.total_length / doc_count, 1)
+
+            dfs = dict(
+                db.query(BM25Posting.term, func.count())
+                .filter(
+                    BM25Posting.collection_name == collection_name,
+                    BM25Posting.term.in_(list(query_terms)),
+                )
+                .group_by(BM25Posting.term)
+                .all()
+            )
+            if not dfs:
+                return []
+
+            # Terms repeated in the query count that many times, like rank_bm25
+            weight = case(
+                *[
+                    (
+                        BM25Posting.term == term,
+                        literal(get_idf(doc_count, df) * query_terms[term], Float),
+                    )
+                    for term, df in dfs.items()
+                ],
+                else_=literal(0.0, Float),
+            )
+            tf = BM25Posting.tf * literal(1.0, Float)
+            score = func.sum(
+                weight
+                * tf
+                * (BM25_K1 + 1)
+                / (
+                    tf
+                    + BM25_K1
+                    * (1 - BM25_B + BM25_B * BM25Posting.length / literal(avgdl, Float))
+                )
+            ).label("score")
+
+            scores = (
+                db.query(BM25Posting.document_id, score)
+                .filter(
+                    BM25Posting.collection_name == collection_name,
+                    BM25Posting.term.in_(list(dfs)),
+                )
+                .group_by(BM25Posting.document_id)
+                .order_by(score.desc(), BM25Posting.document_id)
+                .limit(k)
+                .all()
+            )
+            if not scores:
+                return []
+
+            documents = {
+                document.id: BM25DocumentModel.model_validate(document)
+                for document in db.query(BM25Document).filter(
+                    BM25Document.collection_name == collection_name,
+                    BM25Document.id.in_([row.document_id for row in scores]),
+                )
+            }
+
+            return [
+                BM25SearchResult(score=row.score, document=documents[row.document_id])
+                for row in scores
+                if row.document_id in documents
+            ]
+
+
+BM25Index = BM25IndexTable()
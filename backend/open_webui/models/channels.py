@@ -3,7 +3,7 @@ import time
 import uuid
 from typing import Optional
 
-from open_webui.internal.db import Base, get_db
+from open_webui.internal.db import Base, get_async_db, get_db, sync_fallback
 from open_webui.utils.access_control import has_access
 
 from pydantic import BaseModel, ConfigDict
@@ -134,3 +134,14 @@ class ChannelTable:
 
 
 Channels = ChannelTable()
+
+
+class AsyncChannelTable:
+    @sync_fallback(Channels.get_channel_by_id)
+    async def get_channel_by_id(self, id: str) -> Optional[ChannelModel]:
+        async with get_async_db() as db:
+            channel = await db.scalar(select(Channel).filter(Channel.id == id))
+            return ChannelModel.model_validate(channel) if channel else None
+
+
+AsyncChannels = AsyncChannelTable()
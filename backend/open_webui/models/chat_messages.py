@@ -0,0 +1,312 @@
+import logging
+import time
+from typing import Optional
+
+from open_webui.internal.db import (
+    Base,
+    get_async_db,
+    get_db,
+    insert_or_ignore,
+    sync_fallback,
+)
+from open_webui.env import SRC_LOG_LEVELS
+
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import BigInteger, Column, Index, PrimaryKeyConstraint, Text, JSON
+from sqlalchemy import select
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+####################
+# ChatMessage DB Schema
+####################
+
+# Keys of a legacy `chat.history.messages` entry that are stored in their own
+# columns, everything else is kept as-is in `meta`.
+MESSAGE_COLUMN_KEYS = ("id", "parentId", "role", "content")
+
+
+class ChatMessage(Base):
+    __tablename__ = "chat_message"
+
+    id = Column(Text)
+    chat_id = Column(Text)
+    parent_id = Column(Text, nullable=True)
+
+    role = Column(Text, nullable=True)
+    content = Column(Text, nullable=True)
+    meta = Column(JSON, nullable=True)
+
+    created_at = Column(BigInteger)  # time_ns
+    updated_at = Column(BigInteger)  # time_ns
+
+    __table_args__ = (
+        PrimaryKeyConstraint("chat_id", "id", name="pk_chat_id_id"),
+        Index("chat_message_chat_id_updated_at_idx", "chat_id", "updated_at"),
+    )
+
+
+class ChatMessageModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    chat_id: str
+    parent_id: Optional[str] = None
+
+    role: Optional[str] = None
+    content: Optional[str] = None
+    meta: Optional[dict] = None
+
+    created_at: int  # timestamp in epoch (time_ns)
+    updated_at: int  # timestamp in epoch (time_ns)
+
+    def to_message(self) -> dict:
+        """Rebuild the legacy `chat.history.messages[id]` dict from the row."""
+        message = {**(self.meta or {}), "id": self.id, "parentId": self.parent_id}
+        if self.role is not None:
+            message["role"] = self.role
+        if self.content is not None:
+            message["content"] = self.content
+        return message
+
+
+def split_message(message: dict) -> dict:
+    """Split a legacy message dict into `chat_message` column values."""
+    content = message.get("content")
+    meta = {k: v for k, v in message.items() if k not in MESSAGE_COLUMN_KEYS}
+
+    # Only plain text content gets its own column, anything else stays in meta
+    if content is not None and not isinstance(content, str):
+        meta["content"] = content
+        content = None
+
+    return {
+        "parent_id": message.get("parentId"),
+        "role": message.get("role"),
+        "content": content,
+        "meta": meta,
+    }
+
+
+def build_message_values(
+    chat_id: str, messages: dict[str, dict], timestamp: int
+) -> list[dict]:
+    """Build the `chat_message` column values of a legacy history dict."""
+    return [
+        {
+            "id": message_id,
+            "chat_id": chat_id,
+            **split_message(message),
+            "created_at": timestamp,
+            "updated_at": timestamp,
+        }
+        for message_id, message in messages.items()
+    ]
+
+
+def build_message_rows(
+    chat_id: str, messages: dict[str, dict], timestamp: int
+) -> list[ChatMessage]:
+    """Build the `chat_message` rows of a legacy history dict."""
+    return [
+        ChatMessage(**values)
+        for values in build_message_values(chat_id, messages, timestamp)
+    ]
+
+
+class ChatMessageTable:
+    def get_message_list_by_chat_id(self, chat_id: str) -> list[ChatMessageModel]:
+        with get_db() as db:
+            rows = db.scalars(self._select_message_list_by_chat_id(chat_id))
+            return [ChatMessageModel.model_validate(row) for row in rows]
+
+    def _select_message_list_by_chat_id(self, chat_id: str):
+        # Shared with `AsyncChatMessageTable`
+        return select(ChatMessage).filter_by(chat_id=chat_id)
+
+    def get_message_lists_by_chat_ids(
+        self, chat_ids: list[str]
+    ) -> dict[str, list[ChatMessageModel]]:
+        messages_by_chat_id = {}
+        if not chat_ids:
+            return messages_by_chat_id
+
+        with get_db() as db:
+            # In batches, so a list of every chat stays under the bind limits
+            for i in range(0, len(chat_ids), 500):
+                rows = db.query(ChatMessage).filter(
+                    ChatMessage.chat_id.in_(chat_ids[i : i + 500])
+                )
+                for row in rows:
+                    messages_by_chat_id.setdefault(row.chat_id, []).append(
+                        ChatMessageModel.model_validate(row)
+                    )
+            return messages_by_chat_id
+
+    def get_messages_by_chat_id(self, chat_id: str) -> dict[str, dict]:
+        return {
+            message.id: message.to_message()
+            for message in self.get_message_list_by_chat_id(chat_id)
+        }
+
+    def get_message_by_chat_id_and_id(
+        self, chat_id: str, id: str
+    ) -> Optional[ChatMessageModel]:
+        with get_db() as db:
+            row = db.get(ChatMessage, (chat_id, id))
+            return ChatMessageModel.model_validate(row) if row else None
+
+    def has_messages_by_chat_id(self, chat_id: str) -> bool:
+        with get_db() as db:
+            return (
+                db.query(ChatMessage.id).filter_by(chat_id=chat_id).first() is not None
+            )
+
+    def insert_messages_by_chat_id(
+        self, chat_id: str, messages: dict[str, dict], timestamp: Optional[int] = None
+    ) -> bool:
+        """
+        Bulk insert the messages of a legacy history dict (used for backfill).
+        Messages that already have a row, inserted by a concurrent backfill of
+        the same chat, are left as they are.
+        """
+        if not messages:
+            return True
+
+        timestamp = timestamp or time.time_ns()
+        try:
+            with get_db() as db:
+                insert_or_ignore(
+                    db, ChatMessage, build_message_values(chat_id, messages, timestamp)
+                )
+                db.commit()
+                return True
+        except Exception as e:
+            log.exception(f"Error inserting messages for chat {chat_id}: {e}")
+            return False
+
+    def update_message_by_chat_id_and_id(
+        self, chat_id: str, id: str, message: dict
+    ) -> Optional[ChatMessageModel]:
+        """Merge `message` into an existing row, returns None if there is none."""
+        with get_db() as db:
+            row = db.get(ChatMessage, (chat_id, id))
+            if row is None:
+                return None
+
+            merged = {**ChatMessageModel.model_validate(row).to_message(), **message}
+            for key, value in split_message(merged).items():
+                setattr(row, key, value)
+            row.updated_at = time.time_ns()
+
+            db.commit()
+            db.refresh(row)
+            return ChatMessageModel.model_validate(row)
+
+    def upsert_message_by_chat_id_and_id(
+        self, chat_id: str, id: str, message: dict
+    ) -> Optional[ChatMessageModel]:
+        updated = self.update_message_by_chat_id_and_id(chat_id, id, message)
+        if updated:
+            return updated
+
+        with get_db() as db:
+            inserted = insert_or_ignore(
+                db,
+                ChatMessage,
+                build_message_values(chat_id, {id: message}, time.time_ns()),
+            )
+            db.commit()
+
+            if inserted:
+                return ChatMessageModel.model_validate(
+                    db.get(ChatMessage, (chat_id, id))
+                )
+
+        # Inserted concurrently in the meantime, merge into that row instead
+        return self.update_message_by_chat_id_and_id(chat_id, id, message)
+
+    def sync_messages_by_chat_id(
+        self, chat_id: str, messages: dict[str, dict], timestamp: int
+    ) -> bool:
+        """
+        Make the rows of a chat match a full legacy history dict, only writing
+        the messages that actually changed.
+        """
+        try:
+            with get_db() as db:
+                rows = {
+                    row.id: row
+                    for row in db.query(ChatMessage).filter_by(chat_id=chat_id).all()
+                }
+
+                for message_id, message in messages.items():
+                    values = split_message(message)
+                    row = rows.pop(message_id, None)
+                    if row is None:
+                        db.add(
+                            ChatMessage(
+                                id=message_id,
+                                chat_id=chat_id,
+                                **values,
+                                created_at=timestamp,
+                                updated_at=timestamp,
+                            )
+                        )
+                    elif any(getattr(row, k) != v for k, v in values.items()):
+                        for key, value in values.items():
+                            setattr(row, key, value)
+                        row.updated_at = timestamp
+                    elif row.updated_at > timestamp:
+                        row.updated_at = timestamp
+
+                if rows:
+                    db.query(ChatMessage).filter(
+                        ChatMessage.chat_id == chat_id,
+                        ChatMessage.id.in_(list(rows.keys())),
+                    ).delete(synchronize_session=False)
+
+                db.commit()
+                return True
+        except Exception as e:
+            log.exception(f"Error syncing messages for chat {chat_id}: {e}")
+            return False
+
+    def delete_messages_by_chat_id(self, chat_id: str) -> bool:
+        try:
+            with get_db() as db:
+                db.query(ChatMessage).filter_by(chat_id=chat_id).delete()
+                db.commit()
+                return True
+        except Exception as e:
+            log.exception(f"Error deleting messages for chat {chat_id}: {e}")
+            return False
+
+    def delete_messages_by_chat_ids(self, chat_ids: list[str]) -> bool:
+        try:
+            with get_db() as db:
+                db.query(ChatMessage).filter(ChatMessage.chat_id.in_(chat_ids)).delete(
+                    synchronize_session=False
+                )
+                db.commit()
+                return True
+        except Exception as e:
+            log.exception(f"Error deleting messages for {len(chat_ids)} chats: {e}")
+            return False
+
+
+ChatMessages = ChatMessageTable()
+
+
+class AsyncChatMessageTable:
+    @sync_fallback(ChatMessages.get_message_list_by_chat_id)
+    async def get_message_list_by_chat_id(self, chat_id: str) -> list[ChatMessageModel]:
+        async with get_async_db() as db:
+            rows = await db.scalars(
+                ChatMessages._select_message_list_by_chat_id(chat_id)
+            )
+            return [ChatMessageModel.model_validate(row) for row in rows]
+
+
+AsyncChatMessages = AsyncChatMessageTable()
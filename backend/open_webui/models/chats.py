@@ -2,16 +2,25 @@ import logging
 import json
 import time
 import uuid
-from typing import Optional
-
-from open_webui.internal.db import Base, get_db
+from typing import Iterator, Optional
+
+from open_webui.internal.db import Base, get_async_db, get_db, sync_fallback
+from open_webui.models.chat_messages import (
+    AsyncChatMessages,
+    ChatMessage,
+    ChatMessageModel,
+    ChatMessages,
+    build_message_rows,
+)
 from open_webui.models.tags import TagModel, Tag, Tags
 from open_webui.env import SRC_LOG_LEVELS
 
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Boolean, Column, String, Text, JSON
+from sqlalchemy import BigInteger, Boolean, Column, Float, String, Text, JSON
+from sqlalchemy import Index, PrimaryKeyConstraint
 from sqlalchemy import or_, func, select, and_, text
 from sqlalchemy.sql import exists
+from starlette.concurrency import run_in_threadpool
 
 ####################
 # Chat DB Schema
@@ -39,6 +48,40 @@ class Chat(Base):
     meta = Column(JSON, server_default="{}")
     folder_id = Column(Text, nullable=True)
 
+    # `history.currentId`, kept here when only the `chat_message` rows change
+    current_message_id = Column(Text, nullable=True)
+
+    __table_args__ = (
+        Index(
+            "chat_user_id_archived_pinned_updated_at_idx",
+            "user_id",
+            "archived",
+            "pinned",
+            "updated_at",
+        ),
+        Index(
+            "chat_user_id_folder_id_updated_at_idx",
+            "user_id",
+            "folder_id",
+            "updated_at",
+        ),
+    )
+
+
+class ChatTag(Base):
+    """Tags of a chat, mirroring `chat.meta.tags` for indexed lookups."""
+
+    __tablename__ = "chat_tag"
+
+    chat_id = Column(String)
+    user_id = Column(String)
+    tag_id = Column(String)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("chat_id", "tag_id", name="pk_chat_id_tag_id"),
+        Index("chat_tag_user_id_tag_id_idx", "user_id", "tag_id"),
+    )
+
 
 class ChatModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -58,6 +101,8 @@ class ChatModel(BaseModel):
     meta: dict = {}
     folder_id: Optional[str] = None
 
+    current_message_id: Optional[str] = None
+
 
 ####################
 # Forms
@@ -98,13 +143,62 @@ class ChatResponse(BaseModel):
 
 
 class ChatTitleIdResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: str
     title: str
     updated_at: int
     created_at: int
 
 
+# Columns of the title lists, which never need the (potentially large) chat JSON
+CHAT_TITLE_ID_COLUMNS = (Chat.id, Chat.title, Chat.updated_at, Chat.created_at)
+
+
+def get_chat_cursor(chat) -> str:
+    """Returns the cursor to continue a chat list after `chat`."""
+    return f"{chat.updated_at}:{chat.id}"
+
+
+def paginate_chats(
+    query,
+    skip: Optional[int] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+):
+    """
+    Orders a chat query by most recently updated first and paginates it.
+
+    With a `cursor` (see `get_chat_cursor`), the page starts after that chat
+    using the `(updated_at, id)` keyset instead of an OFFSET, so deep pages
+    don't scan the skipped rows. Raises `ValueError` for a malformed cursor.
+    """
+    query = query.order_by(Chat.updated_at.desc(), Chat.id.desc())
+
+    if cursor:
+        updated_at, id = cursor.split(":", 1)
+        updated_at = int(updated_at)
+
+        query = query.filter(
+            or_(
+                Chat.updated_at < updated_at,
+                and_(Chat.updated_at == updated_at, Chat.id < id),
+            )
+        )
+    elif skip:
+        query = query.offset(skip)
+
+    if limit:
+        query = query.limit(limit)
+
+    return query
+
+
 class ChatTable:
+    def __init__(self):
+        # Set once no chat has messages missing from the search index
+        self.messages_backfilled = False
+
     def insert_new_chat(self, user_id: str, form_data: ChatForm) -> Optional[ChatModel]:
         with get_db() as db:
             id = str(uuid.uuid4())
@@ -127,36 +221,69 @@ class ChatTable:
             db.add(result)
             db.commit()
             db.refresh(result)
+
+            ChatMessages.insert_messages_by_chat_id(
+                id, self._get_history_messages(chat.chat)
+            )
             return ChatModel.model_validate(result) if result else None
 
     def import_chat(
         self, user_id: str, form_data: ChatImportForm
     ) -> Optional[ChatModel]:
+        return self.import_chats(user_id, [form_data])[0]
+
+    def import_chats(
+        self, user_id: str, forms: list[ChatImportForm]
+    ) -> list[ChatModel]:
+        """Imports chats, with their tags and messages, in a single transaction."""
+        now = int(time.time())
+        timestamp = time.time_ns()
+
+        chats = []
         with get_db() as db:
-            id = str(uuid.uuid4())
-            chat = ChatModel(
-                **{
-                    "id": id,
-                    "user_id": user_id,
-                    "title": (
-                        form_data.chat["title"]
-                        if "title" in form_data.chat
-                        else "New Chat"
-                    ),
-                    "chat": form_data.chat,
-                    "meta": form_data.meta,
-                    "pinned": form_data.pinned,
-                    "folder_id": form_data.folder_id,
-                    "created_at": int(time.time()),
-                    "updated_at": int(time.time()),
-                }
-            )
+            for form_data in forms:
+                tag_ids = [
+                    tag_id.replace(" ", "_").lower()
+                    for tag_id in (form_data.meta or {}).get("tags", [])
+                ]
+                tag_ids = [
+                    tag_id for tag_id in dict.fromkeys(tag_ids) if tag_id != "none"
+                ]
+
+                chat = ChatModel(
+                    **{
+                        "id": str(uuid.uuid4()),
+                        "user_id": user_id,
+                        "title": (
+                            form_data.chat["title"]
+                            if "title" in form_data.chat
+                            else "New Chat"
+                        ),
+                        "chat": form_data.chat,
+                        "meta": {**(form_data.meta or {}), "tags": tag_ids},
+                        "pinned": form_data.pinned,
+                        "folder_id": form_data.folder_id,
+                        "created_at": now,
+                        "updated_at": now,
+                    }
+                )
+
+                db.add(Chat(**chat.model_dump()))
+                db.add_all(
+                    [
+                        ChatTag(chat_id=chat.id, user_id=user_id, tag_id=tag_id)
+                        for tag_id in tag_ids
+                    ]
+                )
+                db.add_all(
+                    build_message_rows(
+                        chat.id, self._get_history_messages(chat.chat), timestamp
+                    )
+                )
+                chats.append(chat)
 
-            result = Chat(**chat.model_dump())
-            db.add(result)
             db.commit()
-            db.refresh(result)
-            return ChatModel.model_validate(result) if result else None
+            return chats
 
     def update_chat_by_id(self, id: str, chat: dict) -> Optional[ChatModel]:
         try:
@@ -164,10 +291,18 @@ class ChatTable:
                 chat_item = db.get(Chat, id)
                 chat_item.chat = chat
                 chat_item.title = chat["title"] if "title" in chat else "New Chat"
+                chat_item.current_message_id = (chat.get("history") or {}).get(
+                    "currentId"
+                )
                 chat_item.updated_at = int(time.time())
                 db.commit()
                 db.refresh(chat_item)
 
+                ChatMessages.sync_messages_by_chat_id(
+                    id,
+                    self._get_history_messages(chat),
+                    chat_item.updated_at * 1_000_000_000,
+                )
                 return ChatModel.model_validate(chat_item)
         except Exception:
             return None
@@ -185,23 +320,47 @@ class ChatTable:
     def update_chat_tags_by_id(
         self, id: str, tags: list[str], user
     ) -> Optional[ChatModel]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
-            return None
+        with get_db() as db:
+            if not db.query(exists().where(Chat.id == id)).scalar():
+                return None
 
-        self.delete_all_tags_by_id_and_user_id(id, user.id)
+        tags = Tags.insert_new_tags(
+            [tag_name for tag_name in tags if tag_name.lower() != "none"], user.id
+        )
 
-        for tag in chat.meta.get("tags", []):
-            if self.count_chats_by_tag_name_and_user_id(tag, user.id) == 0:
-                Tags.delete_tag_by_name_and_user_id(tag, user.id)
+        try:
+            with get_db() as db:
+                chat = db.get(Chat, id)
+                removed_tag_ids = set(chat.meta.get("tags", [])) - {
+                    tag.id for tag in tags
+                }
 
-        for tag_name in tags:
-            if tag_name.lower() == "none":
-                continue
+                self._set_chat_tags(db, chat, [tag.id for tag in tags])
+                db.commit()
+        except Exception:
+            return None
 
-            self.add_chat_tag_by_id_and_user_id_and_tag_name(id, user.id, tag_name)
+        # Delete the tags that are not used by any other chat anymore
+        counts = self.count_chats_by_tag_ids_and_user_id(list(removed_tag_ids), user.id)
+        Tags.delete_tags_by_ids_and_user_id(
+            [tag_id for tag_id in removed_tag_ids if counts.get(tag_id, 0) == 0],
+            user.id,
+        )
         return self.get_chat_by_id(id)
 
+    def _set_chat_tags(self, db, chat: Chat, tag_ids: list[str]):
+        """Sets the tags of a chat in `chat.meta` and `chat_tag` as part of `db`'s transaction."""
+        tag_ids = list(dict.fromkeys(tag_ids))
+
+        chat.meta = {**(chat.meta or {}), "tags": tag_ids}
+        db.query(ChatTag).filter_by(chat_id=chat.id).delete()
+        db.add_all(
+            [
+                ChatTag(chat_id=chat.id, user_id=chat.user_id, tag_id=tag_id)
+                for tag_id in tag_ids
+            ]
+        )
+
     def get_chat_title_by_id(self, id: str) -> Optional[str]:
         chat = self.get_chat_by_id(id)
         if chat is None:
@@ -209,67 +368,187 @@ class ChatTable:
 
         return chat.chat.get("title", "New Chat")
 
+    def _get_history_messages(self, chat: dict) -> dict:
+        return (chat or {}).get("history", {}).get("messages", {}) or {}
+
+    def _backfill_messages_by_id(self, id: str) -> bool:
+        """
+        Lazily copies `chat.history.messages` into the `chat_message` table the
+        first time a chat is accessed per message. Returns False if the chat
+        does not exist.
+        """
+        if ChatMessages.has_messages_by_chat_id(id):
+            return True
+
+        with get_db() as db:
+            chat = db.get(Chat, id)
+            if chat is None:
+                return False
+
+            return ChatMessages.insert_messages_by_chat_id(
+                id,
+                self._get_history_messages(chat.chat),
+                (chat.updated_at or 0) * 1_000_000_000,
+            )
+
+    def has_unindexed_messages(self) -> bool:
+        """
+        Whether any chat still has messages that were never copied to `chat_message`,
+        and so are missing from the search index. Search scans the JSON of such chats.
+        """
+        if self.messages_backfilled:
+            return False
+
+        with get_db() as db:
+            chats = (
+                db.query(Chat.chat)
+                .filter(~exists().where(ChatMessage.chat_id == Chat.id))
+                .yield_per(100)
+            )
+            unindexed = any(self._get_history_messages(chat) for (chat,) in chats)
+
+        # New chats are indexed when they are written, so this stays true
+        self.messages_backfilled = not unindexed
+        return unindexed
+
+    def backfill_messages(self, batch_size: int = 500) -> int:
+        """
+        Copies the messages of every chat that has none in `chat_message` yet,
+        which also adds them to the search index. Returns the number of chats.
+        """
+        count = 0
+        last_id = ""
+        while True:
+            with get_db() as db:
+                # Chats without any messages never get rows, so page by id
+                ids = [
+                    id
+                    for (id,) in db.query(Chat.id)
+                    .filter(Chat.id > last_id)
+                    .filter(~exists().where(ChatMessage.chat_id == Chat.id))
+                    .order_by(Chat.id)
+                    .limit(batch_size)
+                    .all()
+                ]
+
+            for id in ids:
+                if self._backfill_messages_by_id(id):
+                    count += 1
+
+            if len(ids) < batch_size:
+                return count
+            last_id = ids[-1]
+
+    def _load_history_messages(self, chat: ChatModel) -> ChatModel:
+        return self._apply_history_messages(
+            chat, ChatMessages.get_message_list_by_chat_id(chat.id)
+        )
+
+    def _load_history_messages_list(self, chats: list[ChatModel]) -> list[ChatModel]:
+        messages = ChatMessages.get_message_lists_by_chat_ids(
+            [chat.id for chat in chats]
+        )
+        return [
+            self._apply_history_messages(chat, messages.get(chat.id, []))
+            for chat in chats
+        ]
+
+    def _apply_history_messages(
+        self, chat: ChatModel, messages: list[ChatMessageModel]
+    ) -> ChatModel:
+        """
+        Rebuilds the legacy `chat.history` shape, overlaying the messages that
+        were written row by row on top of the last full save of the chat.
+        """
+        if not messages and not chat.current_message_id:
+            return chat
+
+        history = chat.chat.get("history", {})
+        if messages:
+            history["messages"] = {
+                message.id: message.to_message() for message in messages
+            }
+        if chat.current_message_id:
+            history["currentId"] = chat.current_message_id
+
+        chat.chat["history"] = history
+        return chat
+
     def get_messages_by_chat_id(self, id: str) -> Optional[dict]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
+        if not self._backfill_messages_by_id(id):
             return None
 
-        return chat.chat.get("history", {}).get("messages", {}) or {}
+        return ChatMessages.get_messages_by_chat_id(id)
 
     def get_message_by_id_and_message_id(
         self, id: str, message_id: str
     ) -> Optional[dict]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
+        message = ChatMessages.get_message_by_chat_id_and_id(id, message_id)
+        if message:
+            return message.to_message()
+
+        if not self._backfill_messages_by_id(id):
             return None
 
-        return chat.chat.get("history", {}).get("messages", {}).get(message_id, {})
+        message = ChatMessages.get_message_by_chat_id_and_id(id, message_id)
+        return message.to_message() if message else {}
 
     def upsert_message_to_chat_by_id_and_message_id(
         self, id: str, message_id: str, message: dict
-    ) -> Optional[ChatModel]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
-            return None
-
-        chat = chat.chat
-        history = chat.get("history", {})
-
-        if message_id in history.get("messages", {}):
-            history["messages"][message_id] = {
-                **history["messages"][message_id],
-                **message,
-            }
-        else:
-            history["messages"][message_id] = message
+    ) -> Optional[ChatMessageModel]:
+        updated = ChatMessages.update_message_by_chat_id_and_id(id, message_id, message)
+        if updated is None:
+            if not self._backfill_messages_by_id(id):
+                return None
+
+            updated = ChatMessages.upsert_message_by_chat_id_and_id(
+                id, message_id, message
+            )
 
-        history["currentId"] = message_id
+        # The upserted message becomes the current one and the chat moves up
+        # the chat list, as in a full save
+        if updated:
+            self._touch_chat_by_id(id, message_id)
+        return updated
 
-        chat["history"] = history
-        return self.update_chat_by_id(id, chat)
+    def _touch_chat_by_id(self, id: str, message_id: str):
+        """
+        Sets the current message and `updated_at` of a chat. Streamed chunks of
+        the same message write at most once per second, the resolution of
+        `updated_at`.
+        """
+        timestamp = int(time.time())
+        with get_db() as db:
+            db.query(Chat).filter(
+                Chat.id == id,
+                or_(
+                    Chat.current_message_id == None,
+                    Chat.current_message_id != message_id,
+                    Chat.updated_at < timestamp,
+                ),
+            ).update(
+                {"current_message_id": message_id, "updated_at": timestamp},
+                synchronize_session=False,
+            )
+            db.commit()
 
     def add_message_status_to_chat_by_id_and_message_id(
         self, id: str, message_id: str, status: dict
-    ) -> Optional[ChatModel]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
+    ) -> Optional[ChatMessageModel]:
+        message = self.get_message_by_id_and_message_id(id, message_id)
+        if not message:
             return None
 
-        chat = chat.chat
-        history = chat.get("history", {})
-
-        if message_id in history.get("messages", {}):
-            status_history = history["messages"][message_id].get("statusHistory", [])
-            status_history.append(status)
-            history["messages"][message_id]["statusHistory"] = status_history
-
-        chat["history"] = history
-        return self.update_chat_by_id(id, chat)
+        return ChatMessages.update_message_by_chat_id_and_id(
+            id,
+            message_id,
+            {"statusHistory": [*message.get("statusHistory", []), status]},
+        )
 
     def insert_shared_chat_by_chat_id(self, chat_id: str) -> Optional[ChatModel]:
         with get_db() as db:
             # Get the existing chat to share
-            chat = db.get(Chat, chat_id)
+            chat = self.get_chat_by_id(chat_id)
             # Check if the chat is already shared
             if chat.share_id:
                 return self.get_chat_by_id_and_user_id(chat.share_id, "shared")
@@ -301,7 +580,7 @@ class ChatTable:
     def update_shared_chat_by_chat_id(self, chat_id: str) -> Optional[ChatModel]:
         try:
             with get_db() as db:
-                chat = db.get(Chat, chat_id)
+                chat = self.get_chat_by_id(chat_id)
                 shared_chat = (
                     db.query(Chat).filter_by(user_id=f"shared-{chat_id}").first()
                 )
@@ -339,7 +618,7 @@ class ChatTable:
                 chat.share_id = share_id
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._load_history_messages(ChatModel.model_validate(chat))
         except Exception:
             return None
 
@@ -351,7 +630,7 @@ class ChatTable:
                 chat.updated_at = int(time.time())
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._load_history_messages(ChatModel.model_validate(chat))
         except Exception:
             return None
 
@@ -363,7 +642,7 @@ class ChatTable:
                 chat.updated_at = int(time.time())
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._load_history_messages(ChatModel.model_validate(chat))
         except Exception:
             return None
 
@@ -378,16 +657,16 @@ class ChatTable:
 
     def get_archived_chat_list_by_user_id(
         self, user_id: str, skip: int = 0, limit: int = 50
-    ) -> list[ChatModel]:
+    ) -> list[ChatTitleIdResponse]:
         with get_db() as db:
             all_chats = (
-                db.query(Chat)
+                db.query(*CHAT_TITLE_ID_COLUMNS)
                 .filter_by(user_id=user_id, archived=True)
-                .order_by(Chat.updated_at.desc())
+                .order_by(Chat.updated_at.desc(), Chat.id.desc())
                 # .limit(limit).offset(skip)
                 .all()
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return [ChatTitleIdResponse.model_validate(chat) for chat in all_chats]
 
     def get_chat_list_by_user_id(
         self,
@@ -401,15 +680,10 @@ class ChatTable:
             if not include_archived:
                 query = query.filter_by(archived=False)
 
-            query = query.order_by(Chat.updated_at.desc())
+            all_chats = paginate_chats(query, skip, limit).all()
+            all_chats = [ChatModel.model_validate(chat) for chat in all_chats]
 
-            if skip:
-                query = query.offset(skip)
-            if limit:
-                query = query.limit(limit)
-
-            all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+        return self._load_history_messages_list(all_chats)
 
     def get_chat_title_id_list_by_user_id(
         self,
@@ -417,37 +691,51 @@ class ChatTable:
         include_archived: bool = False,
         skip: Optional[int] = None,
         limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        include_all: bool = False,
     ) -> list[ChatTitleIdResponse]:
+        """
+        Lists the ids and titles of a user's chats, most recently updated first.
+
+        Unless `include_all` is set, pinned chats and chats in folders are left out
+        as the sidebar lists them separately.
+        """
         with get_db() as db:
-            query = db.query(Chat).filter_by(user_id=user_id).filter_by(folder_id=None)
-            query = query.filter(or_(Chat.pinned == False, Chat.pinned == None))
+            query = self._select_chat_title_id_list(
+                user_id, include_archived, skip, limit, cursor, include_all
+            )
+            return [
+                ChatTitleIdResponse.model_validate(chat) for chat in db.execute(query)
+            ]
 
-            if not include_archived:
-                query = query.filter_by(archived=False)
+    # The statements below are shared with `AsyncChatTable`, which executes
+    # them on the async engine
 
-            query = query.order_by(Chat.updated_at.desc()).with_entities(
-                Chat.id, Chat.title, Chat.updated_at, Chat.created_at
-            )
+    def _select_chat_title_id_list(
+        self,
+        user_id: str,
+        include_archived: bool = False,
+        skip: Optional[int] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        include_all: bool = False,
+    ):
+        query = select(*CHAT_TITLE_ID_COLUMNS).filter_by(user_id=user_id)
+
+        if not include_all:
+            query = query.filter_by(folder_id=None)
+            query = query.filter(or_(Chat.pinned == False, Chat.pinned == None))
 
-            if skip:
-                query = query.offset(skip)
-            if limit:
-                query = query.limit(limit)
+        if not include_archived:
+            query = query.filter_by(archived=False)
 
-            all_chats = query.all()
+        return paginate_chats(query, skip, limit, cursor)
 
-            # result has to be destrctured from sqlalchemy `row` and mapped to a dict since the `ChatModel`is not the returned dataclass.
-            return [
-                ChatTitleIdResponse.model_validate(
-                    {
-                        "id": chat[0],
-                        "title": chat[1],
-                        "updated_at": chat[2],
-                        "created_at": chat[3],
-                    }
-                )
-                for chat in all_chats
-            ]
+    def _select_chat_by_id(self, id: str, user_id: Optional[str] = None):
+        query = select(Chat).filter_by(id=id)
+        if user_id is not None:
+            query = query.filter_by(user_id=user_id)
+        return query
 
     def get_chat_list_by_chat_ids(
         self, chat_ids: list[str], skip: int = 0, limit: int = 50
@@ -460,13 +748,15 @@ class ChatTable:
                 .order_by(Chat.updated_at.desc())
                 .all()
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            all_chats = [ChatModel.model_validate(chat) for chat in all_chats]
+
+        return self._load_history_messages_list(all_chats)
 
     def get_chat_by_id(self, id: str) -> Optional[ChatModel]:
         try:
             with get_db() as db:
-                chat = db.get(Chat, id)
-                return ChatModel.model_validate(chat)
+                chat = db.scalar(self._select_chat_by_id(id))
+                return self._load_history_messages(ChatModel.model_validate(chat))
         except Exception:
             return None
 
@@ -487,8 +777,8 @@ class ChatTable:
     def get_chat_by_id_and_user_id(self, id: str, user_id: str) -> Optional[ChatModel]:
         try:
             with get_db() as db:
-                chat = db.query(Chat).filter_by(id=id, user_id=user_id).first()
-                return ChatModel.model_validate(chat)
+                chat = db.scalar(self._select_chat_by_id(id, user_id))
+                return self._load_history_messages(ChatModel.model_validate(chat))
         except Exception:
             return None
 
@@ -499,7 +789,44 @@ class ChatTable:
                 # .limit(limit).offset(skip)
                 .order_by(Chat.updated_at.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            all_chats = [ChatModel.model_validate(chat) for chat in all_chats]
+
+        return self._load_history_messages_list(all_chats)
+
+    def iter_chats(
+        self, user_id: Optional[str] = None, batch_size: int = 100
+    ) -> Iterator[ChatModel]:
+        """
+        Yields every chat (of a user) with its messages, loading `batch_size`
+        chats at a time so memory stays bounded however many chats there are.
+
+        Each batch is a short query paging by id, rather than one cursor held
+        open for the whole iteration, so slow consumers don't block writers.
+        """
+        last_id = ""
+        while True:
+            with get_db() as db:
+                query = db.query(Chat).filter(Chat.id > last_id)
+                if user_id is not None:
+                    query = query.filter_by(user_id=user_id)
+
+                chats = [
+                    ChatModel.model_validate(chat)
+                    for chat in query.order_by(Chat.id).limit(batch_size).all()
+                ]
+
+            yield from self._load_history_messages_list(chats)
+
+            if len(chats) < batch_size:
+                return
+            last_id = chats[-1].id
+
+    def count_chats(self, user_id: Optional[str] = None) -> int:
+        with get_db() as db:
+            query = db.query(Chat)
+            if user_id is not None:
+                query = query.filter_by(user_id=user_id)
+            return query.count()
 
     def get_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
         with get_db() as db:
@@ -508,16 +835,18 @@ class ChatTable:
                 .filter_by(user_id=user_id)
                 .order_by(Chat.updated_at.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            all_chats = [ChatModel.model_validate(chat) for chat in all_chats]
+
+        return self._load_history_messages_list(all_chats)
 
-    def get_pinned_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
+    def get_pinned_chats_by_user_id(self, user_id: str) -> list[ChatTitleIdResponse]:
         with get_db() as db:
             all_chats = (
-                db.query(Chat)
+                db.query(*CHAT_TITLE_ID_COLUMNS)
                 .filter_by(user_id=user_id, pinned=True, archived=False)
-                .order_by(Chat.updated_at.desc())
+                .order_by(Chat.updated_at.desc(), Chat.id.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return [ChatTitleIdResponse.model_validate(chat) for chat in all_chats]
 
     def get_archived_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
         with get_db() as db:
@@ -526,7 +855,9 @@ class ChatTable:
                 .filter_by(user_id=user_id, archived=True)
                 .order_by(Chat.updated_at.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            all_chats = [ChatModel.model_validate(chat) for chat in all_chats]
+
+        return self._load_history_messages_list(all_chats)
 
     def get_chats_by_user_id_and_search_text(
         self,
@@ -537,7 +868,12 @@ class ChatTable:
         limit: int = 60,
     ) -> list[ChatModel]:
         """
-        Filters chats based on a search query using Python, allowing pagination using skip and limit.
+        Searches the titles and messages of a user's chats, allowing pagination using skip and limit.
+
+        Messages are looked up in the full-text index of `chat_message` (FTS5 on SQLite,
+        tsvector and trigram indexes on PostgreSQL) and results are ranked by relevance,
+        with title matches first. Chats whose messages were not copied to `chat_message`
+        yet fall back to scanning their JSON.
         """
         search_text = search_text.lower().strip()
 
@@ -565,110 +901,33 @@ class ChatTable:
             if not include_archived:
                 query = query.filter(Chat.archived == False)
 
-            query = query.order_by(Chat.updated_at.desc())
-
             # Check if the database dialect is either 'sqlite' or 'postgresql'
             dialect_name = db.bind.dialect.name
-            if dialect_name == "sqlite":
-                # SQLite case: using JSON1 extension for JSON searching
-                query = query.filter(
-                    (
-                        Chat.title.ilike(
-                            f"%{search_text}%"
-                        )  # Case-insensitive search in title
-                        | text(
-                            """
-                            EXISTS (
-                                SELECT 1 
-                                FROM json_each(Chat.chat, '$.messages') AS message 
-                                WHERE LOWER(message.value->>'content') LIKE '%' || :search_text || '%'
-                            )
-                            """
-                        )
-                    ).params(search_text=search_text)
+            if dialect_name not in ("sqlite", "postgresql"):
+                raise NotImplementedError(
+                    f"Unsupported dialect: {db.bind.dialect.name}"
                 )
 
-                # Check if there are any tags to filter, it should have all the tags
-                if "none" in tag_ids:
-                    query = query.filter(
-                        text(
-                            """
-                            NOT EXISTS (
-                                SELECT 1
-                                FROM json_each(Chat.meta, '$.tags') AS tag
-                            )
-                            """
-                        )
-                    )
-                elif tag_ids:
-                    query = query.filter(
-                        and_(
-                            *[
-                                text(
-                                    f"""
-                                    EXISTS (
-                                        SELECT 1
-                                        FROM json_each(Chat.meta, '$.tags') AS tag
-                                        WHERE tag.value = :tag_id_{tag_idx}
-                                    )
-                                    """
-                                ).params(**{f"tag_id_{tag_idx}": tag_id})
-                                for tag_idx, tag_id in enumerate(tag_ids)
-                            ]
-                        )
-                    )
-
-            elif dialect_name == "postgresql":
-                # PostgreSQL relies on proper JSON query for search
-                query = query.filter(
-                    (
-                        Chat.title.ilike(
-                            f"%{search_text}%"
-                        )  # Case-insensitive search in title
-                        | text(
-                            """
-                            EXISTS (
-                                SELECT 1
-                                FROM json_array_elements(Chat.chat->'messages') AS message
-                                WHERE LOWER(message->>'content') LIKE '%' || :search_text || '%'
-                            )
-                            """
-                        )
-                    ).params(search_text=search_text)
+            if search_text:
+                query = self._filter_by_search_text(
+                    query, dialect_name, user_id, search_text
                 )
+            else:
+                query = query.order_by(Chat.updated_at.desc())
 
-                # Check if there are any tags to filter, it should have all the tags
-                if "none" in tag_ids:
-                    query = query.filter(
-                        text(
-                            """
-                            NOT EXISTS (
-                                SELECT 1
-                                FROM json_array_elements_text(Chat.meta->'tags') AS tag
+            # Check if there are any tags to filter, it should have all the tags
+            if "none" in tag_ids:
+                query = query.filter(~exists().where(ChatTag.chat_id == Chat.id))
+            elif tag_ids:
+                query = query.filter(
+                    and_(
+                        *[
+                            exists().where(
+                                ChatTag.chat_id == Chat.id, ChatTag.tag_id == tag_id
                             )
-                            """
-                        )
+                            for tag_id in tag_ids
+                        ]
                     )
-                elif tag_ids:
-                    query = query.filter(
-                        and_(
-                            *[
-                                text(
-                                    f"""
-                                    EXISTS (
-                                        SELECT 1
-                                        FROM json_array_elements_text(Chat.meta->'tags') AS tag
-                                        WHERE tag = :tag_id_{tag_idx}
-                                    )
-                                    """
-                                ).params(**{f"tag_id_{tag_idx}": tag_id})
-                                for tag_idx, tag_id in enumerate(tag_ids)
-                            ]
-                        )
-                    )
-            else:
-                raise NotImplementedError(
-                    f"Unsupported dialect: {db.bind.dialect.name}"
                 )
 
             # Perform pagination at the SQL level
@@ -677,20 +936,136 @@ class ChatTable:
             log.info(f"The number of chats: {len(all_chats)}")
 
             # Validate and return chats
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            all_chats = [ChatModel.model_validate(chat) for chat in all_chats]
+
+        return self._load_history_messages_list(all_chats)
+
+    def _filter_by_search_text(
+        self, query, dialect_name: str, user_id: str, search_text: str
+    ):
+        # The message scores are only computed for the chats of the user
+        pattern = f"%{search_text}%"
+
+        if dialect_name == "sqlite":
+            if len(search_text) >= 3:
+                # A quoted phrase matches any substring with the trigram tokenizer
+                scores = text(
+                    """
+                    SELECT chat_message_fts.chat_id, MIN(chat_message_fts.rank) AS score
+                    FROM chat_message_fts
+                    JOIN chat ON chat.id = chat_message_fts.chat_id
+                    WHERE chat_message_fts MATCH :fts_query
+                    AND chat.user_id = :user_id
+                    GROUP BY chat_message_fts.chat_id
+                    """
+                ).bindparams(
+                    fts_query='"' + search_text.replace('"', '""') + '"',
+                    user_id=user_id,
+                )
+            else:
+                # Trigrams can't match shorter text, scan the messages of the
+                # user's chats instead
+                scores = text(
+                    """
+                    SELECT chat_message.chat_id, 0 AS score
+                    FROM chat
+                    JOIN chat_message ON chat_message.chat_id = chat.id
+                    WHERE chat.user_id = :user_id
+                    AND chat_message.content LIKE :pattern
+                    GROUP BY chat_message.chat_id
+                    """
+                ).bindparams(pattern=pattern, user_id=user_id)
+
+            legacy_match = text(
+                """
+                EXISTS (
+                    SELECT 1
+                    FROM json_each(Chat.chat, '$.messages') AS message
+                    WHERE LOWER(message.value->>'content') LIKE '%' || :search_text || '%'
+                )
+                """
+            )
+        else:
+            # Words are matched by the tsvector index, substrings by the trigram index
+            scores = text(
+                """
+                SELECT chat_message.chat_id, -MAX(ts_rank(
+                    to_tsvector('simple', coalesce(chat_message.content, '')),
+                    plainto_tsquery('simple', :search_text)
+                )) AS score
+                FROM chat
+                JOIN chat_message ON chat_message.chat_id = chat.id
+                WHERE chat.user_id = :user_id
+                AND (
+                    to_tsvector('simple', coalesce(chat_message.content, ''))
+                        @@ plainto_tsquery('simple', :search_text)
+                    OR chat_message.content ILIKE :pattern
+                )
+                GROUP BY chat_message.chat_id
+                """
+            ).bindparams(search_text=search_text, pattern=pattern, user_id=user_id)
+
+            legacy_match = text(
+                """
+                EXISTS (
+                    SELECT 1
+                    FROM json_array_elements(Chat.chat->'messages') AS message
+                    WHERE LOWER(message->>'content') LIKE '%' || :search_text || '%'
+                )
+                """
+            )
+
+        scores = scores.columns(chat_id=Text, score=Float).subquery("scores")
+        title_match = Chat.title.ilike(pattern)  # Case-insensitive search in title
+
+        conditions = [title_match, scores.c.chat_id.isnot(None)]
+        if self.has_unindexed_messages():
+            conditions.append(
+                and_(
+                    ~exists().where(ChatMessage.chat_id == Chat.id),
+                    legacy_match.bindparams(search_text=search_text),
+                )
+            )
+
+        return (
+            query.outerjoin(scores, scores.c.chat_id == Chat.id)
+            .filter(or_(*conditions))
+            .order_by(
+                title_match.desc(),
+                func.coalesce(scores.c.score, 0),
+                Chat.updated_at.desc(),
+            )
+        )
 
     def get_chats_by_folder_id_and_user_id(
         self, folder_id: str, user_id: str
-    ) -> list[ChatModel]:
+    ) -> list[ChatTitleIdResponse]:
+        return self.get_chat_title_id_lists_by_folder_ids_and_user_id(
+            [folder_id], user_id
+        ).get(folder_id, [])
+
+    def get_chat_title_id_lists_by_folder_ids_and_user_id(
+        self, folder_ids: list[str], user_id: str
+    ) -> dict[str, list[ChatTitleIdResponse]]:
+        """Lists the ids and titles of the chats in each folder in a single query."""
+        chats_by_folder_id = {}
+        if not folder_ids:
+            return chats_by_folder_id
+
         with get_db() as db:
-            query = db.query(Chat).filter_by(folder_id=folder_id, user_id=user_id)
+            query = db.query(Chat.folder_id, *CHAT_TITLE_ID_COLUMNS).filter(
+                Chat.folder_id.in_(folder_ids), Chat.user_id == user_id
+            )
             query = query.filter(or_(Chat.pinned == False, Chat.pinned == None))
             query = query.filter_by(archived=False)
 
-            query = query.order_by(Chat.updated_at.desc())
+            query = query.order_by(Chat.updated_at.desc(), Chat.id.desc())
 
-            all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            for chat in query.all():
+                chats_by_folder_id.setdefault(chat.folder_id, []).append(
+                    ChatTitleIdResponse.model_validate(chat)
+                )
+            return chats_by_folder_id
 
     def get_chats_by_folder_ids_and_user_id(
         self, folder_ids: list[str], user_id: str
@@ -704,8 +1079,9 @@ class ChatTable:
 
             query = query.order_by(Chat.updated_at.desc())
 
-            all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            all_chats = [ChatModel.model_validate(chat) for chat in query.all()]
+
+        return self._load_history_messages_list(all_chats)
 
     def update_chat_folder_id_by_id_and_user_id(
         self, id: str, user_id: str, folder_id: str
@@ -718,46 +1094,36 @@ class ChatTable:
                 chat.pinned = False
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._load_history_messages(ChatModel.model_validate(chat))
         except Exception:
             return None
 
     def get_chat_tags_by_id_and_user_id(self, id: str, user_id: str) -> list[TagModel]:
         with get_db() as db:
             chat = db.get(Chat, id)
-            tags = chat.meta.get("tags", [])
-            return [Tags.get_tag_by_name_and_user_id(tag, user_id) for tag in tags]
+            tag_ids = chat.meta.get("tags", [])
+            tags = {
+                tag.id: tag
+                for tag in Tags.get_tags_by_ids_and_user_id(tag_ids, user_id)
+            }
+            return [tags[tag_id] for tag_id in tag_ids if tag_id in tags]
 
     def get_chat_list_by_user_id_and_tag_name(
         self, user_id: str, tag_name: str, skip: int = 0, limit: int = 50
     ) -> list[ChatModel]:
         with get_db() as db:
-            query = db.query(Chat).filter_by(user_id=user_id)
             tag_id = tag_name.replace(" ", "_").lower()
-
-            log.info(f"DB dialect name: {db.bind.dialect.name}")
-            if db.bind.dialect.name == "sqlite":
-                # SQLite JSON1 querying for tags within the meta JSON field
-                query = query.filter(
-                    text(
-                        f"EXISTS (SELECT 1 FROM json_each(Chat.meta, '$.tags') WHERE json_each.value = :tag_id)"
-                    )
-                ).params(tag_id=tag_id)
-            elif db.bind.dialect.name == "postgresql":
-                # PostgreSQL JSON query for tags within the meta JSON field (for `json` type)
-                query = query.filter(
-                    text(
-                        "EXISTS (SELECT 1 FROM json_array_elements_text(Chat.meta->'tags') elem WHERE elem = :tag_id)"
-                    )
-                ).params(tag_id=tag_id)
-            else:
-                raise NotImplementedError(
-                    f"Unsupported dialect: {db.bind.dialect.name}"
-                )
+            query = (
+                db.query(Chat)
+                .join(ChatTag, ChatTag.chat_id == Chat.id)
+                .filter(ChatTag.user_id == user_id, ChatTag.tag_id == tag_id)
+            )
 
             all_chats = query.all()
             log.debug(f"all_chats: {all_chats}")
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            all_chats = [ChatModel.model_validate(chat) for chat in all_chats]
+
+        return self._load_history_messages_list(all_chats)
 
     def add_chat_tag_by_id_and_user_id_and_tag_name(
         self, id: str, user_id: str, tag_name: str
@@ -771,52 +1137,39 @@ class ChatTable:
 
                 tag_id = tag.id
                 if tag_id not in chat.meta.get("tags", []):
-                    chat.meta = {
-                        **chat.meta,
-                        "tags": list(set(chat.meta.get("tags", []) + [tag_id])),
-                    }
+                    self._set_chat_tags(db, chat, chat.meta.get("tags", []) + [tag_id])
 
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._load_history_messages(ChatModel.model_validate(chat))
         except Exception:
             return None
 
     def count_chats_by_tag_name_and_user_id(self, tag_name: str, user_id: str) -> int:
-        with get_db() as db:  # Assuming `get_db()` returns a session object
-            query = db.query(Chat).filter_by(user_id=user_id, archived=False)
+        # Normalize the tag_name for consistency
+        tag_id = tag_name.replace(" ", "_").lower()
+        return self.count_chats_by_tag_ids_and_user_id([tag_id], user_id).get(tag_id, 0)
 
-            # Normalize the tag_name for consistency
-            tag_id = tag_name.replace(" ", "_").lower()
+    def count_chats_by_tag_ids_and_user_id(
+        self, tag_ids: list[str], user_id: str
+    ) -> dict[str, int]:
+        """Counts the unarchived chats of each tag in a single query."""
+        if not tag_ids:
+            return {}
 
-            if db.bind.dialect.name == "sqlite":
-                # SQLite JSON1 support for querying the tags inside the `meta` JSON field
-                query = query.filter(
-                    text(
-                        f"EXISTS (SELECT 1 FROM json_each(Chat.meta, '$.tags') WHERE json_each.value = :tag_id)"
-                    )
-                ).params(tag_id=tag_id)
-
-            elif db.bind.dialect.name == "postgresql":
-                # PostgreSQL JSONB support for querying the tags inside the `meta` JSON field
-                query = query.filter(
-                    text(
-                        "EXISTS (SELECT 1 FROM json_array_elements_text(Chat.meta->'tags') elem WHERE elem = :tag_id)"
-                    )
-                ).params(tag_id=tag_id)
-
-            else:
-                raise NotImplementedError(
-                    f"Unsupported dialect: {db.bind.dialect.name}"
+        with get_db() as db:
+            rows = (
+                db.query(ChatTag.tag_id, func.count(ChatTag.chat_id))
+                .join(Chat, Chat.id == ChatTag.chat_id)
+                .filter(
+                    ChatTag.user_id == user_id,
+                    ChatTag.tag_id.in_(tag_ids),
+                    Chat.archived == False,
                 )
-
-            # Get the count of matching records
-            count = query.count()
-
-            # Debugging output for inspection
-            log.info(f"Count of chats for tag '{tag_name}': {count}")
-
-            return count
+                .group_by(ChatTag.tag_id)
+                .all()
+            )
+            return {tag_id: count for tag_id, count in rows}
 
     def delete_tag_by_id_and_user_id_and_tag_name(
         self, id: str, user_id: str, tag_name: str
@@ -827,11 +1180,7 @@ class ChatTable:
                 tags = chat.meta.get("tags", [])
                 tag_id = tag_name.replace(" ", "_").lower()
 
-                tags = [tag for tag in tags if tag != tag_id]
-                chat.meta = {
-                    **chat.meta,
-                    "tags": list(set(tags)),
-                }
+                self._set_chat_tags(db, chat, [tag for tag in tags if tag != tag_id])
                 db.commit()
                 return True
         except Exception:
@@ -841,10 +1190,7 @@ class ChatTable:
         try:
             with get_db() as db:
                 chat = db.get(Chat, id)
-                chat.meta = {
-                    **chat.meta,
-                    "tags": [],
-                }
+                self._set_chat_tags(db, chat, [])
                 db.commit()
 
                 return True
@@ -855,8 +1201,10 @@ class ChatTable:
         try:
             with get_db() as db:
                 db.query(Chat).filter_by(id=id).delete()
+                db.query(ChatTag).filter_by(chat_id=id).delete()
                 db.commit()
 
+                ChatMessages.delete_messages_by_chat_id(id)
                 return True and self.delete_shared_chat_by_chat_id(id)
         except Exception:
             return False
@@ -865,8 +1213,10 @@ class ChatTable:
         try:
             with get_db() as db:
                 db.query(Chat).filter_by(id=id, user_id=user_id).delete()
+                db.query(ChatTag).filter_by(chat_id=id, user_id=user_id).delete()
                 db.commit()
 
+                ChatMessages.delete_messages_by_chat_id(id)
                 return True and self.delete_shared_chat_by_chat_id(id)
         except Exception:
             return False
@@ -876,7 +1226,14 @@ class ChatTable:
             with get_db() as db:
                 self.delete_shared_chats_by_user_id(user_id)
 
+                chat_ids = [
+                    chat.id
+                    for chat in db.query(Chat.id).filter_by(user_id=user_id).all()
+                ]
+                ChatMessages.delete_messages_by_chat_ids(chat_ids)
+
                 db.query(Chat).filter_by(user_id=user_id).delete()
+                db.query(ChatTag).filter_by(user_id=user_id).delete()
                 db.commit()
 
                 return True
@@ -888,7 +1245,16 @@ class ChatTable:
     ) -> bool:
         try:
             with get_db() as db:
+                chat_ids = [
+                    chat.id
+                    for chat in db.query(Chat.id)
+                    .filter_by(user_id=user_id, folder_id=folder_id)
+                    .all()
+                ]
+                ChatMessages.delete_messages_by_chat_ids(chat_ids)
+
                 db.query(Chat).filter_by(user_id=user_id, folder_id=folder_id).delete()
+                db.query(ChatTag).filter(ChatTag.chat_id.in_(chat_ids)).delete()
                 db.commit()
 
                 return True
@@ -910,3 +1276,73 @@ class ChatTable:
 
 
 Chats = ChatTable()
+
+
+class AsyncChatTable:
+    """
+    Async variants of the `ChatTable` reads on the hot request paths. They
+    execute the statements `ChatTable` builds, so both stay in step.
+    """
+
+    async def _load_history_messages(self, chat: ChatModel) -> ChatModel:
+        messages = await AsyncChatMessages.get_message_list_by_chat_id(chat.id)
+        return Chats._apply_history_messages(chat, messages)
+
+    @sync_fallback(Chats.get_chat_by_id)
+    async def get_chat_by_id(self, id: str) -> Optional[ChatModel]:
+        try:
+            async with get_async_db() as db:
+                chat = await db.scalar(Chats._select_chat_by_id(id))
+                return await self._load_history_messages(ChatModel.model_validate(chat))
+        except Exception:
+            return None
+
+    @sync_fallback(Chats.get_chat_by_id_and_user_id)
+    async def get_chat_by_id_and_user_id(
+        self, id: str, user_id: str
+    ) -> Optional[ChatModel]:
+        try:
+            async with get_async_db() as db:
+                chat = await db.scalar(Chats._select_chat_by_id(id, user_id))
+                return await self._load_history_messages(ChatModel.model_validate(chat))
+        except Exception:
+            return None
+
+    @sync_fallback(Chats.get_chat_title_id_list_by_user_id)
+    async def get_chat_title_id_list_by_user_id(
+        self,
+        user_id: str,
+        include_archived: bool = False,
+        skip: Optional[int] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        include_all: bool = False,
+    ) -> list[ChatTitleIdResponse]:
+        async with get_async_db() as db:
+            query = Chats._select_chat_title_id_list(
+                user_id, include_archived, skip, limit, cursor, include_all
+            )
+            all_chats = await db.execute(query)
+            return [ChatTitleIdResponse.model_validate(chat) for chat in all_chats]
+
+    async def get_chats_by_user_id_and_search_text(
+        self,
+        user_id: str,
+        search_text: str,
+        include_archived: bool = False,
+        skip: int = 0,
+        limit: int = 60,
+    ) -> list[ChatModel]:
+        # The search builds dialect specific full-text queries (and ranks
+        # them) on the sync engine, it runs as is off the event loop
+        return await run_in_threadpool(
+            Chats.get_chats_by_user_id_and_search_text,
+            user_id,
+            search_text,
+            include_archived,
+            skip,
+            limit,
+        )
+
+
+AsyncChats = AsyncChatTable()
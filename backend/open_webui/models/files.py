@@ -2,7 +2,13 @@ import logging
 import time
 from typing import Optional
 
-from open_webui.internal.db import Base, JSONField, get_db
+from open_webui.internal.db import (
+    Base,
+    JSONField,
+    get_async_db,
+    get_db,
+    sync_fallback,
+)
 from open_webui.env import SRC_LOG_LEVELS
 from pydantic import BaseModel, ConfigDict
 from sqlalchemy import BigInteger, Column, String, Text, JSON
@@ -233,3 +239,17 @@ class FilesTable:
 
 
 Files = FilesTable()
+
+
+class AsyncFilesTable:
+    @sync_fallback(Files.get_file_by_id)
+    async def get_file_by_id(self, id: str) -> Optional[FileModel]:
+        async with get_async_db() as db:
+            try:
+                file = await db.get(File, id)
+                return FileModel.model_validate(file)
+            except Exception:
+                return None
+
+
+AsyncFiles = AsyncFilesTable()
@@ -8,10 +8,11 @@ from open_webui.internal.db import Base, get_db
 from open_webui.env import SRC_LOG_LEVELS
 
 from open_webui.models.files import FileMetadataResponse
+from open_webui.utils.permission_cache import PERMISSION_CACHE
 
 
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Column, String, Text, JSON, func
+from sqlalchemy import BigInteger, Column, Index, Text, JSON
 
 
 log = logging.getLogger(__name__)
@@ -41,6 +42,18 @@ class Group(Base):
     updated_at = Column(BigInteger)
 
 
+class GroupMember(Base):
+    __tablename__ = "group_member"
+
+    # Indexed copy of `group.user_ids` for membership lookups
+    group_id = Column(Text, primary_key=True)
+    user_id = Column(Text, primary_key=True)
+
+    created_at = Column(BigInteger)
+
+    __table_args__ = (Index("group_member_user_id_idx", "user_id"),)
+
+
 class GroupModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
     id: str
@@ -88,6 +101,29 @@ class GroupUpdateForm(GroupForm):
 
 
 class GroupTable:
+    def _set_group_members(self, db, group_id: str, user_ids: list[str]):
+        user_ids = set(user_ids)
+        member_ids = {
+            user_id
+            for (user_id,) in db.query(GroupMember.user_id).filter_by(group_id=group_id)
+        }
+
+        removed_ids = member_ids - user_ids
+        if removed_ids:
+            db.query(GroupMember).filter(
+                GroupMember.group_id == group_id,
+                GroupMember.user_id.in_(removed_ids),
+            ).delete(synchronize_session=False)
+
+        db.add_all(
+            [
+                GroupMember(
+                    group_id=group_id, user_id=user_id, created_at=int(time.time())
+                )
+                for user_id in user_ids - member_ids
+            ]
+        )
+
     def insert_new_group(
         self, user_id: str, form_data: GroupForm
     ) -> Optional[GroupModel]:
@@ -105,7 +141,9 @@ class GroupTable:
             try:
                 result = Group(**group.model_dump())
                 db.add(result)
+                self._set_group_members(db, group.id, group.user_ids)
                 db.commit()
+                PERMISSION_CACHE.invalidate()
                 db.refresh(result)
                 if result:
                     return GroupModel.model_validate(result)
@@ -127,16 +165,21 @@ class GroupTable:
             return [
                 GroupModel.model_validate(group)
                 for group in db.query(Group)
-                .filter(
-                    func.json_array_length(Group.user_ids) > 0
-                )  # Ensure array exists
-                .filter(
-                    Group.user_ids.cast(String).like(f'%"{user_id}"%')
-                )  # String-based check
+                .join(GroupMember, GroupMember.group_id == Group.id)
+                .filter(GroupMember.user_id == user_id)
                 .order_by(Group.updated_at.desc())
                 .all()
             ]
 
+    def get_group_ids_by_member_id(self, user_id: str) -> list[str]:
+        with get_db() as db:
+            return [
+                group_id
+                for (group_id,) in db.query(GroupMember.group_id).filter_by(
+                    user_id=user_id
+                )
+            ]
+
     def get_group_by_id(self, id: str) -> Optional[GroupModel]:
         try:
             with get_db() as db:
@@ -152,6 +195,15 @@ class GroupTable:
         else:
             return None
 
+    def get_group_user_ids_by_ids(self, ids: list[str]) -> list[str]:
+        with get_db() as db:
+            return [
+                user_id
+                for (user_id,) in db.query(GroupMember.user_id)
+                .filter(GroupMember.group_id.in_(ids))
+                .distinct()
+            ]
+
     def update_group_by_id(
         self, id: str, form_data: GroupUpdateForm, overwrite: bool = False
     ) -> Optional[GroupModel]:
@@ -163,7 +215,10 @@ class GroupTable:
                         "updated_at": int(time.time()),
                     }
                 )
+                if form_data.user_ids is not None:
+                    self._set_group_members(db, id, form_data.user_ids)
                 db.commit()
+                PERMISSION_CACHE.invalidate()
                 return self.get_group_by_id(id=id)
         except Exception as e:
             log.exception(e)
@@ -173,7 +228,9 @@ class GroupTable:
         try:
             with get_db() as db:
                 db.query(Group).filter_by(id=id).delete()
+                db.query(GroupMember).filter_by(group_id=id).delete()
                 db.commit()
+                PERMISSION_CACHE.invalidate()
                 return True
         except Exception:
             return False
@@ -182,7 +239,9 @@ class GroupTable:
         with get_db() as db:
             try:
                 db.query(Group).delete()
+                db.query(GroupMember).delete()
                 db.commit()
+                PERMISSION_CACHE.invalidate()
 
                 return True
             except Exception:
@@ -194,14 +253,17 @@ class GroupTable:
                 groups = self.get_groups_by_member_id(user_id)
 
                 for group in groups:
-                    group.user_ids.remove(user_id)
+                    group.user_ids = [id for id in group.user_ids if id != user_id]
                     db.query(Group).filter_by(id=group.id).update(
                         {
                             "user_ids": group.user_ids,
                             "updated_at": int(time.time()),
                         }
                     )
-                    db.commit()
+
+                db.query(GroupMember).filter_by(user_id=user_id).delete()
+                db.commit()
+                PERMISSION_CACHE.invalidate()
 
                 return True
             except Exception:
@@ -0,0 +1,261 @@
+import logging
+import time
+import uuid
+from typing import Optional
+
+from open_webui.internal.db import Base, get_db
+from open_webui.env import SRC_LOG_LEVELS
+
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import BigInteger, Column, Float, Index, Integer, String, Text, JSON
+from sqlalchemy import and_, or_
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+####################
+# Ingestion Job DB Schema
+####################
+
+
+class IngestionJob(Base):
+    __tablename__ = "ingestion_job"
+
+    id = Column(String, primary_key=True)
+    user_id = Column(String)
+
+    type = Column(Text)
+    # pending, running, completed or failed
+    status = Column(Text)
+    stage = Column(Text, nullable=True)
+    progress = Column(Float, default=0.0)
+    attempts = Column(Integer, default=0)
+
+    # Input of the job, output of its completed stages and its final result
+    data = Column(JSON, nullable=True)
+    state = Column(JSON, nullable=True)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+
+    # A pending job waiting for a retry backoff or a slot of its user is due
+    # again at `run_after`
+    run_after = Column(BigInteger, nullable=True)
+
+    created_at = Column(BigInteger)
+    updated_at = Column(BigInteger)
+
+    __table_args__ = (
+        Index("ingestion_job_user_id_created_at_idx", "user_id", "created_at"),
+        Index("ingestion_job_status_updated_at_idx", "status", "updated_at"),
+    )
+
+
+class IngestionJobModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    user_id: str
+
+    type: str
+    status: str
+    stage: Optional[str] = None
+    progress: float = 0.0
+    attempts: int = 0
+
+    data: Optional[dict] = None
+    state: Optional[dict] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+
+    run_after: Optional[int] = None  # timestamp in epoch
+
+    created_at: int  # timestamp in epoch
+    updated_at: int  # timestamp in epoch
+
+
+####################
+# Forms
+####################
+
+
+class IngestionJobResponse(BaseModel):
+    id: str
+    user_id: str
+
+    type: str
+    status: str
+    stage: Optional[str] = None
+    progress: float = 0.0
+    attempts: int = 0
+
+    data: Optional[dict] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+
+    run_after: Optional[int] = None  # timestamp in epoch
+
+    created_at: int  # timestamp in epoch
+    updated_at: int  # timestamp in epoch
+
+
+class IngestionJobsTable:
+    def insert_new_job(
+        self, user_id: str, type: str, data: dict
+    ) -> Optional[IngestionJobModel]:
+        with get_db() as db:
+            timestamp = int(time.time())
+            job = IngestionJob(
+                id=str(uuid.uuid4()),
+                user_id=user_id,
+                type=type,
+                status="pending",
+                progress=0.0,
+                attempts=0,
+                data=data,
+                state={},
+                created_at=timestamp,
+                updated_at=timestamp,
+            )
+
+            try:
+                db.add(job)
+                db.commit()
+                db.refresh(job)
+                return IngestionJobModel.model_validate(job)
+            except Exception as e:
+                log.exception(f"Error inserting a new ingestion job: {e}")
+                return None
+
+    def get_job_by_id(self, id: str) -> Optional[IngestionJobModel]:
+        with get_db() as db:
+            job = db.get(IngestionJob, id)
+            return IngestionJobModel.model_validate(job) if job else None
+
+    def get_jobs_by_user_id(
+        self, user_id: str, limit: int = 50
+    ) -> list[IngestionJobModel]:
+        with get_db() as db:
+            return [
+                IngestionJobModel.model_validate(job)
+                for job in db.query(IngestionJob)
+                .filter_by(user_id=user_id)
+                .order_by(IngestionJob.created_at.desc())
+                .limit(limit)
+            ]
+
+    def requeue_pending_jobs(self, now: int, queued_before: int) -> list[str]:
+        """
+        Returns the pending jobs that are due but may not be in the queue: the
+        deferred jobs whose `run_after` has passed, and the jobs queued before
+        `queued_before` that no worker picked up. Their `run_after` is cleared
+        and `updated_at` reset, so each job is returned to one caller once.
+        """
+        due = and_(
+            IngestionJob.status == "pending",
+            or_(
+                IngestionJob.run_after <= now,
+                and_(
+                    IngestionJob.run_after.is_(None),
+                    IngestionJob.updated_at < queued_before,
+                ),
+            ),
+        )
+
+        with get_db() as db:
+            ids = [
+                row.id
+                for row in db.query(IngestionJob.id)
+                .filter(due)
+                .order_by(IngestionJob.created_at)
+            ]
+
+            requeued_ids = []
+            for id in ids:
+                if (
+                    db.query(IngestionJob)
+                    .filter(IngestionJob.id == id, due)
+                    .update(
+                        {
+                            IngestionJob.run_after: None,
+                            IngestionJob.updated_at: int(time.time()),
+                        },
+                        synchronize_session=False,
+                    )
+                ):
+                    requeued_ids.append(id)
+            db.commit()
+            return requeued_ids
+
+    def claim_job_by_id(self, id: str) -> bool:
+        """
+        Marks a pending job as running. Only one of the workers that try to
+        claim the same job succeeds, so a job queued twice runs once.
+        """
+        with get_db() as db:
+            claimed = (
+                db.query(IngestionJob)
+                .filter_by(id=id, status="pending")
+                .update(
+                    {
+                        IngestionJob.status: "running",
+                        IngestionJob.attempts: IngestionJob.attempts + 1,
+                        IngestionJob.run_after: None,
+                        IngestionJob.updated_at: int(time.time()),
+                    },
+                    synchronize_session=False,
+                )
+            )
+            db.commit()
+            return claimed == 1
+
+    def reset_stale_jobs(self, updated_before: int) -> list[str]:
+        """
+        Marks running jobs not updated since `updated_before` as pending again,
+        their worker stopped without finishing them.
+        """
+        with get_db() as db:
+            ids = [
+                row.id
+                for row in db.query(IngestionJob.id).filter(
+                    IngestionJob.status == "running",
+                    IngestionJob.updated_at < updated_before,
+                )
+            ]
+
+            reset_ids = []
+            for id in ids:
+                if (
+                    db.query(IngestionJob)
+                    .filter(
+                        IngestionJob.id == id,
+                        IngestionJob.status == "running",
+                        IngestionJob.updated_at < updated_before,
+                    )
+                    .update(
+                        {
+                            IngestionJob.status: "pending",
+                            IngestionJob.updated_at: int(time.time()),
+                        },
+                        synchronize_session=False,
+                    )
+                ):
+                    reset_ids.append(id)
+            db.commit()
+            return reset_ids
+
+    def update_job_by_id(self, id: str, **updated) -> Optional[IngestionJobModel]:
+        with get_db() as db:
+            job = db.get(IngestionJob, id)
+            if job is None:
+                return None
+
+            for key, value in updated.items():
+                setattr(job, key, value)
+            job.updated_at = int(time.time())
+
+            db.commit()
+            db.refresh(job)
+            return IngestionJobModel.model_validate(job)
+
+
+IngestionJobs = IngestionJobsTable()
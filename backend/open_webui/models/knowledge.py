@@ -4,7 +4,7 @@ import time
 from typing import Optional
 import uuid
 
-from open_webui.internal.db import Base, get_db
+from open_webui.internal.db import Base, get_async_db, get_db, sync_fallback
 from open_webui.env import SRC_LOG_LEVELS
 
 from open_webui.models.files import FileMetadataResponse
@@ -12,7 +12,7 @@ from open_webui.models.users import Users, UserResponse
 
 
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Column, String, Text, JSON
+from sqlalchemy import BigInteger, Column, String, Text, JSON, select
 
 from open_webui.utils.access_control import has_access
 
@@ -219,3 +219,17 @@ class KnowledgeTable:
 
 
 Knowledges = KnowledgeTable()
+
+
+class AsyncKnowledgeTable:
+    @sync_fallback(Knowledges.get_knowledge_by_id)
+    async def get_knowledge_by_id(self, id: str) -> Optional[KnowledgeModel]:
+        try:
+            async with get_async_db() as db:
+                knowledge = await db.scalar(select(Knowledge).filter_by(id=id))
+                return KnowledgeModel.model_validate(knowledge) if knowledge else None
+        except Exception:
+            return None
+
+
+AsyncKnowledges = AsyncKnowledgeTable()
@@ -3,7 +3,7 @@ import time
 import uuid
 from typing import Optional
 
-from open_webui.internal.db import Base, get_db
+from open_webui.internal.db import Base, get_async_db, get_db, sync_fallback
 from open_webui.models.tags import TagModel, Tag, Tags
 
 
@@ -94,6 +94,43 @@ class MessageResponse(MessageModel):
     reactions: list[Reactions]
 
 
+class MessageReplyStats(BaseModel):
+    reply_count: int = 0
+    latest_reply_at: Optional[int] = None
+
+
+def group_reactions(all_reactions) -> dict[str, list[Reactions]]:
+    """Groups reaction rows by message, then by reaction name."""
+    reactions_by_message_id = {}
+    for reaction in all_reactions:
+        reactions = reactions_by_message_id.setdefault(reaction.message_id, {})
+        if reaction.name not in reactions:
+            reactions[reaction.name] = {
+                "name": reaction.name,
+                "user_ids": [],
+                "count": 0,
+            }
+        reactions[reaction.name]["user_ids"].append(reaction.user_id)
+        reactions[reaction.name]["count"] += 1
+
+    return {
+        message_id: [Reactions(**reaction) for reaction in reactions.values()]
+        for message_id, reactions in reactions_by_message_id.items()
+    }
+
+
+def get_reply_stats_query(ids: list[str]):
+    return (
+        select(
+            Message.parent_id,
+            func.count(Message.id),
+            func.max(Message.created_at),
+        )
+        .filter(Message.parent_id.in_(ids))
+        .group_by(Message.parent_id)
+    )
+
+
 class MessageTable:
     def insert_new_message(
         self, form_data: MessageForm, channel_id: str, user_id: str
@@ -150,6 +187,23 @@ class MessageTable:
             )
             return [MessageModel.model_validate(message) for message in all_messages]
 
+    def get_reply_stats_by_message_ids(
+        self, ids: list[str]
+    ) -> dict[str, MessageReplyStats]:
+        """Counts the replies of each message and finds the latest one in a single query."""
+        if not ids:
+            return {}
+
+        with get_db() as db:
+            return {
+                parent_id: MessageReplyStats(
+                    reply_count=count, latest_reply_at=latest_reply_at
+                )
+                for parent_id, count, latest_reply_at in db.execute(
+                    get_reply_stats_query(ids)
+                )
+            }
+
     def get_reply_user_ids_by_message_id(self, id: str) -> list[str]:
         with get_db() as db:
             return [
@@ -227,21 +281,22 @@ class MessageTable:
             return MessageReactionModel.model_validate(result) if result else None
 
     def get_reactions_by_message_id(self, id: str) -> list[Reactions]:
-        with get_db() as db:
-            all_reactions = db.query(MessageReaction).filter_by(message_id=id).all()
+        return self.get_reactions_by_message_ids([id]).get(id, [])
 
-            reactions = {}
-            for reaction in all_reactions:
-                if reaction.name not in reactions:
-                    reactions[reaction.name] = {
-                        "name": reaction.name,
-                        "user_ids": [],
-                        "count": 0,
-                    }
-                reactions[reaction.name]["user_ids"].append(reaction.user_id)
-                reactions[reaction.name]["count"] += 1
+    def get_reactions_by_message_ids(
+        self, ids: list[str]
+    ) -> dict[str, list[Reactions]]:
+        if not ids:
+            return {}
 
-            return [Reactions(**reaction) for reaction in reactions.values()]
+        with get_db() as db:
+            all_reactions = (
+                db.query(MessageReaction)
+                .filter(MessageReaction.message_id.in_(ids))
+                .order_by(MessageReaction.created_at)
+                .all()
+            )
+            return group_reactions(all_reactions)
 
     def remove_reaction_by_id_and_user_id_and_name(
         self, id: str, user_id: str, name: str
@@ -277,3 +332,72 @@ class MessageTable:
 
 
 Messages = MessageTable()
+
+
+class AsyncMessageTable:
+    """
+    Async variants of the `MessageTable` reads on the hot request paths.
+    """
+
+    @sync_fallback(Messages.get_replies_by_message_id)
+    async def get_replies_by_message_id(self, id: str) -> list[MessageModel]:
+        async with get_async_db() as db:
+            all_messages = await db.scalars(
+                select(Message)
+                .filter_by(parent_id=id)
+                .order_by(Message.created_at.desc())
+            )
+            return [MessageModel.model_validate(message) for message in all_messages]
+
+    @sync_fallback(Messages.get_messages_by_channel_id)
+    async def get_messages_by_channel_id(
+        self, channel_id: str, skip: int = 0, limit: int = 50
+    ) -> list[MessageModel]:
+        async with get_async_db() as db:
+            all_messages = await db.scalars(
+                select(Message)
+                .filter_by(channel_id=channel_id, parent_id=None)
+                .order_by(Message.created_at.desc())
+                .offset(skip)
+                .limit(limit)
+            )
+            return [MessageModel.model_validate(message) for message in all_messages]
+
+    @sync_fallback(Messages.get_reply_stats_by_message_ids)
+    async def get_reply_stats_by_message_ids(
+        self, ids: list[str]
+    ) -> dict[str, MessageReplyStats]:
+        if not ids:
+            return {}
+
+        async with get_async_db() as db:
+            return {
+                parent_id: MessageReplyStats(
+                    reply_count=count, latest_reply_at=latest_reply_at
+                )
+                for parent_id, count, latest_reply_at in await db.execute(
+                    get_reply_stats_query(ids)
+                )
+            }
+
+    @sync_fallback(Messages.get_reactions_by_message_id)
+    async def get_reactions_by_message_id(self, id: str) -> list[Reactions]:
+        return (await self.get_reactions_by_message_ids([id])).get(id, [])
+
+    @sync_fallback(Messages.get_reactions_by_message_ids)
+    async def get_reactions_by_message_ids(
+        self, ids: list[str]
+    ) -> dict[str, list[Reactions]]:
+        if not ids:
+            return {}
+
+        async with get_async_db() as db:
+            all_reactions = await db.scalars(
+                select(MessageReaction)
+                .filter(MessageReaction.message_id.in_(ids))
+                .order_by(MessageReaction.created_at)
+            )
+            return group_reactions(all_reactions)
+
+
+AsyncMessages = AsyncMessageTable()
@@ -15,7 +15,7 @@ from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy import BigInteger, Column, Text, JSON, Boolean
 
 
-from open_webui.utils.access_control import has_access
+from open_webui.utils.access_control import get_user_group_ids, has_access
 
 
 log = logging.getLogger(__name__)
@@ -199,13 +199,42 @@ class ModelsTable:
         self, user_id: str, permission: str = "write"
     ) -> list[ModelUserResponse]:
         models = self.get_models()
+        user_group_ids = get_user_group_ids(user_id)
         return [
             model
             for model in models
             if model.user_id == user_id
-            or has_access(user_id, permission, model.access_control)
+            or has_access(user_id, permission, model.access_control, user_group_ids)
         ]
 
+    def get_accessible_model_ids(
+        self,
+        user_id: str,
+        ids: list[str],
+        permission: str = "read",
+        user_group_ids: Optional[set[str]] = None,
+    ) -> set[str]:
+        """
+        Returns the ids out of `ids` the user owns or has `permission` access
+        to, loading the access control of all models in a single query.
+        """
+        if user_group_ids is None:
+            user_group_ids = get_user_group_ids(user_id)
+
+        with get_db() as db:
+            rows = (
+                db.query(Model.id, Model.user_id, Model.access_control)
+                .filter(Model.id.in_(ids))
+                .all()
+            )
+
+        return {
+            id
+            for id, model_user_id, access_control in rows
+            if model_user_id == user_id
+            or has_access(user_id, permission, access_control, user_group_ids)
+        }
+
     def get_model_by_id(self, id: str) -> Optional[ModelModel]:
         try:
             with get_db() as db:
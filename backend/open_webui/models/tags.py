@@ -64,6 +64,38 @@ class TagTable:
                 log.exception(f"Error inserting a new tag: {e}")
                 return None
 
+    def insert_new_tags(self, names: list[str], user_id: str) -> list[TagModel]:
+        """Returns the tags of `names`, creating the missing ones in one transaction."""
+        names_by_id = {}
+        for name in names:
+            names_by_id.setdefault(name.replace(" ", "_").lower(), name)
+        if not names_by_id:
+            return []
+
+        with get_db() as db:
+            tags = {
+                tag.id: TagModel.model_validate(tag)
+                for tag in db.query(Tag)
+                .filter(Tag.id.in_(names_by_id), Tag.user_id == user_id)
+                .all()
+            }
+            new_tags = [
+                TagModel(id=id, user_id=user_id, name=name)
+                for id, name in names_by_id.items()
+                if id not in tags
+            ]
+
+            if new_tags:
+                try:
+                    db.add_all([Tag(**tag.model_dump()) for tag in new_tags])
+                    db.commit()
+                    tags.update({tag.id: tag for tag in new_tags})
+                except Exception as e:
+                    log.exception(f"Error inserting new tags: {e}")
+                    return self.get_tags_by_ids_and_user_id(list(names_by_id), user_id)
+
+            return [tags[id] for id in names_by_id]
+
     def get_tag_by_name_and_user_id(
         self, name: str, user_id: str
     ) -> Optional[TagModel]:
@@ -93,6 +125,19 @@ class TagTable:
                 )
             ]
 
+    def delete_tags_by_ids_and_user_id(self, ids: list[str], user_id: str) -> bool:
+        if not ids:
+            return True
+
+        try:
+            with get_db() as db:
+                db.query(Tag).filter(Tag.id.in_(ids), Tag.user_id == user_id).delete()
+                db.commit()
+                return True
+        except Exception as e:
+            log.error(f"delete_tags: {e}")
+            return False
+
     def delete_tag_by_name_and_user_id(self, name: str, user_id: str) -> bool:
         try:
             with get_db() as db:
@@ -6,10 +6,11 @@ from open_webui.internal.db import Base, JSONField, get_db
 
 from open_webui.models.chats import Chats
 from open_webui.models.groups import Groups
+from open_webui.utils.user_cache import USER_CACHE
 
 
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Column, String, Text
+from sqlalchemy import BigInteger, Column, String, Text, case
 
 ####################
 # User DB Schema
@@ -213,6 +214,7 @@ class UsersTable:
             with get_db() as db:
                 db.query(User).filter_by(id=id).update({"role": role})
                 db.commit()
+                USER_CACHE.invalidate(id)
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
         except Exception:
@@ -227,6 +229,7 @@ class UsersTable:
                     {"profile_image_url": profile_image_url}
                 )
                 db.commit()
+                USER_CACHE.invalidate(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -246,6 +249,18 @@ class UsersTable:
         except Exception:
             return None
 
+    def update_users_last_active_by_ids(self, last_active: dict[str, int]):
+        """
+        Sets the last active timestamp of many users in a single update,
+        `last_active` maps user ids to their timestamp.
+        """
+        with get_db() as db:
+            db.query(User).filter(User.id.in_(list(last_active.keys()))).update(
+                {"last_active_at": case(last_active, value=User.id)},
+                synchronize_session=False,
+            )
+            db.commit()
+
     def update_user_oauth_sub_by_id(
         self, id: str, oauth_sub: str
     ) -> Optional[UserModel]:
@@ -253,6 +268,7 @@ class UsersTable:
             with get_db() as db:
                 db.query(User).filter_by(id=id).update({"oauth_sub": oauth_sub})
                 db.commit()
+                USER_CACHE.invalidate(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -264,6 +280,7 @@ class UsersTable:
             with get_db() as db:
                 db.query(User).filter_by(id=id).update(updated)
                 db.commit()
+                USER_CACHE.invalidate(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -283,6 +300,7 @@ class UsersTable:
 
                 db.query(User).filter_by(id=id).update({"settings": user_settings})
                 db.commit()
+                USER_CACHE.invalidate(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -301,6 +319,7 @@ class UsersTable:
                     # Delete User
                     db.query(User).filter_by(id=id).delete()
                     db.commit()
+                    USER_CACHE.invalidate(id)
 
                 return True
             else:
@@ -311,8 +330,10 @@ class UsersTable:
     def update_user_api_key_by_id(self, id: str, api_key: str) -> str:
         try:
             with get_db() as db:
+                # Invalidates the previous key as well, its entry belongs to the user
                 result = db.query(User).filter_by(id=id).update({"api_key": api_key})
                 db.commit()
+                USER_CACHE.invalidate(id)
                 return True if result == 1 else False
         except Exception:
             return False
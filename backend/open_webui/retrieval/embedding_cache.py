@@ -0,0 +1,254 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from typing import Callable, Optional
+
+import numpy as np
+
+from open_webui.utils.redis import get_redis_connection, get_sentinels_from_env
+from open_webui.config import (
+    CACHE_DIR,
+    RAG_EMBEDDING_CACHE,
+    RAG_EMBEDDING_CACHE_MAX_ENTRIES,
+    RAG_EMBEDDING_CACHE_TTL,
+)
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    REDIS_URL,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+class EmbeddingCacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.evictions = 0
+
+    def to_dict(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "errors": self.errors,
+            "evictions": self.evictions,
+        }
+
+
+EMBEDDING_CACHE_STATS = EmbeddingCacheStats()
+
+
+def get_embedding_cache_key(
+    engine: str, model: str, url: Optional[str], prefix: Optional[str], text: str
+) -> str:
+    # Servers behind different URLs may serve different models under one name
+    text_hash = hashlib.sha256(
+        f"{url or ''}\0{prefix or ''}\0{text}".encode()
+    ).hexdigest()
+    return f"{engine or 'local'}:{model}:{text_hash}"
+
+
+def to_bytes(embedding: list[float]) -> bytes:
+    return np.asarray(embedding, dtype=np.float32).tobytes()
+
+
+def from_bytes(value: bytes) -> list[float]:
+    return np.frombuffer(value, dtype=np.float32).tolist()
+
+
+class SQLiteEmbeddingCache:
+    """
+    Embeddings stored as float32 blobs in a SQLite file. Once the file holds
+    more than `max_entries`, the least recently used tenth is evicted.
+    """
+
+    def __init__(self, path: str, max_entries: int = RAG_EMBEDDING_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.local = threading.local()
+        self.count: Optional[int] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embedding (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    accessed_at INTEGER NOT NULL
+                )
+                """
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS embedding_accessed_at_idx "
+                "ON embedding (accessed_at)"
+            )
+            self.local.connection = connection
+        return connection
+
+    def get_many(self, keys: list[str]) -> dict[str, list[float]]:
+        connection = self._connection()
+        embeddings = {}
+        for i in range(0, len(keys), 500):
+            batch = keys[i : i + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows = connection.execute(
+                f"SELECT key, value FROM embedding WHERE key IN ({placeholders})",
+                batch,
+            ).fetchall()
+            if rows:
+                connection.execute(
+                    f"UPDATE embedding SET accessed_at = ? WHERE key IN ({placeholders})",
+                    [int(time.time()), *batch],
+                )
+            embeddings.update((key, from_bytes(value)) for key, value in rows)
+        return embeddings
+
+    def set_many(self, embeddings: dict[str, list[float]]):
+        connection = self._connection()
+        timestamp = int(time.time())
+        connection.executemany(
+            "INSERT OR REPLACE INTO embedding (key, value, accessed_at) VALUES (?, ?, ?)",
+            [(key, to_bytes(value), timestamp) for key, value in embeddings.items()],
+        )
+
+        # Other workers write to the same file, the count is only an estimate
+        # between evictions
+        if self.count is None:
+            self.count = connection.execute(
+                "SELECT COUNT(*) FROM embedding"
+            ).fetchone()[0]
+        else:
+            self.count += len(embeddings)
+
+        if self.count > self.max_entries:
+            self.evict(connection)
+
+    def evict(self, connection: sqlite3.Connection):
+        keep = int(self.max_entries * 0.9)
+        cursor = connection.execute(
+            "DELETE FROM embedding WHERE key IN ("
+            "SELECT key FROM embedding ORDER BY accessed_at DESC LIMIT -1 OFFSET ?"
+            ")",
+            (keep,),
+        )
+        EMBEDDING_CACHE_STATS.evictions += max(cursor.rowcount, 0)
+        self.count = connection.execute("SELECT COUNT(*) FROM embedding").fetchone()[0]
+
+
+class RedisEmbeddingCache:
+    """Embeddings stored as float32 strings in Redis, expiring after `ttl` seconds."""
+
+    def __init__(
+        self,
+        redis_url: str,
+        redis_sentinels: list = [],
+        ttl: int = RAG_EMBEDDING_CACHE_TTL,
+        name: str = "open-webui:embedding",
+    ):
+        self.redis = get_redis_connection(
+            redis_url, redis_sentinels, decode_responses=False
+        )
+        self.ttl = ttl
+        self.name = name
+
+    def get_many(self, keys: list[str]) -> dict[str, list[float]]:
+        values = self.redis.mget([f"{self.name}:{key}" for key in keys])
+        return {
+            key: from_bytes(value)
+            for key, value in zip(keys, values)
+            if value is not None
+        }
+
+    def set_many(self, embeddings: dict[str, list[float]]):
+        pipe = self.redis.pipeline(transaction=False)
+        for key, value in embeddings.items():
+            pipe.set(f"{self.name}:{key}", to_bytes(value), ex=self.ttl)
+        pipe.execute()
+
+
+def get_cached_embedding_function(
+    cache,
+    engine: str,
+    model: str,
+    embedding_function: Callable,
+    url: Optional[str] = None,
+) -> Callable:
+    """
+    Wraps an embedding function so that only texts not found in `cache` are
+    embedded. Cache errors are logged and the texts are embedded as usual.
+    """
+    if cache is None:
+        return embedding_function
+
+    def cached_embedding_function(query, prefix=None, user=None):
+        texts = query if isinstance(query, list) else [query]
+        keys = [
+            get_embedding_cache_key(engine, model, url, prefix, text) for text in texts
+        ]
+
+        cached = {}
+        try:
+            cached = cache.get_many(list(dict.fromkeys(keys)))
+        except Exception as e:
+            EMBEDDING_CACHE_STATS.errors += 1
+            log.warning(f"Error reading cached embeddings: {e}")
+
+        # Texts repeated in the request are embedded once
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached:
+                missing.setdefault(key, text)
+
+        EMBEDDING_CACHE_STATS.hits += len(texts) - len(missing)
+        EMBEDDING_CACHE_STATS.misses += len(missing)
+
+        if missing:
+            embeddings = embedding_function(
+                list(missing.values()), prefix=prefix, user=user
+            )
+            if embeddings is None:
+                return None
+
+            generated = dict(zip(missing, embeddings))
+            try:
+                cache.set_many(
+                    {key: value for key, value in generated.items() if value}
+                )
+            except Exception as e:
+                EMBEDDING_CACHE_STATS.errors += 1
+                log.warning(f"Error caching embeddings: {e}")
+            cached.update(generated)
+
+        embeddings = [cached[key] for key in keys]
+        return embeddings if isinstance(query, list) else embeddings[0]
+
+    return cached_embedding_function
+
+
+def get_embedding_cache():
+    if RAG_EMBEDDING_CACHE == "local":
+        return SQLiteEmbeddingCache(f"{CACHE_DIR}/embeddings.db")
+    elif RAG_EMBEDDING_CACHE == "redis" and REDIS_URL:
+        try:
+            return RedisEmbeddingCache(
+                REDIS_URL,
+                get_sentinels_from_env(REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT),
+            )
+        except Exception as e:
+            log.error(f"Error connecting to the embedding cache: {e}")
+    return None
+
+
+EMBEDDING_CACHE = get_embedding_cache()
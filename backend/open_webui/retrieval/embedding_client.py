@@ -0,0 +1,335 @@
+import asyncio
+import logging
+import random
+import threading
+from typing import Optional
+
+import aiohttp
+
+from open_webui.models.users import UserModel
+from open_webui.utils.session_pool import ClientSessionPool
+from open_webui.config import (
+    RAG_EMBEDDING_BATCH_MAX_TOKENS,
+    RAG_EMBEDDING_CONCURRENCY,
+    RAG_EMBEDDING_MAX_RETRIES,
+    RAG_EMBEDDING_PREFIX_FIELD_NAME,
+)
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    AIOHTTP_CLIENT_TIMEOUT,
+    ENABLE_FORWARD_USER_INFO_HEADERS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+# Rate limited or temporarily unavailable, the same request may succeed later
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Upper bound for a `Retry-After` the client is willing to wait for
+MAX_RETRY_AFTER = 60
+
+
+class EmbeddingClientStats:
+    def __init__(self):
+        self.requests = 0
+        self.texts = 0
+        self.retries = 0
+        self.splits = 0
+        self.failures = 0
+        self.in_flight = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "texts": self.texts,
+            "retries": self.retries,
+            "splits": self.splits,
+            "failures": self.failures,
+            "in_flight": self.in_flight,
+        }
+
+
+EMBEDDING_CLIENT_STATS = EmbeddingClientStats()
+
+
+def estimate_tokens(text: str) -> int:
+    # About four bytes of UTF-8 per token for English text, an overestimate
+    # for most other scripts, so no tokenizer has to be loaded
+    return len(text.encode("utf-8")) // 4 + 1
+
+
+def get_batches(
+    texts: list[str], batch_size: Optional[int], max_tokens: int
+) -> list[tuple[int, int]]:
+    """
+    Splits texts into `(start, end)` ranges of at most `batch_size` texts and
+    `max_tokens` estimated tokens. A text longer than `max_tokens` is sent in
+    a batch of its own.
+    """
+    batches = []
+    start = 0
+    tokens = 0
+    for i, text in enumerate(texts):
+        text_tokens = estimate_tokens(text)
+        if i > start and (
+            (batch_size and i - start >= batch_size)
+            or tokens + text_tokens > max_tokens
+        ):
+            batches.append((start, i))
+            start, tokens = i, 0
+        tokens += text_tokens
+
+    if start < len(texts):
+        batches.append((start, len(texts)))
+    return batches
+
+
+def get_headers(key: str, user: Optional[UserModel]) -> dict:
+    return {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {key}",
+        **(
+            {
+                "X-OpenWebUI-User-Name": user.name,
+                "X-OpenWebUI-User-Id": user.id,
+                "X-OpenWebUI-User-Email": user.email,
+                "X-OpenWebUI-User-Role": user.role,
+            }
+            if ENABLE_FORWARD_USER_INFO_HEADERS and user
+            else {}
+        ),
+    }
+
+
+def get_retry_after(e: aiohttp.ClientResponseError) -> Optional[float]:
+    try:
+        return min(float(e.headers["Retry-After"]), MAX_RETRY_AFTER)
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class EmbeddingClient:
+    """
+    Embeds texts with the OpenAI or Ollama API, sending the batches of a call
+    concurrently over pooled connections and retrying rate limited or failed
+    batches with exponential backoff. Embeddings are returned in input order.
+
+    Requests run on an event loop thread owned by the client, so sync callers
+    on worker threads and async callers share its connections and its limit
+    of `concurrency` requests in flight.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = RAG_EMBEDDING_CONCURRENCY,
+        max_batch_tokens: int = RAG_EMBEDDING_BATCH_MAX_TOKENS,
+        max_retries: int = RAG_EMBEDDING_MAX_RETRIES,
+        backoff: float = 0.5,
+    ):
+        self.concurrency = max(concurrency, 1)
+        self.max_batch_tokens = max_batch_tokens
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+        self.session_pool = ClientSessionPool()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.semaphore: Optional[asyncio.Semaphore] = None
+        self.lock = threading.Lock()
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self.lock:
+            if self.loop is None:
+                self.loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self.loop.run_forever,
+                    name="embedding-client",
+                    daemon=True,
+                ).start()
+            return self.loop
+
+    async def embed(
+        self,
+        engine: str,
+        model: str,
+        texts: list[str],
+        url: str,
+        key: str = "",
+        prefix: Optional[str] = None,
+        user: Optional[UserModel] = None,
+        batch_size: Optional[int] = None,
+    ) -> list[list[float]]:
+        future = asyncio.run_coroutine_threadsafe(
+            self._embed(engine, model, texts, url, key, prefix, user, batch_size),
+            self._get_loop(),
+        )
+        return await asyncio.wrap_future(future)
+
+    def embed_sync(
+        self,
+        engine: str,
+        model: str,
+        texts: list[str],
+        url: str,
+        key: str = "",
+        prefix: Optional[str] = None,
+        user: Optional[UserModel] = None,
+        batch_size: Optional[int] = None,
+    ) -> list[list[float]]:
+        """Blocking `embed`, for callers outside of an event loop."""
+        future = asyncio.run_coroutine_threadsafe(
+            self._embed(engine, model, texts, url, key, prefix, user, batch_size),
+            self._get_loop(),
+        )
+        return future.result()
+
+    async def close(self):
+        if self.loop is not None:
+            await asyncio.wrap_future(
+                asyncio.run_coroutine_threadsafe(self.session_pool.close(), self.loop)
+            )
+
+    async def _embed(
+        self,
+        engine: str,
+        model: str,
+        texts: list[str],
+        url: str,
+        key: str,
+        prefix: Optional[str],
+        user: Optional[UserModel],
+        batch_size: Optional[int],
+    ) -> list[list[float]]:
+        if engine not in ["openai", "ollama"]:
+            raise ValueError(f"Unknown embedding engine: {engine}")
+        if not texts:
+            return []
+
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.concurrency)
+
+        def embed_batch(batch: list[str]):
+            return self._embed_batch(engine, model, batch, url, key, prefix, user)
+
+        tasks = [
+            asyncio.ensure_future(embed_batch(texts[start:end]))
+            for start, end in get_batches(texts, batch_size, self.max_batch_tokens)
+        ]
+        try:
+            results = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            EMBEDDING_CLIENT_STATS.failures += 1
+            raise
+
+        return [embedding for embeddings in results for embedding in embeddings]
+
+    async def _embed_batch(
+        self,
+        engine: str,
+        model: str,
+        texts: list[str],
+        url: str,
+        key: str,
+        prefix: Optional[str],
+        user: Optional[UserModel],
+    ) -> list[list[float]]:
+        attempt = 0
+        while True:
+            try:
+                async with self.semaphore:
+                    return await self._post(
+                        engine, model, texts, url, key, prefix, user
+                    )
+            except aiohttp.ClientResponseError as e:
+                # The token estimate was off, halve the batch instead of retrying
+                if e.status == 413 and len(texts) > 1:
+                    EMBEDDING_CLIENT_STATS.splits += 1
+                    middle = len(texts) // 2
+                    first, second = await asyncio.gather(
+                        self._embed_batch(
+                            engine, model, texts[:middle], url, key, prefix, user
+                        ),
+                        self._embed_batch(
+                            engine, model, texts[middle:], url, key, prefix, user
+                        ),
+                    )
+                    return first + second
+
+                if e.status not in RETRY_STATUSES or attempt >= self.max_retries:
+                    raise
+                delay = get_retry_after(e)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt >= self.max_retries:
+                    raise
+                delay = None
+
+            if delay is None:
+                delay = self.backoff * 2**attempt + random.uniform(0, self.backoff)
+
+            attempt += 1
+            EMBEDDING_CLIENT_STATS.retries += 1
+            log.debug(f"Retrying embedding batch in {delay:.2f}s (attempt {attempt})")
+            await asyncio.sleep(delay)
+
+    async def _post(
+        self,
+        engine: str,
+        model: str,
+        texts: list[str],
+        url: str,
+        key: str,
+        prefix: Optional[str],
+        user: Optional[UserModel],
+    ) -> list[list[float]]:
+        json_data = {"input": texts, "model": model}
+        if isinstance(RAG_EMBEDDING_PREFIX_FIELD_NAME, str) and isinstance(prefix, str):
+            json_data[RAG_EMBEDDING_PREFIX_FIELD_NAME] = prefix
+
+        endpoint = f"{url}/embeddings" if engine == "openai" else f"{url}/api/embed"
+        session = self.session_pool.get_session(url)
+
+        EMBEDDING_CLIENT_STATS.requests += 1
+        EMBEDDING_CLIENT_STATS.in_flight += 1
+        try:
+            async with session.post(
+                endpoint,
+                headers=get_headers(key, user),
+                json=json_data,
+                timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT),
+            ) as response:
+                if not response.ok:
+                    detail = await response.text()
+                    raise aiohttp.ClientResponseError(
+                        response.request_info,
+                        response.history,
+                        status=response.status,
+                        message=detail[:500],
+                        headers=response.headers,
+                    )
+                data = await response.json(content_type=None)
+        finally:
+            EMBEDDING_CLIENT_STATS.in_flight -= 1
+
+        if engine == "openai" and "data" in data:
+            # OpenAI does not promise the order of `data`, only its indexes
+            embeddings = [
+                item["embedding"]
+                for item in sorted(data["data"], key=lambda item: item.get("index", 0))
+            ]
+        elif engine == "ollama" and "embeddings" in data:
+            embeddings = data["embeddings"]
+        else:
+            raise ValueError(f"Unexpected embedding response: {str(data)[:500]}")
+
+        if len(embeddings) != len(texts):
+            raise ValueError(
+                f"Expected {len(texts)} embeddings, the response has {len(embeddings)}"
+            )
+
+        EMBEDDING_CLIENT_STATS.texts += len(texts)
+        return embeddings
+
+
+EMBEDDING_CLIENT = EmbeddingClient()
@@ -20,6 +20,13 @@ from langchain_community.document_loaders import (
     YoutubeLoader,
 )
 from langchain_core.documents import Document
+from open_webui.retrieval.loaders.process_pool import LoaderProcessPool
+from open_webui.config import (
+    CONTENT_EXTRACTION_MAX_MEMORY,
+    CONTENT_EXTRACTION_TIMEOUT,
+    CONTENT_EXTRACTION_WORKERS,
+    PDF_PAGES_PER_TASK,
+)
 from open_webui.env import SRC_LOG_LEVELS, GLOBAL_LOG_LEVEL
 
 logging.basicConfig(stream=sys.stdout, level=GLOBAL_LOG_LEVEL)
@@ -163,16 +170,31 @@ class DoclingLoader:
             raise Exception(f"Error calling Docling: {error_msg}")
 
 
+LOADER_PROCESS_POOL = LoaderProcessPool(
+    workers=CONTENT_EXTRACTION_WORKERS,
+    timeout=CONTENT_EXTRACTION_TIMEOUT,
+    max_memory=CONTENT_EXTRACTION_MAX_MEMORY,
+    pages_per_task=PDF_PAGES_PER_TASK,
+)
+
+# Loaders waiting on a server rather than the CPU, they stay in the request thread
+REMOTE_LOADERS = (TikaLoader, DoclingLoader, AzureAIDocumentIntelligenceLoader)
+
+
 class Loader:
-    def __init__(self, engine: str = "", **kwargs):
+    def __init__(self, engine: str = "", process_pool=LOADER_PROCESS_POOL, **kwargs):
         self.engine = engine
+        self.process_pool = process_pool
         self.kwargs = kwargs
 
     def load(
         self, filename: str, file_content_type: str, file_path: str
     ) -> list[Document]:
         loader = self._get_loader(filename, file_content_type, file_path)
-        docs = loader.load()
+        if self.process_pool.enabled and not isinstance(loader, REMOTE_LOADERS):
+            docs = self.process_pool.load(loader)
+        else:
+            docs = loader.load()
 
         return [
             Document(
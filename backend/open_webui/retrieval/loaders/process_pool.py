@@ -0,0 +1,280 @@
+import concurrent.futures
+import io
+import logging
+import multiprocessing
+import resource
+import signal
+import threading
+import time
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from langchain_community.document_loaders import PyPDFLoader
+from langchain_core.documents import Document
+from langchain_core.documents.base import Blob
+
+# This module is imported by the worker processes, it must not import
+# open_webui.env or open_webui.config (and torch with them)
+log = logging.getLogger(__name__)
+
+# Seconds of CPU time a worker gets past the timeout of its task before the
+# kernel stops it, for extractors stuck in code that never checks for signals
+CPU_LIMIT_GRACE = 10
+
+
+class LoaderProcessPoolStats:
+    def __init__(self):
+        self.files = 0
+        self.tasks = 0
+        self.split_files = 0
+        self.timeouts = 0
+        self.memory_errors = 0
+        self.failures = 0
+        self.restarts = 0
+        self.in_flight = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "files": self.files,
+            "tasks": self.tasks,
+            "split_files": self.split_files,
+            "timeouts": self.timeouts,
+            "memory_errors": self.memory_errors,
+            "failures": self.failures,
+            "restarts": self.restarts,
+            "in_flight": self.in_flight,
+        }
+
+
+LOADER_PROCESS_POOL_STATS = LoaderProcessPoolStats()
+
+
+def get_page_ranges(page_count: int, pages_per_task: int) -> list[tuple[int, int]]:
+    """Splits the pages of a PDF into `(start, end)` ranges of a task each."""
+    if pages_per_task <= 0:
+        return [(0, page_count)]
+    return [
+        (start, min(start + pages_per_task, page_count))
+        for start in range(0, page_count, pages_per_task)
+    ]
+
+
+####################
+# Worker processes
+####################
+
+
+def _init_worker(max_memory: int):
+    # The workers are stopped with the pool, not by a Ctrl+C of the server
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if max_memory > 0:
+        limit = max_memory * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _on_timeout(signum, frame):
+    raise TimeoutError("Content extraction timed out")
+
+
+def _run(timeout: int, func, *args):
+    if timeout <= 0:
+        return func(*args)
+
+    # Only the soft CPU limit is lowered, an unprivileged process could not
+    # raise the hard limit again for the next task
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    used = int(usage.ru_utime + usage.ru_stime)
+    resource.setrlimit(
+        resource.RLIMIT_CPU,
+        (used + timeout + CPU_LIMIT_GRACE, resource.RLIM_INFINITY),
+    )
+    signal.signal(signal.SIGALRM, _on_timeout)
+    signal.alarm(timeout)
+    try:
+        return func(*args)
+    finally:
+        signal.alarm(0)
+        resource.setrlimit(
+            resource.RLIMIT_CPU, (resource.RLIM_INFINITY, resource.RLIM_INFINITY)
+        )
+
+
+def _load(loader) -> list[Document]:
+    return loader.load()
+
+
+def _get_pdf_page_count(loader: PyPDFLoader) -> int:
+    import pypdf
+
+    return len(pypdf.PdfReader(loader.file_path, password=loader.parser.password).pages)
+
+
+def _load_pdf_pages(loader: PyPDFLoader, start: int, end: int) -> list[Document]:
+    """
+    Loads pages `start` to `end` of a PDF, as `PyPDFLoader` in "page" mode
+    would, so the documents of all ranges are those of the whole file.
+
+    The pages are copied to a PDF of their own, with the metadata of the
+    file, which the loader's `PyPDFParser` parses. Only the page numbers and
+    count it reports are then those of the whole file.
+    """
+    import pypdf
+
+    parser = loader.parser
+    reader = pypdf.PdfReader(loader.file_path, password=parser.password)
+
+    writer = pypdf.PdfWriter()
+    for page in reader.pages[start:end]:
+        writer.add_page(page)
+    # PdfWriter sets its own producer, keep the parser's default for files
+    # without one
+    writer.add_metadata({"/Producer": "PyPDF", **(reader.metadata or {})})
+    if parser.password:
+        writer.encrypt(parser.password)
+
+    data = io.BytesIO()
+    writer.write(data)
+
+    docs = list(
+        parser.lazy_parse(Blob.from_data(data.getvalue(), path=loader.file_path))
+    )
+    for page_number, doc in enumerate(docs, start):
+        doc.metadata.update(
+            {
+                "total_pages": len(reader.pages),
+                "page": page_number,
+                "page_label": reader.page_labels[page_number],
+            }
+        )
+    return docs
+
+
+####################
+# Pool
+####################
+
+
+class LoaderProcessPool:
+    """
+    Runs local content extractors (PyPDF, docx2txt, Unstructured, ...) in a
+    bounded pool of worker processes, so CPU-bound extraction neither holds
+    the GIL of the server nor blocks its request threads.
+
+    Each task is stopped after `timeout` seconds and each worker is limited to
+    `max_memory` MB of address space. PDFs of more than `pages_per_task` pages
+    are split into page ranges loaded in parallel, their documents merged in
+    page order. A worker that dies (memory limit, crash) breaks the pool, it
+    is replaced and the tasks running on it fail.
+    """
+
+    def __init__(
+        self,
+        workers: int = 0,
+        timeout: int = 0,
+        max_memory: int = 0,
+        pages_per_task: int = 0,
+    ):
+        self.workers = workers
+        self.timeout = timeout
+        self.max_memory = max_memory
+        self.pages_per_task = pages_per_task
+
+        self.executor: Optional[concurrent.futures.ProcessPoolExecutor] = None
+        self.lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0
+
+    def load(self, loader) -> list[Document]:
+        LOADER_PROCESS_POOL_STATS.files += 1
+        LOADER_PROCESS_POOL_STATS.in_flight += 1
+        try:
+            if (
+                isinstance(loader, PyPDFLoader)
+                and loader.parser.mode == "page"
+                and not loader.web_path
+                and self.pages_per_task > 0
+            ):
+                return self._load_pdf(loader)
+
+            [docs] = self._map([(_load, loader)])
+            return docs
+        finally:
+            LOADER_PROCESS_POOL_STATS.in_flight -= 1
+
+    def shutdown(self):
+        with self.lock:
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _load_pdf(self, loader: PyPDFLoader) -> list[Document]:
+        [page_count] = self._map([(_get_pdf_page_count, loader)])
+        ranges = get_page_ranges(page_count, self.pages_per_task)
+        if len(ranges) <= 1:
+            [docs] = self._map([(_load, loader)])
+            return docs
+
+        LOADER_PROCESS_POOL_STATS.split_files += 1
+        docs = []
+        for range_docs in self._map(
+            [(_load_pdf_pages, loader, start, end) for start, end in ranges]
+        ):
+            docs.extend(range_docs)
+        return docs
+
+    def _get_executor(self) -> concurrent.futures.ProcessPoolExecutor:
+        with self.lock:
+            if self.executor is None:
+                # Forking a server with running threads (event loop, database
+                # pools) is unsafe, workers start from a fresh interpreter
+                self.executor = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.max_memory,),
+                )
+            return self.executor
+
+    def _replace_executor(self, executor: concurrent.futures.ProcessPoolExecutor):
+        with self.lock:
+            # Only the first of the callers that saw the pool break replaces it
+            if self.executor is executor:
+                self.executor = None
+                LOADER_PROCESS_POOL_STATS.restarts += 1
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _map(self, tasks: list[tuple]) -> list:
+        """Runs `(func, *args)` tasks in the pool, returns their results in order."""
+        executor = self._get_executor()
+        start = time.monotonic()
+        futures = []
+        try:
+            for func, *args in tasks:
+                futures.append(executor.submit(_run, self.timeout, func, *args))
+            LOADER_PROCESS_POOL_STATS.tasks += len(futures)
+            return [future.result() for future in futures]
+        except BrokenProcessPool as e:
+            self._replace_executor(executor)
+            LOADER_PROCESS_POOL_STATS.failures += 1
+            raise RuntimeError(
+                "Content extraction worker stopped, "
+                "the file may exceed the time or memory limit"
+            ) from e
+        except TimeoutError:
+            LOADER_PROCESS_POOL_STATS.timeouts += 1
+            log.warning(
+                f"Content extraction timed out after {time.monotonic() - start:.1f}s"
+            )
+            raise
+        except MemoryError:
+            LOADER_PROCESS_POOL_STATS.memory_errors += 1
+            raise
+        except Exception:
+            LOADER_PROCESS_POOL_STATS.failures += 1
+            raise
+        finally:
+            # Remaining ranges of a file that failed are not needed anymore
+            for future in futures:
+                future.cancel()
@@ -12,6 +12,9 @@ log.setLevel(SRC_LOG_LEVELS["RAG"])
 
 
 class ColBERT:
+    # Scores are normalized over the documents of a single `predict` call
+    normalizes_scores = True
+
     def __init__(self, name, **kwargs) -> None:
         log.info("ColBERT: Loading model", name)
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
@@ -1,14 +1,12 @@
 import logging
 import os
-from typing import Optional, Union
+from typing import Optional, Sequence, Union
 
-import requests
-import hashlib
+import numpy as np
 from concurrent.futures import ThreadPoolExecutor
 
 from huggingface_hub import snapshot_download
-from langchain.retrievers import ContextualCompressionRetriever, EnsembleRetriever
-from langchain_community.retrievers import BM25Retriever
+from langchain.retrievers import EnsembleRetriever
 from langchain_core.documents import Document
 
 from open_webui.config import VECTOR_DB
@@ -16,19 +14,22 @@ from open_webui.retrieval.vector.connector import VECTOR_DB_CLIENT
 
 from open_webui.models.users import UserModel
 from open_webui.models.files import Files
-
-from open_webui.retrieval.vector.main import GetResult
-
+from open_webui.models.bm25 import BM25Index
+from open_webui.retrieval.embedding_client import EMBEDDING_CLIENT
+from open_webui.retrieval.embedding_cache import (
+    EMBEDDING_CACHE,
+    get_cached_embedding_function,
+)
 
 from open_webui.env import (
     SRC_LOG_LEVELS,
     OFFLINE_MODE,
-    ENABLE_FORWARD_USER_INFO_HEADERS,
 )
 from open_webui.config import (
     RAG_EMBEDDING_QUERY_PREFIX,
     RAG_EMBEDDING_CONTENT_PREFIX,
     RAG_EMBEDDING_PREFIX_FIELD_NAME,
+    RAG_RERANKING_BATCH_SIZE,
 )
 
 log = logging.getLogger(__name__)
@@ -73,6 +74,45 @@ class VectorSearchRetriever(BaseRetriever):
         return results
 
 
+class BM25SearchRetriever(BaseRetriever):
+    collection_name: Any
+    top_k: int
+
+    def _get_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: CallbackManagerForRetrieverRun,
+    ) -> list[Document]:
+        return [
+            Document(
+                metadata=result.document.meta or {}, page_content=result.document.text
+            )
+            for result in BM25Index.search(self.collection_name, query, self.top_k)
+        ]
+
+
+def ensure_bm25_index(collection_name: str):
+    """Indexes a collection that was not indexed yet, in one pass over it."""
+    if BM25Index.has_index(collection_name):
+        return
+
+    result = VECTOR_DB_CLIENT.get(collection_name=collection_name)
+    items = []
+    if result and result.ids:
+        items = [
+            {"id": id, "text": text, "metadata": metadata}
+            for id, text, metadata in zip(
+                result.ids[0], result.documents[0], result.metadatas[0]
+            )
+        ]
+
+    log.info(f"Indexing {len(items)} documents of {collection_name} for BM25")
+    # Another worker may be indexing the same collection, its index is kept
+    if not BM25Index.create_index(collection_name, items, replace=False):
+        log.info(f"{collection_name} was already indexed for BM25")
+
+
 def query_doc(
     collection_name: str, query_embedding: list[float], k: int, user: UserModel = None
 ):
@@ -105,63 +145,58 @@ def get_doc(collection_name: str, user: UserModel = None):
         raise e
 
 
+def get_hybrid_search_candidates(
+    collection_name: str, query: str, embedding_function, k: int
+) -> list[Document]:
+    bm25_retriever = BM25SearchRetriever(collection_name=collection_name, top_k=k)
+    vector_search_retriever = VectorSearchRetriever(
+        collection_name=collection_name,
+        embedding_function=embedding_function,
+        top_k=k,
+    )
+
+    ensemble_retriever = EnsembleRetriever(
+        retrievers=[bm25_retriever, vector_search_retriever], weights=[0.5, 0.5]
+    )
+    return ensemble_retriever.invoke(query)
+
+
+def get_hybrid_search_result(documents: Sequence[Document], k: int) -> dict:
+    # Reranked documents come sorted by score, keep the k best
+    documents = documents[:k]
+    return {
+        "distances": [[d.metadata.get("score") for d in documents]],
+        "documents": [[d.page_content for d in documents]],
+        "metadatas": [[d.metadata for d in documents]],
+    }
+
+
 def query_doc_with_hybrid_search(
     collection_name: str,
-    collection_result: GetResult,
     query: str,
     embedding_function,
     k: int,
     reranking_function,
     k_reranker: int,
     r: float,
+    user: UserModel = None,
 ) -> dict:
     try:
-        bm25_retriever = BM25Retriever.from_texts(
-            texts=collection_result.documents[0],
-            metadatas=collection_result.metadatas[0],
+        ensure_bm25_index(collection_name)
+        candidates = get_hybrid_search_candidates(
+            collection_name, query, embedding_function, k
         )
-        bm25_retriever.k = k
 
-        vector_search_retriever = VectorSearchRetriever(
-            collection_name=collection_name,
-            embedding_function=embedding_function,
-            top_k=k,
-        )
-
-        ensemble_retriever = EnsembleRetriever(
-            retrievers=[bm25_retriever, vector_search_retriever], weights=[0.5, 0.5]
-        )
         compressor = RerankCompressor(
             embedding_function=embedding_function,
             top_n=k_reranker,
             reranking_function=reranking_function,
             r_score=r,
         )
-
-        compression_retriever = ContextualCompressionRetriever(
-            base_compressor=compressor, base_retriever=ensemble_retriever
+        result = get_hybrid_search_result(
+            compressor.compress_documents(candidates, query), k
         )
 
-        result = compression_retriever.invoke(query)
-
-        distances = [d.metadata.get("score") for d in result]
-        documents = [d.page_content for d in result]
-        metadatas = [d.metadata for d in result]
-
-        # retrieve only min(k, k_reranker) items, sort and cut by distance if k < k_reranker
-        if k < k_reranker:
-            sorted_items = sorted(
-                zip(distances, metadatas, documents), key=lambda x: x[0], reverse=True
-            )
-            sorted_items = sorted_items[:k]
-            distances, documents, metadatas = map(list, zip(*sorted_items))
-
-        result = {
-            "distances": [distances],
-            "documents": [documents],
-            "metadatas": [metadatas],
-        }
-
         log.info(
             "query_doc_with_hybrid_search:result "
             + f'{result["metadatas"]} {result["distances"]}'
@@ -193,42 +228,35 @@ def merge_get_results(get_results: list[dict]) -> dict:
 
 
 def merge_and_sort_query_results(query_results: list[dict], k: int) -> dict:
-    # Initialize lists to store combined data
-    combined = dict()  # To store documents with unique document hashes
+    distances = []
+    documents = []
+    metadatas = []
 
+    # Documents found more than once keep their best distance, the dict
+    # hashes each document string once instead of MD5-ing every copy
+    document_indexes = {}
     for data in query_results:
-        distances = data["distances"][0]
-        documents = data["documents"][0]
-        metadatas = data["metadatas"][0]
-
-        for distance, document, metadata in zip(distances, documents, metadatas):
-            if isinstance(document, str):
-                doc_hash = hashlib.md5(
-                    document.encode()
-                ).hexdigest()  # Compute a hash for uniqueness
-
-                if doc_hash not in combined.keys():
-                    combined[doc_hash] = (distance, document, metadata)
-                    continue  # if doc is new, no further comparison is needed
-
-                # if doc is alredy in, but new distance is better, update
-                if distance > combined[doc_hash][0]:
-                    combined[doc_hash] = (distance, document, metadata)
-
-    combined = list(combined.values())
-    # Sort the list based on distances
-    combined.sort(key=lambda x: x[0], reverse=True)
-
-    # Slice to keep only the top k elements
-    sorted_distances, sorted_documents, sorted_metadatas = (
-        zip(*combined[:k]) if combined else ([], [], [])
-    )
+        for distance, document, metadata in zip(
+            data["distances"][0], data["documents"][0], data["metadatas"][0]
+        ):
+            if not isinstance(document, str):
+                continue
 
-    # Create and return the output dictionary
+            index = document_indexes.get(document)
+            if index is None:
+                document_indexes[document] = len(documents)
+                distances.append(distance)
+                documents.append(document)
+                metadatas.append(metadata)
+            elif distance > distances[index]:
+                distances[index] = distance
+                metadatas[index] = metadata
+
+    top_indexes = get_top_k_indexes(distances, k)
     return {
-        "distances": [list(sorted_distances)],
-        "documents": [list(sorted_documents)],
-        "metadatas": [list(sorted_metadatas)],
+        "distances": [[distances[i] for i in top_indexes]],
+        "documents": [[documents[i] for i in top_indexes]],
+        "metadatas": [[metadatas[i] for i in top_indexes]],
     }
 
 
@@ -287,17 +315,12 @@ def query_collection_with_hybrid_search(
 ) -> dict:
     results = []
     error = False
-    # Fetch collection data once per collection sequentially
-    # Avoid fetching the same data multiple times later
-    collection_results = {}
+    # Index collections searched for the first time once, before the queries
     for collection_name in collection_names:
         try:
-            collection_results[collection_name] = VECTOR_DB_CLIENT.get(
-                collection_name=collection_name
-            )
+            ensure_bm25_index(collection_name)
         except Exception as e:
-            log.exception(f"Failed to fetch collection {collection_name}: {e}")
-            collection_results[collection_name] = None
+            log.exception(f"Failed to index collection {collection_name}: {e}")
 
     log.info(
         f"Starting hybrid search for {len(queries)} queries in {len(collection_names)} collections..."
@@ -305,17 +328,10 @@ def query_collection_with_hybrid_search(
 
     def process_query(collection_name, query):
         try:
-            result = query_doc_with_hybrid_search(
-                collection_name=collection_name,
-                collection_result=collection_results[collection_name],
-                query=query,
-                embedding_function=embedding_function,
-                k=k,
-                reranking_function=reranking_function,
-                k_reranker=k_reranker,
-                r=r,
+            candidates = get_hybrid_search_candidates(
+                collection_name, query, embedding_function, k
             )
-            return result, None
+            return candidates, None
         except Exception as e:
             log.exception(f"Error when querying the collection with hybrid_search: {e}")
             return None, e
@@ -330,17 +346,28 @@ def query_collection_with_hybrid_search(
         future_results = [executor.submit(process_query, cn, q) for cn, q in tasks]
         task_results = [future.result() for future in future_results]
 
-    for result, err in task_results:
+    candidates = []
+    for (_, query), (documents, err) in zip(tasks, task_results):
         if err is not None:
             error = True
-        elif result is not None:
-            results.append(result)
+        elif documents is not None:
+            candidates.append((query, documents))
 
-    if error and not results:
+    if error and not candidates:
         raise Exception(
             "Hybrid search failed for all collections. Using Non-hybrid search as fallback."
         )
 
+    # Candidates of every query and collection are reranked together
+    compressor = RerankCompressor(
+        embedding_function=embedding_function,
+        top_n=k_reranker,
+        reranking_function=reranking_function,
+        r_score=r,
+    )
+    for documents in compressor.rerank(candidates):
+        results.append(get_hybrid_search_result(documents, k))
+
     return merge_and_sort_query_results(results, k=k)
 
 
@@ -353,11 +380,13 @@ def get_embedding_function(
     embedding_batch_size,
 ):
     if embedding_engine == "":
-        return lambda query, prefix=None, user=None: embedding_function.encode(
+        generate = lambda query, prefix=None, user=None: embedding_function.encode(
             query, prompt=prefix if prefix else None
         ).tolist()
     elif embedding_engine in ["ollama", "openai"]:
-        func = lambda query, prefix=None, user=None: generate_embeddings(
+        # Lists are split into batches of `embedding_batch_size` texts that are
+        # embedded concurrently, see EmbeddingClient
+        generate = lambda query, prefix=None, user=None: generate_embeddings(
             engine=embedding_engine,
             model=embedding_model,
             text=query,
@@ -365,29 +394,19 @@ def get_embedding_function(
             url=url,
             key=key,
             user=user,
-        )
-
-        def generate_multiple(query, prefix, user, func):
-            if isinstance(query, list):
-                embeddings = []
-                for i in range(0, len(query), embedding_batch_size):
-                    embeddings.extend(
-                        func(
-                            query[i : i + embedding_batch_size],
-                            prefix=prefix,
-                            user=user,
-                        )
-                    )
-                return embeddings
-            else:
-                return func(query, prefix, user)
-
-        return lambda query, prefix=None, user=None: generate_multiple(
-            query, prefix, user, func
+            batch_size=embedding_batch_size,
         )
     else:
         raise ValueError(f"Unknown embedding engine: {embedding_engine}")
 
+    return get_cached_embedding_function(
+        EMBEDDING_CACHE,
+        embedding_engine,
+        embedding_model,
+        generate,
+        url=url if embedding_engine else None,
+    )
+
 
 def get_sources_from_files(
     request,
@@ -608,36 +627,12 @@ def generate_openai_batch_embeddings(
     key: str = "",
     prefix: str = None,
     user: UserModel = None,
+    batch_size: Optional[int] = None,
 ) -> Optional[list[list[float]]]:
     try:
-        json_data = {"input": texts, "model": model}
-        if isinstance(RAG_EMBEDDING_PREFIX_FIELD_NAME, str) and isinstance(prefix, str):
-            json_data[RAG_EMBEDDING_PREFIX_FIELD_NAME] = prefix
-
-        r = requests.post(
-            f"{url}/embeddings",
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {key}",
-                **(
-                    {
-                        "X-OpenWebUI-User-Name": user.name,
-                        "X-OpenWebUI-User-Id": user.id,
-                        "X-OpenWebUI-User-Email": user.email,
-                        "X-OpenWebUI-User-Role": user.role,
-                    }
-                    if ENABLE_FORWARD_USER_INFO_HEADERS and user
-                    else {}
-                ),
-            },
-            json=json_data,
+        return EMBEDDING_CLIENT.embed_sync(
+            "openai", model, texts, url, key, prefix, user, batch_size
         )
-        r.raise_for_status()
-        data = r.json()
-        if "data" in data:
-            return [elem["embedding"] for elem in data["data"]]
-        else:
-            raise "Something went wrong :/"
     except Exception as e:
         log.exception(f"Error generating openai batch embeddings: {e}")
         return None
@@ -650,37 +645,12 @@ def generate_ollama_batch_embeddings(
     key: str = "",
     prefix: str = None,
     user: UserModel = None,
+    batch_size: Optional[int] = None,
 ) -> Optional[list[list[float]]]:
     try:
-        json_data = {"input": texts, "model": model}
-        if isinstance(RAG_EMBEDDING_PREFIX_FIELD_NAME, str) and isinstance(prefix, str):
-            json_data[RAG_EMBEDDING_PREFIX_FIELD_NAME] = prefix
-
-        r = requests.post(
-            f"{url}/api/embed",
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {key}",
-                **(
-                    {
-                        "X-OpenWebUI-User-Name": user.name,
-                        "X-OpenWebUI-User-Id": user.id,
-                        "X-OpenWebUI-User-Email": user.email,
-                        "X-OpenWebUI-User-Role": user.role,
-                    }
-                    if ENABLE_FORWARD_USER_INFO_HEADERS
-                    else {}
-                ),
-            },
-            json=json_data,
+        return EMBEDDING_CLIENT.embed_sync(
+            "ollama", model, texts, url, key, prefix, user, batch_size
         )
-        r.raise_for_status()
-        data = r.json()
-
-        if "embeddings" in data:
-            return data["embeddings"]
-        else:
-            raise "Something went wrong :/"
     except Exception as e:
         log.exception(f"Error generating ollama batch embeddings: {e}")
         return None
@@ -696,6 +666,7 @@ def generate_embeddings(
     url = kwargs.get("url", "")
     key = kwargs.get("key", "")
     user = kwargs.get("user")
+    batch_size = kwargs.get("batch_size")
 
     if prefix is not None and RAG_EMBEDDING_PREFIX_FIELD_NAME is None:
         if isinstance(text, list):
@@ -713,6 +684,7 @@ def generate_embeddings(
                     "key": key,
                     "prefix": prefix,
                     "user": user,
+                    "batch_size": batch_size,
                 }
             )
         else:
@@ -730,7 +702,7 @@ def generate_embeddings(
     elif engine == "openai":
         if isinstance(text, list):
             embeddings = generate_openai_batch_embeddings(
-                model, text, url, key, prefix, user
+                model, text, url, key, prefix, user, batch_size
             )
         else:
             embeddings = generate_openai_batch_embeddings(
@@ -739,13 +711,29 @@ def generate_embeddings(
         return embeddings[0] if isinstance(text, str) else embeddings
 
 
-import operator
-from typing import Optional, Sequence
-
 from langchain_core.callbacks import Callbacks
 from langchain_core.documents import BaseDocumentCompressor, Document
 
 
+def get_top_k_indexes(scores, k: int) -> list[int]:
+    """Indexes of the `k` highest scores, best first and ties in input order."""
+    if k <= 0 or len(scores) == 0:
+        return []
+
+    scores = np.asarray(scores, dtype=np.float64)
+    if k < len(scores):
+        indexes = np.sort(np.argpartition(-scores, k - 1)[:k])
+    else:
+        indexes = np.arange(len(scores))
+    return indexes[np.argsort(-scores[indexes], kind="stable")].tolist()
+
+
+def normalize_rows(embeddings) -> np.ndarray:
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings / np.maximum(norms, 1e-12)
+
+
 class RerankCompressor(BaseDocumentCompressor):
     embedding_function: Any
     top_n: int
@@ -762,35 +750,110 @@ class RerankCompressor(BaseDocumentCompressor):
         query: str,
         callbacks: Optional[Callbacks] = None,
     ) -> Sequence[Document]:
-        reranking = self.reranking_function is not None
-
-        if reranking:
-            scores = self.reranking_function.predict(
-                [(query, doc.page_content) for doc in documents]
-            )
-        else:
-            from sentence_transformers import util
+        return self.rerank([(query, documents)])[0]
+
+    def rerank(
+        self, candidates: list[tuple[str, Sequence[Document]]]
+    ) -> list[list[Document]]:
+        """
+        Reranks the candidate documents of several queries at once. Returns the
+        `top_n` documents of each query, with their score in `metadata["score"]`.
+        """
+        results = []
+        for (query, documents), scores in zip(candidates, self.score(candidates)):
+            indexes = np.arange(len(scores))
+            if self.r_score:
+                indexes = indexes[scores >= self.r_score]
 
-            query_embedding = self.embedding_function(query, RAG_EMBEDDING_QUERY_PREFIX)
-            document_embedding = self.embedding_function(
-                [doc.page_content for doc in documents], RAG_EMBEDDING_CONTENT_PREFIX
+            results.append(
+                [
+                    Document(
+                        page_content=documents[i].page_content,
+                        metadata={**documents[i].metadata, "score": float(scores[i])},
+                    )
+                    for i in indexes[get_top_k_indexes(scores[indexes], self.top_n)]
+                ]
             )
-            scores = util.cos_sim(query_embedding, document_embedding)[0]
+        return results
 
-        docs_with_scores = list(zip(documents, scores.tolist()))
-        if self.r_score:
-            docs_with_scores = [
-                (d, s) for d, s in docs_with_scores if s >= self.r_score
+    def score(
+        self, candidates: list[tuple[str, Sequence[Document]]]
+    ) -> list[np.ndarray]:
+        # Queries without candidates (a collection without hits) are never
+        # sent to the reranker, ColBERT fails on an empty list
+        scores = [np.empty(0) for _ in candidates]
+        indexes = [i for i, (_, documents) in enumerate(candidates) if documents]
+        if not indexes:
+            return scores
+
+        for i, candidate_scores in zip(
+            indexes, self.score_candidates([candidates[i] for i in indexes])
+        ):
+            scores[i] = candidate_scores
+        return scores
+
+    def score_candidates(
+        self, candidates: list[tuple[str, Sequence[Document]]]
+    ) -> list[np.ndarray]:
+        if self.reranking_function is None:
+            return self.score_by_similarity(candidates)
+
+        if getattr(self.reranking_function, "normalizes_scores", False):
+            # Scores depend on the documents scored along, keep the lists apart
+            return [
+                np.asarray(
+                    self.reranking_function.predict(
+                        [(query, doc.page_content) for doc in documents]
+                    ),
+                    dtype=np.float64,
+                ).reshape(-1)
+                for query, documents in candidates
             ]
 
-        result = sorted(docs_with_scores, key=operator.itemgetter(1), reverse=True)
-        final_results = []
-        for doc, doc_score in result[: self.top_n]:
-            metadata = doc.metadata
-            metadata["score"] = doc_score
-            doc = Document(
-                page_content=doc.page_content,
-                metadata=metadata,
+        # Each distinct (query, document) pair is scored once, in batches
+        pair_indexes = {}
+        for query, documents in candidates:
+            for doc in documents:
+                pair_indexes.setdefault((query, doc.page_content), len(pair_indexes))
+
+        pairs = list(pair_indexes)
+        pair_scores = np.empty(len(pairs), dtype=np.float64)
+        for i in range(0, len(pairs), RAG_RERANKING_BATCH_SIZE):
+            batch = pairs[i : i + RAG_RERANKING_BATCH_SIZE]
+            pair_scores[i : i + len(batch)] = np.asarray(
+                self.reranking_function.predict(batch), dtype=np.float64
+            ).reshape(-1)
+
+        return [
+            pair_scores[[pair_indexes[(query, doc.page_content)] for doc in documents]]
+            for query, documents in candidates
+        ]
+
+    def score_by_similarity(
+        self, candidates: list[tuple[str, Sequence[Document]]]
+    ) -> list[np.ndarray]:
+        # Cosine similarity of every query to every distinct document, the
+        # embeddings are requested in one call each
+        queries = list(dict.fromkeys(query for query, _ in candidates))
+        texts = list(
+            dict.fromkeys(
+                doc.page_content for _, documents in candidates for doc in documents
             )
-            final_results.append(doc)
-        return final_results
+        )
+        query_embeddings = normalize_rows(
+            self.embedding_function(queries, RAG_EMBEDDING_QUERY_PREFIX)
+        )
+        text_embeddings = normalize_rows(
+            self.embedding_function(texts, RAG_EMBEDDING_CONTENT_PREFIX)
+        )
+        similarities = query_embeddings @ text_embeddings.T
+
+        query_indexes = {query: i for i, query in enumerate(queries)}
+        text_indexes = {text: i for i, text in enumerate(texts)}
+        return [
+            similarities[
+                query_indexes[query],
+                [text_indexes[doc.page_content] for doc in documents],
+            ].astype(np.float64)
+            for query, documents in candidates
+        ]
@@ -1,12 +1,15 @@
 import json
 import logging
-from typing import Optional
+import tempfile
+from typing import Iterable, Iterator, Optional
 
 
 from open_webui.socket.main import get_event_emitter
 from open_webui.models.chats import (
+    AsyncChats,
     ChatForm,
     ChatImportForm,
+    ChatModel,
     ChatResponse,
     Chats,
     ChatTitleIdResponse,
@@ -18,7 +21,8 @@ from open_webui.config import ENABLE_ADMIN_CHAT_ACCESS, ENABLE_ADMIN_EXPORT
 from open_webui.constants import ERROR_MESSAGES
 from open_webui.env import SRC_LOG_LEVELS
 from fastapi import APIRouter, Depends, HTTPException, Request, status
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
 
 
 from open_webui.utils.auth import get_admin_user, get_verified_user
@@ -29,6 +33,54 @@ log.setLevel(SRC_LOG_LEVELS["MODELS"])
 
 router = APIRouter()
 
+
+def delete_unused_tags(tag_ids: list[str], user_id: str, count: int = 0):
+    """Deletes the tags of `tag_ids` used by at most `count` unarchived chats."""
+    counts = Chats.count_chats_by_tag_ids_and_user_id(tag_ids, user_id)
+    unused_tag_ids = [tag_id for tag_id in tag_ids if counts.get(tag_id, 0) <= count]
+    if unused_tag_ids:
+        log.debug(f"deleting tags: {unused_tag_ids}")
+        Tags.delete_tags_by_ids_and_user_id(unused_tag_ids, user_id)
+
+
+def insert_imported_tags(chats: list[ChatModel], user_id: str):
+    Tags.insert_new_tags(
+        [
+            " ".join([word.capitalize() for word in tag_id.split("_")])
+            for chat in chats
+            for tag_id in chat.meta.get("tags", [])
+        ],
+        user_id,
+    )
+
+
+def stream_chats(
+    chats: Iterable[ChatModel], total: int, ndjson: bool = False
+) -> StreamingResponse:
+    """
+    Streams chats one by one, either as a JSON array or as NDJSON with one chat
+    per line. `X-Total-Count` lets clients report the progress of the download.
+    """
+
+    def iter_json_array(chats: Iterable[ChatModel]) -> Iterator[str]:
+        yield "["
+        for idx, chat in enumerate(chats):
+            yield ("," if idx else "") + ChatResponse(
+                **chat.model_dump()
+            ).model_dump_json()
+        yield "]"
+
+    def iter_ndjson(chats: Iterable[ChatModel]) -> Iterator[str]:
+        for chat in chats:
+            yield ChatResponse(**chat.model_dump()).model_dump_json() + "\n"
+
+    return StreamingResponse(
+        iter_ndjson(chats) if ndjson else iter_json_array(chats),
+        media_type="application/x-ndjson" if ndjson else "application/json",
+        headers={"X-Total-Count": str(total)},
+    )
+
+
 ############################
 # GetChatList
 ############################
@@ -37,15 +89,30 @@ router = APIRouter()
 @router.get("/", response_model=list[ChatTitleIdResponse])
 @router.get("/list", response_model=list[ChatTitleIdResponse])
 async def get_session_user_chat_list(
-    user=Depends(get_verified_user), page: Optional[int] = None
+    user=Depends(get_verified_user),
+    page: Optional[int] = None,
+    cursor: Optional[str] = None,
 ):
-    if page is not None:
-        limit = 60
-        skip = (page - 1) * limit
+    # `cursor` is "{updated_at}:{id}" of the last chat of the previous page
+    try:
+        if cursor is not None:
+            return await AsyncChats.get_chat_title_id_list_by_user_id(
+                user.id, limit=60, cursor=cursor
+            )
+        elif page is not None:
+            limit = 60
+            skip = (page - 1) * limit
 
-        return Chats.get_chat_title_id_list_by_user_id(user.id, skip=skip, limit=limit)
-    else:
-        return Chats.get_chat_title_id_list_by_user_id(user.id)
+            return await AsyncChats.get_chat_title_id_list_by_user_id(
+                user.id, skip=skip, limit=limit
+            )
+        else:
+            return await AsyncChats.get_chat_title_id_list_by_user_id(user.id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.DEFAULT("Invalid cursor"),
+        )
 
 
 ############################
@@ -79,15 +146,28 @@ async def get_user_chat_list_by_user_id(
     user=Depends(get_admin_user),
     skip: int = 0,
     limit: int = 50,
+    cursor: Optional[str] = None,
 ):
     if not ENABLE_ADMIN_CHAT_ACCESS:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=ERROR_MESSAGES.ACCESS_PROHIBITED,
         )
-    return Chats.get_chat_list_by_user_id(
-        user_id, include_archived=True, skip=skip, limit=limit
-    )
+
+    try:
+        return await AsyncChats.get_chat_title_id_list_by_user_id(
+            user_id,
+            include_archived=True,
+            include_all=True,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.DEFAULT("Invalid cursor"),
+        )
 
 
 ############################
@@ -117,15 +197,7 @@ async def import_chat(form_data: ChatImportForm, user=Depends(get_verified_user)
     try:
         chat = Chats.import_chat(user.id, form_data)
         if chat:
-            tags = chat.meta.get("tags", [])
-            for tag_id in tags:
-                tag_id = tag_id.replace(" ", "_").lower()
-                tag_name = " ".join([word.capitalize() for word in tag_id.split("_")])
-                if (
-                    tag_id != "none"
-                    and Tags.get_tag_by_name_and_user_id(tag_name, user.id) is None
-                ):
-                    Tags.insert_new_tag(tag_name, user.id)
+            insert_imported_tags([chat], user.id)
 
         return ChatResponse(**chat.model_dump())
     except Exception as e:
@@ -135,6 +207,75 @@ async def import_chat(form_data: ChatImportForm, user=Depends(get_verified_user)
         )
 
 
+############################
+# ImportChats
+############################
+
+
+IMPORT_BATCH_SIZE = 100
+IMPORT_SPOOL_MAX_SIZE = 1024 * 1024
+
+
+@router.post("/import/ndjson")
+async def import_chats(request: Request, user=Depends(get_verified_user)):
+    """
+    Imports the chats of an NDJSON body, one `ChatImportForm` per line, in
+    transactions of `IMPORT_BATCH_SIZE` chats. Progress is streamed back as
+    NDJSON: `{"imported", "failed"}` after each batch, `{"line", "error"}` for
+    every line that could not be imported and `{"done": true, ...}` at the end.
+    """
+    # The body is spooled to disk first, the streamed response can't read it
+    file = tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_MAX_SIZE)
+    async for chunk in request.stream():
+        file.write(chunk)
+    file.seek(0)
+
+    imported, failed = 0, 0
+    batch: list[tuple[int, ChatImportForm]] = []
+
+    def import_batch() -> Iterator[dict]:
+        nonlocal imported, failed, batch
+        try:
+            chats = Chats.import_chats(user.id, [form for _, form in batch])
+            insert_imported_tags(chats, user.id)
+            imported += len(chats)
+        except Exception as e:
+            log.exception(f"Error importing chats: {e}")
+            failed += len(batch)
+            for line, _ in batch:
+                yield {"line": line, "error": ERROR_MESSAGES.DEFAULT()}
+
+        batch = []
+        yield {"imported": imported, "failed": failed}
+
+    def stream():
+        nonlocal failed
+
+        with file:
+            for line, data in enumerate(file, start=1):
+                if not data.strip():
+                    continue
+
+                try:
+                    batch.append((line, ChatImportForm.model_validate_json(data)))
+                except ValidationError:
+                    failed += 1
+                    yield json.dumps({"line": line, "error": "Invalid chat"}) + "\n"
+                    continue
+
+                if len(batch) >= IMPORT_BATCH_SIZE:
+                    for progress in import_batch():
+                        yield json.dumps(progress) + "\n"
+
+            if batch:
+                for progress in import_batch():
+                    yield json.dumps(progress) + "\n"
+
+        yield json.dumps({"done": True, "imported": imported, "failed": failed}) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
 ############################
 # GetChats
 ############################
@@ -152,7 +293,7 @@ async def search_user_chats(
 
     chat_list = [
         ChatTitleIdResponse(**chat.model_dump())
-        for chat in Chats.get_chats_by_user_id_and_search_text(
+        for chat in await AsyncChats.get_chats_by_user_id_and_search_text(
             user.id, text, skip=skip, limit=limit
         )
     ]
@@ -194,12 +335,9 @@ async def get_chats_by_folder_id(folder_id: str, user=Depends(get_verified_user)
 ############################
 
 
-@router.get("/pinned", response_model=list[ChatResponse])
+@router.get("/pinned", response_model=list[ChatTitleIdResponse])
 async def get_user_pinned_chats(user=Depends(get_verified_user)):
-    return [
-        ChatResponse(**chat.model_dump())
-        for chat in Chats.get_pinned_chats_by_user_id(user.id)
-    ]
+    return Chats.get_pinned_chats_by_user_id(user.id)
 
 
 ############################
@@ -209,10 +347,14 @@ async def get_user_pinned_chats(user=Depends(get_verified_user)):
 
 @router.get("/all", response_model=list[ChatResponse])
 async def get_user_chats(user=Depends(get_verified_user)):
-    return [
-        ChatResponse(**chat.model_dump())
-        for chat in Chats.get_chats_by_user_id(user.id)
-    ]
+    return stream_chats(Chats.iter_chats(user.id), Chats.count_chats(user.id))
+
+
+@router.get("/all/export")
+async def export_user_chats(user=Depends(get_verified_user)):
+    return stream_chats(
+        Chats.iter_chats(user.id), Chats.count_chats(user.id), ndjson=True
+    )
 
 
 ############################
@@ -257,7 +399,17 @@ async def get_all_user_chats_in_db(user=Depends(get_admin_user)):
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=ERROR_MESSAGES.ACCESS_PROHIBITED,
         )
-    return [ChatResponse(**chat.model_dump()) for chat in Chats.get_chats()]
+    return stream_chats(Chats.iter_chats(), Chats.count_chats())
+
+
+@router.get("/all/db/export")
+async def export_all_user_chats_in_db(user=Depends(get_admin_user)):
+    if not ENABLE_ADMIN_EXPORT:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=ERROR_MESSAGES.ACCESS_PROHIBITED,
+        )
+    return stream_chats(Chats.iter_chats(), Chats.count_chats(), ndjson=True)
 
 
 ############################
@@ -297,7 +449,7 @@ async def get_shared_chat_by_id(share_id: str, user=Depends(get_verified_user)):
     if user.role == "user" or (user.role == "admin" and not ENABLE_ADMIN_CHAT_ACCESS):
         chat = Chats.get_chat_by_share_id(share_id)
     elif user.role == "admin" and ENABLE_ADMIN_CHAT_ACCESS:
-        chat = Chats.get_chat_by_id(share_id)
+        chat = await AsyncChats.get_chat_by_id(share_id)
 
     if chat:
         return ChatResponse(**chat.model_dump())
@@ -342,7 +494,7 @@ async def get_user_chat_list_by_tag_name(
 
 @router.get("/{id}", response_model=Optional[ChatResponse])
 async def get_chat_by_id(id: str, user=Depends(get_verified_user)):
-    chat = Chats.get_chat_by_id_and_user_id(id, user.id)
+    chat = await AsyncChats.get_chat_by_id_and_user_id(id, user.id)
 
     if chat:
         return ChatResponse(**chat.model_dump())
@@ -362,7 +514,7 @@ async def get_chat_by_id(id: str, user=Depends(get_verified_user)):
 async def update_chat_by_id(
     id: str, form_data: ChatForm, user=Depends(get_verified_user)
 ):
-    chat = Chats.get_chat_by_id_and_user_id(id, user.id)
+    chat = await AsyncChats.get_chat_by_id_and_user_id(id, user.id)
     if chat:
         updated_chat = {**chat.chat, **form_data.chat}
         chat = Chats.update_chat_by_id(id, updated_chat)
@@ -385,7 +537,7 @@ class MessageForm(BaseModel):
 async def update_chat_message_by_id(
     id: str, message_id: str, form_data: MessageForm, user=Depends(get_verified_user)
 ):
-    chat = Chats.get_chat_by_id(id)
+    chat = await AsyncChats.get_chat_by_id(id)
 
     if not chat:
         raise HTTPException(
@@ -399,7 +551,7 @@ async def update_chat_message_by_id(
             detail=ERROR_MESSAGES.ACCESS_PROHIBITED,
         )
 
-    chat = Chats.upsert_message_to_chat_by_id_and_message_id(
+    Chats.upsert_message_to_chat_by_id_and_message_id(
         id,
         message_id,
         {
@@ -428,6 +580,7 @@ async def update_chat_message_by_id(
             }
         )
 
+    chat = await AsyncChats.get_chat_by_id(id)
     return ChatResponse(**chat.model_dump())
 
 
@@ -443,7 +596,7 @@ class EventForm(BaseModel):
 async def send_chat_message_event_by_id(
     id: str, message_id: str, form_data: EventForm, user=Depends(get_verified_user)
 ):
-    chat = Chats.get_chat_by_id(id)
+    chat = await AsyncChats.get_chat_by_id(id)
 
     if not chat:
         raise HTTPException(
@@ -483,10 +636,8 @@ async def send_chat_message_event_by_id(
 @router.delete("/{id}", response_model=bool)
 async def delete_chat_by_id(request: Request, id: str, user=Depends(get_verified_user)):
     if user.role == "admin":
-        chat = Chats.get_chat_by_id(id)
-        for tag in chat.meta.get("tags", []):
-            if Chats.count_chats_by_tag_name_and_user_id(tag, user.id) == 1:
-                Tags.delete_tag_by_name_and_user_id(tag, user.id)
+        chat = await AsyncChats.get_chat_by_id(id)
+        delete_unused_tags(chat.meta.get("tags", []), user.id, count=1)
 
         result = Chats.delete_chat_by_id(id)
 
@@ -500,10 +651,8 @@ async def delete_chat_by_id(request: Request, id: str, user=Depends(get_verified
                 detail=ERROR_MESSAGES.ACCESS_PROHIBITED,
             )
 
-        chat = Chats.get_chat_by_id(id)
-        for tag in chat.meta.get("tags", []):
-            if Chats.count_chats_by_tag_name_and_user_id(tag, user.id) == 1:
-                Tags.delete_tag_by_name_and_user_id(tag, user.id)
+        chat = await AsyncChats.get_chat_by_id(id)
+        delete_unused_tags(chat.meta.get("tags", []), user.id, count=1)
 
         result = Chats.delete_chat_by_id_and_user_id(id, user.id)
         return result
@@ -516,7 +665,7 @@ async def delete_chat_by_id(request: Request, id: str, user=Depends(get_verified
 
 @router.get("/{id}/pinned", response_model=Optional[bool])
 async def get_pinned_status_by_id(id: str, user=Depends(get_verified_user)):
-    chat = Chats.get_chat_by_id_and_user_id(id, user.id)
+    chat = await AsyncChats.get_chat_by_id_and_user_id(id, user.id)
     if chat:
         return chat.pinned
     else:
@@ -532,7 +681,7 @@ async def get_pinned_status_by_id(id: str, user=Depends(get_verified_user)):
 
 @router.post("/{id}/pin", response_model=Optional[ChatResponse])
 async def pin_chat_by_id(id: str, user=Depends(get_verified_user)):
-    chat = Chats.get_chat_by_id_and_user_id(id, user.id)
+    chat = await AsyncChats.get_chat_by_id_and_user_id(id, user.id)
     if chat:
         chat = Chats.toggle_chat_pinned_by_id(id)
         return chat
@@ -555,7 +704,7 @@ class CloneForm(BaseModel):
 async def clone_chat_by_id(
     form_data: CloneForm, id: str, user=Depends(get_verified_user)
 ):
-    chat = Chats.get_chat_by_id_and_user_id(id, user.id)
+    chat = await AsyncChats.get_chat_by_id_and_user_id(id, user.id)
     if chat:
         updated_chat = {
             **chat.chat,
@@ -603,22 +752,15 @@ async def clone_shared_chat_by_id(id: str, user=Depends(get_verified_user)):
 
 @router.post("/{id}/archive", response_model=Optional[ChatResponse])
 async def archive_chat_by_id(id: str, user=Depends(get_verified_user)):
-    chat = Chats.get_chat_by_id_and_user_id(id, user.id)
+    chat = await AsyncChats.get_chat_by_id_and_user_id(id, user.id)
     if chat:
         chat = Chats.toggle_chat_archive_by_id(id)
 
         # Delete tags if chat is archived
         if chat.archived:
-            for tag_id in chat.meta.get("tags", []):
-                if Chats.count_chats_by_tag_name_and_user_id(tag_id, user.id) == 0:
-                    log.debug(f"deleting tag: {tag_id}")
-                    Tags.delete_tag_by_name_and_user_id(tag_id, user.id)
+            delete_unused_tags(chat.meta.get("tags", []), user.id)
         else:
-            for tag_id in chat.meta.get("tags", []):
-                tag = Tags.get_tag_by_name_and_user_id(tag_id, user.id)
-                if tag is None:
-                    log.debug(f"inserting tag: {tag_id}")
-                    tag = Tags.insert_new_tag(tag_id, user.id)
+            Tags.insert_new_tags(chat.meta.get("tags", []), user.id)
 
         return ChatResponse(**chat.model_dump())
     else:
@@ -634,7 +776,7 @@ async def archive_chat_by_id(id: str, user=Depends(get_verified_user)):
 
 @router.post("/{id}/share", response_model=Optional[ChatResponse])
 async def share_chat_by_id(id: str, user=Depends(get_verified_user)):
-    chat = Chats.get_chat_by_id_and_user_id(id, user.id)
+    chat = await AsyncChats.get_chat_by_id_and_user_id(id, user.id)
     if chat:
         if chat.share_id:
             shared_chat = Chats.update_shared_chat_by_chat_id(chat.id)
@@ -662,7 +804,7 @@ async def share_chat_by_id(id: str, user=Depends(get_verified_user)):
 
 @router.delete("/{id}/share", response_model=Optional[bool])
 async def delete_shared_chat_by_id(id: str, user=Depends(get_verified_user)):
-    chat = Chats.get_chat_by_id_and_user_id(id, user.id)
+    chat = await AsyncChats.get_chat_by_id_and_user_id(id, user.id)
     if chat:
         if not chat.share_id:
             return False
@@ -691,7 +833,7 @@ class ChatFolderIdForm(BaseModel):
 async def update_chat_folder_id_by_id(
     id: str, form_data: ChatFolderIdForm, user=Depends(get_verified_user)
 ):
-    chat = Chats.get_chat_by_id_and_user_id(id, user.id)
+    chat = await AsyncChats.get_chat_by_id_and_user_id(id, user.id)
     if chat:
         chat = Chats.update_chat_folder_id_by_id_and_user_id(
             id, user.id, form_data.folder_id
@@ -710,7 +852,7 @@ async def update_chat_folder_id_by_id(
 
 @router.get("/{id}/tags", response_model=list[TagModel])
 async def get_chat_tags_by_id(id: str, user=Depends(get_verified_user)):
-    chat = Chats.get_chat_by_id_and_user_id(id, user.id)
+    chat = await AsyncChats.get_chat_by_id_and_user_id(id, user.id)
     if chat:
         tags = chat.meta.get("tags", [])
         return Tags.get_tags_by_ids_and_user_id(tags, user.id)
@@ -729,7 +871,7 @@ async def get_chat_tags_by_id(id: str, user=Depends(get_verified_user)):
 async def add_tag_by_id_and_tag_name(
     id: str, form_data: TagForm, user=Depends(get_verified_user)
 ):
-    chat = Chats.get_chat_by_id_and_user_id(id, user.id)
+    chat = await AsyncChats.get_chat_by_id_and_user_id(id, user.id)
     if chat:
         tags = chat.meta.get("tags", [])
         tag_id = form_data.name.replace(" ", "_").lower()
@@ -745,7 +887,7 @@ async def add_tag_by_id_and_tag_name(
                 id, user.id, form_data.name
             )
 
-        chat = Chats.get_chat_by_id_and_user_id(id, user.id)
+        chat = await AsyncChats.get_chat_by_id_and_user_id(id, user.id)
         tags = chat.meta.get("tags", [])
         return Tags.get_tags_by_ids_and_user_id(tags, user.id)
     else:
@@ -763,14 +905,14 @@ async def add_tag_by_id_and_tag_name(
 async def delete_tag_by_id_and_tag_name(
     id: str, form_data: TagForm, user=Depends(get_verified_user)
 ):
-    chat = Chats.get_chat_by_id_and_user_id(id, user.id)
+    chat = await AsyncChats.get_chat_by_id_and_user_id(id, user.id)
     if chat:
         Chats.delete_tag_by_id_and_user_id_and_tag_name(id, user.id, form_data.name)
 
         if Chats.count_chats_by_tag_name_and_user_id(form_data.name, user.id) == 0:
             Tags.delete_tag_by_name_and_user_id(form_data.name, user.id)
 
-        chat = Chats.get_chat_by_id_and_user_id(id, user.id)
+        chat = await AsyncChats.get_chat_by_id_and_user_id(id, user.id)
         tags = chat.meta.get("tags", [])
         return Tags.get_tags_by_ids_and_user_id(tags, user.id)
     else:
@@ -786,13 +928,10 @@ async def delete_tag_by_id_and_tag_name(
 
 @router.delete("/{id}/tags/all", response_model=Optional[bool])
 async def delete_all_tags_by_id(id: str, user=Depends(get_verified_user)):
-    chat = Chats.get_chat_by_id_and_user_id(id, user.id)
+    chat = await AsyncChats.get_chat_by_id_and_user_id(id, user.id)
     if chat:
         Chats.delete_all_tags_by_id_and_user_id(id, user.id)
-
-        for tag in chat.meta.get("tags", []):
-            if Chats.count_chats_by_tag_name_and_user_id(tag, user.id) == 0:
-                Tags.delete_tag_by_name_and_user_id(tag, user.id)
+        delete_unused_tags(chat.meta.get("tags", []), user.id)
 
         return True
     else:
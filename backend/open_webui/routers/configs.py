@@ -6,6 +6,7 @@ from typing import Optional
 from open_webui.utils.auth import get_admin_user, get_verified_user
 from open_webui.config import get_config, save_config
 from open_webui.config import BannerModel
+from open_webui.utils.permission_cache import PERMISSION_CACHE
 
 
 router = APIRouter()
@@ -23,6 +24,7 @@ class ImportConfigForm(BaseModel):
 @router.post("/import", response_model=dict)
 async def import_config(form_data: ImportConfigForm, user=Depends(get_admin_user)):
     save_config(form_data.config)
+    PERMISSION_CACHE.invalidate()
     return get_config()
 
 
@@ -1,3 +1,5 @@
+import asyncio
+import json
 import logging
 import os
 import uuid
@@ -17,20 +19,30 @@ from fastapi import (
 )
 from fastapi.responses import FileResponse, StreamingResponse
 from open_webui.constants import ERROR_MESSAGES
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.env import SRC_LOG_LEVELS, ENABLE_BACKGROUND_INGESTION
 from open_webui.models.files import (
+    AsyncFiles,
     FileForm,
     FileModel,
     FileModelResponse,
     Files,
 )
+from open_webui.models.ingestion_jobs import IngestionJobModel
 from open_webui.models.knowledge import Knowledges
+from open_webui.models.users import Users
 
 from open_webui.routers.knowledge import get_knowledge, get_knowledge_list
-from open_webui.routers.retrieval import ProcessFileForm, process_file
+from open_webui.routers.retrieval import (
+    ProcessFileForm,
+    load_file_docs,
+    process_file,
+    save_file_docs,
+)
 from open_webui.routers.audio import transcribe
 from open_webui.storage.provider import Storage
 from open_webui.utils.auth import get_admin_user, get_verified_user
+from open_webui.utils.ingestion import INGESTION_WORKER_POOL
+from langchain_core.documents import Document
 from pydantic import BaseModel
 
 log = logging.getLogger(__name__)
@@ -39,6 +51,9 @@ log.setLevel(SRC_LOG_LEVELS["MODELS"])
 
 router = APIRouter()
 
+AUDIO_CONTENT_TYPES = ["audio/mpeg", "audio/wav", "audio/ogg", "audio/x-m4a"]
+IMAGE_CONTENT_TYPES = ["image/png", "image/jpeg", "image/gif"]
+
 
 ############################
 # Check if the current user has access to a file through any knowledge bases the user may be in.
@@ -84,6 +99,7 @@ def upload_file(
     user=Depends(get_verified_user),
     file_metadata: dict = {},
     process: bool = Query(True),
+    background: Optional[bool] = Query(None),
 ):
     log.info(f"file.content_type: {file.content_type}")
     try:
@@ -112,14 +128,27 @@ def upload_file(
                 }
             ),
         )
-        if process:
+        if background is None:
+            background = ENABLE_BACKGROUND_INGESTION
+
+        if process and background and file.content_type not in IMAGE_CONTENT_TYPES:
+            # Processed by an ingestion worker, progress is sent as
+            # "ingestion-events" and at /api/v1/retrieval/jobs/{job_id}
+            job = INGESTION_WORKER_POOL.enqueue(
+                user.id,
+                "file",
+                {
+                    "file_id": id,
+                    "transcribe": file.content_type in AUDIO_CONTENT_TYPES,
+                },
+            )
+            if job is None:
+                raise Exception("Error queueing the file for processing")
+
+            file_item = FileModelResponse(**file_item.model_dump(), job_id=job.id)
+        elif process:
             try:
-                if file.content_type in [
-                    "audio/mpeg",
-                    "audio/wav",
-                    "audio/ogg",
-                    "audio/x-m4a",
-                ]:
+                if file.content_type in AUDIO_CONTENT_TYPES:
                     file_path = Storage.get_file(file_path)
                     result = transcribe(request, file_path)
                     process_file(
@@ -127,7 +156,7 @@ def upload_file(
                         ProcessFileForm(file_id=id, content=result.get("text", "")),
                         user=user,
                     )
-                elif file.content_type not in ["image/png", "image/jpeg", "image/gif"]:
+                elif file.content_type not in IMAGE_CONTENT_TYPES:
                     process_file(request, ProcessFileForm(file_id=id), user=user)
                     file_item = Files.get_file_by_id(id=id)
             except Exception as e:
@@ -156,6 +185,70 @@ def upload_file(
         )
 
 
+############################
+# Process File Job
+############################
+
+
+async def process_file_job(request: Request, job: IngestionJobModel, update) -> dict:
+    """
+    Processes an uploaded file in two stages: "load" extracts (or transcribes)
+    its documents, "embed" saves them to the vector DB. The loaded documents
+    are kept in the job state, so a retry after a failed "embed" skips "load".
+    """
+    file = Files.get_file_by_id(job.data["file_id"])
+    if file is None:
+        raise ValueError(ERROR_MESSAGES.NOT_FOUND)
+    user = Users.get_user_by_id(job.user_id)
+
+    def load():
+        form_data = ProcessFileForm(file_id=file.id)
+        if job.data.get("transcribe"):
+            result = transcribe(request, Storage.get_file(file.path))
+            form_data.content = result.get("text", "")
+        return load_file_docs(request, file, form_data)
+
+    state = job.state or {}
+    if "docs" not in state:
+        await update(stage="load", progress=0.0)
+        docs, text_content = await asyncio.to_thread(load)
+
+        # Loader metadata may hold values JSON can't store, like dates
+        state = {
+            "docs": json.loads(
+                json.dumps(
+                    [
+                        {"page_content": doc.page_content, "metadata": doc.metadata}
+                        for doc in docs
+                    ],
+                    default=str,
+                )
+            ),
+            "text_content": text_content,
+        }
+        await update(stage="embed", progress=0.5, state=state)
+    else:
+        await update(stage="embed")
+
+    result = await asyncio.to_thread(
+        save_file_docs,
+        request,
+        file,
+        [Document(**doc) for doc in state["docs"]],
+        state["text_content"],
+        f"file-{file.id}",
+        False,
+        user,
+    )
+    return {
+        "file_id": file.id,
+        "collection_name": (result or {}).get("collection_name"),
+    }
+
+
+INGESTION_WORKER_POOL.register("file", process_file_job)
+
+
 ############################
 # List Files
 ############################
@@ -203,7 +296,7 @@ async def delete_all_files(user=Depends(get_admin_user)):
 
 @router.get("/{id}", response_model=Optional[FileModel])
 async def get_file_by_id(id: str, user=Depends(get_verified_user)):
-    file = Files.get_file_by_id(id)
+    file = await AsyncFiles.get_file_by_id(id)
 
     if not file:
         raise HTTPException(
@@ -231,7 +324,7 @@ async def get_file_by_id(id: str, user=Depends(get_verified_user)):
 
 @router.get("/{id}/data/content")
 async def get_file_data_content_by_id(id: str, user=Depends(get_verified_user)):
-    file = Files.get_file_by_id(id)
+    file = await AsyncFiles.get_file_by_id(id)
 
     if not file:
         raise HTTPException(
@@ -265,7 +358,7 @@ class ContentForm(BaseModel):
 async def update_file_data_content_by_id(
     request: Request, id: str, form_data: ContentForm, user=Depends(get_verified_user)
 ):
-    file = Files.get_file_by_id(id)
+    file = await AsyncFiles.get_file_by_id(id)
 
     if not file:
         raise HTTPException(
@@ -284,7 +377,7 @@ async def update_file_data_content_by_id(
                 ProcessFileForm(file_id=id, content=form_data.content),
                 user=user,
             )
-            file = Files.get_file_by_id(id=id)
+            file = await AsyncFiles.get_file_by_id(id=id)
         except Exception as e:
             log.exception(e)
             log.error(f"Error processing file: {file.id}")
@@ -306,7 +399,7 @@ async def update_file_data_content_by_id(
 async def get_file_content_by_id(
     id: str, user=Depends(get_verified_user), attachment: bool = Query(False)
 ):
-    file = Files.get_file_by_id(id)
+    file = await AsyncFiles.get_file_by_id(id)
 
     if not file:
         raise HTTPException(
@@ -374,7 +467,7 @@ async def get_file_content_by_id(
 
 @router.get("/{id}/content/html")
 async def get_html_file_content_by_id(id: str, user=Depends(get_verified_user)):
-    file = Files.get_file_by_id(id)
+    file = await AsyncFiles.get_file_by_id(id)
 
     if not file:
         raise HTTPException(
@@ -416,7 +509,7 @@ async def get_html_file_content_by_id(id: str, user=Depends(get_verified_user)):
 
 @router.get("/{id}/content/{file_name}")
 async def get_file_content_by_id(id: str, user=Depends(get_verified_user)):
-    file = Files.get_file_by_id(id)
+    file = await AsyncFiles.get_file_by_id(id)
 
     if not file:
         raise HTTPException(
@@ -478,7 +571,7 @@ async def get_file_content_by_id(id: str, user=Depends(get_verified_user)):
 
 @router.delete("/{id}")
 async def delete_file_by_id(id: str, user=Depends(get_verified_user)):
-    file = Files.get_file_by_id(id)
+    file = await AsyncFiles.get_file_by_id(id)
 
     if not file:
         raise HTTPException(
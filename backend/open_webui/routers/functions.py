@@ -14,6 +14,7 @@ from open_webui.config import CACHE_DIR
 from open_webui.constants import ERROR_MESSAGES
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 from open_webui.utils.auth import get_admin_user, get_verified_user
+from open_webui.utils.model_registry import MODEL_REGISTRY
 from open_webui.env import SRC_LOG_LEVELS
 
 log = logging.getLogger(__name__)
@@ -78,6 +79,7 @@ async def create_new_function(
             function_cache_dir.mkdir(parents=True, exist_ok=True)
 
             if function:
+                MODEL_REGISTRY.invalidate()
                 return function
             else:
                 raise HTTPException(
@@ -129,6 +131,7 @@ async def toggle_function_by_id(id: str, user=Depends(get_admin_user)):
         )
 
         if function:
+            MODEL_REGISTRY.invalidate()
             return function
         else:
             raise HTTPException(
@@ -156,6 +159,7 @@ async def toggle_global_by_id(id: str, user=Depends(get_admin_user)):
         )
 
         if function:
+            MODEL_REGISTRY.invalidate()
             return function
         else:
             raise HTTPException(
@@ -194,6 +198,7 @@ async def update_function_by_id(
         function = Functions.update_function_by_id(id, updated)
 
         if function:
+            MODEL_REGISTRY.invalidate()
             return function
         else:
             raise HTTPException(
@@ -224,6 +229,8 @@ async def delete_function_by_id(
         if id in FUNCTIONS:
             del FUNCTIONS[id]
 
+        MODEL_REGISTRY.invalidate()
+
     return result
 
 
@@ -303,6 +310,8 @@ async def update_function_valves_by_id(
                 form_data = {k: v for k, v in form_data.items() if v is not None}
                 valves = Valves(**form_data)
                 Functions.update_function_valves_by_id(id, valves.model_dump())
+                # Pipes can list their models based on valves
+                MODEL_REGISTRY.invalidate()
                 return valves.model_dump()
             except Exception as e:
                 log.exception(f"Error updating function values by id {id}: {e}")
@@ -1,15 +1,20 @@
+import asyncio
 from typing import List, Optional
 from pydantic import BaseModel
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Request
 import logging
 
 from open_webui.models.knowledge import (
+    AsyncKnowledges,
     Knowledges,
     KnowledgeForm,
     KnowledgeResponse,
     KnowledgeUserResponse,
 )
 from open_webui.models.files import Files, FileModel
+from open_webui.models.ingestion_jobs import IngestionJobModel
+from open_webui.models.users import Users
+from open_webui.models.bm25 import BM25Index
 from open_webui.retrieval.vector.connector import VECTOR_DB_CLIENT
 from open_webui.routers.retrieval import (
     process_file,
@@ -22,9 +27,10 @@ from open_webui.storage.provider import Storage
 from open_webui.constants import ERROR_MESSAGES
 from open_webui.utils.auth import get_verified_user
 from open_webui.utils.access_control import has_access, has_permission
+from open_webui.utils.ingestion import INGESTION_WORKER_POOL
 
 
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.env import SRC_LOG_LEVELS, ENABLE_BACKGROUND_INGESTION
 from open_webui.models.models import Models, ModelForm
 
 
@@ -172,7 +178,7 @@ class KnowledgeFilesResponse(KnowledgeResponse):
 
 @router.get("/{id}", response_model=Optional[KnowledgeFilesResponse])
 async def get_knowledge_by_id(id: str, user=Depends(get_verified_user)):
-    knowledge = Knowledges.get_knowledge_by_id(id=id)
+    knowledge = await AsyncKnowledges.get_knowledge_by_id(id=id)
 
     if knowledge:
 
@@ -207,7 +213,7 @@ async def update_knowledge_by_id(
     form_data: KnowledgeForm,
     user=Depends(get_verified_user),
 ):
-    knowledge = Knowledges.get_knowledge_by_id(id=id)
+    knowledge = await AsyncKnowledges.get_knowledge_by_id(id=id)
     if not knowledge:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -370,6 +376,7 @@ def update_file_from_knowledge_by_id(
     VECTOR_DB_CLIENT.delete(
         collection_name=knowledge.id, filter={"file_id": form_data.file_id}
     )
+    BM25Index.delete_documents(knowledge.id, filter={"file_id": form_data.file_id})
 
     # Add content to the vector database
     try:
@@ -441,6 +448,7 @@ def remove_file_from_knowledge_by_id(
         VECTOR_DB_CLIENT.delete(
             collection_name=knowledge.id, filter={"file_id": form_data.file_id}
         )
+        BM25Index.delete_documents(knowledge.id, filter={"file_id": form_data.file_id})
     except Exception as e:
         log.debug("This was most likely caused by bypassing embedding processing")
         log.debug(e)
@@ -451,6 +459,7 @@ def remove_file_from_knowledge_by_id(
         file_collection = f"file-{form_data.file_id}"
         if VECTOR_DB_CLIENT.has_collection(collection_name=file_collection):
             VECTOR_DB_CLIENT.delete_collection(collection_name=file_collection)
+        BM25Index.delete_index(file_collection)
     except Exception as e:
         log.debug("This was most likely caused by bypassing embedding processing")
         log.debug(e)
@@ -500,7 +509,7 @@ def remove_file_from_knowledge_by_id(
 
 @router.delete("/{id}/delete", response_model=bool)
 async def delete_knowledge_by_id(id: str, user=Depends(get_verified_user)):
-    knowledge = Knowledges.get_knowledge_by_id(id=id)
+    knowledge = await AsyncKnowledges.get_knowledge_by_id(id=id)
     if not knowledge:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -549,6 +558,7 @@ async def delete_knowledge_by_id(id: str, user=Depends(get_verified_user)):
     # Clean up vector DB
     try:
         VECTOR_DB_CLIENT.delete_collection(collection_name=id)
+        BM25Index.delete_index(id)
     except Exception as e:
         log.debug(e)
         pass
@@ -563,7 +573,7 @@ async def delete_knowledge_by_id(id: str, user=Depends(get_verified_user)):
 
 @router.post("/{id}/reset", response_model=Optional[KnowledgeResponse])
 async def reset_knowledge_by_id(id: str, user=Depends(get_verified_user)):
-    knowledge = Knowledges.get_knowledge_by_id(id=id)
+    knowledge = await AsyncKnowledges.get_knowledge_by_id(id=id)
     if not knowledge:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -582,6 +592,7 @@ async def reset_knowledge_by_id(id: str, user=Depends(get_verified_user)):
 
     try:
         VECTOR_DB_CLIENT.delete_collection(collection_name=id)
+        BM25Index.delete_index(id)
     except Exception as e:
         log.debug(e)
         pass
@@ -595,13 +606,99 @@ async def reset_knowledge_by_id(id: str, user=Depends(get_verified_user)):
 # AddFilesToKnowledge
 ############################
 
+# Files embedded per `process_files_batch` call of a knowledge batch job, each
+# call is one step of its progress
+KNOWLEDGE_BATCH_JOB_SIZE = 10
+
+
+class KnowledgeFilesJobResponse(KnowledgeFilesResponse):
+    job_id: Optional[str] = None
+
+
+def add_file_ids_to_knowledge(id: str, file_ids: list[str]):
+    knowledge = Knowledges.get_knowledge_by_id(id=id)
+    data = knowledge.data or {}
+    existing_file_ids = data.get("file_ids", [])
+
+    for file_id in file_ids:
+        if file_id not in existing_file_ids:
+            existing_file_ids.append(file_id)
+
+    data["file_ids"] = existing_file_ids
+    return Knowledges.update_knowledge_data_by_id(id=id, data=data)
+
+
+async def add_files_to_knowledge_job(
+    request: Request, job: IngestionJobModel, update
+) -> dict:
+    """
+    Embeds the files of a knowledge batch add a few at a time, adding each
+    file to the knowledge base once it is embedded. The files done so far are
+    kept in the job state, so a retry only processes the files that failed.
+    """
+    knowledge_id = job.data["knowledge_id"]
+    file_ids = job.data["file_ids"]
+    if Knowledges.get_knowledge_by_id(id=knowledge_id) is None:
+        raise ValueError(ERROR_MESSAGES.NOT_FOUND)
+    user = Users.get_user_by_id(job.user_id)
+
+    completed_file_ids = list((job.state or {}).get("completed_file_ids", []))
+    remaining_file_ids = [id for id in file_ids if id not in completed_file_ids]
+    errors = {}
+
+    await update(stage="embed", progress=len(completed_file_ids) / len(file_ids))
+    for i in range(0, len(remaining_file_ids), KNOWLEDGE_BATCH_JOB_SIZE):
+        batch_file_ids = remaining_file_ids[i : i + KNOWLEDGE_BATCH_JOB_SIZE]
+        files = Files.get_files_by_ids(batch_file_ids)
+
+        found_file_ids = {file.id for file in files}
+        for file_id in batch_file_ids:
+            if file_id not in found_file_ids:
+                errors[file_id] = "File not found"
+
+        if files:
+            result = await asyncio.to_thread(
+                process_files_batch,
+                request=request,
+                form_data=BatchProcessFilesForm(
+                    files=files, collection_name=knowledge_id
+                ),
+                user=user,
+            )
+            errors.update({error.file_id: error.error for error in result.errors})
+
+            succeeded_file_ids = [
+                r.file_id for r in result.results if r.status == "completed"
+            ]
+            add_file_ids_to_knowledge(knowledge_id, succeeded_file_ids)
+            completed_file_ids.extend(succeeded_file_ids)
+
+        await update(
+            progress=len(completed_file_ids) / len(file_ids),
+            state={"completed_file_ids": completed_file_ids},
+        )
 
-@router.post("/{id}/files/batch/add", response_model=Optional[KnowledgeFilesResponse])
+    if errors:
+        raise RuntimeError(
+            f"{len(errors)} of {len(file_ids)} files failed to process: "
+            + "; ".join(f"{file_id}: {error}" for file_id, error in errors.items())
+        )
+
+    return {"knowledge_id": knowledge_id, "file_ids": completed_file_ids}
+
+
+INGESTION_WORKER_POOL.register("knowledge_batch", add_files_to_knowledge_job)
+
+
+@router.post(
+    "/{id}/files/batch/add", response_model=Optional[KnowledgeFilesJobResponse]
+)
 def add_files_to_knowledge_batch(
     request: Request,
     id: str,
     form_data: list[KnowledgeFileIdForm],
     user=Depends(get_verified_user),
+    background: Optional[bool] = Query(None),
 ):
     """
     Add multiple files to a knowledge base
@@ -635,6 +732,29 @@ def add_files_to_knowledge_batch(
             )
         files.append(file)
 
+    if background is None:
+        background = ENABLE_BACKGROUND_INGESTION
+
+    if background and files:
+        # Files are added to the knowledge base as an ingestion worker embeds
+        # them, see add_files_to_knowledge_job
+        job = INGESTION_WORKER_POOL.enqueue(
+            user.id,
+            "knowledge_batch",
+            {"knowledge_id": id, "file_ids": [file.id for file in files]},
+        )
+        if job is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=ERROR_MESSAGES.DEFAULT("Error queueing the files"),
+            )
+
+        return KnowledgeFilesJobResponse(
+            **knowledge.model_dump(),
+            files=Files.get_files_by_ids((knowledge.data or {}).get("file_ids", [])),
+            job_id=job.id,
+        )
+
     # Process files
     try:
         result = process_files_batch(
@@ -648,18 +768,10 @@ def add_files_to_knowledge_batch(
         )
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
-    # Add successful files to knowledge base
-    data = knowledge.data or {}
-    existing_file_ids = data.get("file_ids", [])
-
     # Only add files that were successfully processed
     successful_file_ids = [r.file_id for r in result.results if r.status == "completed"]
-    for file_id in successful_file_ids:
-        if file_id not in existing_file_ids:
-            existing_file_ids.append(file_id)
-
-    data["file_ids"] = existing_file_ids
-    knowledge = Knowledges.update_knowledge_data_by_id(id=id, data=data)
+    knowledge = add_file_ids_to_knowledge(id, successful_file_ids)
+    existing_file_ids = knowledge.data["file_ids"]
 
     # If there were any errors, include them in the response
     if result.errors:
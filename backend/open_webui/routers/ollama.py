@@ -1,18 +1,12 @@
-# TODO: Implement a more intelligent load balancing mechanism for distributing requests among multiple backend instances.
-# Current implementation uses a simple round-robin approach (random.choice). Consider incorporating algorithms like weighted round-robin,
-# least connections, or least response time for better resource utilization and performance optimization.
-
 import asyncio
 import json
 import logging
 import os
-import random
 import re
 import time
 from typing import Optional, Union
 from urllib.parse import urlparse
 import aiohttp
-from aiocache import cached
 import requests
 from open_webui.models.users import UserModel
 
@@ -46,6 +40,9 @@ from open_webui.utils.payload import (
 )
 from open_webui.utils.auth import get_admin_user, get_verified_user
 from open_webui.utils.access_control import has_access
+from open_webui.utils.session_pool import SESSION_POOL, release_response
+from open_webui.utils.load_balancer import OLLAMA_LOAD_BALANCER, BackendLease
+from open_webui.utils.model_registry import MODEL_REGISTRY
 
 
 from open_webui.config import (
@@ -74,25 +71,26 @@ log.setLevel(SRC_LOG_LEVELS["OLLAMA"])
 async def send_get_request(url, key=None, user: UserModel = None):
     timeout = aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST)
     try:
-        async with aiohttp.ClientSession(timeout=timeout, trust_env=True) as session:
-            async with session.get(
-                url,
-                headers={
-                    "Content-Type": "application/json",
-                    **({"Authorization": f"Bearer {key}"} if key else {}),
-                    **(
-                        {
-                            "X-OpenWebUI-User-Name": user.name,
-                            "X-OpenWebUI-User-Id": user.id,
-                            "X-OpenWebUI-User-Email": user.email,
-                            "X-OpenWebUI-User-Role": user.role,
-                        }
-                        if ENABLE_FORWARD_USER_INFO_HEADERS and user
-                        else {}
-                    ),
-                },
-            ) as response:
-                return await response.json()
+        session = SESSION_POOL.get_session(url)
+        async with session.get(
+            url,
+            timeout=timeout,
+            headers={
+                "Content-Type": "application/json",
+                **({"Authorization": f"Bearer {key}"} if key else {}),
+                **(
+                    {
+                        "X-OpenWebUI-User-Name": user.name,
+                        "X-OpenWebUI-User-Id": user.id,
+                        "X-OpenWebUI-User-Email": user.email,
+                        "X-OpenWebUI-User-Role": user.role,
+                    }
+                    if ENABLE_FORWARD_USER_INFO_HEADERS and user
+                    else {}
+                ),
+            },
+        ) as response:
+            return await response.json()
     except Exception as e:
         # Handle connection error here
         log.error(f"Connection error: {e}")
@@ -101,12 +99,12 @@ async def send_get_request(url, key=None, user: UserModel = None):
 
 async def cleanup_response(
     response: Optional[aiohttp.ClientResponse],
-    session: Optional[aiohttp.ClientSession],
+    lease: Optional[BackendLease] = None,
 ):
-    if response:
-        response.close()
-    if session:
-        await session.close()
+    # The session is shared through SESSION_POOL, only the response is released
+    await release_response(response)
+    if lease:
+        lease.release()
 
 
 async def send_post_request(
@@ -116,17 +114,19 @@ async def send_post_request(
     key: Optional[str] = None,
     content_type: Optional[str] = None,
     user: UserModel = None,
+    backend: Optional[int] = None,
 ):
+    # `backend` is the index of the connection the load balancer picked, if any
+    lease = OLLAMA_LOAD_BALANCER.acquire(backend) if backend is not None else None
 
     r = None
     try:
-        session = aiohttp.ClientSession(
-            trust_env=True, timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT)
-        )
+        session = SESSION_POOL.get_session(url)
 
         r = await session.post(
             url,
             data=payload,
+            timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT),
             headers={
                 "Content-Type": "application/json",
                 **({"Authorization": f"Bearer {key}"} if key else {}),
@@ -142,6 +142,8 @@ async def send_post_request(
                 ),
             },
         )
+        if lease:
+            lease.record_latency()
         r.raise_for_status()
 
         if stream:
@@ -154,18 +156,20 @@ async def send_post_request(
                 r.content,
                 status_code=r.status,
                 headers=response_headers,
-                background=BackgroundTask(
-                    cleanup_response, response=r, session=session
-                ),
+                background=BackgroundTask(cleanup_response, response=r, lease=lease),
             )
         else:
             res = await r.json()
-            await cleanup_response(r, session)
+            await cleanup_response(r, lease)
             return res
 
     except Exception as e:
         detail = None
 
+        if lease:
+            # Client errors (e.g. unknown model) say nothing about the backend health
+            lease.release(error=r is None or r.status >= 500)
+
         if r is not None:
             try:
                 res = await r.json()
@@ -174,12 +178,38 @@ async def send_post_request(
             except Exception:
                 detail = f"Ollama: {e}"
 
+            await cleanup_response(r)
+
         raise HTTPException(
             status_code=r.status if r else 500,
             detail=detail if detail else "Open WebUI: Server Connection Error",
         )
 
 
+def select_url_idx(request: Request, url_idxs: list[int], affinity_key=None) -> int:
+    """
+    Picks one of the connections serving a model through the load balancer,
+    which tracks backends by their index, so the same URL configured twice
+    counts as two backends.
+    """
+    weights = {}
+    for idx in url_idxs:
+        url = request.app.state.config.OLLAMA_BASE_URLS[idx]
+        api_config = request.app.state.config.OLLAMA_API_CONFIGS.get(
+            str(idx),
+            request.app.state.config.OLLAMA_API_CONFIGS.get(url, {}),  # Legacy support
+        )
+
+        try:
+            weights[idx] = float(api_config.get("weight", 1))
+        except (TypeError, ValueError):
+            weights[idx] = 1.0
+
+    return OLLAMA_LOAD_BALANCER.select(
+        list(weights.keys()), weights=weights, affinity_key=affinity_key
+    )
+
+
 def get_api_key(idx, url, configs):
     parsed_url = urlparse(url)
     base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
@@ -288,6 +318,8 @@ async def update_config(
         if key in keys
     }
 
+    MODEL_REGISTRY.invalidate()
+
     return {
         "ENABLE_OLLAMA_API": request.app.state.config.ENABLE_OLLAMA_API,
         "OLLAMA_BASE_URLS": request.app.state.config.OLLAMA_BASE_URLS,
@@ -295,7 +327,6 @@ async def update_config(
     }
 
 
-@cached(ttl=1)
 async def get_all_models(request: Request, user: UserModel = None):
     log.info("get_all_models()")
     if request.app.state.config.ENABLE_OLLAMA_API:
@@ -304,7 +335,12 @@ async def get_all_models(request: Request, user: UserModel = None):
             if (str(idx) not in request.app.state.config.OLLAMA_API_CONFIGS) and (
                 url not in request.app.state.config.OLLAMA_API_CONFIGS  # Legacy support
             ):
-                request_tasks.append(send_get_request(f"{url}/api/tags", user=user))
+                request_tasks.append(
+                    MODEL_REGISTRY.get_connection_models(
+                        f"ollama:{idx}:{url}",
+                        send_get_request(f"{url}/api/tags", user=user),
+                    )
+                )
             else:
                 api_config = request.app.state.config.OLLAMA_API_CONFIGS.get(
                     str(idx),
@@ -318,7 +354,10 @@ async def get_all_models(request: Request, user: UserModel = None):
 
                 if enable:
                     request_tasks.append(
-                        send_get_request(f"{url}/api/tags", key, user=user)
+                        MODEL_REGISTRY.get_connection_models(
+                            f"ollama:{idx}:{url}",
+                            send_get_request(f"{url}/api/tags", key, user=user),
+                        )
                     )
                 else:
                     request_tasks.append(asyncio.ensure_future(asyncio.sleep(0, None)))
@@ -390,15 +429,14 @@ async def get_all_models(request: Request, user: UserModel = None):
 
 async def get_filtered_models(models, user):
     # Filter models based on user access control
-    filtered_models = []
-    for model in models.get("models", []):
-        model_info = Models.get_model_by_id(model["model"])
-        if model_info:
-            if user.id == model_info.user_id or has_access(
-                user.id, type="read", access_control=model_info.access_control
-            ):
-                filtered_models.append(model)
-    return filtered_models
+    accessible_model_ids = Models.get_accessible_model_ids(
+        user.id, [model["model"] for model in models.get("models", [])]
+    )
+    return [
+        model
+        for model in models.get("models", [])
+        if model["model"] in accessible_model_ids
+    ]
 
 
 @router.get("/api/tags")
@@ -599,7 +637,7 @@ async def push_model(
     user=Depends(get_admin_user),
 ):
     if url_idx is None:
-        await get_all_models(request, user=user)
+        await MODEL_REGISTRY.get_models(request, user=user)
         models = request.app.state.OLLAMA_MODELS
 
         if form_data.name in models:
@@ -662,7 +700,7 @@ async def copy_model(
     user=Depends(get_admin_user),
 ):
     if url_idx is None:
-        await get_all_models(request, user=user)
+        await MODEL_REGISTRY.get_models(request, user=user)
         models = request.app.state.OLLAMA_MODELS
 
         if form_data.source in models:
@@ -699,6 +737,7 @@ async def copy_model(
         r.raise_for_status()
 
         log.debug(f"r.text: {r.text}")
+        MODEL_REGISTRY.invalidate()
         return True
     except Exception as e:
         log.exception(e)
@@ -727,7 +766,7 @@ async def delete_model(
     user=Depends(get_admin_user),
 ):
     if url_idx is None:
-        await get_all_models(request, user=user)
+        await MODEL_REGISTRY.get_models(request, user=user)
         models = request.app.state.OLLAMA_MODELS
 
         if form_data.name in models:
@@ -764,6 +803,7 @@ async def delete_model(
         r.raise_for_status()
 
         log.debug(f"r.text: {r.text}")
+        MODEL_REGISTRY.invalidate()
         return True
     except Exception as e:
         log.exception(e)
@@ -787,7 +827,7 @@ async def delete_model(
 async def show_model_info(
     request: Request, form_data: ModelNameForm, user=Depends(get_verified_user)
 ):
-    await get_all_models(request, user=user)
+    await MODEL_REGISTRY.get_models(request, user=user)
     models = request.app.state.OLLAMA_MODELS
 
     if form_data.name not in models:
@@ -796,7 +836,7 @@ async def show_model_info(
             detail=ERROR_MESSAGES.MODEL_NOT_FOUND(form_data.name),
         )
 
-    url_idx = random.choice(models[form_data.name]["urls"])
+    url_idx = select_url_idx(request, models[form_data.name]["urls"])
 
     url = request.app.state.config.OLLAMA_BASE_URLS[url_idx]
     key = get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS)
@@ -861,7 +901,7 @@ async def embed(
     log.info(f"generate_ollama_batch_embeddings {form_data}")
 
     if url_idx is None:
-        await get_all_models(request, user=user)
+        await MODEL_REGISTRY.get_models(request, user=user)
         models = request.app.state.OLLAMA_MODELS
 
         model = form_data.model
@@ -870,7 +910,7 @@ async def embed(
             model = f"{model}:latest"
 
         if model in models:
-            url_idx = random.choice(models[model]["urls"])
+            url_idx = select_url_idx(request, models[model]["urls"])
         else:
             raise HTTPException(
                 status_code=400,
@@ -940,7 +980,7 @@ async def embeddings(
     log.info(f"generate_ollama_embeddings {form_data}")
 
     if url_idx is None:
-        await get_all_models(request, user=user)
+        await MODEL_REGISTRY.get_models(request, user=user)
         models = request.app.state.OLLAMA_MODELS
 
         model = form_data.model
@@ -949,7 +989,7 @@ async def embeddings(
             model = f"{model}:latest"
 
         if model in models:
-            url_idx = random.choice(models[model]["urls"])
+            url_idx = select_url_idx(request, models[model]["urls"])
         else:
             raise HTTPException(
                 status_code=400,
@@ -1025,7 +1065,7 @@ async def generate_completion(
     user=Depends(get_verified_user),
 ):
     if url_idx is None:
-        await get_all_models(request, user=user)
+        await MODEL_REGISTRY.get_models(request, user=user)
         models = request.app.state.OLLAMA_MODELS
 
         model = form_data.model
@@ -1034,7 +1074,7 @@ async def generate_completion(
             model = f"{model}:latest"
 
         if model in models:
-            url_idx = random.choice(models[model]["urls"])
+            url_idx = select_url_idx(request, models[model]["urls"])
         else:
             raise HTTPException(
                 status_code=400,
@@ -1056,6 +1096,7 @@ async def generate_completion(
         payload=form_data.model_dump_json(exclude_none=True).encode(),
         key=get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS),
         user=user,
+        backend=url_idx,
     )
 
 
@@ -1090,7 +1131,12 @@ class GenerateChatCompletionForm(BaseModel):
     tools: Optional[list[dict]] = None
 
 
-async def get_ollama_url(request: Request, model: str, url_idx: Optional[int] = None):
+async def get_ollama_url(
+    request: Request,
+    model: str,
+    url_idx: Optional[int] = None,
+    affinity_key: Optional[str] = None,
+):
     if url_idx is None:
         models = request.app.state.OLLAMA_MODELS
         if model not in models:
@@ -1098,7 +1144,9 @@ async def get_ollama_url(request: Request, model: str, url_idx: Optional[int] =
                 status_code=400,
                 detail=ERROR_MESSAGES.MODEL_NOT_FOUND(model),
             )
-        url_idx = random.choice(models[model].get("urls", []))
+        url_idx = select_url_idx(
+            request, models[model].get("urls", []), affinity_key=affinity_key
+        )
     url = request.app.state.config.OLLAMA_BASE_URLS[url_idx]
     return url, url_idx
 
@@ -1169,7 +1217,13 @@ async def generate_chat_completion(
     if ":" not in payload["model"]:
         payload["model"] = f"{payload['model']}:latest"
 
-    url, url_idx = await get_ollama_url(request, payload["model"], url_idx)
+    # Keep a chat on one backend so its prompt cache stays warm
+    url, url_idx = await get_ollama_url(
+        request,
+        payload["model"],
+        url_idx,
+        affinity_key=(metadata or {}).get("chat_id"),
+    )
     api_config = request.app.state.config.OLLAMA_API_CONFIGS.get(
         str(url_idx),
         request.app.state.config.OLLAMA_API_CONFIGS.get(url, {}),  # Legacy support
@@ -1186,6 +1240,7 @@ async def generate_chat_completion(
         key=get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS),
         content_type="application/x-ndjson",
         user=user,
+        backend=url_idx,
     )
 
 
@@ -1289,6 +1344,7 @@ async def generate_openai_completion(
         stream=payload.get("stream", False),
         key=get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS),
         user=user,
+        backend=url_idx,
     )
 
 
@@ -1352,7 +1408,12 @@ async def generate_openai_chat_completion(
     if ":" not in payload["model"]:
         payload["model"] = f"{payload['model']}:latest"
 
-    url, url_idx = await get_ollama_url(request, payload["model"], url_idx)
+    url, url_idx = await get_ollama_url(
+        request,
+        payload["model"],
+        url_idx,
+        affinity_key=(metadata or {}).get("chat_id"),
+    )
     api_config = request.app.state.config.OLLAMA_API_CONFIGS.get(
         str(url_idx),
         request.app.state.config.OLLAMA_API_CONFIGS.get(url, {}),  # Legacy support
@@ -1368,6 +1429,7 @@ async def generate_openai_chat_completion(
         stream=payload.get("stream", False),
         key=get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS),
         user=user,
+        backend=url_idx,
     )
 
 
@@ -1427,15 +1489,10 @@ async def get_openai_models(
 
     if user.role == "user" and not BYPASS_MODEL_ACCESS_CONTROL:
         # Filter models based on user access control
-        filtered_models = []
-        for model in models:
-            model_info = Models.get_model_by_id(model["id"])
-            if model_info:
-                if user.id == model_info.user_id or has_access(
-                    user.id, type="read", access_control=model_info.access_control
-                ):
-                    filtered_models.append(model)
-        models = filtered_models
+        accessible_model_ids = Models.get_accessible_model_ids(
+            user.id, [model["id"] for model in models]
+        )
+        models = [model for model in models if model["id"] in accessible_model_ids]
 
     return {
         "data": models,
@@ -26,6 +26,7 @@ from open_webui.constants import ERROR_MESSAGES
 from open_webui.routers.openai import get_all_models_responses
 
 from open_webui.utils.auth import get_admin_user
+from open_webui.utils.model_registry import MODEL_REGISTRY
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MAIN"])
@@ -228,6 +229,7 @@ async def upload_pipeline(
         r.raise_for_status()
         data = r.json()
 
+        MODEL_REGISTRY.invalidate()
         return {**data}
     except Exception as e:
         # Handle connection error here
@@ -279,6 +281,7 @@ async def add_pipeline(
         r.raise_for_status()
         data = r.json()
 
+        MODEL_REGISTRY.invalidate()
         return {**data}
     except Exception as e:
         # Handle connection error here
@@ -324,6 +327,7 @@ async def delete_pipeline(
         r.raise_for_status()
         data = r.json()
 
+        MODEL_REGISTRY.invalidate()
         return {**data}
     except Exception as e:
         # Handle connection error here
@@ -479,6 +483,7 @@ async def update_pipeline_valves(
         r.raise_for_status()
         data = r.json()
 
+        MODEL_REGISTRY.invalidate()
         return {**data}
     except Exception as e:
         # Handle connection error here
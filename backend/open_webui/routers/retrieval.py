@@ -31,6 +31,12 @@ from langchain_core.documents import Document
 
 from open_webui.models.files import FileModel, Files
 from open_webui.models.knowledge import Knowledges
+from open_webui.models.bm25 import BM25Index
+from open_webui.models.ingestion_jobs import (
+    IngestionJobModel,
+    IngestionJobResponse,
+    IngestionJobs,
+)
 from open_webui.storage.provider import Storage
 
 
@@ -73,6 +79,7 @@ from open_webui.utils.misc import (
     calculate_sha256_string,
 )
 from open_webui.utils.auth import get_admin_user, get_verified_user
+from open_webui.utils.ingestion import INGESTION_WORKER_POOL
 
 from open_webui.config import (
     ENV,
@@ -861,11 +868,14 @@ def save_docs_to_vector_db(
                 metadata[key] = str(value)
 
     try:
+        is_new_collection = True
         if VECTOR_DB_CLIENT.has_collection(collection_name=collection_name):
             log.info(f"collection {collection_name} already exists")
+            is_new_collection = overwrite
 
             if overwrite:
                 VECTOR_DB_CLIENT.delete_collection(collection_name=collection_name)
+                BM25Index.delete_index(collection_name)
                 log.info(f"deleting existing collection {collection_name}")
             elif add is False:
                 log.info(
@@ -912,6 +922,13 @@ def save_docs_to_vector_db(
             items=items,
         )
 
+        # Existing collections that are not indexed yet are indexed as a whole
+        # on their first hybrid search
+        if is_new_collection and request.app.state.config.ENABLE_RAG_HYBRID_SEARCH:
+            BM25Index.create_index(collection_name, items)
+        else:
+            BM25Index.add_documents(collection_name, items)
+
         return True
     except Exception as e:
         log.exception(e)
@@ -924,34 +941,56 @@ class ProcessFileForm(BaseModel):
     collection_name: Optional[str] = None
 
 
-@router.post("/process/file")
-def process_file(
-    request: Request,
-    form_data: ProcessFileForm,
-    user=Depends(get_verified_user),
-):
-    try:
-        file = Files.get_file_by_id(form_data.file_id)
-
-        collection_name = form_data.collection_name
+def load_file_docs(
+    request: Request, file: FileModel, form_data: ProcessFileForm
+) -> tuple[list[Document], str]:
+    """Loads the documents of a file and its text content."""
+    if form_data.content:
+        # Update the content in the file
+        # Usage: /files/{file_id}/data/content/update
 
-        if collection_name is None:
-            collection_name = f"file-{file.id}"
+        try:
+            # /files/{file_id}/data/content/update
+            VECTOR_DB_CLIENT.delete_collection(collection_name=f"file-{file.id}")
+            BM25Index.delete_index(f"file-{file.id}")
+        except:
+            # Audio file upload pipeline
+            pass
+
+        docs = [
+            Document(
+                page_content=form_data.content.replace("<br/>", "\n"),
+                metadata={
+                    **file.meta,
+                    "name": file.filename,
+                    "created_by": file.user_id,
+                    "file_id": file.id,
+                    "source": file.filename,
+                },
+            )
+        ]
 
-        if form_data.content:
-            # Update the content in the file
-            # Usage: /files/{file_id}/data/content/update
+        text_content = form_data.content
+    elif form_data.collection_name:
+        # Check if the file has already been processed and save the content
+        # Usage: /knowledge/{id}/file/add, /knowledge/{id}/file/update
 
-            try:
-                # /files/{file_id}/data/content/update
-                VECTOR_DB_CLIENT.delete_collection(collection_name=f"file-{file.id}")
-            except:
-                # Audio file upload pipeline
-                pass
+        result = VECTOR_DB_CLIENT.query(
+            collection_name=f"file-{file.id}", filter={"file_id": file.id}
+        )
 
+        if result is not None and len(result.ids[0]) > 0:
             docs = [
                 Document(
-                    page_content=form_data.content.replace("<br/>", "\n"),
+                    page_content=result.documents[0][idx],
+                    metadata=result.metadatas[0][idx],
+                )
+                for idx, id in enumerate(result.ids[0])
+            ]
+        else:
+            docs = [
+                Document(
+                    page_content=file.data.get("content", ""),
                     metadata={
                         **file.meta,
                         "name": file.filename,
@@ -962,132 +1001,137 @@ def process_file(
                 )
             ]
 
-            text_content = form_data.content
-        elif form_data.collection_name:
-            # Check if the file has already been processed and save the content
-            # Usage: /knowledge/{id}/file/add, /knowledge/{id}/file/update
-
-            result = VECTOR_DB_CLIENT.query(
-                collection_name=f"file-{file.id}", filter={"file_id": file.id}
+        text_content = file.data.get("content", "")
+    else:
+        # Process the file and save the content
+        # Usage: /files/
+        file_path = file.path
+        if file_path:
+            file_path = Storage.get_file(file_path)
+            loader = Loader(
+                engine=request.app.state.config.CONTENT_EXTRACTION_ENGINE,
+                TIKA_SERVER_URL=request.app.state.config.TIKA_SERVER_URL,
+                DOCLING_SERVER_URL=request.app.state.config.DOCLING_SERVER_URL,
+                PDF_EXTRACT_IMAGES=request.app.state.config.PDF_EXTRACT_IMAGES,
+                DOCUMENT_INTELLIGENCE_ENDPOINT=request.app.state.config.DOCUMENT_INTELLIGENCE_ENDPOINT,
+                DOCUMENT_INTELLIGENCE_KEY=request.app.state.config.DOCUMENT_INTELLIGENCE_KEY,
             )
+            docs = loader.load(file.filename, file.meta.get("content_type"), file_path)
 
-            if result is not None and len(result.ids[0]) > 0:
-                docs = [
-                    Document(
-                        page_content=result.documents[0][idx],
-                        metadata=result.metadatas[0][idx],
-                    )
-                    for idx, id in enumerate(result.ids[0])
-                ]
-            else:
-                docs = [
-                    Document(
-                        page_content=file.data.get("content", ""),
-                        metadata={
-                            **file.meta,
-                            "name": file.filename,
-                            "created_by": file.user_id,
-                            "file_id": file.id,
-                            "source": file.filename,
-                        },
-                    )
-                ]
-
-            text_content = file.data.get("content", "")
-        else:
-            # Process the file and save the content
-            # Usage: /files/
-            file_path = file.path
-            if file_path:
-                file_path = Storage.get_file(file_path)
-                loader = Loader(
-                    engine=request.app.state.config.CONTENT_EXTRACTION_ENGINE,
-                    TIKA_SERVER_URL=request.app.state.config.TIKA_SERVER_URL,
-                    DOCLING_SERVER_URL=request.app.state.config.DOCLING_SERVER_URL,
-                    PDF_EXTRACT_IMAGES=request.app.state.config.PDF_EXTRACT_IMAGES,
-                    DOCUMENT_INTELLIGENCE_ENDPOINT=request.app.state.config.DOCUMENT_INTELLIGENCE_ENDPOINT,
-                    DOCUMENT_INTELLIGENCE_KEY=request.app.state.config.DOCUMENT_INTELLIGENCE_KEY,
+            docs = [
+                Document(
+                    page_content=doc.page_content,
+                    metadata={
+                        **doc.metadata,
+                        "name": file.filename,
+                        "created_by": file.user_id,
+                        "file_id": file.id,
+                        "source": file.filename,
+                    },
                 )
-                docs = loader.load(
-                    file.filename, file.meta.get("content_type"), file_path
+                for doc in docs
+            ]
+        else:
+            docs = [
+                Document(
+                    page_content=file.data.get("content", ""),
+                    metadata={
+                        **file.meta,
+                        "name": file.filename,
+                        "created_by": file.user_id,
+                        "file_id": file.id,
+                        "source": file.filename,
+                    },
                 )
+            ]
+        text_content = " ".join([doc.page_content for doc in docs])
 
-                docs = [
-                    Document(
-                        page_content=doc.page_content,
-                        metadata={
-                            **doc.metadata,
-                            "name": file.filename,
-                            "created_by": file.user_id,
-                            "file_id": file.id,
-                            "source": file.filename,
-                        },
-                    )
-                    for doc in docs
-                ]
-            else:
-                docs = [
-                    Document(
-                        page_content=file.data.get("content", ""),
-                        metadata={
-                            **file.meta,
-                            "name": file.filename,
-                            "created_by": file.user_id,
-                            "file_id": file.id,
-                            "source": file.filename,
-                        },
-                    )
-                ]
-            text_content = " ".join([doc.page_content for doc in docs])
+    return docs, text_content
 
-        log.debug(f"text_content: {text_content}")
-        Files.update_file_data_by_id(
-            file.id,
-            {"content": text_content},
-        )
 
-        hash = calculate_sha256_string(text_content)
-        Files.update_file_hash_by_id(file.id, hash)
+def save_file_docs(
+    request: Request,
+    file: FileModel,
+    docs: list[Document],
+    text_content: str,
+    collection_name: str,
+    add: bool = False,
+    user=None,
+) -> Optional[dict]:
+    """Saves the text content of a file and embeds its documents."""
+    log.debug(f"text_content: {text_content}")
+    Files.update_file_data_by_id(
+        file.id,
+        {"content": text_content},
+    )
 
-        if not request.app.state.config.BYPASS_EMBEDDING_AND_RETRIEVAL:
-            try:
-                result = save_docs_to_vector_db(
-                    request,
-                    docs=docs,
-                    collection_name=collection_name,
-                    metadata={
-                        "file_id": file.id,
-                        "name": file.filename,
-                        "hash": hash,
+    hash = calculate_sha256_string(text_content)
+    Files.update_file_hash_by_id(file.id, hash)
+
+    if not request.app.state.config.BYPASS_EMBEDDING_AND_RETRIEVAL:
+        try:
+            result = save_docs_to_vector_db(
+                request,
+                docs=docs,
+                collection_name=collection_name,
+                metadata={
+                    "file_id": file.id,
+                    "name": file.filename,
+                    "hash": hash,
+                },
+                add=add,
+                user=user,
+            )
+
+            if result:
+                Files.update_file_metadata_by_id(
+                    file.id,
+                    {
+                        "collection_name": collection_name,
                     },
-                    add=(True if form_data.collection_name else False),
-                    user=user,
                 )
 
-                if result:
-                    Files.update_file_metadata_by_id(
-                        file.id,
-                        {
-                            "collection_name": collection_name,
-                        },
-                    )
+                return {
+                    "status": True,
+                    "collection_name": collection_name,
+                    "filename": file.filename,
+                    "content": text_content,
+                }
+        except Exception as e:
+            raise e
+    else:
+        return {
+            "status": True,
+            "collection_name": None,
+            "filename": file.filename,
+            "content": text_content,
+        }
 
-                    return {
-                        "status": True,
-                        "collection_name": collection_name,
-                        "filename": file.filename,
-                        "content": text_content,
-                    }
-            except Exception as e:
-                raise e
-        else:
-            return {
-                "status": True,
-                "collection_name": None,
-                "filename": file.filename,
-                "content": text_content,
-            }
 
+@router.post("/process/file")
+def process_file(
+    request: Request,
+    form_data: ProcessFileForm,
+    user=Depends(get_verified_user),
+):
+    try:
+        file = Files.get_file_by_id(form_data.file_id)
+
+        collection_name = form_data.collection_name
+
+        if collection_name is None:
+            collection_name = f"file-{file.id}"
+
+        docs, text_content = load_file_docs(request, file, form_data)
+        return save_file_docs(
+            request,
+            file,
+            docs,
+            text_content,
+            collection_name,
+            add=(True if form_data.collection_name else False),
+            user=user,
+        )
     except Exception as e:
         log.exception(e)
         if "No pandoc was found" in str(e):
@@ -1623,6 +1667,7 @@ def delete_entries_from_collection(form_data: DeleteForm, user=Depends(get_admin
                 collection_name=form_data.collection_name,
                 metadata={"hash": hash},
             )
+            BM25Index.delete_documents(form_data.collection_name, filter={"hash": hash})
             return {"status": True}
         else:
             return {"status": False}
@@ -1634,6 +1679,7 @@ def delete_entries_from_collection(form_data: DeleteForm, user=Depends(get_admin
 @router.post("/reset/db")
 def reset_vector_db(user=Depends(get_admin_user)):
     VECTOR_DB_CLIENT.reset()
+    BM25Index.delete_all_indexes()
     Knowledges.delete_all_knowledge()
 
 
@@ -1757,7 +1803,51 @@ def process_files_batch(
             for result in results:
                 result.status = "failed"
                 errors.append(
-                    BatchProcessFilesResult(file_id=result.file_id, error=str(e))
+                    BatchProcessFilesResult(
+                        file_id=result.file_id, status="failed", error=str(e)
+                    )
                 )
 
     return BatchProcessFilesResponse(results=results, errors=errors)
+
+
+####################################
+#
+# Ingestion jobs
+#
+####################################
+
+
+def get_ingestion_job_by_id(id: str, user) -> IngestionJobModel:
+    job = IngestionJobs.get_job_by_id(id)
+    if job is None or (job.user_id != user.id and user.role != "admin"):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ERROR_MESSAGES.NOT_FOUND,
+        )
+    return job
+
+
+@router.get("/jobs", response_model=list[IngestionJobResponse])
+def get_ingestion_jobs(user=Depends(get_verified_user)):
+    return [
+        IngestionJobResponse(**job.model_dump())
+        for job in IngestionJobs.get_jobs_by_user_id(user.id)
+    ]
+
+
+@router.get("/jobs/{id}", response_model=IngestionJobResponse)
+def get_ingestion_job(id: str, user=Depends(get_verified_user)):
+    return IngestionJobResponse(**get_ingestion_job_by_id(id, user).model_dump())
+
+
+@router.post("/jobs/{id}/retry", response_model=IngestionJobResponse)
+def retry_ingestion_job(id: str, user=Depends(get_verified_user)):
+    job = get_ingestion_job_by_id(id, user)
+    if job.status != "failed":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.DEFAULT("Only failed jobs can be retried"),
+        )
+
+    return IngestionJobResponse(**INGESTION_WORKER_POOL.retry(job.id).model_dump())
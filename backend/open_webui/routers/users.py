@@ -21,6 +21,7 @@ from pydantic import BaseModel
 
 from open_webui.utils.auth import get_admin_user, get_password_hash, get_verified_user
 from open_webui.utils.access_control import get_permissions
+from open_webui.utils.permission_cache import PERMISSION_CACHE
 
 
 log = logging.getLogger(__name__)
@@ -128,6 +129,7 @@ async def update_default_user_permissions(
     request: Request, form_data: UserPermissions, user=Depends(get_admin_user)
 ):
     request.app.state.config.USER_PERMISSIONS = form_data.model_dump()
+    PERMISSION_CACHE.invalidate()
     return request.app.state.config.USER_PERMISSIONS
 
 
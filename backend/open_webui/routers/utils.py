@@ -133,3 +133,52 @@ async def download_litellm_config_yaml(user=Depends(get_admin_user)):
         media_type="application/octet-stream",
         filename="config.yaml",
     )
+
+
+@router.get("/stats/realtime-save")
+async def get_realtime_save_stats(user=Depends(get_admin_user)):
+    from open_webui.utils.realtime_save import REALTIME_SAVE_STATS
+
+    return REALTIME_SAVE_STATS.to_dict()
+
+
+@router.get("/stats/chat-events")
+async def get_chat_event_stats(user=Depends(get_admin_user)):
+    from open_webui.socket.utils import CHAT_EVENT_STATS
+
+    return CHAT_EVENT_STATS.to_dict()
+
+
+@router.get("/stats/embedding-cache")
+async def get_embedding_cache_stats(user=Depends(get_admin_user)):
+    from open_webui.retrieval.embedding_cache import EMBEDDING_CACHE_STATS
+
+    return EMBEDDING_CACHE_STATS.to_dict()
+
+
+@router.get("/stats/embedding-client")
+async def get_embedding_client_stats(user=Depends(get_admin_user)):
+    from open_webui.retrieval.embedding_client import EMBEDDING_CLIENT_STATS
+
+    return EMBEDDING_CLIENT_STATS.to_dict()
+
+
+@router.get("/stats/loader-process-pool")
+async def get_loader_process_pool_stats(user=Depends(get_admin_user)):
+    from open_webui.retrieval.loaders.process_pool import LOADER_PROCESS_POOL_STATS
+
+    return LOADER_PROCESS_POOL_STATS.to_dict()
+
+
+@router.get("/stats/http-pool")
+async def get_http_pool_stats(user=Depends(get_admin_user)):
+    from open_webui.utils.session_pool import SESSION_POOL
+
+    return SESSION_POOL.get_stats()
+
+
+@router.get("/stats/ollama-backends")
+async def get_ollama_backend_stats(user=Depends(get_admin_user)):
+    from open_webui.utils.load_balancer import OLLAMA_LOAD_BALANCER
+
+    return OLLAMA_LOAD_BALANCER.get_stats()
@@ -23,7 +23,15 @@ from open_webui.env import (
     WEBSOCKET_SENTINEL_HOSTS,
 )
 from open_webui.utils.auth import decode_token
-from open_webui.socket.utils import RedisDict, RedisLock
+from open_webui.socket.utils import (
+    RedisDict,
+    RedisLock,
+    RedisUsagePool,
+    RedisUserPool,
+    UsagePool,
+    UserPool,
+    get_chat_event_buffer,
+)
 
 from open_webui.env import (
     GLOBAL_LOG_LEVEL,
@@ -83,13 +91,13 @@ if WEBSOCKET_MANAGER == "redis":
         redis_url=WEBSOCKET_REDIS_URL,
         redis_sentinels=redis_sentinels,
     )
-    USER_POOL = RedisDict(
-        "open-webui:user_pool",
+    USER_POOL = RedisUserPool(
+        "open-webui:user_sessions",
         redis_url=WEBSOCKET_REDIS_URL,
         redis_sentinels=redis_sentinels,
     )
-    USAGE_POOL = RedisDict(
-        "open-webui:usage_pool",
+    USAGE_POOL = RedisUsagePool(
+        "open-webui:model_usage",
         redis_url=WEBSOCKET_REDIS_URL,
         redis_sentinels=redis_sentinels,
     )
@@ -105,8 +113,8 @@ if WEBSOCKET_MANAGER == "redis":
     release_func = clean_up_lock.release_lock
 else:
     SESSION_POOL = {}
-    USER_POOL = {}
-    USAGE_POOL = {}
+    USER_POOL = UserPool()
+    USAGE_POOL = UsagePool()
     aquire_func = release_func = renew_func = lambda: True
 
 
@@ -121,26 +129,8 @@ async def periodic_usage_pool_cleanup():
                 log.error(f"Unable to renew cleanup lock. Exiting usage pool cleanup.")
                 raise Exception("Unable to renew usage pool cleanup lock.")
 
-            now = int(time.time())
-            send_usage = False
-            for model_id, connections in list(USAGE_POOL.items()):
-                # Creating a list of sids to remove if they have timed out
-                expired_sids = [
-                    sid
-                    for sid, details in connections.items()
-                    if now - details["updated_at"] > TIMEOUT_DURATION
-                ]
-
-                for sid in expired_sids:
-                    del connections[sid]
-
-                if not connections:
-                    log.debug(f"Cleaning up model {model_id} from usage pool")
-                    del USAGE_POOL[model_id]
-                else:
-                    USAGE_POOL[model_id] = connections
-
-                send_usage = True
+            # Drop the sessions that have not reported usage in time
+            send_usage = USAGE_POOL.cleanup(int(time.time()) - TIMEOUT_DURATION)
 
             if send_usage:
                 # Emit updated usage information after cleaning
@@ -159,7 +149,7 @@ app = socketio.ASGIApp(
 
 def get_models_in_use():
     # List models that are currently in use
-    models_in_use = list(USAGE_POOL.keys())
+    models_in_use = USAGE_POOL.model_ids()
     return models_in_use
 
 
@@ -170,10 +160,7 @@ async def usage(sid, data):
     current_time = int(time.time())
 
     # Store the new usage data and task
-    USAGE_POOL[model_id] = {
-        **(USAGE_POOL[model_id] if model_id in USAGE_POOL else {}),
-        sid: {"updated_at": current_time},
-    }
+    USAGE_POOL.touch(model_id, sid, current_time)
 
     # Broadcast the usage data to all clients
     await sio.emit("usage", {"models": get_models_in_use()})
@@ -190,13 +177,10 @@ async def connect(sid, environ, auth):
 
         if user:
             SESSION_POOL[sid] = user.model_dump()
-            if user.id in USER_POOL:
-                USER_POOL[user.id] = USER_POOL[user.id] + [sid]
-            else:
-                USER_POOL[user.id] = [sid]
+            USER_POOL.add(user.id, sid)
 
             # print(f"user {user.name}({user.id}) connected with session ID {sid}")
-            await sio.emit("user-list", {"user_ids": list(USER_POOL.keys())})
+            await sio.emit("user-list", {"user_ids": USER_POOL.user_ids()})
             await sio.emit("usage", {"models": get_models_in_use()})
 
 
@@ -216,10 +200,7 @@ async def user_join(sid, data):
         return
 
     SESSION_POOL[sid] = user.model_dump()
-    if user.id in USER_POOL:
-        USER_POOL[user.id] = USER_POOL[user.id] + [sid]
-    else:
-        USER_POOL[user.id] = [sid]
+    USER_POOL.add(user.id, sid)
 
     # Join all the channels
     channels = Channels.get_channels_by_user_id(user.id)
@@ -229,7 +210,7 @@ async def user_join(sid, data):
 
     # print(f"user {user.name}({user.id}) connected with session ID {sid}")
 
-    await sio.emit("user-list", {"user_ids": list(USER_POOL.keys())})
+    await sio.emit("user-list", {"user_ids": USER_POOL.user_ids()})
     return {"id": user.id, "name": user.name}
 
 
@@ -284,7 +265,7 @@ async def channel_events(sid, data):
 
 @sio.on("user-list")
 async def user_list(sid):
-    await sio.emit("user-list", {"user_ids": list(USER_POOL.keys())})
+    await sio.emit("user-list", {"user_ids": USER_POOL.user_ids()})
 
 
 @sio.event
@@ -293,25 +274,26 @@ async def disconnect(sid):
         user = SESSION_POOL[sid]
         del SESSION_POOL[sid]
 
-        user_id = user["id"]
-        USER_POOL[user_id] = [_sid for _sid in USER_POOL[user_id] if _sid != sid]
-
-        if len(USER_POOL[user_id]) == 0:
-            del USER_POOL[user_id]
+        USER_POOL.remove(user["id"], sid)
 
-        await sio.emit("user-list", {"user_ids": list(USER_POOL.keys())})
+        await sio.emit("user-list", {"user_ids": USER_POOL.user_ids()})
     else:
         pass
         # print(f"Unknown session ID {sid} disconnected")
 
 
+async def emit_to_user(user_id: str, event: str, data: dict):
+    for session_id in USER_POOL.get(user_id):
+        await sio.emit(event, data, to=session_id)
+
+
 def get_event_emitter(request_info, update_db=True):
-    async def __event_emitter__(event_data):
+    async def emit(event_data):
         user_id = request_info["user_id"]
 
         session_ids = list(
             set(
-                USER_POOL.get(user_id, [])
+                USER_POOL.get(user_id)
                 + (
                     [request_info.get("session_id")]
                     if request_info.get("session_id")
@@ -331,6 +313,13 @@ def get_event_emitter(request_info, update_db=True):
                 to=session_id,
             )
 
+    buffer = get_chat_event_buffer(
+        request_info.get("chat_id"), request_info.get("message_id"), emit
+    )
+
+    async def __event_emitter__(event_data):
+        await buffer.emit(event_data, emit)
+
         if update_db:
             if "type" in event_data and event_data["type"] == "status":
                 Chats.add_message_status_to_chat_by_id_and_message_id(
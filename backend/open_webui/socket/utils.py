@@ -1,6 +1,16 @@
+import asyncio
 import json
+import time
 import uuid
+import weakref
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+
 from open_webui.utils.redis import get_redis_connection
+from open_webui.env import (
+    WEBSOCKET_EVENT_BATCH_INTERVAL,
+    WEBSOCKET_EVENT_BATCH_MAX_BYTES,
+)
 
 
 class RedisLock:
@@ -89,3 +99,324 @@ class RedisDict:
         if key not in self:
             self[key] = default
         return self[key]
+
+
+class UserPool:
+    """
+    Socket session ids of each connected user, kept in process.
+    `RedisUserPool` is the shared variant with the same interface.
+    """
+
+    def __init__(self):
+        self.sessions: dict[str, set[str]] = {}
+
+    def add(self, user_id: str, sid: str):
+        self.sessions.setdefault(user_id, set()).add(sid)
+
+    def remove(self, user_id: str, sid: str):
+        sids = self.sessions.get(user_id)
+        if sids is None:
+            return
+
+        sids.discard(sid)
+        if not sids:
+            del self.sessions[user_id]
+
+    def get(self, user_id: str) -> list[str]:
+        return list(self.sessions.get(user_id, []))
+
+    def user_ids(self) -> list[str]:
+        return list(self.sessions)
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self.sessions
+
+
+class RedisUserPool:
+    """
+    Socket session ids of each connected user, stored as one Redis set per user
+    plus a set of the connected user ids.
+
+    Lookups by user go through a short-lived in-process cache since they happen
+    for every emitted event; sessions connecting through another worker show up
+    after at most `cache_ttl` seconds. Expired entries are pruned and the cache
+    holds at most `cache_max_size` users.
+    """
+
+    # Removes a session and, atomically, the user once it has no session left
+    REMOVE_SCRIPT = """
+    redis.call('SREM', KEYS[1], ARGV[1])
+    if redis.call('SCARD', KEYS[1]) == 0 then
+        redis.call('SREM', KEYS[2], ARGV[2])
+    end
+    """
+
+    def __init__(
+        self,
+        name,
+        redis_url,
+        redis_sentinels=[],
+        cache_ttl: float = 1,
+        cache_max_size: int = 10000,
+    ):
+        self.name = name
+        self.redis = get_redis_connection(
+            redis_url, redis_sentinels, decode_responses=True
+        )
+        self.remove_script = self.redis.register_script(self.REMOVE_SCRIPT)
+
+        self.cache_ttl = cache_ttl
+        self.cache_max_size = cache_max_size
+        # user id -> (expires at, session ids), in expiry order
+        self.cache: OrderedDict[str, tuple[float, list[str]]] = OrderedDict()
+
+    def _key(self, user_id: str) -> str:
+        return f"{self.name}:{user_id}"
+
+    def add(self, user_id: str, sid: str):
+        pipe = self.redis.pipeline()
+        pipe.sadd(self._key(user_id), sid)
+        pipe.sadd(self.name, user_id)
+        pipe.execute()
+        self.cache.pop(user_id, None)
+
+    def remove(self, user_id: str, sid: str):
+        self.remove_script(keys=[self._key(user_id), self.name], args=[sid, user_id])
+        self.cache.pop(user_id, None)
+
+    def get(self, user_id: str) -> list[str]:
+        now = time.monotonic()
+        entry = self.cache.get(user_id)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+
+        sids = list(self.redis.smembers(self._key(user_id)))
+        self._set_cache(user_id, sids, now)
+        return sids
+
+    def _set_cache(self, user_id: str, sids: list[str], now: float):
+        self.cache[user_id] = (now + self.cache_ttl, sids)
+        self.cache.move_to_end(user_id)
+
+        while self.cache:
+            oldest_id, (expires_at, _) = next(iter(self.cache.items()))
+            if expires_at > now and len(self.cache) <= self.cache_max_size:
+                break
+            del self.cache[oldest_id]
+
+    def user_ids(self) -> list[str]:
+        return list(self.redis.smembers(self.name))
+
+    def __contains__(self, user_id: str) -> bool:
+        return bool(self.redis.sismember(self.name, user_id))
+
+
+class UsagePool:
+    """
+    Socket sessions using each model with the time they last reported it,
+    kept in process. `RedisUsagePool` is the shared variant.
+    """
+
+    def __init__(self):
+        self.usage: dict[str, dict[str, int]] = {}
+
+    def touch(self, model_id: str, sid: str, timestamp: int):
+        self.usage.setdefault(model_id, {})[sid] = timestamp
+
+    def model_ids(self) -> list[str]:
+        return list(self.usage)
+
+    def cleanup(self, cutoff: int) -> bool:
+        """Drops usage older than `cutoff`, returns whether there was any usage."""
+        if not self.usage:
+            return False
+
+        for model_id, sessions in list(self.usage.items()):
+            for sid, timestamp in list(sessions.items()):
+                if timestamp < cutoff:
+                    del sessions[sid]
+
+            if not sessions:
+                del self.usage[model_id]
+
+        return True
+
+
+class RedisUsagePool:
+    """
+    Socket sessions using each model, stored as one Redis sorted set per model
+    scored by the time each session last reported it, plus a sorted set of the
+    models scored by their latest usage.
+    """
+
+    def __init__(self, name, redis_url, redis_sentinels=[]):
+        self.name = name
+        self.redis = get_redis_connection(
+            redis_url, redis_sentinels, decode_responses=True
+        )
+
+    def _key(self, model_id: str) -> str:
+        return f"{self.name}:{model_id}"
+
+    def touch(self, model_id: str, sid: str, timestamp: int):
+        pipe = self.redis.pipeline()
+        pipe.zadd(self._key(model_id), {sid: timestamp})
+        pipe.zadd(self.name, {model_id: timestamp})
+        pipe.execute()
+
+    def model_ids(self) -> list[str]:
+        return self.redis.zrange(self.name, 0, -1)
+
+    def cleanup(self, cutoff: int) -> bool:
+        """Drops usage older than `cutoff`, returns whether there was any usage."""
+        model_ids = self.redis.zrange(self.name, 0, -1)
+        if not model_ids:
+            return False
+
+        # Sorted sets that become empty are deleted by Redis
+        pipe = self.redis.pipeline()
+        for model_id in model_ids:
+            pipe.zremrangebyscore(self._key(model_id), "-inf", f"({cutoff}")
+        pipe.zremrangebyscore(self.name, "-inf", f"({cutoff}")
+        pipe.execute()
+        return True
+
+
+class ChatEventStats:
+    def __init__(self):
+        self.events = 0  # events handed to an event emitter
+        self.emits = 0  # events actually emitted to the sessions
+
+    def to_dict(self) -> dict:
+        return {
+            "events": self.events,
+            "emits": self.emits,
+            "coalesced": self.events - self.emits,
+        }
+
+
+CHAT_EVENT_STATS = ChatEventStats()
+
+
+def _get_streamed_content(event_data: dict) -> Optional[str]:
+    # Streamed chat completions carry the whole content of the message so
+    # far, so only the latest one of a run needs to be emitted
+    data = event_data.get("data")
+    if (
+        event_data.get("type") == "chat:completion"
+        and isinstance(data, dict)
+        and data.keys() == {"content"}
+        and isinstance(data["content"], str)
+    ):
+        return data["content"]
+    return None
+
+
+class ChatEventBuffer:
+    """
+    Coalesces the streamed content events of a single chat message.
+
+    A run of content events is emitted at most once per `interval` seconds,
+    or as soon as the content grew by more than `max_bytes`. Any other event
+    (status, tool calls, usage, the final `done` event, ...) first emits the
+    buffered content and is then emitted right away, so events keep their
+    order. Emitters of the same message share its buffer, see
+    `get_chat_event_buffer`, and each event is sent through the `emit` it was
+    handed with.
+    """
+
+    def __init__(
+        self,
+        emit: Callable[[dict], Awaitable[None]],
+        interval: float = WEBSOCKET_EVENT_BATCH_INTERVAL,
+        max_bytes: int = WEBSOCKET_EVENT_BATCH_MAX_BYTES,
+    ):
+        self._emit = emit
+        self.interval = interval
+        self.max_bytes = max_bytes
+
+        self.pending: Optional[tuple[dict, Callable[[dict], Awaitable[None]]]] = None
+        self.emitted_at = time.monotonic()
+        self.emitted_size = 0
+        self.lock = asyncio.Lock()
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.flush_task: Optional[asyncio.Task] = None
+
+    async def emit(
+        self,
+        event_data: dict,
+        emit: Optional[Callable[[dict], Awaitable[None]]] = None,
+    ):
+        CHAT_EVENT_STATS.events += 1
+        emit = emit or self._emit
+
+        content = _get_streamed_content(event_data)
+        if content is None or self.interval <= 0:
+            async with self.lock:
+                await self._flush_pending()
+                await self._send(event_data, emit)
+            return
+
+        self.pending = (event_data, emit)
+        if (
+            time.monotonic() - self.emitted_at >= self.interval
+            or abs(len(content) - self.emitted_size) >= self.max_bytes
+        ):
+            await self.flush()
+        elif self.timer is None:
+            # Make sure a stalled stream still gets its last content emitted
+            self.timer = asyncio.get_running_loop().call_later(
+                self.interval, self._flush_later
+            )
+
+    async def flush(self):
+        async with self.lock:
+            await self._flush_pending()
+
+    def _flush_later(self):
+        self.timer = None
+        self.flush_task = asyncio.create_task(self.flush())
+
+    async def _flush_pending(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+        if self.pending is None:
+            return
+
+        (event_data, emit), self.pending = self.pending, None
+        await self._send(event_data, emit)
+
+    async def _send(self, event_data: dict, emit: Callable[[dict], Awaitable[None]]):
+        await emit(event_data)
+        CHAT_EVENT_STATS.emits += 1
+
+        content = _get_streamed_content(event_data)
+        if content is not None:
+            self.emitted_at = time.monotonic()
+            self.emitted_size = len(content)
+
+
+# Buffers of the messages being streamed, dropped once no emitter uses them
+CHAT_EVENT_BUFFERS: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+
+
+def get_chat_event_buffer(
+    chat_id: Optional[str],
+    message_id: Optional[str],
+    emit: Callable[[dict], Awaitable[None]],
+) -> ChatEventBuffer:
+    """
+    Returns the buffer of a chat message, shared by all its event emitters
+    (the streaming response, tools, functions, ...) so a status event sent
+    through one of them still follows the content buffered by another.
+    """
+    if not chat_id or not message_id:
+        return ChatEventBuffer(emit)
+
+    buffer = CHAT_EVENT_BUFFERS.get((chat_id, message_id))
+    if buffer is None:
+        buffer = ChatEventBuffer(emit)
+        CHAT_EVENT_BUFFERS[(chat_id, message_id)] = buffer
+    return buffer
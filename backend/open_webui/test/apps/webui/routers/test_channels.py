@@ -0,0 +1,97 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from test.util.abstract_integration_test import AbstractPostgresTest
+from test.util.mock_user import mock_webui_user
+
+
+@contextmanager
+def count_queries():
+    from open_webui.internal.db import engine
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+class TestChannels(AbstractPostgresTest):
+    BASE_PATH = "/api/v1/channels"
+
+    def setup_method(self):
+        super().setup_method()
+        from open_webui.models.channels import ChannelForm, Channels
+        from open_webui.models.messages import MessageForm, Messages
+        from open_webui.models.users import Users
+
+        for id in ["1", "2", "3"]:
+            Users.insert_new_user(id, f"user {id}", f"user{id}@openwebui.com")
+
+        self.channel = Channels.insert_new_channel(None, ChannelForm(name="test"), "1")
+        self.messages = [
+            Messages.insert_new_message(
+                MessageForm(content=f"message {i}"), self.channel.id, str(i % 3 + 1)
+            )
+            for i in range(20)
+        ]
+
+        parent = self.messages[0]
+        for user_id in ["2", "3"]:
+            Messages.insert_new_message(
+                MessageForm(content="reply", parent_id=parent.id),
+                self.channel.id,
+                user_id,
+            )
+            Messages.add_reaction_to_message(parent.id, user_id, "thumbsup")
+
+    def get_messages(self, path):
+        with count_queries() as statements:
+            with mock_webui_user(id="1", role="admin"):
+                response = self.fast_api_client.get(self.create_url(path))
+        assert response.status_code == 200
+        return response.json(), len(statements)
+
+    def test_get_channel_messages(self):
+        messages, _ = self.get_messages(f"/{self.channel.id}/messages?limit=50")
+        assert len(messages) == 20
+
+        parent = next(m for m in messages if m["id"] == self.messages[0].id)
+        assert parent["reply_count"] == 2
+        assert parent["latest_reply_at"] is not None
+        assert parent["reactions"] == [
+            {"name": "thumbsup", "user_ids": ["2", "3"], "count": 2}
+        ]
+        assert parent["user"]["name"] == "user 1"
+
+    def test_get_channel_messages_query_count(self):
+        # Channel, messages, reply stats, reactions and users: one query each,
+        # however many messages are on the page
+        _, small_page_queries = self.get_messages(
+            f"/{self.channel.id}/messages?limit=2"
+        )
+        _, full_page_queries = self.get_messages(
+            f"/{self.channel.id}/messages?limit=50"
+        )
+
+        assert small_page_queries == full_page_queries
+        assert full_page_queries <= 5
+
+    def test_get_channel_thread_messages_query_count(self):
+        messages, queries = self.get_messages(
+            f"/{self.channel.id}/messages/{self.messages[0].id}/thread"
+        )
+
+        assert [message["content"] for message in messages] == [
+            "reply",
+            "reply",
+            "message 0",
+        ]
+        # Channel, parent, replies, reactions and users
+        assert queries <= 5
@@ -39,6 +39,29 @@ class TestChats(AbstractPostgresTest):
         assert first_chat["created_at"] is not None
         assert first_chat["updated_at"] is not None
 
+    def test_get_session_user_chat_list_by_cursor(self):
+        from open_webui.models.chats import ChatForm
+
+        for i in range(2):
+            self.chats.insert_new_chat("2", ChatForm(chat={"title": f"chat{i}"}))
+
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.get(self.create_url("/"))
+        assert response.status_code == 200
+        chats = response.json()
+        assert len(chats) == 3
+
+        # The page after a chat continues right after it
+        cursor = f"{chats[0]['updated_at']}:{chats[0]['id']}"
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.get(self.create_url(f"/?cursor={cursor}"))
+        assert response.status_code == 200
+        assert response.json() == chats[1:]
+
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.get(self.create_url("/?cursor=invalid"))
+        assert response.status_code == 400
+
     def test_delete_all_user_chats(self):
         with mock_webui_user(id="2"):
             response = self.fast_api_client.delete(self.create_url("/"))
@@ -86,6 +109,86 @@ class TestChats(AbstractPostgresTest):
     def test_get_user_chats(self):
         self.test_get_session_user_chat_list()
 
+    def test_search_user_chats(self):
+        from open_webui.models.chats import ChatForm
+
+        chat = self.chats.insert_new_chat(
+            "2",
+            ChatForm(
+                **{
+                    "chat": {
+                        "title": "Groceries",
+                        "history": {
+                            "currentId": "m1",
+                            "messages": {
+                                "m1": {
+                                    "id": "m1",
+                                    "parentId": None,
+                                    "role": "user",
+                                    "content": "Where can I buy Blueberries?",
+                                }
+                            },
+                        },
+                    }
+                }
+            ),
+        )
+
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.get(
+                self.create_url("/search?text=blueberr")
+            )
+        assert response.status_code == 200
+        assert [chat["id"] for chat in response.json()] == [chat.id]
+
+        # Updated messages are searchable right away
+        self.chats.upsert_message_to_chat_by_id_and_message_id(
+            chat.id, "m1", {"content": "Where can I buy raspberries?"}
+        )
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.get(
+                self.create_url("/search?text=blueberr")
+            )
+        assert response.status_code == 200
+        assert response.json() == []
+
+    def test_chat_tags(self):
+        chat = self.chats.get_chats_by_user_id("2")[0]
+
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.post(
+                self.create_url(f"/{chat.id}/tags"), json={"name": "Work"}
+            )
+        assert response.status_code == 200
+        assert [tag["id"] for tag in response.json()] == ["work"]
+
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.post(
+                self.create_url("/tags"), json={"name": "work"}
+            )
+        assert response.status_code == 200
+        assert [chat["id"] for chat in response.json()] == [chat.id]
+
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.get(
+                self.create_url("/search?text=tag:none")
+            )
+        assert response.status_code == 200
+        assert response.json() == []
+
+        # The last chat of a tag is untagged, so the tag is deleted
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.request(
+                "DELETE", self.create_url(f"/{chat.id}/tags"), json={"name": "Work"}
+            )
+        assert response.status_code == 200
+        assert response.json() == []
+
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.get(self.create_url("/all/tags"))
+        assert response.status_code == 200
+        assert response.json() == []
+
     def test_get_user_archived_chats(self):
         self.chats.archive_all_chats_by_user_id("2")
         from open_webui.internal.db import Session
@@ -106,6 +209,34 @@ class TestChats(AbstractPostgresTest):
         assert response.status_code == 200
         assert len(response.json()) == 1
 
+    def test_import_and_export_chats_ndjson(self):
+        import json
+
+        lines = [
+            json.dumps({"chat": {"title": "imported1"}, "meta": {"tags": ["Tag 1"]}}),
+            "not json",
+            json.dumps({"chat": {"title": "imported2"}}),
+        ]
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.post(
+                self.create_url("/import/ndjson"), content="\n".join(lines)
+            )
+        assert response.status_code == 200
+        progress = [json.loads(line) for line in response.text.splitlines()]
+        assert {"line": 2, "error": "Invalid chat"} in progress
+        assert progress[-1] == {"done": True, "imported": 2, "failed": 1}
+
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.get(self.create_url("/all/export"))
+        assert response.status_code == 200
+        assert response.headers["x-total-count"] == "3"
+        chats = [json.loads(line) for line in response.text.splitlines()]
+        assert sorted(chat["title"] for chat in chats) == [
+            "New Chat",
+            "imported1",
+            "imported2",
+        ]
+
     def test_get_archived_session_user_chat_list(self):
         self.test_get_user_archived_chats()
 
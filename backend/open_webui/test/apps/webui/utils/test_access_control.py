@@ -0,0 +1,39 @@
+from open_webui.utils import access_control
+from open_webui.utils.access_control import get_user_group_ids, has_access
+
+
+def patch_groups(monkeypatch, group_ids):
+    calls = []
+
+    def get_group_ids_by_member_id(user_id):
+        calls.append(user_id)
+        return group_ids
+
+    monkeypatch.setattr(
+        access_control.Groups, "get_group_ids_by_member_id", get_group_ids_by_member_id
+    )
+    return calls
+
+
+def test_has_access_with_preloaded_groups(monkeypatch):
+    calls = patch_groups(monkeypatch, ["group_a"])
+
+    user_group_ids = get_user_group_ids("user")
+    access_controls = [
+        {"read": {"group_ids": ["group_a"], "user_ids": []}},
+        {"read": {"group_ids": ["group_b"], "user_ids": []}},
+        {"read": {"group_ids": [], "user_ids": ["user"]}},
+        {},
+    ] * 50
+
+    results = [
+        has_access("user", "read", access_control, user_group_ids)
+        for access_control in access_controls
+    ]
+
+    # Groups are looked up once, not once per resource
+    assert len(calls) == 1
+    assert results == [
+        has_access("user", "read", access_control) for access_control in access_controls
+    ]
+    assert results[:4] == [True, False, True, False]
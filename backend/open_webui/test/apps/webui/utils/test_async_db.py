@@ -0,0 +1,47 @@
+import asyncio
+import time
+
+from open_webui.internal import db
+from open_webui.internal.db import sync_fallback
+
+
+def slow_query(id: str) -> str:
+    time.sleep(0.2)
+    return id
+
+
+class AsyncTable:
+    @sync_fallback(slow_query)
+    async def get_by_id(self, id: str) -> str:
+        return f"async-{id}"
+
+
+def test_sync_fallback_does_not_block_the_event_loop(monkeypatch):
+    monkeypatch.setattr(db, "async_engine", None)
+    table = AsyncTable()
+
+    async def run():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.create_task(tick())
+        result = await table.get_by_id(id="a")
+        ticker.cancel()
+        return result, ticks
+
+    result, ticks = asyncio.run(run())
+
+    assert result == "a"
+    # The loop kept serving other tasks while the query ran
+    assert ticks >= 5
+
+
+def test_async_engine_is_used_when_enabled(monkeypatch):
+    monkeypatch.setattr(db, "async_engine", object())
+
+    assert asyncio.run(AsyncTable().get_by_id("a")) == "async-a"
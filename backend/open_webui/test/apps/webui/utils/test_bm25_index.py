@@ -0,0 +1,161 @@
+import uuid
+from types import SimpleNamespace
+
+from open_webui.models.bm25 import BM25Index, tokenize
+
+
+def item(id, text, file_id="file"):
+    return {"id": id, "text": text, "metadata": {"file_id": file_id, "name": id}}
+
+
+def search(query, k=10):
+    return [result.document.id for result in BM25Index.search("bm25-test", query, k)]
+
+
+def test_tokenize():
+    assert tokenize("Hello, World! It's 2025") == ["hello", "world", "it", "s", "2025"]
+
+
+def test_bm25_index_is_updated_incrementally():
+    BM25Index.create_index(
+        "bm25-test",
+        [
+            item("apples", "Apples and pears are fruit. Apples are red."),
+            item("pears", "Pears are green fruit."),
+            item("cars", "Cars are fast, some cars are red."),
+        ],
+    )
+
+    assert search("apples") == ["apples"]
+    # Documents with more occurrences of the rarer terms rank first
+    assert search("red cars") == ["cars", "apples"]
+    assert search("fruit", k=1) in (["apples"], ["pears"])
+    assert search("bicycles") == []
+
+    assert BM25Index.add_documents("bm25-test", [item("bikes", "Red bikes", "other")])
+    assert search("bikes") == ["bikes"]
+
+    BM25Index.delete_documents("bm25-test", filter={"file_id": "file"})
+    assert search("red apples cars") == ["bikes"]
+
+    BM25Index.delete_documents("bm25-test", ids=["bikes"])
+    assert search("red") == []
+
+    # Collections without an index are left alone until they are searched
+    BM25Index.delete_index("bm25-test")
+    assert not BM25Index.has_index("bm25-test")
+    assert not BM25Index.add_documents("bm25-test", [item("bikes", "Red bikes")])
+
+
+def test_create_index_keeps_a_concurrent_builders_index():
+    assert BM25Index.create_index("bm25-build", [item("apples", "Red apples")])
+
+    # A second builder that saw no index finds the first one's and stops
+    assert not BM25Index.create_index(
+        "bm25-build", [item("cars", "Red cars")], replace=False
+    )
+    results = BM25Index.search("bm25-build", "red", 10)
+    assert [result.document.id for result in results] == ["apples"]
+
+    assert BM25Index.create_index("bm25-build", [item("cars", "Red cars")])
+    results = BM25Index.search("bm25-build", "red", 10)
+    assert [result.document.id for result in results] == ["cars"]
+    BM25Index.delete_index("bm25-build")
+
+
+class InMemoryVectorDB:
+    def __init__(self):
+        self.collections = {}
+
+    def has_collection(self, collection_name):
+        return collection_name in self.collections
+
+    def insert(self, collection_name, items):
+        self.collections.setdefault(collection_name, []).extend(items)
+
+    def query(self, collection_name, filter):
+        items = self.delete(collection_name, metadata=filter, keep=True)
+        return SimpleNamespace(ids=[[item["id"] for item in items]])
+
+    def delete(self, collection_name, metadata, keep=False):
+        items = self.collections.get(collection_name, [])
+        matches = [
+            item
+            for item in items
+            if all(item["metadata"].get(k) == v for k, v in metadata.items())
+        ]
+        if not keep:
+            self.collections[collection_name] = [i for i in items if i not in matches]
+        return matches
+
+    def delete_collection(self, collection_name):
+        self.collections.pop(collection_name, None)
+
+
+def test_router_keeps_index_in_sync_with_vector_db(monkeypatch):
+    from langchain_core.documents import Document
+
+    from open_webui.models.files import FileForm, Files
+    from open_webui.routers import retrieval
+
+    def get_embedding_function(*args, **kwargs):
+        return lambda texts, **kwargs: [[float(len(text)), 1.0] for text in texts]
+
+    monkeypatch.setattr(retrieval, "get_embedding_function", get_embedding_function)
+    monkeypatch.setattr(retrieval, "VECTOR_DB_CLIENT", InMemoryVectorDB())
+    config = SimpleNamespace(
+        TEXT_SPLITTER="character",
+        CHUNK_SIZE=1000,
+        CHUNK_OVERLAP=0,
+        RAG_EMBEDDING_ENGINE="",
+        RAG_EMBEDDING_MODEL="",
+        RAG_OLLAMA_BASE_URL="",
+        RAG_OLLAMA_API_KEY="",
+        RAG_EMBEDDING_BATCH_SIZE=1,
+        ENABLE_RAG_HYBRID_SEARCH=True,
+    )
+    request = SimpleNamespace(
+        app=SimpleNamespace(state=SimpleNamespace(config=config, ef=None))
+    )
+    collection_name = f"bm25-{uuid.uuid4()}"
+
+    def save(text, hash, **kwargs):
+        return retrieval.save_docs_to_vector_db(
+            request,
+            [Document(page_content=text, metadata={"name": hash})],
+            collection_name,
+            metadata={"hash": hash, "file_id": hash},
+            **kwargs,
+        )
+
+    def search(query):
+        return [
+            result.document.meta["hash"]
+            for result in BM25Index.search(collection_name, query, 10)
+        ]
+
+    try:
+        # A new collection is indexed with its first documents
+        assert save("Red apples", "apples")
+        assert search("red") == ["apples"]
+
+        assert save("Red cars", "cars", add=True)
+        assert sorted(search("red")) == ["apples", "cars"]
+
+        file = Files.insert_new_file(
+            "user",
+            FileForm(id=str(uuid.uuid4()), hash="cars", filename="cars", path=""),
+        )
+        form_data = retrieval.DeleteForm(
+            collection_name=collection_name, file_id=file.id
+        )
+        assert retrieval.delete_entries_from_collection(form_data, user=None) == {
+            "status": True
+        }
+        assert search("red") == ["apples"]
+
+        assert save("Green pears", "pears", overwrite=True)
+        assert search("red") == []
+        assert search("pears") == ["pears"]
+    finally:
+        BM25Index.delete_index(collection_name)
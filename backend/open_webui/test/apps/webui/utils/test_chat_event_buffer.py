@@ -0,0 +1,129 @@
+import asyncio
+import gc
+
+from open_webui.socket.utils import (
+    CHAT_EVENT_BUFFERS,
+    ChatEventBuffer,
+    get_chat_event_buffer,
+)
+
+
+def content_event(content):
+    return {"type": "chat:completion", "data": {"content": content}}
+
+
+def stream(buffer, deltas, delay=0, content=""):
+    async def run():
+        nonlocal content
+        for delta in deltas:
+            content += delta
+            await buffer.emit(content_event(content))
+            await asyncio.sleep(delay)
+
+    return run()
+
+
+def test_chat_event_buffer_coalesces_streamed_content():
+    emitted = []
+
+    async def emit(event_data):
+        emitted.append(event_data)
+
+    async def run():
+        buffer = ChatEventBuffer(emit, interval=10, max_bytes=4096)
+        buffer.emitted_at = 0  # the first delta goes out right away
+
+        await stream(buffer, ["a", "b", "c"])
+        await buffer.emit({"type": "status", "data": {"description": "searching"}})
+        await stream(buffer, ["d", "e"], content="abc")
+        await buffer.emit(
+            {"type": "chat:completion", "data": {"done": True, "content": "abcde"}}
+        )
+
+    asyncio.run(run())
+
+    # The buffered content is emitted before the events that follow it
+    assert emitted == [
+        content_event("a"),
+        content_event("abc"),
+        {"type": "status", "data": {"description": "searching"}},
+        content_event("abcde"),
+        {"type": "chat:completion", "data": {"done": True, "content": "abcde"}},
+    ]
+
+
+def test_chat_event_buffer_emits_on_size_and_interval():
+    emitted = []
+
+    async def emit(event_data):
+        emitted.append(event_data["data"]["content"])
+
+    async def run():
+        buffer = ChatEventBuffer(emit, interval=0.05, max_bytes=4)
+        await stream(buffer, ["ab", "cd", "ef"])
+        assert emitted == ["abcd"]
+
+        # A stalled stream still gets its last content emitted
+        await asyncio.sleep(0.1)
+        assert emitted == ["abcd", "abcdef"]
+
+    asyncio.run(run())
+
+
+def test_chat_event_buffer_reduces_emits():
+    emits = {"batched": 0, "unbatched": 0}
+
+    def counter(name):
+        async def emit(event_data):
+            emits[name] += 1
+
+        return emit
+
+    async def run():
+        deltas = ["token "] * 200
+        await stream(ChatEventBuffer(counter("unbatched"), interval=0), deltas)
+
+        buffer = ChatEventBuffer(counter("batched"), interval=0.02)
+        await stream(buffer, deltas, delay=0.001)
+        await buffer.flush()
+
+    asyncio.run(run())
+
+    assert emits["unbatched"] == 200
+    assert emits["batched"] < 50
+
+
+def test_emitters_of_a_message_share_its_buffer():
+    emitted = []
+
+    def get_emit(name):
+        async def emit(event_data):
+            emitted.append((name, event_data))
+
+        return emit
+
+    stream_emit, tool_emit = get_emit("stream"), get_emit("tool")
+    stream_buffer = get_chat_event_buffer("chat", "message", stream_emit)
+    tool_buffer = get_chat_event_buffer("chat", "message", tool_emit)
+    assert tool_buffer is stream_buffer
+    assert get_chat_event_buffer("chat", "other", tool_emit) is not stream_buffer
+    assert get_chat_event_buffer(None, None, tool_emit) is not stream_buffer
+
+    async def run():
+        stream_buffer.interval = 10
+        await stream_buffer.emit(content_event("a"), stream_emit)
+        await stream_buffer.emit(content_event("ab"), stream_emit)
+        await tool_buffer.emit({"type": "status", "data": {}}, tool_emit)
+
+    asyncio.run(run())
+
+    # The content buffered by the streaming emitter goes out before the status
+    assert emitted == [
+        ("stream", content_event("ab")),
+        ("tool", {"type": "status", "data": {}}),
+    ]
+
+    # The buffer is dropped with its last emitter
+    del stream_buffer, tool_buffer
+    gc.collect()
+    assert ("chat", "message") not in CHAT_EVENT_BUFFERS
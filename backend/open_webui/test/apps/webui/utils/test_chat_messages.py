@@ -0,0 +1,218 @@
+import asyncio
+import uuid
+
+from open_webui.models.chat_messages import (
+    ChatMessageModel,
+    ChatMessages,
+    split_message,
+)
+from open_webui.models.chats import AsyncChats, ChatForm, Chats
+
+
+def new_chat(user_id: str, messages: dict, current_id: str):
+    return Chats.insert_new_chat(
+        user_id,
+        ChatForm(
+            chat={
+                "title": "Chat",
+                "history": {"messages": messages, "currentId": current_id},
+            }
+        ),
+    )
+
+
+def message(id: str, parent_id, content: str, role: str = "user") -> dict:
+    return {"id": id, "parentId": parent_id, "role": role, "content": content}
+
+
+def test_split_message_round_trips():
+    legacy = {
+        **message("m1", None, "Hello"),
+        "model": "llama",
+        "childrenIds": ["m2"],
+    }
+    values = split_message(legacy)
+    assert values == {
+        "parent_id": None,
+        "role": "user",
+        "content": "Hello",
+        "meta": {"model": "llama", "childrenIds": ["m2"]},
+    }
+    row = ChatMessageModel(id="m1", chat_id="c", created_at=0, updated_at=0, **values)
+    assert row.to_message() == legacy
+
+    # Content that isn't plain text is kept in meta
+    files = {**message("m2", "m1", ""), "content": [{"type": "text"}]}
+    values = split_message(files)
+    assert values["content"] is None
+    assert values["meta"] == {"content": [{"type": "text"}]}
+    assert ChatMessageModel(
+        id="m2", chat_id="c", created_at=0, updated_at=0, **values
+    ).to_message() == {**files, "parentId": "m1"}
+
+
+def test_backfill_and_upsert_tolerate_existing_rows(monkeypatch):
+    chat_id = str(uuid.uuid4())
+    messages = {"m1": message("m1", None, "Hi"), "m2": message("m2", "m1", "Hey")}
+
+    # Two first accesses backfilling the same chat
+    assert ChatMessages.insert_messages_by_chat_id(chat_id, messages)
+    assert ChatMessages.insert_messages_by_chat_id(chat_id, messages)
+    assert ChatMessages.get_messages_by_chat_id(chat_id) == messages
+
+    # The row appears between the failed update and the insert of an upsert
+    update = ChatMessages.update_message_by_chat_id_and_id
+    calls = []
+
+    def update_once_missing(*args):
+        calls.append(args)
+        return None if len(calls) == 1 else update(*args)
+
+    monkeypatch.setattr(
+        ChatMessages, "update_message_by_chat_id_and_id", update_once_missing
+    )
+    upserted = ChatMessages.upsert_message_by_chat_id_and_id(
+        chat_id, "m2", {"content": "Hello"}
+    )
+    assert upserted.content == "Hello"
+    assert upserted.parent_id == "m1"
+    assert len(calls) == 2
+
+
+def test_sync_and_delete_messages():
+    chat_id = str(uuid.uuid4())
+    ChatMessages.insert_messages_by_chat_id(
+        chat_id,
+        {"m1": message("m1", None, "Hi"), "m2": message("m2", "m1", "Hey")},
+        timestamp=1,
+    )
+
+    synced = {
+        "m1": message("m1", None, "Hi"),
+        "m3": message("m3", "m1", "New", role="assistant"),
+    }
+    assert ChatMessages.sync_messages_by_chat_id(chat_id, synced, timestamp=2)
+    assert ChatMessages.get_messages_by_chat_id(chat_id) == synced
+
+    # Unchanged rows are left as they were
+    rows = {row.id: row for row in ChatMessages.get_message_list_by_chat_id(chat_id)}
+    assert rows["m1"].updated_at == 1
+    assert rows["m3"].updated_at == 2
+
+    other_id = str(uuid.uuid4())
+    ChatMessages.insert_messages_by_chat_id(other_id, {"m1": message("m1", None, "")})
+    assert ChatMessages.delete_messages_by_chat_ids([chat_id, other_id])
+    assert ChatMessages.get_message_lists_by_chat_ids([chat_id, other_id]) == {}
+
+
+def test_chats_overlay_written_messages_and_current_id():
+    user_id = str(uuid.uuid4())
+    chat = new_chat(user_id, {"m1": message("m1", None, "Hi")}, "m1")
+
+    assert Chats.upsert_message_to_chat_by_id_and_message_id(
+        chat.id, "m2", message("m2", "m1", "Hello", role="assistant")
+    )
+    Chats.upsert_message_to_chat_by_id_and_message_id(
+        chat.id, "m1", {"content": "Hi there"}
+    )
+
+    def history(chat):
+        return chat.chat["history"]
+
+    loaded = Chats.get_chat_by_id(chat.id)
+    assert history(loaded)["currentId"] == "m1"
+    assert history(loaded)["messages"]["m1"]["content"] == "Hi there"
+    assert history(loaded)["messages"]["m2"]["content"] == "Hello"
+
+    # Lists of full chats return the same history as a single chat
+    Chats.toggle_chat_archive_by_id(chat.id)
+    for chats in [
+        Chats.get_chats_by_user_id(user_id),
+        Chats.get_archived_chats_by_user_id(user_id),
+        Chats.get_chat_list_by_user_id(user_id, include_archived=True),
+    ]:
+        assert [history(chat) for chat in chats] == [history(loaded)]
+
+    # A full save sets the current message again
+    updated = loaded.chat
+    updated["history"]["currentId"] = "m2"
+    Chats.update_chat_by_id(chat.id, updated)
+    assert history(Chats.get_chat_by_id(chat.id))["currentId"] == "m2"
+
+    assert Chats.delete_chat_by_id(chat.id)
+    assert ChatMessages.get_message_list_by_chat_id(chat.id) == []
+
+
+def test_search_matches_messages_of_the_users_chats():
+    user_id, other_id = str(uuid.uuid4()), str(uuid.uuid4())
+    chat = new_chat(user_id, {"m1": message("m1", None, "Blueberry pie ok")}, "m1")
+    new_chat(other_id, {"m1": message("m1", None, "Blueberry jam ok")}, "m1")
+
+    def search(user_id, text):
+        return [
+            chat.id
+            for chat in Chats.get_chats_by_user_id_and_search_text(user_id, text)
+        ]
+
+    # Full-text (3+ characters) and substring (shorter) queries
+    assert search(user_id, "blueberr") == [chat.id]
+    assert search(user_id, "ok") == [chat.id]
+    assert search(user_id, "jam") == []
+    assert len(search(other_id, "blueberr")) == 1
+
+
+def test_async_reads_match_sync_reads():
+    user_id = str(uuid.uuid4())
+    chats = [new_chat(user_id, {"m1": message("m1", None, "Hi")}, "m1")]
+    chats.append(new_chat(user_id, {}, None))
+    Chats.toggle_chat_archive_by_id(chats[1].id)
+
+    async def read():
+        return (
+            await AsyncChats.get_chat_by_id(chats[0].id),
+            await AsyncChats.get_chat_by_id_and_user_id(chats[0].id, user_id),
+            await AsyncChats.get_chat_by_id_and_user_id(chats[0].id, "other"),
+            await AsyncChats.get_chat_title_id_list_by_user_id(user_id),
+            await AsyncChats.get_chat_title_id_list_by_user_id(
+                user_id, include_archived=True, limit=1
+            ),
+        )
+
+    assert asyncio.run(read()) == (
+        Chats.get_chat_by_id(chats[0].id),
+        Chats.get_chat_by_id_and_user_id(chats[0].id, user_id),
+        None,
+        Chats.get_chat_title_id_list_by_user_id(user_id),
+        Chats.get_chat_title_id_list_by_user_id(
+            user_id, include_archived=True, limit=1
+        ),
+    )
+    assert [chat.id for chat in Chats.get_chat_title_id_list_by_user_id(user_id)] == [
+        chats[0].id
+    ]
+
+
+def test_upserted_messages_move_the_chat_up():
+    from open_webui.internal.db import get_db
+    from open_webui.models.chats import Chat
+
+    user_id = str(uuid.uuid4())
+    older = new_chat(user_id, {"m1": message("m1", None, "Hi")}, "m1")
+    newer = new_chat(user_id, {"m1": message("m1", None, "Hi")}, "m1")
+    with get_db() as db:
+        db.query(Chat).filter_by(id=older.id).update({"updated_at": 1})
+        db.query(Chat).filter_by(id=newer.id).update({"updated_at": 2})
+        db.commit()
+
+    # A reply saved while the user is away, e.g. by the event emitter
+    Chats.upsert_message_to_chat_by_id_and_message_id(
+        older.id, "m2", message("m2", "m1", "Hello", role="assistant")
+    )
+
+    chat = Chats.get_chat_by_id(older.id)
+    assert chat.updated_at > 2
+    assert chat.chat["history"]["currentId"] == "m2"
+    assert [chat.id for chat in Chats.get_chat_title_id_list_by_user_id(user_id)] == [
+        older.id,
+        newer.id,
+    ]
@@ -0,0 +1,142 @@
+from open_webui.utils.content_blocks import (
+    ContentBlockSerializer,
+    TagContentParser,
+    serialize_content_blocks,
+)
+
+
+def assert_serialized(serializer, content_blocks):
+    assert serializer.serialize(content_blocks) == serialize_content_blocks(
+        content_blocks
+    )
+
+
+def test_serialize_streamed_blocks():
+    serializer = ContentBlockSerializer()
+    content_blocks = [{"type": "text", "content": ""}]
+    assert_serialized(serializer, content_blocks)
+
+    content_blocks[-1]["content"] = "Let me check ```"
+    assert_serialized(serializer, content_blocks)
+
+    content_blocks.append(
+        {
+            "type": "reasoning",
+            "start_tag": "think",
+            "end_tag": "/think",
+            "attributes": {},
+            "content": "",
+        }
+    )
+    for delta in ["first line\n", "> quoted\n", "last line"]:
+        content_blocks[-1]["content"] += delta
+        assert_serialized(serializer, content_blocks)
+
+    content_blocks[-1]["duration"] = 3
+    content_blocks.append({"type": "text", "content": ""})
+    assert_serialized(serializer, content_blocks)
+
+    content_blocks.append(
+        {
+            "type": "tool_calls",
+            "content": [
+                {"id": "1", "function": {"name": "search", "arguments": '{"q": "<a>"}'}}
+            ],
+        }
+    )
+    assert_serialized(serializer, content_blocks)
+
+    content_blocks[-1]["results"] = [{"tool_call_id": "1", "content": "found"}]
+    content_blocks.append({"type": "text", "content": "Running ```"})
+    assert_serialized(serializer, content_blocks)
+
+    content_blocks.append(
+        {
+            "type": "code_interpreter",
+            "attributes": {"type": "code", "lang": "python"},
+            "content": "print(1)",
+        }
+    )
+    assert_serialized(serializer, content_blocks)
+
+    content_blocks[-1]["output"] = {"stdout": "1"}
+    assert_serialized(serializer, content_blocks)
+
+
+def test_serialize_after_pop():
+    serializer = ContentBlockSerializer()
+    content_blocks = [
+        {"type": "text", "content": "before"},
+        {"type": "text", "content": "after"},
+    ]
+    assert_serialized(serializer, content_blocks)
+
+    # Blocks that become the tail again after a pop must be re-rendered
+    content_blocks.pop()
+    content_blocks[-1]["content"] = "changed"
+    assert_serialized(serializer, content_blocks)
+
+    content_blocks.pop()
+    assert serializer.serialize(content_blocks) == ""
+
+
+REASONING_TAGS = [("think", "/think"), ("|begin_of_thought|", "|end_of_thought|")]
+CODE_INTERPRETER_TAGS = [("code_interpreter", "/code_interpreter")]
+SOLUTION_TAGS = [("|begin_of_solution|", "|end_of_solution|")]
+
+TRANSCRIPTS = [
+    "Hello <think>\nplanning the answer\n</think>The answer is 42.",
+    'Sure.<think type="deep">step one\nstep two</think>\nDone <think>again</think> end',
+    "<|begin_of_thought|>hmm<|end_of_thought|><|begin_of_solution|>x = 1<|end_of_solution|>",
+    'Run it:\n```\n<code_interpreter type="code" lang="python">\nprint(1)\n</code_interpreter>',
+    "a < b and <thinking> is not a tag, </think> neither <think\nfoo> bar",
+    "<think></think>empty thoughts",
+]
+
+
+def replay(transcript, chunk_size, parser):
+    content = ""
+    content_blocks = [{"type": "text", "content": ""}]
+
+    for idx in range(0, len(transcript), chunk_size):
+        value = transcript[idx : idx + chunk_size]
+        content = f"{content}{value}"
+        content_blocks[-1]["content"] = content_blocks[-1]["content"] + value
+
+        for content_type, tags in [
+            ("reasoning", REASONING_TAGS),
+            ("code_interpreter", CODE_INTERPRETER_TAGS),
+            ("solution", SOLUTION_TAGS),
+        ]:
+            content, content_blocks, end = parser(
+                content_type, tags, content, content_blocks
+            )
+            if end and content_type == "code_interpreter":
+                return content, content_blocks
+
+    return content, content_blocks
+
+
+def strip_timestamps(content_blocks):
+    return [
+        {
+            k: v
+            for k, v in block.items()
+            if k not in ("started_at", "ended_at", "duration")
+        }
+        for block in content_blocks
+    ]
+
+
+def test_tag_content_parser_matches_full_scan():
+    for transcript in TRANSCRIPTS:
+        for chunk_size in [1, 2, 3, 7, len(transcript)]:
+            content, content_blocks = replay(transcript, chunk_size, TagContentParser())
+            expected_content, expected_content_blocks = replay(
+                transcript, chunk_size, TagContentParser(incremental=False)
+            )
+
+            assert content == expected_content
+            assert strip_timestamps(content_blocks) == strip_timestamps(
+                expected_content_blocks
+            )
@@ -0,0 +1,62 @@
+from open_webui.retrieval.embedding_cache import (
+    EMBEDDING_CACHE_STATS,
+    SQLiteEmbeddingCache,
+    get_cached_embedding_function,
+    get_embedding_cache_key,
+)
+
+
+def get_embedding_function(calls):
+    def embedding_function(texts, prefix=None, user=None):
+        calls.append(texts)
+        return [[float(len(text)), 0.5] for text in texts]
+
+    return embedding_function
+
+
+def test_embedding_cache_key():
+    key = get_embedding_cache_key("openai", "model", "http://a/v1", None, "text")
+    assert key.startswith("openai:model:")
+    assert key != get_embedding_cache_key(
+        "openai", "model", "http://a/v1", "query: ", "text"
+    )
+    assert key != get_embedding_cache_key(
+        "ollama", "model", "http://a/v1", None, "text"
+    )
+    # Same model name on another server
+    assert key != get_embedding_cache_key(
+        "openai", "model", "http://b/v1", None, "text"
+    )
+
+
+def test_cached_embedding_function_embeds_missing_texts_once(tmp_path):
+    calls = []
+    cache = SQLiteEmbeddingCache(str(tmp_path / "embeddings.db"))
+    embed = get_cached_embedding_function(
+        cache, "openai", "model", get_embedding_function(calls)
+    )
+    hits = EMBEDDING_CACHE_STATS.hits
+
+    assert embed(["a", "bb", "a"]) == [[1.0, 0.5], [2.0, 0.5], [1.0, 0.5]]
+    assert embed("bb", prefix=None) == [2.0, 0.5]
+    assert embed(["ccc", "a"]) == [[3.0, 0.5], [1.0, 0.5]]
+    # Prefixed texts are cached apart
+    embed("a", prefix="query: ")
+
+    assert calls == [["a", "bb"], ["ccc"], ["a"]]
+    assert EMBEDDING_CACHE_STATS.hits - hits == 3
+
+
+def test_sqlite_embedding_cache_evicts_least_recently_used(tmp_path):
+    cache = SQLiteEmbeddingCache(str(tmp_path / "embeddings.db"), max_entries=10)
+    cache.set_many({f"old-{i}": [float(i)] for i in range(5)})
+    cache.set_many({f"new-{i}": [float(i)] for i in range(5)})
+
+    # Reading an entry makes it recent again
+    cache._connection().execute("UPDATE embedding SET accessed_at = 0")
+    assert cache.get_many(["old-0"]) == {"old-0": [0.0]}
+
+    cache.set_many({"newest": [1.0]})
+    assert cache.count == 9
+    assert "old-0" in cache.get_many(["old-0"])
+    assert "newest" in cache.get_many(["newest"])
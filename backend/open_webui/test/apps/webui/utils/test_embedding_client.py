@@ -0,0 +1,135 @@
+import asyncio
+
+from aiohttp import web
+
+from open_webui.retrieval.embedding_client import (
+    EMBEDDING_CLIENT_STATS,
+    EmbeddingClient,
+    get_batches,
+)
+
+
+class EmbeddingServer:
+    """OpenAI style embeddings API, the embedding of a text is its length."""
+
+    def __init__(self, failures: int = 0, status: int = 429, delay: float = 0.02):
+        self.failures = failures
+        self.status = status
+        self.delay = delay
+        self.inputs = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def embeddings(self, request):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            data = await request.json()
+            if self.failures:
+                self.failures -= 1
+                return web.json_response(
+                    {"error": "busy"}, status=self.status, headers={"Retry-After": "0"}
+                )
+
+            self.inputs.append(data["input"])
+            # Reversed, the client has to restore the order from the indexes
+            return web.json_response(
+                {
+                    "data": [
+                        {"index": i, "embedding": [float(len(text))]}
+                        for i, text in reversed(list(enumerate(data["input"])))
+                    ]
+                }
+            )
+        finally:
+            self.in_flight -= 1
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post("/v1/embeddings", self.embeddings)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}/v1"
+
+
+def run_with_server(server, test):
+    async def main():
+        url = await server.start()
+        try:
+            return await test(url)
+        finally:
+            await server.runner.cleanup()
+
+    return asyncio.run(main())
+
+
+def test_get_batches():
+    texts = ["a" * 40, "b" * 40, "c" * 400, "d", "e"]
+    assert get_batches(texts, None, 25) == [(0, 2), (2, 3), (3, 5)]
+    assert get_batches(texts, 2, 1000) == [(0, 2), (2, 4), (4, 5)]
+    assert get_batches([], 2, 1000) == []
+
+
+def test_embed_keeps_order_with_bounded_concurrency():
+    server = EmbeddingServer()
+    client = EmbeddingClient(concurrency=3, max_batch_tokens=1000, backoff=0.01)
+    texts = ["x" * i for i in range(1, 21)]
+
+    async def test(url):
+        embeddings = await client.embed("openai", "model", texts, url, batch_size=2)
+        await client.close()
+        return embeddings
+
+    embeddings = run_with_server(server, test)
+
+    assert embeddings == [[float(i)] for i in range(1, 21)]
+    assert len(server.inputs) == 10
+    assert server.max_in_flight == 3
+
+
+def test_embed_retries_rate_limited_batches():
+    server = EmbeddingServer(failures=2)
+    client = EmbeddingClient(concurrency=1, max_retries=3, backoff=0.01)
+    retries = EMBEDDING_CLIENT_STATS.retries
+
+    async def test(url):
+        embeddings = await client.embed("openai", "model", ["a", "bb"], url)
+        await client.close()
+        return embeddings
+
+    assert run_with_server(server, test) == [[1.0], [2.0]]
+    assert EMBEDDING_CLIENT_STATS.retries - retries == 2
+
+
+def test_embed_splits_batches_that_are_too_large():
+    server = EmbeddingServer(failures=1, status=413)
+    client = EmbeddingClient(concurrency=2, backoff=0.01)
+
+    async def test(url):
+        embeddings = await client.embed("openai", "model", ["a", "bb", "ccc"], url)
+        await client.close()
+        return embeddings
+
+    assert run_with_server(server, test) == [[1.0], [2.0], [3.0]]
+    assert sorted(server.inputs) == [["a"], ["bb", "ccc"]]
+
+
+def test_embed_gives_up_after_max_retries():
+    server = EmbeddingServer(failures=10, status=503)
+    client = EmbeddingClient(max_retries=2, backoff=0.01)
+
+    async def test(url):
+        try:
+            await client.embed("openai", "model", ["a"], url)
+        except Exception as e:
+            return e
+        finally:
+            await client.close()
+
+    error = run_with_server(server, test)
+    assert getattr(error, "status", None) == 503
+    assert server.failures == 7
@@ -0,0 +1,101 @@
+import importlib.util
+import json
+import uuid
+from pathlib import Path
+
+import sqlalchemy as sa
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+
+from open_webui.models.groups import GroupForm, GroupUpdateForm, Groups
+
+MIGRATION = (
+    Path(__file__).parents[4]
+    / "migrations"
+    / "versions"
+    / "b2f7d0c4e8a1_add_group_member_table.py"
+)
+
+
+def assert_members_match(*groups):
+    """The `group_member` lookups agree with the `user_ids` of each group."""
+    for group in groups:
+        group = Groups.get_group_by_id(group.id)
+        assert sorted(Groups.get_group_user_ids_by_ids([group.id])) == sorted(
+            set(group.user_ids)
+        )
+        for user_id in group.user_ids:
+            assert group.id in Groups.get_group_ids_by_member_id(user_id)
+
+
+def test_group_members_follow_group_user_ids():
+    alice, bob, carol = (str(uuid.uuid4()) for _ in range(3))
+
+    first = Groups.insert_new_group("admin", GroupForm(name="First", description=""))
+    second = Groups.insert_new_group("admin", GroupForm(name="Second", description=""))
+    assert Groups.get_group_user_ids_by_ids([first.id, second.id]) == []
+
+    def update(group, user_ids):
+        return Groups.update_group_by_id(
+            group.id,
+            GroupUpdateForm(name=group.name, description="", user_ids=user_ids),
+        )
+
+    first = update(first, [alice, bob, bob])
+    second = update(second, [bob, carol])
+    assert_members_match(first, second)
+    assert sorted(Groups.get_group_user_ids_by_ids([first.id, second.id])) == sorted(
+        [alice, bob, carol]
+    )
+    assert [group.id for group in Groups.get_groups_by_member_id(carol)] == [second.id]
+
+    # Updates without user ids leave the members alone
+    Groups.update_group_by_id(first.id, GroupUpdateForm(name="Renamed", description=""))
+    first = update(first, [alice])
+    assert_members_match(first)
+    assert Groups.get_group_ids_by_member_id(bob) == [second.id]
+
+    assert Groups.remove_user_from_all_groups(bob)
+    assert Groups.get_group_ids_by_member_id(bob) == []
+    assert Groups.get_group_by_id(second.id).user_ids == [carol]
+    assert_members_match(first, second)
+
+    assert Groups.delete_group_by_id(second.id)
+    assert Groups.get_group_ids_by_member_id(carol) == []
+    assert Groups.get_group_user_ids_by_ids([second.id]) == []
+    Groups.delete_group_by_id(first.id)
+
+
+def test_migration_backfills_group_members():
+    spec = importlib.util.spec_from_file_location("migration", MIGRATION)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+
+    engine = sa.create_engine("sqlite://")
+    metadata = sa.MetaData()
+    group = sa.Table(
+        "group",
+        metadata,
+        sa.Column("id", sa.Text, primary_key=True),
+        sa.Column("user_ids", sa.JSON),
+    )
+    metadata.create_all(engine)
+
+    with engine.begin() as conn:
+        conn.execute(
+            group.insert(),
+            [
+                {"id": "a", "user_ids": ["u1", "u2", "u1"]},
+                {"id": "b", "user_ids": None},
+                # Ids stored as a JSON string
+                {"id": "c", "user_ids": json.dumps(["u2"])},
+            ],
+        )
+        with Operations.context(MigrationContext.configure(conn)):
+            migration.upgrade()
+
+        rows = conn.execute(
+            sa.text("SELECT group_id, user_id FROM group_member ORDER BY 1, 2")
+        ).all()
+
+    assert [tuple(row) for row in rows] == [("a", "u1"), ("a", "u2"), ("c", "u2")]
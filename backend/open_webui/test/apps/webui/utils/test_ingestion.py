@@ -0,0 +1,188 @@
+import asyncio
+import time
+
+from open_webui.models.ingestion_jobs import IngestionJobs
+from open_webui.utils import ingestion
+from open_webui.utils.ingestion import (
+    IngestionWorkerPool,
+    LocalJobQueue,
+    LocalUserSlots,
+)
+
+
+def get_pool(**kwargs) -> IngestionWorkerPool:
+    return IngestionWorkerPool(LocalJobQueue(), LocalUserSlots(), **kwargs)
+
+
+async def wait_for_jobs(job_ids, timeout=5.0):
+    for _ in range(int(timeout / 0.01)):
+        jobs = [IngestionJobs.get_job_by_id(job_id) for job_id in job_ids]
+        if all(job.status in ["completed", "failed"] for job in jobs):
+            return jobs
+        await asyncio.sleep(0.01)
+    raise TimeoutError()
+
+
+def test_jobs_run_in_stages_and_report_progress():
+    pool = get_pool(workers=2)
+    events = []
+
+    async def emit(user_id, event, data):
+        if data["type"] == "test":
+            events.append((user_id, event, data["status"], data["progress"]))
+
+    async def handler(request, job, update):
+        await update(stage="load", progress=0.0)
+        await update(stage="embed", progress=0.5, state={"docs": ["a", "b"]})
+        return {"count": len(job.data["texts"])}
+
+    pool.register("test", handler)
+
+    async def main():
+        await pool.start(None, emit)
+        job = pool.enqueue("user", "test", {"texts": ["a", "b"]})
+        [job] = await wait_for_jobs([job.id])
+        await pool.stop()
+        return job
+
+    job = asyncio.run(main())
+
+    assert job.status == "completed"
+    assert job.result == {"count": 2}
+    assert job.progress == 1.0
+    # Stage output is dropped once the job is done
+    assert job.state == {}
+    assert events == [
+        ("user", "ingestion-events", "running", 0.0),
+        ("user", "ingestion-events", "running", 0.0),
+        ("user", "ingestion-events", "running", 0.5),
+        ("user", "ingestion-events", "completed", 1.0),
+    ]
+
+
+def test_failed_jobs_are_retried_from_the_failed_stage(monkeypatch):
+    monkeypatch.setattr(ingestion, "RETRY_DELAY", 0.01)
+    pool = get_pool(workers=1, max_retries=2)
+    loads = []
+
+    async def handler(request, job, update):
+        if "loaded" not in (job.state or {}):
+            loads.append(job.id)
+            await update(stage="embed", state={"loaded": True})
+
+        if job.data.get("fail") and job.attempts < 3:
+            raise ValueError(f"attempt {job.attempts}")
+        return {}
+
+    pool.register("test", handler)
+
+    async def main():
+        await pool.start(None)
+        jobs = [
+            pool.enqueue("user", "test", {"fail": True}),
+            pool.enqueue("user", "test", {"fail": False}),
+        ]
+        jobs = await wait_for_jobs([job.id for job in jobs])
+
+        # A job that ran out of retries can be queued again by hand
+        failing = pool.enqueue("user", "missing-handler", {})
+        [failed] = await wait_for_jobs([failing.id])
+        pool.register("missing-handler", handler)
+        pool.retry(failed.id)
+        await asyncio.sleep(0.05)
+        [retried] = await wait_for_jobs([failed.id])
+
+        await pool.stop()
+        return jobs, failed, retried
+
+    (retried_job, job), failed, retried = asyncio.run(main())
+
+    assert retried_job.status == "completed"
+    assert retried_job.attempts == 3
+    assert job.status == "completed"
+    assert job.attempts == 1
+    # The first stage ran once, retries resumed from the second
+    assert loads.count(retried_job.id) == 1
+
+    # The backoff was saved with the job, then cleared when it ran again
+    assert retried_job.run_after is None
+
+    assert failed.status == "failed"
+    assert failed.attempts == 3
+    assert "Unknown ingestion job type" in failed.error
+    assert retried.status == "completed"
+
+
+def test_running_jobs_per_user_are_limited():
+    pool = get_pool(workers=4, max_per_user=1)
+    running = {}
+    max_running = {}
+
+    async def handler(request, job, update):
+        running[job.user_id] = running.get(job.user_id, 0) + 1
+        max_running[job.user_id] = max(
+            max_running.get(job.user_id, 0), running[job.user_id]
+        )
+        await asyncio.sleep(0.05)
+        running[job.user_id] -= 1
+        return {}
+
+    pool.register("test", handler)
+
+    async def main():
+        await pool.start(None)
+        jobs = [pool.enqueue("busy", "test", {}) for _ in range(3)]
+        jobs.append(pool.enqueue("other", "test", {}))
+        jobs = await wait_for_jobs([job.id for job in jobs])
+        await pool.stop()
+        return jobs
+
+    jobs = asyncio.run(main())
+
+    assert all(job.status == "completed" for job in jobs)
+    assert max_running == {"busy": 1, "other": 1}
+
+
+def test_stale_running_jobs_are_reset():
+    job = IngestionJobs.insert_new_job("user", "stale", {})
+    assert IngestionJobs.claim_job_by_id(job.id)
+    # A job is claimed once
+    assert not IngestionJobs.claim_job_by_id(job.id)
+
+    assert job.id not in IngestionJobs.reset_stale_jobs(job.updated_at - 1)
+    assert job.id in IngestionJobs.reset_stale_jobs(job.updated_at + 1)
+    assert IngestionJobs.get_job_by_id(job.id).status == "pending"
+    IngestionJobs.update_job_by_id(job.id, status="completed")
+
+
+def test_due_pending_jobs_are_queued_again(monkeypatch):
+    monkeypatch.setattr(ingestion, "HEARTBEAT_INTERVAL", 0.05)
+    pool = get_pool(workers=1)
+    ran = []
+
+    async def handler(request, job, update):
+        ran.append(job.id)
+        return {}
+
+    pool.register("deferred", handler)
+
+    async def main():
+        await pool.start(None)
+
+        # Deferred by a process that stopped before queueing them again
+        now = int(time.time())
+        due = IngestionJobs.insert_new_job("user", "deferred", {})
+        IngestionJobs.update_job_by_id(due.id, run_after=now - 1)
+        later = IngestionJobs.insert_new_job("user", "deferred", {})
+        IngestionJobs.update_job_by_id(later.id, run_after=now + 3600)
+
+        [due] = await wait_for_jobs([due.id])
+        await pool.stop()
+        return due, IngestionJobs.get_job_by_id(later.id)
+
+    due, later = asyncio.run(main())
+
+    assert due.status == "completed"
+    assert ran == [due.id]
+    assert later.status == "pending"
+    IngestionJobs.update_job_by_id(later.id, status="completed")
@@ -0,0 +1,104 @@
+from types import SimpleNamespace
+
+from open_webui.utils.load_balancer import LoadBalancer
+
+BACKENDS = ["http://a:11434", "http://b:11434", "http://c:11434"]
+
+
+def test_least_outstanding_prefers_idle_backend():
+    balancer = LoadBalancer(mode="least_outstanding")
+    balancer.acquire(BACKENDS[0])
+    balancer.acquire(BACKENDS[1])
+
+    assert balancer.select(BACKENDS) == BACKENDS[2]
+
+
+def test_ewma_prefers_fast_backend():
+    balancer = LoadBalancer(mode="ewma")
+    for backend, latency in zip(BACKENDS, [2.0, 0.1, 1.0]):
+        balancer.record_latency(backend, latency)
+
+    assert balancer.select(BACKENDS) == BACKENDS[1]
+
+    # A fast backend that is busy loses against an idle, slightly slower one
+    for _ in range(20):
+        balancer.acquire(BACKENDS[1])
+    assert balancer.select(BACKENDS) == BACKENDS[2]
+
+
+def test_ewma_spreads_requests_over_unmeasured_backends():
+    balancer = LoadBalancer(mode="ewma")
+
+    # Without any measurement, requests go to the least busy backend
+    for _ in range(3):
+        balancer.acquire(balancer.select(BACKENDS))
+    assert [balancer.get_backend(b).in_flight for b in BACKENDS] == [1, 1, 1]
+
+    # An unmeasured backend is scored with the average latency of the others
+    balancer.record_latency(BACKENDS[0], 1.0)
+    balancer.record_latency(BACKENDS[1], 1.0)
+    for _ in range(3):
+        balancer.acquire(BACKENDS[2])
+    assert balancer.select(BACKENDS) != BACKENDS[2]
+
+
+def test_select_url_idx_tracks_duplicate_urls_by_index(monkeypatch):
+    from open_webui.routers import ollama
+
+    balancer = LoadBalancer(mode="least_outstanding")
+    monkeypatch.setattr(ollama, "OLLAMA_LOAD_BALANCER", balancer)
+    config = SimpleNamespace(
+        OLLAMA_BASE_URLS=[BACKENDS[0], BACKENDS[0]],
+        OLLAMA_API_CONFIGS={"1": {"weight": 2}},
+    )
+    request = SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace(config=config)))
+
+    first = ollama.select_url_idx(request, [0, 1])
+    balancer.acquire(first)
+    assert ollama.select_url_idx(request, [0, 1]) == 1 - first
+
+
+def test_weighted_skips_zero_weight():
+    balancer = LoadBalancer(mode="weighted")
+    weights = {BACKENDS[0]: 0, BACKENDS[1]: 1, BACKENDS[2]: 0}
+
+    for _ in range(50):
+        assert balancer.select(BACKENDS, weights=weights) == BACKENDS[1]
+
+
+def test_failing_backend_is_ejected():
+    balancer = LoadBalancer(
+        mode="least_outstanding", eject_failures=2, eject_seconds=60
+    )
+    for _ in range(2):
+        balancer.acquire(BACKENDS[0]).release(error=True)
+
+    for _ in range(50):
+        assert balancer.select(BACKENDS) != BACKENDS[0]
+
+    # Everything ejected still yields a backend
+    assert balancer.select(BACKENDS[:1]) == BACKENDS[0]
+    assert balancer.get_stats()["backends"][BACKENDS[0]]["ejected"]
+
+
+def test_lease_release_is_idempotent():
+    balancer = LoadBalancer()
+    lease = balancer.acquire(BACKENDS[0])
+    lease.release()
+    lease.release()
+
+    assert balancer.get_backend(BACKENDS[0]).in_flight == 0
+
+
+def test_session_affinity():
+    balancer = LoadBalancer(mode="least_outstanding", affinity=True)
+    backend = balancer.select(BACKENDS, affinity_key="chat")
+
+    # Sticks to the backend even when it is the busiest one
+    for _ in range(5):
+        balancer.acquire(backend)
+    assert balancer.select(BACKENDS, affinity_key="chat") == backend
+
+    # Unless it is no longer a candidate
+    others = [b for b in BACKENDS if b != backend]
+    assert balancer.select(others, affinity_key="chat") in others
@@ -0,0 +1,86 @@
+import time
+
+import pytest
+from fpdf import FPDF
+from langchain_community.document_loaders import PyPDFLoader, TextLoader
+
+from open_webui.retrieval.loaders.process_pool import (
+    LOADER_PROCESS_POOL_STATS,
+    LoaderProcessPool,
+    get_page_ranges,
+)
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = LoaderProcessPool(workers=2, timeout=2, max_memory=512, pages_per_task=3)
+    yield pool
+    pool.shutdown()
+
+
+def write_pdf(path, pages: int):
+    pdf = FPDF()
+    pdf.set_font("Helvetica", size=12)
+    for page in range(pages):
+        pdf.add_page()
+        pdf.cell(0, 10, f"Page {page + 1} of the document")
+    pdf.output(str(path))
+
+
+def test_get_page_ranges():
+    assert get_page_ranges(7, 3) == [(0, 3), (3, 6), (6, 7)]
+    assert get_page_ranges(3, 3) == [(0, 3)]
+    assert get_page_ranges(7, 0) == [(0, 7)]
+
+
+def test_split_pdf_matches_pypdf_loader(pool, tmp_path):
+    path = tmp_path / "document.pdf"
+    write_pdf(path, 10)
+    split_files = LOADER_PROCESS_POOL_STATS.split_files
+
+    docs = pool.load(PyPDFLoader(str(path)))
+
+    assert LOADER_PROCESS_POOL_STATS.split_files - split_files == 1
+    assert docs == PyPDFLoader(str(path)).load()
+    assert [doc.metadata["page"] for doc in docs] == list(range(10))
+
+
+def test_split_encrypted_pdf_matches_pypdf_loader(pool, tmp_path):
+    import pypdf
+
+    write_pdf(tmp_path / "document.pdf", 7)
+    writer = pypdf.PdfWriter(clone_from=str(tmp_path / "document.pdf"))
+    writer.encrypt("secret")
+    path = tmp_path / "encrypted.pdf"
+    writer.write(path)
+
+    docs = pool.load(PyPDFLoader(str(path), password="secret"))
+
+    assert docs == PyPDFLoader(str(path), password="secret").load()
+    assert docs[6].page_content == "Page 7 of the document"
+
+
+def test_other_loaders_run_in_the_pool(pool, tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("some notes")
+
+    assert pool.load(TextLoader(str(path))) == TextLoader(str(path)).load()
+
+    small = tmp_path / "small.pdf"
+    write_pdf(small, 2)
+    assert pool.load(PyPDFLoader(str(small))) == PyPDFLoader(str(small)).load()
+
+
+def test_tasks_are_stopped_at_the_limits(pool):
+    timeouts = LOADER_PROCESS_POOL_STATS.timeouts
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        pool._map([(time.sleep, 10)])
+    assert time.monotonic() - start < 5
+    assert LOADER_PROCESS_POOL_STATS.timeouts - timeouts == 1
+
+    with pytest.raises(MemoryError):
+        pool._map([(bytearray, 1024 * 1024 * 1024)])
+
+    # The workers are still usable after both
+    assert pool._map([(sum, [1, 2]), (max, [1, 2])]) == [3, 2]
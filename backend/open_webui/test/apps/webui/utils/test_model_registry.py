@@ -0,0 +1,156 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+from open_webui.utils.model_registry import REDIS_VERSION_KEY, ModelRegistry
+
+
+def get_request():
+    state = SimpleNamespace(MODELS={}, OPENAI_MODELS={}, OLLAMA_MODELS={})
+    return SimpleNamespace(app=SimpleNamespace(state=state))
+
+
+def patch_build(monkeypatch, results):
+    calls = []
+
+    async def build_all_models(request, user=None):
+        calls.append(user)
+        await asyncio.sleep(0)
+        result = results[min(len(calls), len(results)) - 1]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    monkeypatch.setattr("open_webui.utils.models.build_all_models", build_all_models)
+    return calls
+
+
+def test_concurrent_callers_share_one_build(monkeypatch):
+    calls = patch_build(monkeypatch, [[{"id": "a"}]])
+    registry = ModelRegistry(refresh_interval=60, redis_url=None)
+
+    async def run():
+        request = get_request()
+        return await asyncio.gather(*[registry.get_models(request) for _ in range(5)])
+
+    assert asyncio.run(run()) == [[{"id": "a"}]] * 5
+    assert len(calls) == 1
+
+
+def test_stale_snapshot_is_served_while_revalidating(monkeypatch):
+    calls = patch_build(monkeypatch, [[{"id": "a"}], [{"id": "b"}]])
+    registry = ModelRegistry(refresh_interval=60, redis_url=None)
+
+    async def run():
+        request = get_request()
+        assert await registry.get_models(request) == [{"id": "a"}]
+
+        registry.snapshot["updated_at"] -= 120
+        assert await registry.get_models(request) == [{"id": "a"}]
+
+        await registry.refresh_task
+        return await registry.get_models(request)
+
+    assert asyncio.run(run()) == [{"id": "b"}]
+    assert len(calls) == 2
+
+
+def test_invalidate_waits_for_rebuild(monkeypatch):
+    patch_build(monkeypatch, [[{"id": "a"}], [{"id": "b"}]])
+    registry = ModelRegistry(refresh_interval=60, redis_url=None)
+
+    async def run():
+        request = get_request()
+        await registry.get_models(request)
+        registry.invalidate()
+        return await registry.get_models(request)
+
+    assert asyncio.run(run()) == [{"id": "b"}]
+
+
+def test_failed_rebuild_keeps_last_snapshot(monkeypatch):
+    patch_build(monkeypatch, [[{"id": "a"}], Exception("upstream down")])
+    registry = ModelRegistry(refresh_interval=60, redis_url=None)
+
+    async def run():
+        request = get_request()
+        await registry.get_models(request)
+        registry.invalidate()
+        return await registry.get_models(request)
+
+    assert asyncio.run(run()) == [{"id": "a"}]
+
+
+def test_connection_keeps_last_good_response():
+    registry = ModelRegistry(refresh_interval=60, redis_url=None)
+
+    async def respond(response):
+        return response
+
+    async def run():
+        first = await registry.get_connection_models(
+            "ollama:0:http://a", respond({"models": [{"model": "m"}]})
+        )
+        # The caller mutates responses, the remembered copy stays intact
+        first["models"][0]["model"] = "prefix.m"
+
+        return await registry.get_connection_models("ollama:0:http://a", respond(None))
+
+    assert asyncio.run(run()) == {"models": [{"model": "m"}]}
+
+
+def test_connection_response_expires_and_is_dropped_on_invalidate():
+    registry = ModelRegistry(refresh_interval=60, redis_url=None, connection_ttl=60)
+
+    async def respond(response):
+        return response
+
+    async def run():
+        key = "openai:0:http://a"
+        await registry.get_connection_models(key, respond({"data": []}))
+        assert await registry.get_connection_models(key, respond(None)) == {"data": []}
+
+        # A reconfigured connection does not fall back to its old models
+        registry.invalidate()
+        assert await registry.get_connection_models(key, respond(None)) is None
+
+        await registry.get_connection_models(key, respond({"data": []}))
+        response, received_at = registry.connection_responses[key]
+        registry.connection_responses[key] = (response, received_at - 120)
+        return await registry.get_connection_models(key, respond(None))
+
+    assert asyncio.run(run()) is None
+
+
+class CountingRedis:
+    def __init__(self):
+        self.values = {}
+        self.gets = 0
+
+    def get(self, key):
+        self.gets += 1
+        return self.values.get(key)
+
+    def incr(self, key):
+        self.values[key] = int(self.values.get(key) or 0) + 1
+        return self.values[key]
+
+
+def test_shared_version_is_read_once_per_ttl():
+    registry = ModelRegistry(refresh_interval=60, redis_url=None, version_ttl=60)
+    registry._redis = redis = CountingRedis()
+    registry.connection_responses["ollama:0:http://a"] = ({}, time.monotonic())
+
+    async def run():
+        assert [await registry.get_version() for _ in range(3)] == [0, 0, 0]
+        assert redis.gets == 1
+
+        # Another worker invalidates, it shows up once the TTL passed
+        redis.incr(REDIS_VERSION_KEY)
+        assert await registry.get_version() == 0
+        registry.version_checked_at -= 60
+        assert await registry.get_version() == 1
+        assert redis.gets == 2
+
+    asyncio.run(run())
+    assert registry.connection_responses == {}
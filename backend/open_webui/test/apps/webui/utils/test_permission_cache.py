@@ -0,0 +1,54 @@
+from open_webui.utils.permission_cache import PermissionCache
+
+
+def test_entries_are_resolved_once():
+    cache = PermissionCache(redis_url=None)
+    calls = []
+
+    def resolve():
+        calls.append(1)
+        return {"chat": {"delete": True}}
+
+    assert cache.get(("permissions", "user"), resolve) == {"chat": {"delete": True}}
+    assert cache.get(("permissions", "user"), resolve) == {"chat": {"delete": True}}
+    assert len(calls) == 1
+
+    cache.invalidate()
+    cache.get(("permissions", "user"), resolve)
+    assert len(calls) == 2
+
+
+def test_tree_resolved_during_invalidation_is_not_cached():
+    cache = PermissionCache(redis_url=None)
+
+    def resolve():
+        # Group membership changes while the tree is being resolved
+        cache.invalidate()
+        return {"chat": {"delete": False}}
+
+    cache.get(("permissions", "user"), resolve)
+    assert ("permissions", "user") not in cache.entries
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = PermissionCache(max_size=2, redis_url=None)
+
+    cache.get("a", lambda: {})
+    cache.get("b", lambda: {})
+    cache.get("a", lambda: {})
+    cache.get("c", lambda: {})
+
+    assert list(cache.entries) == ["a", "c"]
+
+
+def test_entries_expire_after_the_ttl():
+    # Another worker changed the groups, without a published invalidation
+    cache = PermissionCache(redis_url=None, ttl=60)
+    trees = iter([{"chat": {"delete": True}}, {"chat": {"delete": False}}])
+
+    assert cache.get("user", lambda: next(trees)) == {"chat": {"delete": True}}
+    assert cache.get("user", lambda: next(trees)) == {"chat": {"delete": True}}
+
+    expires_at, permissions = cache.entries["user"]
+    cache.entries["user"] = (expires_at - 60, permissions)
+    assert cache.get("user", lambda: next(trees)) == {"chat": {"delete": False}}
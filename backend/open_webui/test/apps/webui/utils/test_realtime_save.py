@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from open_webui.utils import realtime_save
+from open_webui.utils.realtime_save import MessageWriteBuffer
+
+
+@pytest.fixture
+def writes(monkeypatch):
+    writes = []
+
+    def upsert(chat_id, message_id, message):
+        writes.append(message["content"])
+
+    monkeypatch.setattr(
+        realtime_save.Chats, "upsert_message_to_chat_by_id_and_message_id", upsert
+    )
+    return writes
+
+
+def test_writes_are_coalesced_until_the_final_flush(writes):
+    async def main():
+        buffer = MessageWriteBuffer("chat", "message", interval=60, max_bytes=1024)
+        for content in ["H", "He", "Hello"]:
+            await buffer.write({"content": content})
+        assert writes == []
+
+        await buffer.flush()
+        assert writes == ["Hello"]
+
+        # Nothing is written again without new content
+        await buffer.flush()
+        assert writes == ["Hello"]
+
+    asyncio.run(main())
+
+
+def test_writes_are_flushed_by_size_in_bytes(writes):
+    async def main():
+        buffer = MessageWriteBuffer("chat", "message", interval=60, max_bytes=4)
+        await buffer.write({"content": "abc"})
+        assert writes == []
+
+        # Two characters, four bytes
+        await buffer.write({"content": "éé"})
+        assert writes == ["éé"]
+
+        await buffer.write({"content": "éé!"})
+        assert writes == ["éé"]
+        await buffer.flush()
+
+    asyncio.run(main())
+
+
+def test_stalled_writes_are_flushed_after_the_interval(writes):
+    async def main():
+        buffer = MessageWriteBuffer("chat", "message", interval=0.05, max_bytes=1024)
+        await buffer.write({"content": "Hel"})
+        await buffer.write({"content": "Hello"})
+        assert writes == []
+
+        await asyncio.sleep(0.2)
+        assert writes == ["Hello"]
+        assert buffer.timer is None
+
+        # A write after the interval is flushed right away
+        await buffer.write({"content": "Hello!"})
+        assert writes == ["Hello", "Hello!"]
+
+    asyncio.run(main())
+
+
+def test_failed_flushes_are_retried(writes, monkeypatch):
+    def fail(chat_id, message_id, message):
+        raise RuntimeError("database is locked")
+
+    async def main():
+        buffer = MessageWriteBuffer("chat", "message", interval=60, max_bytes=1024)
+        with monkeypatch.context() as m:
+            m.setattr(
+                realtime_save.Chats, "upsert_message_to_chat_by_id_and_message_id", fail
+            )
+            await buffer.write({"content": "Hello"})
+            await buffer.flush()
+        assert writes == []
+
+        await buffer.flush()
+        assert writes == ["Hello"]
+
+    asyncio.run(main())
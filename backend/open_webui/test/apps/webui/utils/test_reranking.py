@@ -0,0 +1,135 @@
+from langchain_core.documents import Document
+
+from open_webui.retrieval.utils import (
+    RerankCompressor,
+    get_top_k_indexes,
+    merge_and_sort_query_results,
+)
+
+
+class LengthReranker:
+    """Scores documents by length, records the pairs of each call."""
+
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, pairs):
+        self.calls.append(pairs)
+        return [float(len(doc)) for _, doc in pairs]
+
+
+def documents(*texts):
+    return [Document(page_content=text, metadata={"name": text}) for text in texts]
+
+
+def test_get_top_k_indexes():
+    assert get_top_k_indexes([0.1, 0.9, 0.5, 0.9], 3) == [1, 3, 2]
+    assert get_top_k_indexes([0.1, 0.9], 5) == [1, 0]
+    assert get_top_k_indexes([0.1, 0.9], 0) == []
+    assert get_top_k_indexes([], 3) == []
+
+
+def test_rerank_scores_distinct_pairs_in_batches(monkeypatch):
+    from open_webui.retrieval import utils
+
+    monkeypatch.setattr(utils, "RAG_RERANKING_BATCH_SIZE", 2)
+    reranker = LengthReranker()
+    compressor = RerankCompressor(
+        embedding_function=None, top_n=2, reranking_function=reranker, r_score=2
+    )
+
+    results = compressor.rerank(
+        [
+            ("q1", documents("a", "ccc", "bb")),
+            ("q1", documents("ccc", "dddd")),
+            ("q2", documents("a", "bb")),
+        ]
+    )
+
+    assert [[d.page_content for d in docs] for docs in results] == [
+        ["ccc", "bb"],
+        ["dddd", "ccc"],
+        ["bb"],
+    ]
+    assert results[0][0].metadata == {"name": "ccc", "score": 3.0}
+
+    # ("q1", "ccc") is scored once, 6 distinct pairs in batches of 2
+    assert [len(pairs) for pairs in reranker.calls] == [2, 2, 2]
+
+
+def test_rerank_skips_queries_without_candidates():
+    class ColBERTReranker(LengthReranker):
+        normalizes_scores = True
+
+        def predict(self, pairs):
+            # As ColBERT, which reads the first pair before scoring
+            pairs[0][0]
+            return super().predict(pairs)
+
+    def embedding_function(texts, prefix):
+        return [[1.0, float(len(text))] for text in texts]
+
+    for reranker in [LengthReranker(), ColBERTReranker(), None]:
+        compressor = RerankCompressor(
+            embedding_function=embedding_function,
+            top_n=2,
+            reranking_function=reranker,
+            r_score=0,
+        )
+        results = compressor.rerank(
+            [("q1", []), ("q2", documents("a", "bb")), ("q3", [])]
+        )
+
+        assert [[d.page_content for d in docs] for docs in results] == [
+            [],
+            ["bb", "a"],
+            [],
+        ]
+        assert compressor.rerank([("q", [])]) == [[]]
+        if reranker is not None:
+            assert all(pairs for pairs in reranker.calls)
+
+
+def test_rerank_by_cosine_similarity():
+    embeddings = {"q": [1, 0], "x": [2, 0], "y": [1, 1], "z": [0, 3]}
+    calls = []
+
+    def embedding_function(texts, prefix):
+        calls.append(texts)
+        return [embeddings[text] for text in texts]
+
+    compressor = RerankCompressor(
+        embedding_function=embedding_function,
+        top_n=3,
+        reranking_function=None,
+        r_score=0,
+    )
+    [result] = compressor.rerank([("q", documents("z", "y", "x"))])
+
+    assert [d.page_content for d in result] == ["x", "y", "z"]
+    assert [round(d.metadata["score"], 4) for d in result] == [1.0, 0.7071, 0.0]
+    assert calls == [["q"], ["z", "y", "x"]]
+
+
+def test_merge_and_sort_query_results_keeps_best_distance():
+    result = merge_and_sort_query_results(
+        [
+            {
+                "distances": [[0.5, 0.9]],
+                "documents": [["a", "b"]],
+                "metadatas": [[{"n": 1}, {"n": 2}]],
+            },
+            {
+                "distances": [[0.7, 0.1]],
+                "documents": [["a", "c"]],
+                "metadatas": [[{"n": 3}, {"n": 4}]],
+            },
+        ],
+        k=2,
+    )
+
+    assert result == {
+        "distances": [[0.9, 0.7]],
+        "documents": [["b", "a"]],
+        "metadatas": [[{"n": 2}, {"n": 3}]],
+    }
@@ -0,0 +1,123 @@
+import asyncio
+from types import SimpleNamespace
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from open_webui.utils.session_pool import (
+    ClientSessionPool,
+    get_base_url,
+    get_connector_usage,
+    release_response,
+)
+
+
+async def start_server():
+    async def hello(request):
+        return web.Response(text="hello")
+
+    async def large(request):
+        return web.Response(body=b"x" * 1024 * 1024)
+
+    async def login(request):
+        response = web.Response(text=request.headers.get("Cookie", ""))
+        response.set_cookie("session", "user-a-secret")
+        return response
+
+    app = web.Application()
+    app.router.add_get("/large", large)
+    app.router.add_get("/login", login)
+    app.router.add_get("/{path:.*}", hello)
+    server = TestServer(app, host="127.0.0.1")
+    await server.start_server()
+    return server
+
+
+def test_sessions_are_shared_per_base_url():
+    async def run():
+        pool = ClientSessionPool(limit_per_host=4)
+        session = pool.get_session("http://a:11434/api/chat")
+        assert pool.get_session("http://a:11434/api/tags") is session
+        assert pool.get_session("http://b:11434/api/chat") is not session
+        assert list(pool.sessions) == ["http://a:11434", "http://b:11434"]
+
+        # A closed session is replaced
+        await session.close()
+        assert pool.get_session("http://a:11434") is not session
+
+        sessions = list(pool.sessions.values())
+        await pool.close()
+        assert pool.sessions == {}
+        assert all(session.closed for session in sessions)
+
+    asyncio.run(run())
+
+
+def test_released_responses_return_their_connection():
+    async def run():
+        server = await start_server()
+        pool = ClientSessionPool(limit_per_host=4)
+        try:
+            url = str(server.make_url("/api/tags"))
+            session = pool.get_session(url)
+
+            response = await session.get(url)
+            assert await response.text() == "hello"
+            await release_response(response)
+            await release_response(None)
+
+            stats = pool.get_stats()
+            assert stats == {
+                get_base_url(url): {
+                    "closed": False,
+                    "in_use": 0,
+                    "idle": 1,
+                    "limit_per_host": 4,
+                }
+            }
+
+            # The next request reuses the idle connection
+            response = await session.get(url)
+            await response.read()
+            await release_response(response)
+            assert pool.get_stats()[get_base_url(url)]["idle"] == 1
+
+            # The connection of a response that was not read is closed
+            response = await session.get(str(server.make_url("/large")))
+            assert pool.get_stats()[get_base_url(url)]["in_use"] == 1
+            await release_response(response)
+            assert pool.get_stats()[get_base_url(url)]["in_use"] == 0
+            assert pool.get_stats()[get_base_url(url)]["idle"] == 0
+        finally:
+            await pool.close()
+            await server.close()
+
+    asyncio.run(run())
+
+
+def test_cookies_are_not_shared_between_requests():
+    async def run():
+        server = await start_server()
+        pool = ClientSessionPool()
+        try:
+            # By host name, aiohttp's default jar ignores cookies of IPs
+            url = f"http://localhost:{server.port}/login"
+            session = pool.get_session(url)
+            for _ in range(2):
+                async with session.get(url) as response:
+                    assert "session" in response.cookies
+                    assert await response.text() == ""
+        finally:
+            await pool.close()
+            await server.close()
+
+    asyncio.run(run())
+
+
+def test_connector_usage_tolerates_other_aiohttp_versions():
+    assert get_connector_usage(None) == (None, None)
+    assert get_connector_usage(SimpleNamespace(_acquired=42, _conns=[])) == (
+        None,
+        None,
+    )
+    assert get_connector_usage(SimpleNamespace(_acquired=set(), _conns={})) == (0, 0)
@@ -0,0 +1,213 @@
+import re
+
+import pytest
+
+from open_webui.socket import utils
+from open_webui.socket.utils import (
+    RedisUsagePool,
+    RedisUserPool,
+    UsagePool,
+    UserPool,
+)
+
+
+class FakeRedis:
+    """
+    In-memory Redis with the set and sorted set commands the pools use.
+    Registered scripts are run by a small evaluator of the Lua they are
+    written in: `redis.call(...)` statements and `if <call> == <n> then`.
+    """
+
+    def __init__(self):
+        self.data = {}
+        self.commands = []
+
+    def _cleanup(self, key):
+        # Redis deletes sets that become empty
+        if key in self.data and not self.data[key]:
+            del self.data[key]
+
+    def sadd(self, key, *members):
+        self.commands.append("SADD")
+        self.data.setdefault(key, set()).update(members)
+
+    def srem(self, key, *members):
+        self.commands.append("SREM")
+        self.data.get(key, set()).difference_update(members)
+        self._cleanup(key)
+
+    def scard(self, key):
+        return len(self.data.get(key, set()))
+
+    def smembers(self, key):
+        self.commands.append("SMEMBERS")
+        return set(self.data.get(key, set()))
+
+    def sismember(self, key, member):
+        return member in self.data.get(key, set())
+
+    def zadd(self, key, mapping):
+        self.commands.append("ZADD")
+        self.data.setdefault(key, {}).update(mapping)
+
+    def zrange(self, key, start, end):
+        scores = self.data.get(key, {})
+        return sorted(scores, key=lambda member: (scores[member], member))
+
+    def zremrangebyscore(self, key, min, max):
+        self.commands.append("ZREMRANGEBYSCORE")
+        assert min == "-inf" and max.startswith("(")
+        cutoff = float(max[1:])
+        scores = self.data.get(key, {})
+        for member in [m for m, score in scores.items() if score < cutoff]:
+            del scores[member]
+        self._cleanup(key)
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+    def register_script(self, script):
+        return lambda keys, args: self._eval(script, keys, args)
+
+    def _eval(self, script, keys, args):
+        def call(statement):
+            name, *params = (
+                re.fullmatch(r"redis\.call\((.*)\)", statement.strip())
+                .group(1)
+                .split(",")
+            )
+            values = []
+            for param in params:
+                kind, index = re.fullmatch(
+                    r"(KEYS|ARGV)\[(\d+)\]", param.strip()
+                ).groups()
+                values.append((keys if kind == "KEYS" else args)[int(index) - 1])
+            return getattr(self, name.strip("' ").lower())(*values)
+
+        skipping = False
+        for line in filter(None, map(str.strip, script.splitlines())):
+            if line == "end":
+                skipping = False
+            elif skipping:
+                continue
+            elif match := re.fullmatch(r"if (.*) == (\d+) then", line):
+                skipping = call(match.group(1)) != int(match.group(2))
+            else:
+                call(line)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda *args: self.calls.append((name, args))
+
+    def execute(self):
+        self.redis.commands.append("EXEC")
+        return [getattr(self.redis, name)(*args) for name, args in self.calls]
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr(utils, "get_redis_connection", lambda *args, **kwargs: redis)
+    return redis
+
+
+def test_user_pool_tracks_sessions_per_user():
+    pool = UserPool()
+    pool.add("1", "a")
+    pool.add("1", "b")
+    pool.add("2", "c")
+
+    assert sorted(pool.get("1")) == ["a", "b"]
+    assert sorted(pool.user_ids()) == ["1", "2"]
+
+    # Users are dropped with their last session
+    pool.remove("1", "a")
+    assert "1" in pool
+    pool.remove("1", "b")
+    assert "1" not in pool
+    assert pool.get("1") == []
+
+    # Unknown users and sessions are ignored
+    pool.remove("3", "d")
+    pool.remove("2", "d")
+    assert pool.user_ids() == ["2"]
+
+
+def test_usage_pool_cleanup_drops_expired_sessions():
+    pool = UsagePool()
+    assert pool.cleanup(100) is False
+
+    pool.touch("model-a", "a", 90)
+    pool.touch("model-a", "b", 110)
+    pool.touch("model-b", "c", 95)
+
+    assert pool.cleanup(100) is True
+    assert pool.model_ids() == ["model-a"]
+    assert pool.usage["model-a"] == {"b": 110}
+
+    # A session reporting again is kept alive
+    pool.touch("model-a", "b", 130)
+    pool.cleanup(120)
+    assert pool.model_ids() == ["model-a"]
+
+
+def test_redis_user_pool_tracks_sessions_per_user(redis):
+    pool = RedisUserPool("pool", "redis://", cache_ttl=60)
+    pool.add("1", "a")
+    pool.add("1", "b")
+    pool.add("2", "c")
+
+    assert sorted(pool.get("1")) == ["a", "b"]
+    assert sorted(pool.user_ids()) == ["1", "2"]
+
+    # Users are dropped with their last session, by the remove script
+    pool.remove("1", "a")
+    assert "1" in pool
+    assert pool.get("1") == ["b"]
+    pool.remove("1", "b")
+    assert "1" not in pool
+    assert pool.get("1") == []
+    assert redis.data == {"pool": {"2"}, "pool:2": {"c"}}
+
+    # Lookups are cached until the user's sessions change on this worker
+    commands = len(redis.commands)
+    assert pool.get("2") == ["c"]
+    assert pool.get("2") == ["c"]
+    assert redis.commands[commands:] == ["SMEMBERS"]
+
+
+def test_redis_user_pool_cache_is_bounded(redis):
+    pool = RedisUserPool("pool", "redis://", cache_ttl=60, cache_max_size=2)
+    for user_id in ["1", "2", "3"]:
+        pool.get(user_id)
+    assert list(pool.cache) == ["2", "3"]
+
+    # Expired entries are pruned as other users are looked up
+    pool.cache["2"] = (0, [])
+    pool.get("4")
+    assert list(pool.cache) == ["3", "4"]
+
+
+def test_redis_usage_pool_cleanup_drops_expired_sessions(redis):
+    pool = RedisUsagePool("usage", "redis://")
+    assert pool.cleanup(100) is False
+
+    pool.touch("model-a", "a", 90)
+    pool.touch("model-a", "b", 110)
+    pool.touch("model-b", "c", 95)
+    assert pool.model_ids() == ["model-b", "model-a"]
+
+    assert pool.cleanup(100) is True
+    assert pool.model_ids() == ["model-a"]
+    assert redis.data["usage:model-a"] == {"b": 110}
+    assert "usage:model-b" not in redis.data
+
+    # A session reporting again is kept alive, usage exactly at the cutoff too
+    pool.touch("model-a", "b", 130)
+    pool.cleanup(130)
+    assert pool.model_ids() == ["model-a"]
@@ -0,0 +1,69 @@
+from open_webui.models.users import UserModel, Users
+from open_webui.utils.user_cache import LastActiveBuffer, UserCache
+
+
+def get_user(id="user", role="user"):
+    return UserModel(
+        id=id,
+        name="User",
+        email=f"{id}@openwebui.com",
+        role=role,
+        profile_image_url="/user.png",
+        last_active_at=0,
+        updated_at=0,
+        created_at=0,
+    )
+
+
+def test_users_are_loaded_once_until_invalidated():
+    cache = UserCache(ttl=60, redis_url=None)
+    calls = []
+
+    def resolve():
+        calls.append(1)
+        return get_user(role="admin" if len(calls) == 1 else "user")
+
+    assert cache.get(("id", "user"), resolve).role == "admin"
+    assert cache.get(("api_key", "sk-1"), resolve).role == "user"
+    assert cache.get(("id", "user"), resolve).role == "admin"
+    assert len(calls) == 2
+
+    # Dropping the user drops its entries under every key
+    cache.invalidate("user")
+    assert cache.entries == {}
+    assert cache.get(("id", "user"), resolve).role == "user"
+
+
+def test_cached_users_are_copies():
+    cache = UserCache(ttl=60, redis_url=None)
+
+    user = cache.get(("id", "user"), get_user)
+    user.role = "admin"
+
+    assert cache.get(("id", "user"), get_user).role == "user"
+
+
+def test_missing_users_are_not_cached():
+    cache = UserCache(ttl=60, redis_url=None)
+
+    assert cache.get(("api_key", "sk-1"), lambda: None) is None
+    assert cache.entries == {}
+
+
+def test_last_active_updates_are_written_in_bulk(monkeypatch):
+    updates = []
+    monkeypatch.setattr(
+        Users,
+        "update_users_last_active_by_ids",
+        lambda pending: updates.append(pending),
+    )
+    buffer = LastActiveBuffer(interval=10)
+
+    for _ in range(100):
+        buffer.touch("user_a")
+        buffer.touch("user_b")
+    buffer.flush()
+    buffer.flush()
+
+    assert len(updates) == 1
+    assert set(updates[0]) == {"user_a", "user_b"}
@@ -1,6 +1,7 @@
 from typing import Optional, Union, List, Dict, Any
 from open_webui.models.users import Users, UserModel
 from open_webui.models.groups import Groups
+from open_webui.utils.permission_cache import PERMISSION_CACHE
 
 
 from open_webui.config import DEFAULT_USER_PERMISSIONS
@@ -33,7 +34,19 @@ def get_permissions(
     Get all permissions for a user by combining the permissions of all groups the user is a member of.
     If a permission is defined in multiple groups, the most permissive value is used (True > False).
     Permissions are nested in a dict with the permission key as the key and a boolean as the value.
+
+    The result is cached until groups or the default permissions change and must not be mutated.
     """
+    return PERMISSION_CACHE.get(
+        ("permissions", user_id),
+        lambda: resolve_permissions(user_id, default_permissions),
+    )
+
+
+def resolve_permissions(
+    user_id: str,
+    default_permissions: Dict[str, Any],
+) -> Dict[str, Any]:
 
     def combine_permissions(
         permissions: Dict[str, Any], group_permissions: Dict[str, Any]
@@ -92,31 +105,38 @@ def has_permission(
 
     permission_hierarchy = permission_key.split(".")
 
-    # Retrieve user group permissions
-    user_groups = Groups.get_groups_by_member_id(user_id)
+    def resolve():
+        # Missing default permissions fall back to DEFAULT_USER_PERMISSIONS
+        defaults = fill_missing_permissions(
+            json.loads(json.dumps(default_permissions)), DEFAULT_USER_PERMISSIONS
+        )
+        # Group permissions are merged with the most permissive value winning,
+        # so the user has a permission if any group or the defaults grant it
+        return resolve_permissions(user_id, defaults)
 
-    for group in user_groups:
-        group_permissions = group.permissions
-        if get_permission(group_permissions, permission_hierarchy):
-            return True
+    permissions = PERMISSION_CACHE.get(("has_permission", user_id), resolve)
+    return get_permission(permissions, permission_hierarchy)
 
-    # Check default permissions afterward if the group permissions don't allow it
-    default_permissions = fill_missing_permissions(
-        default_permissions, DEFAULT_USER_PERMISSIONS
-    )
-    return get_permission(default_permissions, permission_hierarchy)
+
+def get_user_group_ids(user_id: str) -> set[str]:
+    return set(Groups.get_group_ids_by_member_id(user_id))
 
 
 def has_access(
     user_id: str,
     type: str = "write",
     access_control: Optional[dict] = None,
+    user_group_ids: Optional[set[str]] = None,
 ) -> bool:
+    """
+    Pass `user_group_ids` (see `get_user_group_ids`) when checking many
+    resources for the same user, to look up the user's groups only once.
+    """
     if access_control is None:
         return type == "read"
 
-    user_groups = Groups.get_groups_by_member_id(user_id)
-    user_group_ids = [group.id for group in user_groups]
+    if user_group_ids is None:
+        user_group_ids = get_user_group_ids(user_id)
     permission_access = access_control.get(type, {})
     permitted_group_ids = permission_access.get("group_ids", [])
     permitted_user_ids = permission_access.get("user_ids", [])
@@ -138,10 +158,9 @@ def get_users_with_access(
     permitted_user_ids = permission_access.get("user_ids", [])
 
     user_ids_with_access = set(permitted_user_ids)
-
-    for group_id in permitted_group_ids:
-        group_user_ids = Groups.get_group_user_ids_by_id(group_id)
-        if group_user_ids:
-            user_ids_with_access.update(group_user_ids)
+    if permitted_group_ids:
+        user_ids_with_access.update(
+            Groups.get_group_user_ids_by_ids(permitted_group_ids)
+        )
 
     return Users.get_users_by_user_ids(list(user_ids_with_access))
@@ -12,6 +12,7 @@ from datetime import UTC, datetime, timedelta
 from typing import Optional, Union, List, Dict
 
 from open_webui.models.users import Users
+from open_webui.utils.user_cache import USER_CACHE, LAST_ACTIVE_BUFFER
 
 from open_webui.constants import ERROR_MESSAGES
 from open_webui.env import (
@@ -197,7 +198,9 @@ def get_current_user(
         )
 
     if data is not None and "id" in data:
-        user = Users.get_user_by_id(data["id"])
+        user = USER_CACHE.get(
+            ("id", data["id"]), lambda: Users.get_user_by_id(data["id"])
+        )
         if user is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -207,7 +210,7 @@ def get_current_user(
             # Refresh the user's last active timestamp asynchronously
             # to prevent blocking the request
             if background_tasks:
-                background_tasks.add_task(Users.update_user_last_active_by_id, user.id)
+                background_tasks.add_task(LAST_ACTIVE_BUFFER.touch, user.id)
         return user
     else:
         raise HTTPException(
@@ -217,7 +220,9 @@ def get_current_user(
 
 
 def get_current_user_by_api_key(api_key: str):
-    user = Users.get_user_by_api_key(api_key)
+    user = USER_CACHE.get(
+        ("api_key", api_key), lambda: Users.get_user_by_api_key(api_key)
+    )
 
     if user is None:
         raise HTTPException(
@@ -225,7 +230,7 @@ def get_current_user_by_api_key(api_key: str):
             detail=ERROR_MESSAGES.INVALID_TOKEN,
         )
     else:
-        Users.update_user_last_active_by_id(user.id)
+        LAST_ACTIVE_BUFFER.touch(user.id)
 
     return user
 
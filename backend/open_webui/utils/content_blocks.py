@@ -0,0 +1,387 @@
+import html
+import json
+import re
+import time
+
+
+def split_content_and_whitespace(content):
+    content_stripped = content.rstrip()
+    original_whitespace = (
+        content[len(content_stripped) :] if len(content) > len(content_stripped) else ""
+    )
+    return content_stripped, original_whitespace
+
+
+def is_opening_code_block(content):
+    backtick_segments = content.split("```")
+    # Even number of segments means the last backticks are opening a new block
+    return len(backtick_segments) > 1 and len(backtick_segments) % 2 == 0
+
+
+def strip_opening_code_block(content):
+    content_stripped, original_whitespace = split_content_and_whitespace(content)
+    if is_opening_code_block(content_stripped):
+        # Remove trailing backticks that would open a new block
+        return content_stripped.rstrip("`").rstrip() + original_whitespace
+    else:
+        # Keep content as is - either closing backticks or no backticks
+        return content_stripped + original_whitespace
+
+
+def serialize_tool_calls(tool_calls, results=None):
+    tool_calls_display_content = ""
+    for tool_call in tool_calls:
+        tool_call_id = tool_call.get("id", "")
+        tool_name = tool_call.get("function", {}).get("name", "")
+        tool_arguments = tool_call.get("function", {}).get("arguments", "")
+
+        tool_result = None
+        for result in results or []:
+            if tool_call_id == result.get("tool_call_id", ""):
+                tool_result = result.get("content", None)
+                break
+
+        if tool_result:
+            tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="true" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}" result="{html.escape(json.dumps(tool_result))}">\n<summary>Tool Executed</summary>\n</details>'
+        else:
+            tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>'
+
+    return tool_calls_display_content
+
+
+def serialize_content_block(block, raw=False):
+    """
+    Returns the text a single block appends to the serialized content.
+    `code_interpreter` blocks additionally expect the preceding content to be
+    passed through `strip_opening_code_block` first.
+    """
+    if block["type"] == "text":
+        return f"{block['content'].strip()}\n"
+
+    elif block["type"] == "tool_calls":
+        if raw:
+            return ""
+
+        tool_calls_display_content = serialize_tool_calls(
+            block.get("content", []), block.get("results", [])
+        )
+        return f"\n{tool_calls_display_content}\n\n"
+
+    elif block["type"] == "reasoning":
+        if raw:
+            return f'\n<{block["start_tag"]}>{block["content"]}<{block["end_tag"]}>\n'
+
+        reasoning_display_content = "\n".join(
+            (f"> {line}" if not line.startswith(">") else line)
+            for line in block["content"].splitlines()
+        )
+
+        reasoning_duration = block.get("duration", None)
+
+        if reasoning_duration is not None:
+            return f'\n<details type="reasoning" done="true" duration="{reasoning_duration}">\n<summary>Thought for {reasoning_duration} seconds</summary>\n{reasoning_display_content}\n</details>\n'
+        else:
+            return f'\n<details type="reasoning" done="false">\n<summary>Thinking…</summary>\n{reasoning_display_content}\n</details>\n'
+
+    elif block["type"] == "code_interpreter":
+        attributes = block.get("attributes", {})
+        output = block.get("output", None)
+        lang = attributes.get("lang", "")
+
+        if output:
+            output = html.escape(json.dumps(output))
+
+            if raw:
+                return f'\n<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n```output\n{output}\n```\n'
+            else:
+                return f'\n<details type="code_interpreter" done="true" output="{output}">\n<summary>Analyzed</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
+        else:
+            if raw:
+                return f'\n<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n'
+            else:
+                return f'\n<details type="code_interpreter" done="false">\n<summary>Analyzing...</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
+
+    else:
+        block_content = str(block["content"]).strip()
+        return f"{block['type']}: {block_content}\n"
+
+
+def serialize_content_blocks(content_blocks, raw=False):
+    content = ""
+
+    for block in content_blocks:
+        if block["type"] == "code_interpreter":
+            content = strip_opening_code_block(content)
+        content = f"{content}{serialize_content_block(block, raw)}"
+
+    return content.strip()
+
+
+class ContentBlockSerializer:
+    """
+    Incremental `serialize_content_blocks` for a list of content blocks that
+    is being streamed into.
+
+    While streaming only the last block of the list is ever modified, every
+    block before it is closed. The serialized prefix of closed blocks is
+    cached and only the open tail block is rendered again on each call. Cache
+    entries are matched by block identity, so blocks that were popped or
+    replaced are re-rendered.
+    """
+
+    def __init__(self, raw=False):
+        self.raw = raw
+        # [block, content up to and including block, same with an opening code block stripped]
+        self.prefixes: list[list] = []
+
+    def _get_prefix(self, content_blocks) -> int:
+        limit = min(len(self.prefixes), len(content_blocks) - 1)
+
+        idx = 0
+        while idx < limit and self.prefixes[idx][0] is content_blocks[idx]:
+            idx += 1
+
+        del self.prefixes[idx:]
+        return idx
+
+    def _get_content(self, strip_opening_code_block_content=False) -> str:
+        if not self.prefixes:
+            return ""
+
+        prefix = self.prefixes[-1]
+        if not strip_opening_code_block_content:
+            return prefix[1]
+
+        if prefix[2] is None:
+            prefix[2] = strip_opening_code_block(prefix[1])
+        return prefix[2]
+
+    def serialize(self, content_blocks) -> str:
+        if not content_blocks:
+            self.prefixes = []
+            return ""
+
+        for block in content_blocks[self._get_prefix(content_blocks) : -1]:
+            content = self._get_content(block["type"] == "code_interpreter")
+            self.prefixes.append(
+                [block, f"{content}{serialize_content_block(block, self.raw)}", None]
+            )
+
+        block = content_blocks[-1]
+        content = self._get_content(block["type"] == "code_interpreter")
+        return f"{content}{serialize_content_block(block, self.raw)}".strip()
+
+
+def extract_attributes(tag_content):
+    """Extract attributes from a tag if they exist."""
+    attributes = {}
+    if not tag_content:  # Ensure tag_content is not None
+        return attributes
+    # Match attributes in the format: key="value" (ignores single quotes for simplicity)
+    matches = re.findall(r'(\w+)\s*=\s*"([^"]+)"', tag_content)
+    for key, value in matches:
+        attributes[key] = value
+    return attributes
+
+
+def get_start_tag_offset(content, start_tag, offset=0):
+    """
+    Returns the first position at or after `offset` where a start tag
+    (`<tag>` or `<tag attr="value">`) could still be completed by appending
+    more content, or `len(content)` if there is none.
+    """
+    needle = f"<{start_tag}"
+
+    idx = content.find("<", offset)
+    while idx != -1:
+        rest = len(content) - idx
+        if rest <= len(needle):
+            if needle.startswith(content[idx:]):
+                return idx
+        elif content.startswith(needle, idx):
+            next_char = content[idx + len(needle)]
+            if next_char == ">":
+                return idx
+            # Attributes can not span multiple lines
+            if next_char.isspace() and content.find("\n", idx + len(needle) + 1) == -1:
+                return idx
+
+        idx = content.find("<", idx + 1)
+
+    return len(content)
+
+
+class TagContentParser:
+    """
+    Detects tagged sections (e.g. `<think>...</think>`) in streamed content and
+    splits them into their own content blocks.
+
+    A tag can only appear in newly appended content, or complete a partial tag
+    at the end of the previous content, so the scan offset for each tag is kept
+    across deltas and detection is proportional to the delta instead of the
+    whole response. Offsets are reset whenever the content is rewritten.
+    Pass `incremental=False` to always scan the full content.
+    """
+
+    def __init__(self, incremental=True):
+        self.incremental = incremental
+        self.offsets = {}
+
+    def reset(self):
+        self.offsets = {}
+
+    def search_start_tag(self, start_tag, content):
+        pattern = re.compile(rf"<{re.escape(start_tag)}(\s.*?)?>")
+        if not self.incremental:
+            return pattern.search(content)
+
+        key = ("start", start_tag)
+        match = pattern.search(content, self.offsets.get(key, 0))
+        if not match:
+            self.offsets[key] = get_start_tag_offset(
+                content, start_tag, self.offsets.get(key, 0)
+            )
+        return match
+
+    def search_end_tag(self, end_tag, content):
+        needle = f"<{end_tag}>"
+        if not self.incremental:
+            return needle in content
+
+        key = ("end", end_tag)
+        found = content.find(needle, self.offsets.get(key, 0)) != -1
+        if not found:
+            self.offsets[key] = max(
+                self.offsets.get(key, 0), len(content) - len(needle) + 1
+            )
+        return found
+
+    def __call__(self, content_type, tags, content, content_blocks):
+        end_flag = False
+
+        if content_blocks[-1]["type"] == "text":
+            for start_tag, end_tag in tags:
+                # Match start tag e.g., <tag> or <tag attr="value">
+                match = self.search_start_tag(start_tag, content)
+                if match:
+                    attr_content = (
+                        match.group(1) if match.group(1) else ""
+                    )  # Ensure it's not None
+                    attributes = extract_attributes(
+                        attr_content
+                    )  # Extract attributes safely
+
+                    # Capture everything before and after the matched tag
+                    before_tag = content[: match.start()]  # Content before opening tag
+                    after_tag = content[match.end() :]  # Content after opening tag
+
+                    # Remove the start tag and after from the currently handling text block
+                    content_blocks[-1]["content"] = content_blocks[-1][
+                        "content"
+                    ].replace(match.group(0) + after_tag, "")
+
+                    if before_tag:
+                        content_blocks[-1]["content"] = before_tag
+
+                    if not content_blocks[-1]["content"]:
+                        content_blocks.pop()
+
+                    # Append the new block
+                    content_blocks.append(
+                        {
+                            "type": content_type,
+                            "start_tag": start_tag,
+                            "end_tag": end_tag,
+                            "attributes": attributes,
+                            "content": "",
+                            "started_at": time.time(),
+                        }
+                    )
+
+                    if after_tag:
+                        content_blocks[-1]["content"] = after_tag
+
+                    break
+        elif content_blocks[-1]["type"] == content_type:
+            start_tag = content_blocks[-1]["start_tag"]
+            end_tag = content_blocks[-1]["end_tag"]
+            # Match end tag e.g., </tag>
+            end_tag_pattern = rf"<{re.escape(end_tag)}>"
+
+            # Check if the content has the end tag
+            if self.search_end_tag(end_tag, content):
+                end_flag = True
+
+                block_content = content_blocks[-1]["content"]
+                # Strip start and end tags from the content
+                start_tag_pattern = rf"<{re.escape(start_tag)}(.*?)>"
+                block_content = re.sub(start_tag_pattern, "", block_content).strip()
+
+                end_tag_regex = re.compile(end_tag_pattern, re.DOTALL)
+                split_content = end_tag_regex.split(block_content, maxsplit=1)
+
+                # Content inside the tag
+                block_content = split_content[0].strip() if split_content else ""
+
+                # Leftover content (everything after `</tag>`)
+                leftover_content = (
+                    split_content[1].strip() if len(split_content) > 1 else ""
+                )
+
+                if block_content:
+                    content_blocks[-1]["content"] = block_content
+                    content_blocks[-1]["ended_at"] = time.time()
+                    content_blocks[-1]["duration"] = int(
+                        content_blocks[-1]["ended_at"]
+                        - content_blocks[-1]["started_at"]
+                    )
+
+                    # Reset the content_blocks by appending a new text block
+                    if content_type != "code_interpreter":
+                        if leftover_content:
+
+                            content_blocks.append(
+                                {
+                                    "type": "text",
+                                    "content": leftover_content,
+                                }
+                            )
+                        else:
+                            content_blocks.append(
+                                {
+                                    "type": "text",
+                                    "content": "",
+                                }
+                            )
+
+                else:
+                    # Remove the block if content is empty
+                    content_blocks.pop()
+
+                    if leftover_content:
+                        content_blocks.append(
+                            {
+                                "type": "text",
+                                "content": leftover_content,
+                            }
+                        )
+                    else:
+                        content_blocks.append(
+                            {
+                                "type": "text",
+                                "content": "",
+                            }
+                        )
+
+                # Clean processed content
+                content = re.sub(
+                    rf"<{re.escape(start_tag)}(.*?)>(.|\n)*?<{re.escape(end_tag)}>",
+                    "",
+                    content,
+                    flags=re.DOTALL,
+                )
+
+                # The content was rewritten, previous scan offsets are no longer valid
+                self.reset()
+
+        return content, content_blocks, end_flag
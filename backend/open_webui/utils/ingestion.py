@@ -0,0 +1,377 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+
+from fastapi import Request
+
+from open_webui.models.ingestion_jobs import (
+    IngestionJobModel,
+    IngestionJobResponse,
+    IngestionJobs,
+)
+from open_webui.utils.redis import get_redis_connection, get_sentinels_from_env
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    INGESTION_JOB_MAX_PER_USER,
+    INGESTION_JOB_MAX_RETRIES,
+    INGESTION_JOB_QUEUE,
+    INGESTION_WORKERS,
+    REDIS_URL,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+# Running jobs touch their row every HEARTBEAT_INTERVAL seconds, jobs left
+# untouched for STALE_TIMEOUT seconds lost their worker and are queued again.
+# Pending jobs queued STALE_TIMEOUT seconds ago, or deferred and due, are
+# queued again as well, their queue entry may have been lost with a restart.
+HEARTBEAT_INTERVAL = 30
+STALE_TIMEOUT = 300
+
+# Seconds before a job of a user already at INGESTION_JOB_MAX_PER_USER is
+# looked at again, and before the first retry of a failed job (doubled for
+# each further retry)
+USER_LIMIT_DELAY = 1.0
+RETRY_DELAY = 5.0
+
+
+class LocalJobQueue:
+    """Job ids queued on the event loop of this process."""
+
+    def __init__(self):
+        self.queue: Optional[asyncio.Queue] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def start(self, loop: asyncio.AbstractEventLoop):
+        self.queue = asyncio.Queue()
+        self.loop = loop
+
+    def put(self, job_id: str):
+        # Jobs queued before the workers start are picked up from the database
+        if self.loop is not None:
+            # Called from request handler threads as well as from the loop
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, job_id)
+
+    async def get(self, timeout: float) -> Optional[str]:
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class RedisJobQueue:
+    """Job ids queued in a Redis list, shared by the workers of all nodes."""
+
+    def __init__(self, name: str, redis_url: str, redis_sentinels: list = []):
+        self.name = name
+        self.redis = get_redis_connection(redis_url, redis_sentinels)
+
+    def start(self, loop: asyncio.AbstractEventLoop):
+        pass
+
+    def put(self, job_id: str):
+        self.redis.rpush(self.name, job_id)
+
+    async def get(self, timeout: float) -> Optional[str]:
+        result = await asyncio.to_thread(
+            self.redis.blpop, [self.name], max(int(timeout), 1)
+        )
+        return result[1] if result else None
+
+
+class LocalUserSlots:
+    """Number of running jobs of each user in this process."""
+
+    def __init__(self):
+        self.counts: dict[str, int] = {}
+
+    def acquire(self, user_id: str, limit: int) -> bool:
+        if self.counts.get(user_id, 0) >= limit:
+            return False
+        self.counts[user_id] = self.counts.get(user_id, 0) + 1
+        return True
+
+    def release(self, user_id: str):
+        count = self.counts.get(user_id, 0) - 1
+        if count > 0:
+            self.counts[user_id] = count
+        else:
+            self.counts.pop(user_id, None)
+
+
+class RedisUserSlots:
+    """
+    Number of running jobs of each user on all nodes. The counters expire, so
+    slots held by a node that stopped are eventually freed.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        redis_url: str,
+        redis_sentinels: list = [],
+        ttl: int = 3600,
+    ):
+        self.name = name
+        self.ttl = ttl
+        self.redis = get_redis_connection(redis_url, redis_sentinels)
+
+    def acquire(self, user_id: str, limit: int) -> bool:
+        key = f"{self.name}:{user_id}"
+        pipe = self.redis.pipeline()
+        pipe.incr(key)
+        pipe.expire(key, self.ttl)
+        count, _ = pipe.execute()
+
+        if count > limit:
+            self.redis.decr(key)
+            return False
+        return True
+
+    def release(self, user_id: str):
+        self.redis.decr(f"{self.name}:{user_id}")
+
+
+# Called with the request of the app, the claimed job and a function to save
+# its progress, returns the result of the job
+IngestionJobHandler = Callable[[Request, IngestionJobModel, Callable], Awaitable[dict]]
+
+
+class IngestionWorkerPool:
+    """
+    Runs ingestion jobs (file processing, knowledge batch adds) outside of the
+    requests that create them.
+
+    Jobs are rows of the `ingestion_job` table, the queue only carries their
+    ids. A worker claims a job before running it, so ids queued twice, or by
+    the recovery of an interrupted job, are harmless. Handlers save the output
+    of each completed stage to the job state, a failed job is retried with
+    backoff from the stage that failed.
+    """
+
+    def __init__(
+        self,
+        queue,
+        slots,
+        workers: int = INGESTION_WORKERS,
+        max_per_user: int = INGESTION_JOB_MAX_PER_USER,
+        max_retries: int = INGESTION_JOB_MAX_RETRIES,
+    ):
+        self.queue = queue
+        self.slots = slots
+        self.workers = workers
+        self.max_per_user = max(max_per_user, 1)
+        self.max_retries = max_retries
+
+        self.handlers: dict[str, IngestionJobHandler] = {}
+        self.app = None
+        self.emit: Optional[Callable] = None
+        self.tasks: set[asyncio.Task] = set()
+
+    def register(self, type: str, handler: IngestionJobHandler):
+        self.handlers[type] = handler
+
+    def enqueue(
+        self, user_id: str, type: str, data: dict
+    ) -> Optional[IngestionJobModel]:
+        job = IngestionJobs.insert_new_job(user_id, type, data)
+        if job:
+            self.queue.put(job.id)
+        return job
+
+    def retry(self, job_id: str) -> Optional[IngestionJobModel]:
+        """Queues a failed job again, it resumes from the stage that failed."""
+        job = IngestionJobs.update_job_by_id(
+            job_id, status="pending", attempts=0, error=None, run_after=None
+        )
+        if job:
+            self.queue.put(job.id)
+        return job
+
+    async def start(self, app, emit: Optional[Callable] = None):
+        self.app = app
+        self.emit = emit
+        self.queue.start(asyncio.get_running_loop())
+
+        if self.workers <= 0:
+            if isinstance(self.queue, LocalJobQueue):
+                log.warning(
+                    "INGESTION_WORKERS is 0 without a shared job queue, "
+                    "queued ingestion jobs will not run"
+                )
+            return
+
+        # Jobs left pending by a previous run, the Redis list outlives it
+        if isinstance(self.queue, LocalJobQueue):
+            now = int(time.time())
+            for job_id in IngestionJobs.requeue_pending_jobs(now, now + 1):
+                self.queue.put(job_id)
+
+        for _ in range(self.workers):
+            self._create_task(self._worker())
+        self._create_task(self._recover_jobs())
+
+    async def stop(self):
+        tasks, self.tasks = self.tasks, set()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _create_task(self, coroutine) -> asyncio.Task:
+        task = asyncio.create_task(coroutine)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    def _defer(self, job_id: str, delay: float, **updated):
+        """
+        Queues a pending job again after `delay` seconds. The time is saved to
+        the job, so the job is recovered if this process stops before.
+        """
+        job = IngestionJobs.update_job_by_id(
+            job_id, run_after=int(time.time() + delay), **updated
+        )
+        self._create_task(self._put_later(job_id, delay))
+        return job
+
+    async def _put_later(self, job_id: str, delay: float):
+        await asyncio.sleep(delay)
+        self.queue.put(job_id)
+
+    async def _worker(self):
+        while True:
+            try:
+                job_id = await self.queue.get(timeout=5)
+                if job_id:
+                    await self._run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.exception(f"Error running ingestion job: {e}")
+                await asyncio.sleep(1)
+
+    async def _recover_jobs(self):
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            try:
+                now = int(time.time())
+                for job_id in IngestionJobs.reset_stale_jobs(now - STALE_TIMEOUT):
+                    log.info(f"Queueing interrupted ingestion job {job_id} again")
+                    self.queue.put(job_id)
+
+                for job_id in IngestionJobs.requeue_pending_jobs(
+                    now, now - STALE_TIMEOUT
+                ):
+                    log.debug(f"Queueing pending ingestion job {job_id} again")
+                    self.queue.put(job_id)
+            except Exception as e:
+                log.exception(f"Error recovering ingestion jobs: {e}")
+
+    async def _heartbeat(self, job_id: str):
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            IngestionJobs.update_job_by_id(job_id)
+
+    async def _run(self, job_id: str):
+        job = IngestionJobs.get_job_by_id(job_id)
+        if job is None or job.status != "pending":
+            return
+
+        if not self.slots.acquire(job.user_id, self.max_per_user):
+            self._defer(job_id, USER_LIMIT_DELAY)
+            return
+
+        try:
+            if IngestionJobs.claim_job_by_id(job_id):
+                await self._process(IngestionJobs.get_job_by_id(job_id))
+        finally:
+            self.slots.release(job.user_id)
+
+    async def _process(self, job: IngestionJobModel):
+        async def update(
+            stage: Optional[str] = None,
+            progress: Optional[float] = None,
+            state: Optional[dict] = None,
+        ):
+            updated = {}
+            if stage is not None:
+                updated["stage"] = stage
+            if progress is not None:
+                updated["progress"] = progress
+            if state is not None:
+                updated["state"] = state
+            await self._emit(IngestionJobs.update_job_by_id(job.id, **updated))
+
+        await self._emit(job)
+
+        heartbeat = self._create_task(self._heartbeat(job.id))
+        try:
+            handler = self.handlers.get(job.type)
+            if handler is None:
+                raise ValueError(f"Unknown ingestion job type: {job.type}")
+
+            request = Request({"type": "http", "app": self.app})
+            result = await handler(request, job, update)
+        except Exception as e:
+            log.exception(f"Error running ingestion job {job.id}: {e}")
+
+            if job.attempts <= self.max_retries:
+                job = self._defer(
+                    job.id,
+                    RETRY_DELAY * 2 ** (job.attempts - 1),
+                    status="pending",
+                    error=str(e),
+                )
+            else:
+                job = IngestionJobs.update_job_by_id(
+                    job.id, status="failed", error=str(e)
+                )
+        else:
+            # Intermediate stage output is only kept until the job succeeds
+            job = IngestionJobs.update_job_by_id(
+                job.id,
+                status="completed",
+                stage=None,
+                progress=1.0,
+                state={},
+                result=result,
+                error=None,
+            )
+        finally:
+            heartbeat.cancel()
+
+        await self._emit(job)
+
+    async def _emit(self, job: Optional[IngestionJobModel]):
+        if job is None or self.emit is None:
+            return
+
+        try:
+            await self.emit(
+                job.user_id,
+                "ingestion-events",
+                IngestionJobResponse(**job.model_dump()).model_dump(),
+            )
+        except Exception as e:
+            log.debug(f"Error emitting ingestion job event: {e}")
+
+
+def get_ingestion_worker_pool() -> IngestionWorkerPool:
+    if INGESTION_JOB_QUEUE == "redis" and REDIS_URL:
+        redis_sentinels = get_sentinels_from_env(
+            REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT
+        )
+        return IngestionWorkerPool(
+            RedisJobQueue("open-webui:ingestion_jobs", REDIS_URL, redis_sentinels),
+            RedisUserSlots(
+                "open-webui:ingestion_user_jobs", REDIS_URL, redis_sentinels
+            ),
+        )
+    return IngestionWorkerPool(LocalJobQueue(), LocalUserSlots())
+
+
+INGESTION_WORKER_POOL = get_ingestion_worker_pool()
@@ -0,0 +1,248 @@
+import logging
+import random
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    OLLAMA_LOAD_BALANCING_MODE,
+    OLLAMA_SESSION_AFFINITY,
+    OLLAMA_BACKEND_EJECT_FAILURES,
+    OLLAMA_BACKEND_EJECT_SECONDS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+LOAD_BALANCING_MODES = ["random", "least_outstanding", "ewma", "weighted"]
+
+
+class BackendStats:
+    def __init__(self):
+        self.in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.ewma_latency: Optional[float] = None  # seconds to response headers
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+
+    def is_ejected(self, now: float) -> bool:
+        return self.ejected_until > now
+
+    def to_dict(self, now: float) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "errors": self.errors,
+            "ewma_latency": (
+                round(self.ewma_latency, 4) if self.ewma_latency is not None else None
+            ),
+            "consecutive_failures": self.consecutive_failures,
+            "ejected": self.is_ejected(now),
+            "ejected_for": max(round(self.ejected_until - now, 1), 0),
+        }
+
+
+class LoadBalancer:
+    """
+    Picks one of several backends serving the same model.
+
+    Modes:
+    - `random`: uniform choice, the legacy behaviour.
+    - `least_outstanding`: the backend with the fewest requests in flight.
+    - `ewma`: the lowest moving average latency, scaled by the requests in
+      flight. Backends without a measurement yet are scored with the average
+      latency of the others, or by their requests in flight alone if no
+      backend was measured.
+    - `weighted`: random choice proportional to the configured weights.
+
+    Backends failing `eject_failures` times in a row are skipped for
+    `eject_seconds`, unless every candidate is ejected. With `affinity`,
+    requests sharing an affinity key (e.g. a chat id) stick to the backend
+    picked first, so its prompt cache stays warm.
+    """
+
+    def __init__(
+        self,
+        mode: str = OLLAMA_LOAD_BALANCING_MODE,
+        affinity: bool = OLLAMA_SESSION_AFFINITY,
+        eject_failures: int = OLLAMA_BACKEND_EJECT_FAILURES,
+        eject_seconds: float = OLLAMA_BACKEND_EJECT_SECONDS,
+        ewma_alpha: float = 0.3,
+        affinity_ttl: float = 3600,
+        affinity_max_size: int = 10000,
+    ):
+        if mode not in LOAD_BALANCING_MODES:
+            log.warning(f"Unknown load balancing mode {mode}, using random")
+            mode = "random"
+
+        self.mode = mode
+        self.affinity = affinity
+        self.eject_failures = eject_failures
+        self.eject_seconds = eject_seconds
+        self.ewma_alpha = ewma_alpha
+        self.affinity_ttl = affinity_ttl
+        self.affinity_max_size = affinity_max_size
+
+        self.backends: dict[Hashable, BackendStats] = {}
+        # affinity key -> (backend, expires at)
+        self.affinities: OrderedDict[Hashable, tuple[Hashable, float]] = OrderedDict()
+
+    def get_backend(self, backend: Hashable) -> BackendStats:
+        stats = self.backends.get(backend)
+        if stats is None:
+            stats = self.backends[backend] = BackendStats()
+        return stats
+
+    def _get_affinity(self, key: Hashable, now: float) -> Optional[Hashable]:
+        entry = self.affinities.get(key)
+        if entry is None:
+            return None
+
+        backend, expires_at = entry
+        if expires_at <= now:
+            del self.affinities[key]
+            return None
+        return backend
+
+    def _set_affinity(self, key: Hashable, backend: Hashable, now: float):
+        self.affinities[key] = (backend, now + self.affinity_ttl)
+        self.affinities.move_to_end(key)
+        while len(self.affinities) > self.affinity_max_size:
+            self.affinities.popitem(last=False)
+
+    def _choose(self, candidates: list, weights: Optional[dict]) -> Hashable:
+        if self.mode == "least_outstanding":
+            least = min(self.get_backend(c).in_flight for c in candidates)
+            return random.choice(
+                [c for c in candidates if self.get_backend(c).in_flight == least]
+            )
+
+        if self.mode == "ewma":
+            latencies = [
+                self.get_backend(c).ewma_latency
+                for c in candidates
+                if self.get_backend(c).ewma_latency is not None
+            ]
+            default_latency = sum(latencies) / len(latencies) if latencies else 1.0
+
+            def get_score(candidate):
+                stats = self.get_backend(candidate)
+                latency = (
+                    stats.ewma_latency
+                    if stats.ewma_latency is not None
+                    else default_latency
+                )
+                return latency * (stats.in_flight + 1)
+
+            lowest = min(get_score(c) for c in candidates)
+            return random.choice([c for c in candidates if get_score(c) == lowest])
+
+        if self.mode == "weighted" and weights:
+            candidate_weights = [max(weights.get(c, 1.0), 0.0) for c in candidates]
+            if sum(candidate_weights) > 0:
+                return random.choices(candidates, weights=candidate_weights)[0]
+
+        return random.choice(candidates)
+
+    def select(
+        self,
+        candidates: list,
+        weights: Optional[dict] = None,
+        affinity_key: Optional[Hashable] = None,
+    ) -> Hashable:
+        if not candidates:
+            raise ValueError("No backends to select from")
+
+        now = time.monotonic()
+        healthy = [c for c in candidates if not self.get_backend(c).is_ejected(now)]
+        # If everything is ejected, a possibly broken backend beats none at all
+        candidates = healthy or candidates
+
+        affinity_key = affinity_key if self.affinity else None
+        if affinity_key is not None:
+            backend = self._get_affinity(affinity_key, now)
+            if backend in candidates:
+                self._set_affinity(affinity_key, backend, now)
+                return backend
+
+        backend = self._choose(candidates, weights)
+
+        if affinity_key is not None:
+            self._set_affinity(affinity_key, backend, now)
+        return backend
+
+    def acquire(self, backend: Hashable) -> "BackendLease":
+        stats = self.get_backend(backend)
+        stats.in_flight += 1
+        stats.requests += 1
+        return BackendLease(self, backend)
+
+    def record_latency(self, backend: Hashable, latency: float):
+        stats = self.get_backend(backend)
+
+        if stats.ewma_latency is None:
+            stats.ewma_latency = latency
+        else:
+            stats.ewma_latency = (
+                self.ewma_alpha * latency + (1 - self.ewma_alpha) * stats.ewma_latency
+            )
+
+    def release(self, backend: Hashable, error: bool = False):
+        stats = self.get_backend(backend)
+        stats.in_flight -= 1
+
+        if not error:
+            stats.consecutive_failures = 0
+            return
+
+        stats.errors += 1
+        stats.consecutive_failures += 1
+        if self.eject_failures > 0 and (
+            stats.consecutive_failures >= self.eject_failures
+        ):
+            if not stats.is_ejected(time.monotonic()):
+                log.warning(
+                    f"Ejecting backend {backend} for {self.eject_seconds}s after {stats.consecutive_failures} failures"
+                )
+            stats.ejected_until = time.monotonic() + self.eject_seconds
+
+    def get_stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "mode": self.mode,
+            "affinity": self.affinity,
+            "affinities": len(self.affinities),
+            "backends": {
+                str(backend): stats.to_dict(now)
+                for backend, stats in self.backends.items()
+            },
+        }
+
+
+class BackendLease:
+    """
+    A request in flight on a backend. `release` is idempotent, so it can be
+    called from every cleanup path of a request.
+    """
+
+    def __init__(self, balancer: LoadBalancer, backend: Hashable):
+        self.balancer = balancer
+        self.backend = backend
+        self.started_at = time.monotonic()
+        self.released = False
+
+    def record_latency(self):
+        self.balancer.record_latency(self.backend, time.monotonic() - self.started_at)
+
+    def release(self, error: bool = False):
+        if self.released:
+            return
+
+        self.released = True
+        self.balancer.release(self.backend, error=error)
+
+
+OLLAMA_LOAD_BALANCER = LoadBalancer()
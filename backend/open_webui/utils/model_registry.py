@@ -0,0 +1,233 @@
+import asyncio
+import copy
+import json
+import logging
+import time
+from typing import Optional
+
+from fastapi import Request
+
+from open_webui.models.users import UserModel
+from open_webui.utils.redis import get_redis_connection, get_sentinels_from_env
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    ENABLE_FORWARD_USER_INFO_HEADERS,
+    MODELS_REFRESH_INTERVAL,
+    REDIS_URL,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+
+REDIS_SNAPSHOT_KEY = "open-webui:models:snapshot"
+REDIS_VERSION_KEY = "open-webui:models:version"
+
+
+class ModelRegistry:
+    """
+    Snapshot of the merged model list (`utils.models.get_all_models`) with
+    stale-while-revalidate semantics.
+
+    A snapshot older than `refresh_interval` is still served while a single
+    background task rebuilds it. `invalidate()` bumps the registry version,
+    after which the next caller waits for a rebuilt list. With Redis, the
+    version and the latest snapshot are shared, so workers pick up each
+    other's invalidations and reuse a fresh snapshot instead of fanning out
+    to every upstream themselves. The shared version is read at most once per
+    `version_ttl` seconds, so other workers' invalidations show up after that.
+
+    Model lists can differ per user when user info headers are forwarded
+    upstream, so the registry is bypassed in that case.
+    """
+
+    def __init__(
+        self,
+        refresh_interval: float = MODELS_REFRESH_INTERVAL,
+        redis_url: Optional[str] = REDIS_URL,
+        redis_sentinels: Optional[list] = None,
+        version_ttl: float = 1.0,
+        connection_ttl: float = 300,
+    ):
+        self.refresh_interval = refresh_interval
+        self.version_ttl = version_ttl
+        self.connection_ttl = connection_ttl
+        self.snapshot: Optional[dict] = None
+        self.version = 0
+        self.version_checked_at = 0.0
+        self.refresh_task: Optional[asyncio.Task] = None
+        self.refresh_version: Optional[int] = None
+
+        # Last good model list response per upstream connection, with the
+        # time it was received. Dropped on invalidation, as the connection
+        # may have been reconfigured.
+        self.connection_responses: dict[str, tuple[object, float]] = {}
+
+        self._redis = None
+        if redis_url:
+            try:
+                self._redis = get_redis_connection(
+                    redis_url, redis_sentinels or [], decode_responses=True
+                )
+            except Exception as e:
+                log.error(f"Error connecting to Redis, models are not shared: {e}")
+
+    def is_enabled(self) -> bool:
+        return self.refresh_interval > 0 and not ENABLE_FORWARD_USER_INFO_HEADERS
+
+    async def get_version(self) -> int:
+        now = time.monotonic()
+        if self._redis and now - self.version_checked_at >= self.version_ttl:
+            self.version_checked_at = now
+            try:
+                version = int(
+                    await asyncio.to_thread(self._redis.get, REDIS_VERSION_KEY) or 0
+                )
+                if version != self.version:
+                    self.version = version
+                    self.connection_responses.clear()
+            except Exception as e:
+                log.error(f"Error reading model registry version from Redis: {e}")
+        return self.version
+
+    def invalidate(self):
+        self.version += 1
+        self.connection_responses.clear()
+        if self._redis:
+            try:
+                self.version = int(self._redis.incr(REDIS_VERSION_KEY))
+            except Exception as e:
+                log.error(f"Error invalidating models in Redis: {e}")
+
+    async def get_connection_models(self, key: str, request_coro):
+        """
+        Awaits the model list request of an upstream connection and remembers
+        a successful response. When the request fails (`None` or an error),
+        the last good response of the connection is returned instead, if it is
+        less than `connection_ttl` seconds old.
+        """
+        response = await request_coro
+        if response is not None and not (
+            isinstance(response, dict) and "error" in response
+        ):
+            self.connection_responses[key] = (
+                copy.deepcopy(response),
+                time.monotonic(),
+            )
+            return response
+
+        last_response, received_at = self.connection_responses.get(key, (None, 0.0))
+        if last_response is not None:
+            if time.monotonic() - received_at < self.connection_ttl:
+                log.warning(f"Using last known models for {key}")
+                return copy.deepcopy(last_response)
+            del self.connection_responses[key]
+        return response
+
+    def _is_fresh(self, snapshot: Optional[dict], version: int) -> bool:
+        return (
+            snapshot is not None
+            and snapshot["version"] == version
+            and time.time() - snapshot["updated_at"] < self.refresh_interval
+        )
+
+    def _load_shared_snapshot(self) -> Optional[dict]:
+        try:
+            value = self._redis.get(REDIS_SNAPSHOT_KEY)
+            return json.loads(value) if value else None
+        except Exception as e:
+            log.error(f"Error loading models from Redis: {e}")
+            return None
+
+    def _save_shared_snapshot(self, snapshot: dict):
+        try:
+            self._redis.set(REDIS_SNAPSHOT_KEY, json.dumps(snapshot, default=str))
+        except Exception as e:
+            log.error(f"Error saving models to Redis: {e}")
+
+    def _set_snapshot(self, snapshot: dict):
+        # A slow rebuild of an outdated version must not replace a newer one
+        if self.snapshot is None or snapshot["version"] == self.refresh_version:
+            self.snapshot = snapshot
+
+    async def _refresh(
+        self, request: Request, user: Optional[UserModel], version: int
+    ) -> dict:
+        from open_webui.utils.models import build_all_models
+
+        if self._redis:
+            snapshot = await asyncio.to_thread(self._load_shared_snapshot)
+            if self._is_fresh(snapshot, version):
+                # Another worker already rebuilt the list
+                request.app.state.OPENAI_MODELS = snapshot["openai_models"]
+                request.app.state.OLLAMA_MODELS = snapshot["ollama_models"]
+                request.app.state.MODELS = {
+                    model["id"]: model for model in snapshot["models"]
+                }
+                self._set_snapshot(snapshot)
+                return snapshot
+
+        models = await build_all_models(request, user=user)
+        snapshot = {
+            "version": version,
+            "updated_at": time.time(),
+            "models": models,
+            "openai_models": request.app.state.OPENAI_MODELS,
+            "ollama_models": request.app.state.OLLAMA_MODELS,
+        }
+
+        self._set_snapshot(snapshot)
+        if self._redis:
+            await asyncio.to_thread(self._save_shared_snapshot, snapshot)
+        return snapshot
+
+    def _start_refresh(
+        self, request: Request, user: Optional[UserModel], version: int
+    ) -> asyncio.Task:
+        # Concurrent callers share a single rebuild of the same version
+        if (
+            self.refresh_task is None
+            or self.refresh_task.done()
+            or self.refresh_version != version
+        ):
+            self.refresh_task = asyncio.create_task(
+                self._refresh(request, user, version)
+            )
+            self.refresh_task.add_done_callback(self._on_refresh_done)
+            self.refresh_version = version
+        return self.refresh_task
+
+    def _on_refresh_done(self, task: asyncio.Task):
+        if not task.cancelled() and task.exception():
+            log.error(f"Error refreshing models: {task.exception()}")
+
+    async def get_models(
+        self, request: Request, user: Optional[UserModel] = None
+    ) -> list:
+        from open_webui.utils.models import build_all_models
+
+        if not self.is_enabled():
+            return await build_all_models(request, user=user)
+
+        version = await self.get_version()
+        snapshot = self.snapshot
+
+        if snapshot is None or snapshot["version"] != version:
+            try:
+                task = self._start_refresh(request, user, version)
+                snapshot = await asyncio.shield(task)
+            except Exception:
+                if snapshot is None:
+                    raise
+                # Keep serving the last good list until a refresh succeeds
+        elif time.time() - snapshot["updated_at"] >= self.refresh_interval:
+            self._start_refresh(request, user, version)
+
+        return snapshot["models"]
+
+
+MODEL_REGISTRY = ModelRegistry(
+    redis_sentinels=get_sentinels_from_env(REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT)
+)
@@ -15,6 +15,7 @@ from open_webui.models.models import Models
 
 from open_webui.utils.plugin import load_function_module_by_id
 from open_webui.utils.access_control import has_access
+from open_webui.utils.model_registry import MODEL_REGISTRY
 
 
 from open_webui.config import (
@@ -38,6 +39,8 @@ async def get_all_base_models(request: Request, user: UserModel = None):
     if request.app.state.config.ENABLE_OPENAI_API:
         openai_models = await openai.get_all_models(request, user=user)
         openai_models = openai_models["data"]
+    else:
+        request.app.state.OPENAI_MODELS = {}
 
     if request.app.state.config.ENABLE_OLLAMA_API:
         ollama_models = await ollama.get_all_models(request, user=user)
@@ -53,6 +56,8 @@ async def get_all_base_models(request: Request, user: UserModel = None):
             }
             for model in ollama_models["models"]
         ]
+    else:
+        request.app.state.OLLAMA_MODELS = {}
 
     function_models = await get_function_models(request)
     models = function_models + openai_models + ollama_models
@@ -61,6 +66,14 @@ async def get_all_base_models(request: Request, user: UserModel = None):
 
 
 async def get_all_models(request, user: UserModel = None):
+    """
+    Returns the merged model list from the model registry, which rebuilds it
+    with `build_all_models` in the background once it went stale.
+    """
+    return await MODEL_REGISTRY.get_models(request, user=user)
+
+
+async def build_all_models(request, user: UserModel = None):
     models = await get_all_base_models(request, user=user)
 
     # If there are no models, return an empty list
@@ -0,0 +1,104 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+
+from open_webui.utils.redis import get_redis_connection, get_sentinels_from_env
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    PERMISSION_CACHE_TTL,
+    REDIS_URL,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+REDIS_INVALIDATE_CHANNEL = "open-webui:permissions:invalidate"
+
+
+class PermissionCache:
+    """
+    Resolved permission trees keyed by user.
+
+    Every entry belongs to a version that `invalidate()` bumps whenever groups
+    or the default user permissions change, which drops all entries at once.
+    With Redis, invalidations are published so every worker drops its entries.
+    Entries also expire after `ttl` seconds, for workers that miss a published
+    invalidation or run without Redis.
+
+    Cached trees are shared between callers and must not be mutated.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 10000,
+        redis_url: Optional[str] = REDIS_URL,
+        redis_sentinels: Optional[list] = None,
+        ttl: float = PERMISSION_CACHE_TTL,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.version = 0
+        # key -> (expires at, permissions)
+        self.entries: OrderedDict[Hashable, tuple[float, dict]] = OrderedDict()
+        self.lock = threading.Lock()
+
+        self._redis = None
+        self._pubsub_thread = None
+        if redis_url:
+            try:
+                self._redis = get_redis_connection(
+                    redis_url, redis_sentinels or [], decode_responses=True
+                )
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(
+                    **{REDIS_INVALIDATE_CHANNEL: lambda message: self.clear()}
+                )
+                self._pubsub_thread = pubsub.run_in_thread(sleep_time=1, daemon=True)
+            except Exception as e:
+                log.error(f"Error subscribing to permission invalidations: {e}")
+                self._redis = None
+
+    def get(self, key: Hashable, resolve: Callable[[], dict]) -> dict:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self.entries.move_to_end(key)
+                    return entry[1]
+                del self.entries[key]
+            version = self.version
+
+        permissions = resolve()
+
+        with self.lock:
+            # Groups or defaults changed while resolving, don't cache a stale tree
+            if version == self.version and self.ttl > 0:
+                self.entries[key] = (time.monotonic() + self.ttl, permissions)
+                while len(self.entries) > self.max_size:
+                    self.entries.popitem(last=False)
+
+        return permissions
+
+    def clear(self):
+        with self.lock:
+            self.version += 1
+            self.entries.clear()
+
+    def invalidate(self):
+        self.clear()
+
+        if self._redis:
+            try:
+                self._redis.publish(REDIS_INVALIDATE_CHANNEL, "1")
+            except Exception as e:
+                log.error(f"Error publishing permission invalidation: {e}")
+
+
+PERMISSION_CACHE = PermissionCache(
+    redis_sentinels=get_sentinels_from_env(REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT)
+)
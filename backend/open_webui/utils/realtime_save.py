@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from open_webui.models.chats import Chats
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    REALTIME_CHAT_SAVE_INTERVAL,
+    REALTIME_CHAT_SAVE_MAX_BYTES,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+class RealtimeSaveStats:
+    def __init__(self):
+        self.writes = 0  # writes handed to a buffer
+        self.flushes = 0  # writes that actually reached the database
+        self.errors = 0
+        self.last_lag = 0.0  # seconds between first buffered write and its flush
+        self.max_lag = 0.0
+
+    def record_flush(self, lag: float):
+        self.flushes += 1
+        self.last_lag = lag
+        self.max_lag = max(self.max_lag, lag)
+
+    def to_dict(self) -> dict:
+        return {
+            "writes": self.writes,
+            "flushes": self.flushes,
+            "errors": self.errors,
+            "coalesced": self.writes - self.flushes,
+            "last_lag": round(self.last_lag, 4),
+            "max_lag": round(self.max_lag, 4),
+        }
+
+
+REALTIME_SAVE_STATS = RealtimeSaveStats()
+
+
+def _get_size(message: dict) -> int:
+    return sum(
+        len(value.encode("utf-8"))
+        for value in message.values()
+        if isinstance(value, str)
+    )
+
+
+class MessageWriteBuffer:
+    """
+    Write-behind buffer for a single chat message.
+
+    Streamed updates are merged in memory and upserted at most once per
+    `interval` seconds, or as soon as the buffered content grew by more than
+    `max_bytes` (UTF-8 encoded). Callers must `flush()` on completion,
+    cancellation and error. Writes to the database run in a worker thread,
+    one at a time so they reach it in order.
+    """
+
+    def __init__(
+        self,
+        chat_id: str,
+        message_id: str,
+        interval: float = REALTIME_CHAT_SAVE_INTERVAL,
+        max_bytes: int = REALTIME_CHAT_SAVE_MAX_BYTES,
+    ):
+        self.chat_id = chat_id
+        self.message_id = message_id
+        self.interval = interval
+        self.max_bytes = max_bytes
+
+        self.pending: dict = {}
+        self.pending_since: Optional[float] = None
+        self.flushed_at = time.monotonic()
+        self.flushed_size = 0
+        self.timer: Optional[asyncio.Task] = None
+        self.lock = asyncio.Lock()
+
+    async def write(self, message: dict):
+        REALTIME_SAVE_STATS.writes += 1
+
+        self.pending = {**self.pending, **message}
+        now = time.monotonic()
+        if self.pending_since is None:
+            self.pending_since = now
+
+        if (
+            now - self.flushed_at >= self.interval
+            or abs(_get_size(self.pending) - self.flushed_size) >= self.max_bytes
+        ):
+            await self.flush()
+        elif self.timer is None:
+            # Make sure a stalled stream still gets its last delta persisted
+            self.timer = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.interval)
+        self.timer = None
+        await self.flush()
+
+    async def flush(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+        async with self.lock:
+            await self._flush()
+
+    async def _flush(self):
+        if not self.pending:
+            return
+
+        message, self.pending = self.pending, {}
+        pending_since, self.pending_since = self.pending_since, None
+
+        try:
+            await asyncio.to_thread(
+                Chats.upsert_message_to_chat_by_id_and_message_id,
+                self.chat_id,
+                self.message_id,
+                message,
+            )
+        except Exception as e:
+            REALTIME_SAVE_STATS.errors += 1
+            log.exception(f"Error saving message {self.message_id}: {e}")
+
+            # Keep the update around so the next flush retries it
+            self.pending = {**message, **self.pending}
+            self.pending_since = pending_since
+            return
+
+        self.flushed_at = time.monotonic()
+        self.flushed_size = _get_size(message)
+        REALTIME_SAVE_STATS.record_flush(self.flushed_at - pending_since)
@@ -0,0 +1,112 @@
+import asyncio
+import logging
+from typing import Optional
+from urllib.parse import urlparse
+
+import aiohttp
+
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST,
+    AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT,
+    AIOHTTP_CLIENT_DNS_CACHE_TTL,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+def get_base_url(url: str) -> str:
+    parsed_url = urlparse(url)
+    return f"{parsed_url.scheme}://{parsed_url.netloc}"
+
+
+def get_connector_usage(connector) -> tuple[Optional[int], Optional[int]]:
+    """
+    Returns the connections in use and idle in the pool of a connector, or
+    `None`s if they can't be read: aiohttp does not expose pool usage
+    publicly, so this relies on private attributes that may change.
+    """
+    try:
+        acquired = getattr(connector, "_acquired", None)
+        conns = getattr(connector, "_conns", None)
+        return (
+            len(acquired) if acquired is not None else None,
+            sum(len(c) for c in conns.values()) if conns is not None else None,
+        )
+    except Exception:
+        return None, None
+
+
+class ClientSessionPool:
+    """
+    Application scoped `aiohttp.ClientSession`s, one per upstream base URL, so
+    requests to the same backend reuse pooled keep-alive connections and DNS
+    lookups instead of paying a new handshake each time.
+
+    Sessions are shared: callers must never close them, only release their
+    responses. Timeouts are passed per request. Sessions serve every user, so
+    they keep no cookies.
+    """
+
+    def __init__(
+        self,
+        limit_per_host: int = AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST,
+        keepalive_timeout: float = AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT,
+        ttl_dns_cache: int = AIOHTTP_CLIENT_DNS_CACHE_TTL,
+    ):
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.ttl_dns_cache = ttl_dns_cache
+        self.sessions: dict[str, aiohttp.ClientSession] = {}
+
+    def get_session(self, url: str) -> aiohttp.ClientSession:
+        base_url = get_base_url(url)
+
+        session = self.sessions.get(base_url)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=0,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.ttl_dns_cache,
+            )
+            session = aiohttp.ClientSession(
+                connector=connector,
+                trust_env=True,
+                cookie_jar=aiohttp.DummyCookieJar(),
+            )
+            self.sessions[base_url] = session
+
+        return session
+
+    def get_stats(self) -> dict:
+        stats = {}
+        for base_url, session in self.sessions.items():
+            in_use, idle = get_connector_usage(session.connector)
+            stats[base_url] = {
+                "closed": session.closed,
+                "in_use": in_use,
+                "idle": idle,
+                "limit_per_host": self.limit_per_host,
+            }
+        return stats
+
+    async def close(self):
+        sessions, self.sessions = self.sessions, {}
+        await asyncio.gather(
+            *[session.close() for session in sessions.values() if not session.closed],
+            return_exceptions=True,
+        )
+
+
+SESSION_POOL = ClientSessionPool()
+
+
+async def release_response(response: Optional[aiohttp.ClientResponse]):
+    """
+    Returns the connection of a pooled response to its pool. Connections of
+    responses that were not fully read are closed instead.
+    """
+    if response:
+        response.release()
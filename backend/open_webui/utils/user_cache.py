@@ -0,0 +1,170 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+
+from open_webui.utils.redis import get_redis_connection, get_sentinels_from_env
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    USER_CACHE_TTL,
+    USER_LAST_ACTIVE_FLUSH_INTERVAL,
+    REDIS_URL,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+REDIS_INVALIDATE_CHANNEL = "open-webui:users:invalidate"
+
+
+class UserCache:
+    """
+    Short-lived cache of authenticated users, keyed by user id or API key.
+
+    Entries expire after `ttl` seconds and are dropped as soon as the user is
+    updated or deleted through `Users`. With Redis, invalidations are
+    published so every worker drops its entries of that user.
+    """
+
+    def __init__(
+        self,
+        ttl: float = USER_CACHE_TTL,
+        max_size: int = 10000,
+        redis_url: Optional[str] = REDIS_URL,
+        redis_sentinels: Optional[list] = None,
+    ):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.version = 0
+        self.entries: OrderedDict[Hashable, tuple] = OrderedDict()
+        self.lock = threading.Lock()
+
+        self._redis = None
+        self._pubsub_thread = None
+        if redis_url and ttl > 0:
+            try:
+                self._redis = get_redis_connection(
+                    redis_url, redis_sentinels or [], decode_responses=True
+                )
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(
+                    **{
+                        REDIS_INVALIDATE_CHANNEL: lambda message: self.clear(
+                            message["data"]
+                        )
+                    }
+                )
+                self._pubsub_thread = pubsub.run_in_thread(sleep_time=1, daemon=True)
+            except Exception as e:
+                log.error(f"Error subscribing to user invalidations: {e}")
+                self._redis = None
+
+    def get(self, key: Hashable, resolve: Callable[[], Optional[object]]):
+        if self.ttl <= 0:
+            return resolve()
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.entries.move_to_end(key)
+                # Callers may modify the user they get, keep the cached one intact
+                return entry[1].model_copy()
+            version = self.version
+
+        user = resolve()
+        if user is None:
+            return None
+
+        with self.lock:
+            # The user was updated while loading, don't cache the old row
+            if version == self.version:
+                self.entries[key] = (time.monotonic() + self.ttl, user)
+                self.entries.move_to_end(key)
+                while len(self.entries) > self.max_size:
+                    self.entries.popitem(last=False)
+
+        return user.model_copy()
+
+    def clear(self, user_id: Optional[str] = None):
+        with self.lock:
+            self.version += 1
+            if user_id is None:
+                self.entries.clear()
+                return
+
+            for key in [
+                key for key, entry in self.entries.items() if entry[1].id == user_id
+            ]:
+                del self.entries[key]
+
+    def invalidate(self, user_id: str):
+        self.clear(user_id)
+
+        if self._redis:
+            try:
+                self._redis.publish(REDIS_INVALIDATE_CHANNEL, user_id)
+            except Exception as e:
+                log.error(f"Error publishing user invalidation: {e}")
+
+
+USER_CACHE = UserCache(
+    redis_sentinels=get_sentinels_from_env(REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT)
+)
+
+
+class LastActiveBuffer:
+    """
+    Collects last active timestamps of authenticated users and writes them
+    in a single bulk update every `interval` seconds instead of one update
+    per request.
+    """
+
+    def __init__(self, interval: float = USER_LAST_ACTIVE_FLUSH_INTERVAL):
+        self.interval = interval
+        self.pending: dict[str, int] = {}
+        self.lock = threading.Lock()
+
+    def touch(self, user_id: str):
+        from open_webui.models.users import Users
+
+        if self.interval <= 0:
+            Users.update_user_last_active_by_id(user_id)
+            return
+
+        with self.lock:
+            self.pending[user_id] = int(time.time())
+
+    def flush(self):
+        from open_webui.models.users import Users
+
+        with self.lock:
+            pending, self.pending = self.pending, {}
+
+        if not pending:
+            return
+
+        try:
+            Users.update_users_last_active_by_ids(pending)
+        except Exception as e:
+            log.exception(f"Error updating last active timestamps: {e}")
+
+            # Keep the timestamps around so the next flush retries them,
+            # newer ones collected in the meantime take precedence
+            with self.lock:
+                self.pending = {**pending, **self.pending}
+
+    async def run(self):
+        if self.interval <= 0:
+            return
+
+        while True:
+            await asyncio.sleep(self.interval)
+            await asyncio.to_thread(self.flush)
+
+
+LAST_ACTIVE_BUFFER = LastActiveBuffer()